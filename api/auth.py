@@ -5,10 +5,12 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, HTTPAuthorizationCredentials, HTTPBearer
 import jwt
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID
 
-from api.database import get_session
-from api.models.user import UserAuth
+from api.cache import TTLCache
+from api.database import get_session, get_async_session
+from api.models.user import UserAuth, UserRole
 from api.security import verify_password
 
 # Authentication settings
@@ -16,6 +18,13 @@ SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key-change-me-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30 * 24 * 60  # 30 days
 
+# Resolved users, keyed by uid. Entries are column snapshots, so each request gets its own
+# UserAuth instance; writes to a user call invalidate_cached_user, other workers converge
+# within AUTH_CACHE_TTL seconds.
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL  = float(os.getenv("AUTH_CACHE_TTL", "60"))
+user_cache = TTLCache(ttl=AUTH_CACHE_TTL, maxsize=AUTH_CACHE_SIZE)
+
 # The tokenUrl matches the login route we will add
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
 optional_http_bearer = HTTPBearer(auto_error=False)
@@ -33,32 +42,74 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> UserAuth:
-    """
-    Dependency that extracts the current user from the JWT token in the request header.
-    Validates the token and fetches the UserAuth record from the database.
-    """
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_subject(token: str) -> Optional[UUID]:
+    """
+    Returns the user id carried in a valid token's `sub` claim, or None.
+    """
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        uid_str: str = payload.get("sub")
-        if uid_str is None:
-            raise credentials_exception
-        token_data = UUID(uid_str)
-    except jwt.PyJWTError:
+        uid_str: Optional[str] = payload.get("sub")
+        return UUID(uid_str) if uid_str is not None else None
+    except (jwt.PyJWTError, ValueError):
+        return None
+
+def _user_statement(uid: UUID):
+    return select(UserAuth).where(UserAuth.uid == uid)
+
+def invalidate_cached_user(uid: UUID) -> None:
+    """
+    Drops a user's cached snapshot; call after any change to their UserAuth row.
+    """
+    user_cache.invalidate(uid)
+
+def _cached_user(uid: UUID) -> Optional[UserAuth]:
+    snapshot = user_cache.get(uid)
+    return UserAuth(**snapshot) if snapshot is not None else None
+
+def _remember_user(user: UserAuth) -> UserAuth:
+    user_cache.set(user.uid, user.model_dump())
+    return user
+
+def _resolve_user(session: Session, uid: UUID) -> Optional[UserAuth]:
+    user = _cached_user(uid)
+    if user is None:
+        user = session.exec(_user_statement(uid)).first()
+        if user is not None:
+            _remember_user(user)
+    return user
+
+def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> UserAuth:
+    """
+    Dependency that extracts the current user from the JWT token in the request header.
+    Validates the token and resolves the UserAuth record from the user cache or the database.
+    """
+    credentials_exception = _credentials_exception()
+    token_data = _decode_subject(token)
+    if token_data is None:
         raise credentials_exception
-        
-    statement = select(UserAuth).where(UserAuth.uid == token_data)
-    user = session.exec(statement).first()
+
+    user = _resolve_user(session, token_data)
     if user is None:
         raise credentials_exception
     return user
 
 
+def get_current_admin(current_user: UserAuth = Depends(get_current_user)) -> UserAuth:
+    """
+    Dependency for operational endpoints: the current user, who must hold the ADMIN role.
+    """
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Administrator access required")
+    return current_user
+
+
 def get_current_user_optional(
     credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(optional_http_bearer)],
     session: Session = Depends(get_session),
@@ -68,13 +119,24 @@ def get_current_user_optional(
     """
     if credentials is None or not credentials.credentials:
         return None
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        uid_str: Optional[str] = payload.get("sub")
-        if uid_str is None:
-            return None
-        token_data = UUID(uid_str)
-    except jwt.PyJWTError:
+    token_data = _decode_subject(credentials.credentials)
+    if token_data is None:
         return None
-    user = session.exec(select(UserAuth).where(UserAuth.uid == token_data)).first()
+    return _resolve_user(session, token_data)
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_async_session)) -> UserAuth:
+    """
+    Async variant of get_current_user for handlers running on the async engine.
+    """
+    token_data = _decode_subject(token)
+    if token_data is None:
+        raise _credentials_exception()
+
+    user = _cached_user(token_data)
+    if user is None:
+        user = (await session.exec(_user_statement(token_data))).first()
+        if user is None:
+            raise _credentials_exception()
+        _remember_user(user)
     return user
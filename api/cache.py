@@ -0,0 +1,79 @@
+"""
+api/cache.py
+
+Small in-process caches for hot, cheap-to-recompute read results.
+
+Entries live for a fixed number of seconds and can be dropped early by key, so a
+write path can invalidate exactly what it changed while other workers converge
+within one TTL. The caches are per process; nothing here is shared between workers.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe mapping whose entries expire `ttl` seconds after they were stored.
+    Holds at most `maxsize` entries, evicting the least recently used first.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, ttl: float, maxsize: int = 10_000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Stores `value` for `ttl` seconds (default: the cache's own TTL).
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value for `key`, computing and storing it on a miss.
+        `compute` runs outside the lock, so two concurrent misses may both compute.
+        """
+        value = self.get(key, self._MISSING)
+        if value is self._MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, self._MISSING) is not self._MISSING
@@ -0,0 +1,190 @@
+"""
+api/counter_buffer.py
+
+Optional write-behind buffer for the PostStats reaction counters (COUNTER_BUFFER=1).
+
+With the buffer on, a reaction writes only its PostReaction row; the counter deltas
+it implies are parked here per pid and folded into PostStats by one batched UPDATE every
+COUNTER_BUFFER_FLUSH_MS, or as soon as COUNTER_BUFFER_MAX_EVENTS deltas are waiting. A
+hot post then takes one counter write per flush instead of one per reaction.
+
+PostReaction stays authoritative. Reads merge the pending deltas (`merged`), so a user
+sees their own reaction immediately. Deltas lost in a crash are recovered from the
+reaction rows by ReconcileService, which skips pids whose deltas are still pending here
+or mid-flush, so a repair and a flush never count the same reaction twice.
+
+The buffer lives in process memory: run one worker per database when it is on.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable
+from uuid import UUID
+
+from sqlalchemy import case, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session as OrmSession
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import Session, update
+
+from api.models.post import PostStats
+from api.response_cache import invalidate_tags
+
+COUNTER_BUFFER            = os.getenv("COUNTER_BUFFER", "").lower() in ("1", "true", "yes", "on")  # Off: every reaction updates PostStats directly
+COUNTER_BUFFER_FLUSH_MS   = float(os.getenv("COUNTER_BUFFER_FLUSH_MS", "250"))                    # Milliseconds between background flushes
+COUNTER_BUFFER_MAX_EVENTS = int(os.getenv("COUNTER_BUFFER_MAX_EVENTS", "500"))                    # Pending deltas that force a flush from the request
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    """
+    Thread-safe per-pid counter deltas ({"likes": 1, "loves": -1, ...}) waiting to be
+    written to PostStats.
+    """
+
+    def __init__(self, enabled: bool = False, max_events: int = COUNTER_BUFFER_MAX_EVENTS):
+        self.enabled = enabled
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._deltas: Dict[UUID, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._flushing: Dict[UUID, int] = defaultdict(int)   # pid -> flushes holding its drained deltas
+        self._events = 0
+
+    def add(self, pid: UUID, deltas: Dict[str, int], session: Session = None) -> None:
+        """
+        Parks deltas per counter column. Pass the session whose transaction wrote the
+        reaction: if it rolls back, the deltas are taken out again.
+        """
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        with self._lock:
+            pending = self._deltas[pid]
+            for column, delta in deltas.items():
+                pending[column] += delta
+            self._events += 1
+        if session is not None:
+            session.info.setdefault("buffered_deltas", []).append((self, pid, deltas))
+
+    def pending(self, pid: UUID) -> Dict[str, int]:
+        with self._lock:
+            return {column: delta for column, delta in self._deltas.get(pid, {}).items() if delta}
+
+    def merged(self, pid: UUID, **counts: int) -> Dict[str, int]:
+        """
+        The stored `counts` (likes=..., dislikes=...) plus whatever is pending for `pid`.
+        """
+        pending = self.pending(pid)
+        return {column: max(count + pending.get(column, 0), 0) for column, count in counts.items()}
+
+    def held(self, pids: Iterable[UUID]) -> set:
+        """
+        The pids among `pids` with deltas not yet written, including deltas drained by a
+        flush whose transaction has not committed or rolled back yet.
+        """
+        with self._lock:
+            return {pid for pid in pids if self._flushing.get(pid) or any(self._deltas.get(pid, {}).values())}
+
+    def due(self) -> bool:
+        return self._events >= self.max_events
+
+    def drain(self, hold: bool = False) -> Dict[UUID, Dict[str, int]]:
+        """
+        Takes every pending delta out of the buffer. With `hold`, the drained pids stay
+        `held` until `release` is called for them.
+        """
+        with self._lock:
+            deltas = {pid: {c: d for c, d in pending.items() if d} for pid, pending in self._deltas.items()}
+            deltas = {pid: pending for pid, pending in deltas.items() if pending}
+            self._deltas.clear()
+            self._events = 0
+            if hold:
+                for pid in deltas:
+                    self._flushing[pid] += 1
+        return deltas
+
+    def release(self, pids: Iterable[UUID]) -> None:
+        with self._lock:
+            for pid in pids:
+                self._flushing[pid] -= 1
+                if self._flushing[pid] <= 0:
+                    del self._flushing[pid]
+
+    def restore(self, deltas: Dict[UUID, Dict[str, int]]) -> None:
+        for pid, pending in deltas.items():
+            self.add(pid, pending)
+
+    def flush(self, session: Session) -> int:
+        """
+        Writes every pending delta in one transaction and returns the number of posts
+        touched. Pids sharing the same delta share one UPDATE. On failure the deltas go
+        back into the buffer for the next flush. Until the transaction ends the drained
+        pids stay `held`, so a concurrent reconcile never repairs them mid-flush.
+        """
+        from api.services.trending_service import TrendingService
+
+        deltas = self.drain(hold=True)
+        if not deltas:
+            return 0
+        grouped: Dict[tuple, list] = defaultdict(list)
+        for pid, pending in deltas.items():
+            grouped[tuple(sorted(pending.items()))].append(pid)
+        try:
+            for signature, pids in grouped.items():
+                values = {}
+                for column, delta in signature:
+                    moved = getattr(PostStats, column) + delta
+                    values[column] = case((moved < 0, 0), else_=moved)
+                session.exec(update(PostStats).where(PostStats.pid.in_(pids)).values(**values))
+            for pid in deltas:
+                TrendingService.refresh_post(session, pid)
+            session.commit()
+        except Exception:
+            session.rollback()
+            self.restore(deltas)
+            raise
+        finally:
+            self.release(deltas)
+        invalidate_tags("reactions")
+        return len(deltas)
+
+    def clear(self) -> None:
+        self.drain()
+        with self._lock:
+            self._flushing.clear()
+
+
+counter_buffer = CounterBuffer(enabled=COUNTER_BUFFER)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _keep_buffered(session) -> None:
+    session.info.pop("buffered_deltas", None)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _retract_buffered(session) -> None:
+    for buffer, pid, deltas in session.info.pop("buffered_deltas", ()):
+        buffer.add(pid, {column: -delta for column, delta in deltas.items()})
+
+
+def flush_once(engine: Engine) -> int:
+    with Session(engine) as session:
+        return counter_buffer.flush(session)
+
+
+async def flush_forever(engine: Engine, interval_ms: float = COUNTER_BUFFER_FLUSH_MS) -> None:
+    """
+    Background loop started from the app lifespan when the buffer is on. A failed flush
+    is logged; its deltas stay buffered for the next tick.
+    """
+    while True:
+        await asyncio.sleep(interval_ms / 1000)
+        try:
+            await run_in_threadpool(flush_once, engine)
+        except Exception:
+            logger.exception("Counter buffer flush failed")
@@ -0,0 +1,393 @@
+"""
+api/counters.py
+
+Chooses how the denormalized counters (PostStats/CommentStats rows, member counts,
+follow counts, reply counts, post rollups, last_active, the reconciler change log and
+the trending visibility copied from cluster privacy)
+are maintained:
+
+    triggers  the SQLite triggers in api/triggers.py (default on SQLite)
+    hooks     SQLAlchemy session hooks in this module (default on every other dialect)
+
+Set COUNTER_MODE to force one. COUNTER_MODE=hooks on SQLite runs exactly the code a
+MySQL deployment runs, e.g. `COUNTER_MODE=hooks python -m pytest`.
+
+Hook mode mirrors each trigger against the rows a flush (or an ORM bulk INSERT/UPDATE/DELETE)
+touched, inside the same transaction. Deltas are summed per target row, so a flush that
+adds fifty members to one cluster issues one UPDATE, not fifty. Writes made with raw
+text() SQL bypass the hooks; ReconcileService repairs the counters it covers.
+"""
+
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import case, event, func, insert, select, tuple_, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from api.models.cluster import ClusterStats
+from api.models.comment import CommentClosure, CommentStats
+from api.models.follow import UserFollowStats
+from api.models.post import PostCore, PostStats, PostReaction, PostTrending, UserPostStats, ClusterPostStats
+from api.models.reconcile import CounterChange
+from api.models.user import UserProfile
+from api.triggers import apply_triggers_now, drop_triggers_now, register_triggers
+
+COUNTER_MODE = os.getenv("COUNTER_MODE", "").lower()   # "triggers" | "hooks"; empty picks by dialect
+
+# Tables whose writes feed a counter; everything else is ignored by the hooks
+_WATCHED = {"postcore", "commentcore", "clustercore", "clustermember", "userfollow", "poststats", "postreaction", "commentreaction"}
+
+_hooked_engines: set = set()
+
+
+def counter_mode(engine: Engine) -> str:
+    if COUNTER_MODE:
+        return COUNTER_MODE
+    return "triggers" if engine.dialect.name == "sqlite" else "hooks"
+
+
+def install_counters(engine: Engine) -> None:
+    """
+    Wires counter maintenance for connections opened from now on (called once per engine).
+    """
+    mode = counter_mode(engine)
+    if mode == "hooks":
+        enable_hooks(engine)
+    elif engine.dialect.name == "sqlite":
+        register_triggers(engine)
+    else:
+        raise ValueError(f"COUNTER_MODE=triggers is only available on SQLite, not {engine.dialect.name}")
+
+
+def apply_counters_now(engine: Engine) -> None:
+    """
+    Like install_counters, for a database whose tables already exist: installs the triggers
+    on the live connection, or in hook mode drops any triggers left from trigger mode so
+    nothing is counted twice.
+    """
+    if counter_mode(engine) == "hooks":
+        if engine.dialect.name == "sqlite":
+            drop_triggers_now(engine)
+        enable_hooks(engine)
+    else:
+        apply_triggers_now(engine)
+
+
+def enable_hooks(engine: Engine) -> None:
+    _hooked_engines.add(engine)
+
+
+def disable_hooks(engine: Engine) -> None:
+    _hooked_engines.discard(engine)
+
+
+# ---------------------------------------------------------------------------
+# Change batches
+# ---------------------------------------------------------------------------
+
+class _Batch:
+    """
+    Row images from one flush or one bulk statement, by table name. Updates are (old, new) pairs.
+    """
+
+    def __init__(self):
+        self.inserted: Dict[str, List[dict]] = defaultdict(list)
+        self.deleted: Dict[str, List[dict]] = defaultdict(list)
+        self.updated: Dict[str, List[Tuple[dict, dict]]] = defaultdict(list)
+
+    def __bool__(self):
+        return bool(self.inserted or self.deleted or self.updated)
+
+
+class _Effects:
+    """
+    What a batch does to the counter tables, accumulated before anything is written.
+    """
+
+    def __init__(self):
+        self.ensure: Dict[type, set] = defaultdict(set)                          # stats model -> keys that need a row
+        self.deltas: Dict[Tuple[type, object], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.changes: List[Tuple[str, object]] = []                              # counterchange (kind, key)
+        self.active_uids: set = set()                                            # userprofile.last_active bumps
+        self.visibility: Dict[object, bool] = {}                                 # cid -> posttrending.is_public
+
+    def add(self, model, key, column: str, delta: int) -> None:
+        self.deltas[(model, key)][column] += delta
+
+
+def _key_column(model):
+    return list(model.__table__.primary_key.columns)[0]
+
+
+def _image(obj) -> dict:
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+
+def _post_owners(conn: Connection, batch: _Batch, pids: Iterable) -> Dict[object, Tuple[object, object]]:
+    """
+    (uid, cid) per pid, from postcore or, for posts deleted in this batch, from their old image.
+    """
+    pids = set(pids)
+    owners = {row["pid"]: (row["uid"], row["cid"]) for row in batch.deleted.get("postcore", ())}
+    missing = [pid for pid in pids if pid not in owners]
+    if missing:
+        core = PostCore.__table__
+        for pid, uid, cid in conn.execute(select(core.c.pid, core.c.uid, core.c.cid).where(core.c.pid.in_(missing))):
+            owners[pid] = (uid, cid)
+    return owners
+
+
+def _effects(conn: Connection, batch: _Batch) -> _Effects:
+    fx = _Effects()
+
+    # trg_init_post_stats, trg_update_last_active, trg_rollup_post_insert
+    for post in batch.inserted.get("postcore", ()):
+        fx.ensure[PostStats].add(post["pid"])
+        fx.active_uids.add(post["uid"])
+        fx.ensure[UserPostStats].add(post["uid"])
+        fx.ensure[ClusterPostStats].add(post["cid"])
+        fx.add(UserPostStats, post["uid"], "post_count", 1)
+        fx.add(ClusterPostStats, post["cid"], "post_count", 1)
+
+    # trg_rollup_post_delete: only the likes/reactions whose rows outlive the post
+    deleted_posts = batch.deleted.get("postcore", ())
+    if deleted_posts:
+        pids = [post["pid"] for post in deleted_posts]
+        stats, reactions = PostStats.__table__, PostReaction.__table__
+        likes = dict(conn.execute(select(stats.c.pid, stats.c.likes).where(stats.c.pid.in_(pids))).all())
+        counts = dict(conn.execute(
+            select(reactions.c.pid, func.count()).where(reactions.c.pid.in_(pids)).group_by(reactions.c.pid)
+        ).all())
+        for post in deleted_posts:
+            for model, key in ((UserPostStats, post["uid"]), (ClusterPostStats, post["cid"])):
+                fx.add(model, key, "post_count", -1)
+                fx.add(model, key, "total_likes", -likes.get(post["pid"], 0))
+                fx.add(model, key, "total_reactions", -counts.get(post["pid"], 0))
+
+    # trg_rollup_likes_update / trg_rollup_likes_delete / trg_rollup_reaction_*
+    likes_moved = [(new["pid"], new["likes"] - old["likes"]) for old, new in batch.updated.get("poststats", ()) if new["likes"] != old["likes"]]
+    likes_moved += [(row["pid"], -row["likes"]) for row in batch.deleted.get("poststats", ()) if row["likes"]]
+    reactions_moved = [(row["pid"], 1) for row in batch.inserted.get("postreaction", ())]
+    reactions_moved += [(row["pid"], -1) for row in batch.deleted.get("postreaction", ())]
+    if likes_moved or reactions_moved:
+        owners = _post_owners(conn, batch, [pid for pid, _ in likes_moved + reactions_moved])
+        for column, moved in (("total_likes", likes_moved), ("total_reactions", reactions_moved)):
+            for pid, delta in moved:
+                if pid in owners:
+                    uid, cid = owners[pid]
+                    fx.add(UserPostStats, uid, column, delta)
+                    fx.add(ClusterPostStats, cid, column, delta)
+
+    # trg_init_comment_stats, trg_increment/decrement_reply_counts
+    for comment in batch.inserted.get("commentcore", ()):
+        fx.ensure[CommentStats].add(comment["mid"])
+    replies = [(row["parent_mid"], 1) for row in batch.inserted.get("commentcore", ()) if row["parent_mid"]]
+    replies += [(row["parent_mid"], -1) for row in batch.deleted.get("commentcore", ()) if row["parent_mid"]]
+    if replies:
+        closure = CommentClosure.__table__
+        ancestors = defaultdict(list)
+        for ancestor, descendant in conn.execute(
+            select(closure.c.ancestor_mid, closure.c.descendant_mid)
+            .where(closure.c.descendant_mid.in_({parent for parent, _ in replies}))
+        ):
+            ancestors[descendant].append(ancestor)
+        for parent, delta in replies:
+            fx.add(CommentStats, parent, "reply_count", delta)
+            for ancestor in ancestors[parent]:
+                fx.add(CommentStats, ancestor, "total_descendants", delta)
+
+    # trg_increment/decrement_member_count, trg_log_member_*
+    for delta, rows in ((1, batch.inserted.get("clustermember", ())), (-1, batch.deleted.get("clustermember", ()))):
+        for member in rows:
+            fx.add(ClusterStats, member["cid"], "member_count", delta)
+            fx.changes.append(("cluster", member["cid"]))
+
+    # trg_increment/decrement_follow_counts
+    for edge in batch.inserted.get("userfollow", ()):
+        fx.ensure[UserFollowStats].update((edge["following_uid"], edge["follower_uid"]))
+    for delta, rows in ((1, batch.inserted.get("userfollow", ())), (-1, batch.deleted.get("userfollow", ()))):
+        for edge in rows:
+            fx.add(UserFollowStats, edge["following_uid"], "follower_count", delta)
+            fx.add(UserFollowStats, edge["follower_uid"], "following_count", delta)
+
+    # trg_trending_cluster_privacy
+    for old, new in batch.updated.get("clustercore", ()):
+        if bool(new["is_private"]) != bool(old["is_private"]):
+            fx.visibility[new["cid"]] = not new["is_private"]
+
+    # trg_log_post_reaction_*, trg_log_comment_reaction_*
+    for table, kind, key in (("postreaction", "post", "pid"), ("commentreaction", "comment", "mid")):
+        for row in batch.inserted.get(table, ()):
+            fx.changes.append((kind, row[key]))
+        for old, new in batch.updated.get(table, ()):
+            fx.changes.append((kind, new[key]))
+        for row in batch.deleted.get(table, ()):
+            fx.changes.append((kind, row[key]))
+    return fx
+
+
+def _ensure_rows(conn: Connection, model, keys: set) -> None:
+    column = _key_column(model)
+    existing = set(conn.execute(select(column).where(column.in_(keys))).scalars())
+    missing = [key for key in keys if key not in existing]
+    if missing:
+        conn.execute(
+            insert(model.__table__).prefix_with("OR IGNORE", dialect="sqlite").prefix_with("IGNORE", dialect="mysql"),
+            [{column.name: key} for key in missing],
+        )
+
+
+def _apply(conn: Connection, batch: _Batch) -> None:
+    fx = _effects(conn, batch)
+    for model, keys in fx.ensure.items():
+        _ensure_rows(conn, model, keys)
+
+    # One UPDATE per distinct set of deltas, over every row that shares it; floored at 0 like the triggers
+    grouped: Dict[tuple, list] = defaultdict(list)
+    for (model, key), deltas in fx.deltas.items():
+        signature = tuple(sorted((column, delta) for column, delta in deltas.items() if delta))
+        if signature:
+            grouped[(model, signature)].append(key)
+    for (model, signature), keys in grouped.items():
+        table = model.__table__
+        values = {}
+        for column, delta in signature:
+            moved = table.c[column] + delta
+            values[column] = case((moved < 0, 0), else_=moved)
+        conn.execute(update(table).where(_key_column(model).in_(keys)).values(**values))
+
+    if fx.changes:
+        conn.execute(insert(CounterChange.__table__), [{"kind": kind, "key": key} for kind, key in fx.changes])
+    if fx.active_uids:
+        profile = UserProfile.__table__
+        conn.execute(update(profile).where(profile.c.uid.in_(fx.active_uids)).values(last_active=datetime.now()))
+    for cid, is_public in fx.visibility.items():
+        trending, core = PostTrending.__table__, PostCore.__table__
+        conn.execute(
+            update(trending)
+            .where(trending.c.pid.in_(select(core.c.pid).where(core.c.cid == cid)))
+            .values(is_public=is_public)
+        )
+
+
+# ---------------------------------------------------------------------------
+# Session hooks
+# ---------------------------------------------------------------------------
+
+def _hooked(session: Session) -> bool:
+    try:
+        return session.get_bind() in _hooked_engines
+    except Exception:
+        return False
+
+
+@event.listens_for(Session, "before_flush")
+def _capture_deletes(session: Session, flush_context, instances) -> None:
+    # Deleted rows are read now, while they still exist; expired attributes load here
+    if not _hooked(session):
+        return
+    batch = session.info.setdefault("counter_batch", _Batch())
+    for obj in session.deleted:
+        table = getattr(obj, "__tablename__", None)
+        if table in _WATCHED:
+            batch.deleted[table].append(_image(obj))
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_flush(session: Session, flush_context) -> None:
+    if not _hooked(session):
+        return
+    batch = session.info.pop("counter_batch", None) or _Batch()
+    for obj in session.new:
+        table = getattr(obj, "__tablename__", None)
+        if table in _WATCHED:
+            batch.inserted[table].append(_image(obj))
+    for obj in session.dirty:
+        table = getattr(obj, "__tablename__", None)
+        if table not in _WATCHED or not session.is_modified(obj):
+            continue
+        new = _image(obj)
+        old = dict(new)
+        state = obj._sa_instance_state
+        for column in new:
+            history = state.attrs[column].history
+            if history.deleted:
+                old[column] = history.deleted[0]
+        batch.updated[table].append((old, new))
+    if batch:
+        _apply(session.connection(), batch)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_batch(session: Session) -> None:
+    session.info.pop("counter_batch", None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _apply_bulk(orm_execute_state):
+    """
+    ORM bulk INSERT/UPDATE/DELETE statements (session.exec(update(PostStats)...), the
+    reaction upserts in api/reactions.py) never reach the flush hooks; read the affected
+    rows around the statement instead.
+    """
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    session = orm_execute_state.session
+    table = orm_execute_state.statement.table
+    if table.name not in _WATCHED or not _hooked(session):
+        return None
+
+    conn = session.connection()
+    if orm_execute_state.is_insert:
+        return _apply_insert(orm_execute_state, conn, table)
+    where = orm_execute_state.statement.whereclause
+    before = select(table) if where is None else select(table).where(where)
+    old = [dict(row._mapping) for row in conn.execute(before)]
+    result = orm_execute_state.invoke_statement()
+    if not old:
+        return result
+
+    batch = _Batch()
+    if orm_execute_state.is_delete:
+        batch.deleted[table.name] = old
+    else:
+        pk = list(table.primary_key.columns)
+        key = lambda row: tuple(row[c.name] for c in pk)
+        after = conn.execute(select(table).where(tuple_(*pk).in_([key(row) for row in old])))
+        new = {key(row): row for row in (dict(r._mapping) for r in after)}
+        batch.updated[table.name] = [(row, new[key(row)]) for row in old if key(row) in new]
+    _apply(conn, batch)
+    return result
+
+
+def _apply_insert(orm_execute_state, conn: Connection, table):
+    """
+    Inserts and upserts: rows absent before the statement were inserted, rows whose
+    image changed were updated by the conflict clause. Only rows whose primary key is
+    known up front (given values or executemany parameters) can be followed.
+    """
+    params = orm_execute_state.parameters
+    rows = params if isinstance(params, list) else [params] if params else [orm_execute_state.statement.compile().params]
+    pk = list(table.primary_key.columns)
+    keys = [tuple(row[c.name] for c in pk) for row in rows if all(c.name in row for c in pk)]
+    if not keys:
+        return orm_execute_state.invoke_statement()
+
+    key = lambda row: tuple(row[c.name] for c in pk)
+    matching = select(table).where(tuple_(*pk).in_(keys))
+    old = {key(row): row for row in (dict(r._mapping) for r in conn.execute(matching))}
+    result = orm_execute_state.invoke_statement()
+
+    batch = _Batch()
+    for row in (dict(r._mapping) for r in conn.execute(matching)):
+        before = old.get(key(row))
+        if before is None:
+            batch.inserted[table.name].append(row)
+        elif before != row:
+            batch.updated[table.name].append((before, row))
+    if batch:
+        _apply(conn, batch)
+    return result
@@ -1,7 +1,16 @@
+import itertools
 import os
+import threading
+import time
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
 from sqlmodel import create_engine, Session
 
+from api.pool import MeteredQueuePool, MeteredAsyncQueuePool
+
 load_dotenv()
 
 # ---------------------------------------------------------
@@ -12,6 +21,40 @@ load_dotenv()
 
 DB_TYPE = os.getenv("DB_TYPE", "sqlite")
 
+# ---------------------------------------------------------
+# Pool Settings
+# ---------------------------------------------------------
+# Size the pool against the serving processes: every uvicorn worker has its
+# own pool, so the database sees up to
+#   workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# connections. Within a worker, sync routes run on a 40-thread pool, so
+# DB_POOL_SIZE + DB_MAX_OVERFLOW below 40 means requests can queue for a
+# connection; /metrics/db-pool (admins only) shows whether they do.
+
+DB_POOL_SIZE     = int(os.getenv("DB_POOL_SIZE", "5"))          # Persistent connections kept per process
+DB_MAX_OVERFLOW  = int(os.getenv("DB_MAX_OVERFLOW", "10"))      # Extra short-lived connections allowed at peak
+DB_POOL_TIMEOUT  = float(os.getenv("DB_POOL_TIMEOUT", "30"))    # Seconds to wait for a free connection before erroring
+DB_POOL_RECYCLE  = int(os.getenv("DB_POOL_RECYCLE", "1800"))    # Seconds before a connection is replaced (-1 disables)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1" if DB_TYPE == "mysql" else "0").lower() in ("1", "true", "yes")
+
+# SQLite pragmas applied to every new connection
+SQLITE_CACHE_SIZE   = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))      # Pages, or KiB when negative (-64000 = 64 MB)
+SQLITE_MMAP_SIZE    = int(os.getenv("SQLITE_MMAP_SIZE", "268435456"))    # Bytes of the file to memory-map (0 disables)
+SQLITE_TEMP_STORE   = os.getenv("SQLITE_TEMP_STORE", "MEMORY")           # DEFAULT | FILE | MEMORY
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "15000"))     # Milliseconds to wait on a locked database
+
+def pool_settings() -> dict:
+    """
+    The effective pool configuration, as passed to create_engine.
+    """
+    return {
+        "pool_size"    : DB_POOL_SIZE,
+        "max_overflow" : DB_MAX_OVERFLOW,
+        "pool_timeout" : DB_POOL_TIMEOUT,
+        "pool_recycle" : DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
 if DB_TYPE == "mysql":
     # MySQL Configuration
     DB_USER = os.getenv("DB_USER", "root")
@@ -19,38 +62,56 @@ if DB_TYPE == "mysql":
     DB_HOST = os.getenv("DB_HOST", "localhost")
     DB_PORT = os.getenv("DB_PORT", "3306")
     DB_NAME = os.getenv("DB_NAME", "cluster_db")
-    
+
     # Needs PyMySQL driver installed: pip install pymysql
     DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    engine = create_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
+    # Async driver for the opt-in async stack: pip install asyncmy
+    ASYNC_DATABASE_URL = f"mysql+asyncmy://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    engine = create_engine(DATABASE_URL, echo=False, poolclass=MeteredQueuePool, **pool_settings())
     _sqlite = False
 
 else:
     # Default SQLite Configuration
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     DB_PATH = os.path.join(BASE_DIR, "temp", "db", "research.db")
-    
+
     # Ensure directory exists just in case
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    
+
     DATABASE_URL = f"sqlite:///{DB_PATH}"
-    # check_same_thread=False allows FastAPI multithreading. timeout=15 helps prevent locks during concurrent writes.
-    engine = create_engine(DATABASE_URL, echo=False, connect_args={"check_same_thread": False, "timeout": 15})
+    # Async driver for the opt-in async stack: pip install aiosqlite
+    ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH}"
+    # check_same_thread=False allows FastAPI multithreading. The busy timeout helps prevent locks during concurrent writes.
+    engine = create_engine(
+        DATABASE_URL,
+        echo=False,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT / 1000},
+        poolclass=MeteredQueuePool,
+        **pool_settings(),
+    )
     _sqlite = True
 
+# Set ASYNC_DB=1 to serve the hot read routes (feeds, comment reads) from async handlers
+ASYNC_DB = os.getenv("ASYNC_DB", "0").lower() in ("1", "true", "yes")
+
+# Enable WAL mode and relax synchronous parsing allows concurrent reads and writes;
+# the remaining pragmas are per-connection and tuned via the SQLITE_* settings above
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA temp_store={SQLITE_TEMP_STORE}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+    cursor.close()
+
 if _sqlite:
-    from sqlalchemy import event
-    
-    # Enable WAL mode and relax synchronous parsing allows concurrent reads and writes
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA synchronous=NORMAL")
-        cursor.close()
-
-    from api.triggers import register_triggers
-    register_triggers(engine)
+    event.listen(engine, "connect", set_sqlite_pragma)
+
+# Counter maintenance: SQLite triggers, or session hooks on MySQL (see api/counters.py)
+from api.counters import install_counters
+install_counters(engine)
 
 def get_session():
     """
@@ -58,3 +119,174 @@ def get_session():
     """
     with Session(engine) as session:
         yield session
+
+# ---------------------------------------------------------
+# Read Replicas (optional)
+# ---------------------------------------------------------
+# DB_REPLICA_URLS is a comma-separated list of SQLAlchemy URLs. GET routes
+# take their session from get_read_session, which round-robins across the
+# replicas. After a client writes, its reads stick to the primary for
+# READ_YOUR_WRITES_SECONDS so it never sees a replica that has not caught
+# up with its own change. Locally, a second SQLite file works as a replica.
+
+DB_REPLICA_URLS = [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+def create_replica_engine(url: str) -> Engine:
+    """
+    Builds a pooled engine for one replica, with the same tuning as the primary.
+    """
+    if url.startswith("sqlite"):
+        replica = create_engine(
+            url,
+            echo=False,
+            connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT / 1000},
+            poolclass=MeteredQueuePool,
+            **pool_settings(),
+        )
+        event.listen(replica, "connect", set_sqlite_pragma)
+        return replica
+    return create_engine(url, echo=False, poolclass=MeteredQueuePool, **pool_settings())
+
+replica_engines: List[Engine] = [create_replica_engine(url) for url in DB_REPLICA_URLS]
+_replica_counter = itertools.count()
+
+# Client key (the Authorization header) -> monotonic time its primary pin expires
+_primary_pins: Dict[str, float] = {}
+_primary_pins_lock = threading.Lock()
+
+def pin_to_primary(client_key: Optional[str]):
+    """
+    Routes this client's reads to the primary for the next READ_YOUR_WRITES_SECONDS.
+    """
+    if not client_key or not replica_engines:
+        return
+    now = time.monotonic()
+    with _primary_pins_lock:
+        _primary_pins[client_key] = now + READ_YOUR_WRITES_SECONDS
+        if len(_primary_pins) > 10_000:
+            for key in [k for k, until in _primary_pins.items() if until <= now]:
+                del _primary_pins[key]
+
+def is_pinned_to_primary(client_key: Optional[str]) -> bool:
+    if not client_key:
+        return False
+    with _primary_pins_lock:
+        until = _primary_pins.get(client_key)
+    return until is not None and until > time.monotonic()
+
+def get_read_engine(request: Request) -> Engine:
+    """
+    Dependency for long-lived read routes (streams) that must not hold a pooled
+    connection for their whole lifetime: the engine get_read_session would read from,
+    for the route to open short sessions on as needed.
+    """
+    if not replica_engines or is_pinned_to_primary(request.headers.get("Authorization")):
+        return engine
+    return replica_engines[next(_replica_counter) % len(replica_engines)]
+
+def get_read_session(request: Request, primary: Session = Depends(get_session)):
+    """
+    Dependency for read-only routes: a replica session when replicas are configured
+    and the caller has not written recently, otherwise the primary session.
+    """
+    if not replica_engines or is_pinned_to_primary(request.headers.get("Authorization")):
+        yield primary
+        return
+    replica = replica_engines[next(_replica_counter) % len(replica_engines)]
+    with Session(replica) as session:
+        yield session
+
+# ---------------------------------------------------------
+# Async Engine (opt-in)
+# ---------------------------------------------------------
+# Built on first use so the sync path never imports the async drivers.
+# Both engines point at the same database; triggers live in the schema,
+# so they fire regardless of which engine issued the write. Async reads
+# follow the same replica routing as get_read_session, each replica getting
+# an async twin of its sync engine.
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "mysql": "mysql+asyncmy"}
+
+_async_engine = None
+_async_replica_engines: Dict[str, object] = {}   # replica URL -> its AsyncEngine
+_async_replica_lock = threading.Lock()
+
+def async_url(url: str) -> str:
+    """
+    The same database URL with its backend's async driver (aiosqlite, asyncmy).
+    """
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+def _create_async_engine(url: str):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    sqlite = url.startswith("sqlite")
+    connect_args = {"timeout": SQLITE_BUSY_TIMEOUT / 1000} if sqlite else {}
+    async_engine = create_async_engine(
+        url,
+        echo=False,
+        connect_args=connect_args,
+        poolclass=MeteredAsyncQueuePool,
+        **pool_settings(),
+    )
+    if sqlite:
+        event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+    return async_engine
+
+def get_async_engine():
+    """
+    Returns the process-wide AsyncEngine, creating it on first call.
+    """
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = _create_async_engine(ASYNC_DATABASE_URL)
+    return _async_engine
+
+def get_async_replica_engine(replica: Engine):
+    """
+    The AsyncEngine reading from the same database as the sync replica engine, built on first use.
+    """
+    url = replica.url.render_as_string(hide_password=False)
+    with _async_replica_lock:
+        if url not in _async_replica_engines:
+            _async_replica_engines[url] = _create_async_engine(async_url(url))
+        return _async_replica_engines[url]
+
+async def get_async_session():
+    """
+    Async dependency generator yielding an AsyncSession bound to the async engine.
+    """
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        yield session
+
+async def get_async_read_session(request: Request, primary=Depends(get_async_session)):
+    """
+    Async counterpart of get_read_session: a replica session when replicas are configured
+    and the caller has not written recently, otherwise the primary session.
+    """
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    if not replica_engines or is_pinned_to_primary(request.headers.get("Authorization")):
+        yield primary
+        return
+    replica = replica_engines[next(_replica_counter) % len(replica_engines)]
+    async with AsyncSession(get_async_replica_engine(replica), expire_on_commit=False) as session:
+        yield session
+
+def pool_stats() -> dict:
+    """
+    Checkout metrics and occupancy for every engine built in this process.
+    """
+    stats = {"settings": pool_settings(), "sync": engine.pool.stats()}
+    if replica_engines:
+        stats["replicas"] = [replica.pool.stats() for replica in replica_engines]
+    if _async_engine is not None:
+        stats["async"] = _async_engine.sync_engine.pool.stats()
+    if _async_replica_engines:
+        stats["async_replicas"] = [replica.sync_engine.pool.stats() for replica in _async_replica_engines.values()]
+    return stats
@@ -1,29 +1,37 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 from api.routers import users, clusters, posts, comments, triggers
-from api.database import engine
+from api.database import engine, ASYNC_DB, pin_to_primary
+from api.pagination import InvalidCursor, NEXT_CURSOR_HEADER
+from api.security import HashingPoolSaturated
+from api.rules import RuleViolation
 
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    import asyncio
     from api.database import engine
-    from api.models.cluster import ClusterBookmark
-    from api.models.follow import UserFollow
-    from api.models.post import (
-        MegaphonePollOption,
-        MegaphonePollVote,
-        MegaphoneEventMeta,
-        MegaphoneEventRsvp,
-    )
-
-    ClusterBookmark.__table__.create(engine, checkfirst=True)
-    UserFollow.__table__.create(engine, checkfirst=True)
-    for tbl in (MegaphonePollOption, MegaphonePollVote, MegaphoneEventMeta, MegaphoneEventRsvp):
-        tbl.__table__.create(engine, checkfirst=True)
+    from api.migrations import upgrade_schema
+    from api.services.reconcile_service import RECONCILE_INTERVAL, reconcile_forever
+    from api.counter_buffer import counter_buffer, flush_forever, flush_once
+    from api.services.moderation_service import MODERATION_INTERVAL, moderate_forever
+
+    upgrade_schema(engine)
+    reconciler = asyncio.create_task(reconcile_forever(engine)) if RECONCILE_INTERVAL > 0 else None
+    flusher = asyncio.create_task(flush_forever(engine)) if counter_buffer.enabled else None
+    moderator = asyncio.create_task(moderate_forever(engine)) if MODERATION_INTERVAL > 0 else None
     yield
+    if reconciler:
+        reconciler.cancel()
+    if moderator:
+        moderator.cancel()           # Queued items are durable; the next start picks them up
+    if flusher:
+        flusher.cancel()
+        flush_once(engine)           # Write what is still buffered before the process exits
 
 app = FastAPI(title="Cluster API", version="1.0.0", description="Backend API for the Cluster application.", lifespan=lifespan)
 
@@ -34,8 +42,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """
+    Pins a client's reads to the primary database for a short window after any write,
+    so GET routes served by replicas never hide the client's own changes.
+    """
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS"):
+        pin_to_primary(request.headers.get("Authorization"))
+    return response
+
+@app.exception_handler(InvalidCursor)
+def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+@app.exception_handler(RuleViolation)
+def rule_violation_handler(request: Request, exc: RuleViolation):
+    return JSONResponse(status_code=400, content={"detail": str(exc), "rule": exc.rule.name})
+
+@app.exception_handler(HashingPoolSaturated)
+def hashing_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+if ASYNC_DB:
+    # Registered first so its async handlers shadow the sync ones on the same paths
+    from api.routers import async_reads
+    app.include_router(async_reads.router)
+
 app.include_router(users.router)
 app.include_router(clusters.router)
 app.include_router(posts.router)
@@ -43,76 +80,32 @@ app.include_router(comments.router)
 app.include_router(triggers.router)
 
 # ---------------------------------------------------------------------------
-# Global Search endpoint — fans out across users, clusters, and post content
+# Global Search endpoint — fans out across users, clusters, posts and comments
 # ---------------------------------------------------------------------------
-from sqlmodel import Session, select
-from api.database import get_session
-from api.models.user import UserProfile
-from api.models.cluster import ClusterCore, ClusterInfo
-from api.models.post import PostCore, PostContent, PostStats
+from sqlmodel import Session
+from api.database import get_read_session
+from api.search import get_search_backend
 from fastapi import Depends
+from api.auth import get_current_admin
+from api.models.user import UserAuth
 
 @app.get("/search")
-def global_search(q: str = "", limit: int = 15, session: Session = Depends(get_session)):
+def global_search(q: str = "", limit: int = 15, session: Session = Depends(get_read_session)):
+    """
+    Global full-text search ranked by relevance (BM25 on SQLite FTS5, FULLTEXT score on MySQL).
+    Every word must match; the last one matches as a prefix for type-ahead.
+    """
+    return get_search_backend(session.get_bind()).search(session, q, limit)
+
+
+@app.get("/metrics/db-pool")
+def db_pool_metrics(admin: UserAuth = Depends(get_current_admin)):
     """
-    Global fuzzy search: tokenizes query and ORs ilike conditions across users, clusters, and posts.
+    Connection pool occupancy and checkout wait/timeout counters for this worker.
+    Administrators only: the pool settings and load are internals.
     """
-    from sqlalchemy import or_
-    results: dict = {"users": [], "clusters": [], "posts": []}
-    if not q.strip():
-        return results
-
-    # Tokenize: split on whitespace and punctuation, deduplicate
-    tokens = list({t for t in q.strip().split() if len(t) > 0})
-
-    # Users — match any token against name or bio
-    user_conditions = [
-        UserProfile.name.ilike(f"%{t}%")
-        for t in tokens
-    ]
-    user_rows = session.exec(
-        select(UserProfile).where(or_(*user_conditions)).limit(limit)
-    ).all()
-    results["users"] = [{"uid": str(u.uid), "name": u.name, "bio": u.bio} for u in user_rows]
-
-    # Clusters — match any token against name, category, or tags
-    cluster_conditions = []
-    for t in tokens:
-        cluster_conditions.append(ClusterCore.name.ilike(f"%{t}%"))
-        cluster_conditions.append(ClusterCore.category.ilike(f"%{t}%"))
-    cluster_rows = session.exec(
-        select(ClusterCore, ClusterInfo)
-        .join(ClusterInfo, ClusterCore.cid == ClusterInfo.cid)
-        .where(or_(*cluster_conditions))
-        .limit(limit)
-    ).all()
-    results["clusters"] = [{"cid": str(c.cid), "name": c.name, "category": c.category} for c, _ in cluster_rows]
-
-    # Posts — match any token in content or tags
-    post_conditions = []
-    for t in tokens:
-        post_conditions.append(PostContent.content.ilike(f"%{t}%"))
-        post_conditions.append(PostContent.tags.ilike(f"%{t}%"))
-    post_rows = session.exec(
-        select(PostCore, PostContent, PostStats, ClusterCore)
-        .join(PostContent, PostCore.pid == PostContent.pid)
-        .join(PostStats, PostCore.pid == PostStats.pid)
-        .join(ClusterCore, PostCore.cid == ClusterCore.cid)
-        .where(or_(*post_conditions))
-        .order_by(PostStats.likes.desc())
-        .limit(limit)
-    ).all()
-    results["posts"] = [
-        {
-            "pid": str(core.pid), "uid": str(core.uid), "cid": str(core.cid),
-            "cluster_name": cluster.name,
-            "content": content.content[:280], "tags": content.tags,
-            "likes": stats.likes, "dislikes": stats.dislikes,
-        }
-        for core, content, stats, cluster in post_rows
-    ]
-
-    return results
+    from api.database import pool_stats
+    return pool_stats()
 
 
 # Mount the Static HTML/CSS/JS frontend application
@@ -0,0 +1,191 @@
+"""
+api/migrations.py
+
+In-place schema upgrades applied from the FastAPI lifespan hook.
+
+The base schema is created by archive/research/initialize.py; tables, indexes and
+derived data introduced afterwards are added here idempotently so an existing
+database picks them up on the next start.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from api.models.cluster import ClusterBookmark, ClusterCore
+from api.models.comment import CommentClosure, CommentStats
+from api.models.follow import UserFollow, UserFollowStats
+from api.models.feed import UserFeed
+from api.models.post import (
+    PostCore,
+    PostStats,
+    PostTrending,
+    UserPostStats,
+    ClusterPostStats,
+    MegaphonePollOption,
+    MegaphonePollVote,
+    MegaphoneEventMeta,
+    MegaphoneEventRsvp,
+)
+from api.models.moderation import ModerationItem
+from api.models.reconcile import CounterChange, ReconcileState
+from api.models.user import UserProfile
+from api.search import install_search
+from api.counters import apply_counters_now
+
+# Tables added after the original schema
+_ADDED_TABLES = [
+    ClusterBookmark,
+    UserFollow,
+    MegaphonePollOption,
+    MegaphonePollVote,
+    MegaphoneEventMeta,
+    MegaphoneEventRsvp,
+    UserFeed,
+    PostTrending,
+    UserFollowStats,
+    CommentClosure,
+    UserPostStats,
+    ClusterPostStats,
+    CounterChange,
+    ReconcileState,
+    ModerationItem,
+]
+
+# Columns added to existing tables; each needs a server_default so old rows get a value
+_ADDED_COLUMNS = {
+    CommentStats: ["reply_count", "total_descendants", "loves", "laughs", "sads", "wows", "angries"],
+    PostStats: ["loves", "laughs", "sads", "wows", "angries"],
+}
+
+# Existing tables that gained (composite) indexes
+_INDEXED_TABLES = [PostCore, PostStats, UserProfile, ClusterCore, UserFollow, MegaphonePollVote, MegaphoneEventRsvp, UserFeed]
+
+
+def _backfill_user_feed(session: Session) -> None:
+    from api.services.feed_service import FeedService
+    FeedService.rebuild(session)
+
+def _backfill_post_trending(session: Session) -> None:
+    from api.services.trending_service import TrendingService
+    TrendingService.rebuild(session)
+
+def _backfill_follow_stats(session: Session) -> None:
+    from api.services.user_service import UserService
+    UserService.rebuild_follow_stats(session)
+
+def _backfill_comment_closure(session: Session) -> None:
+    from api.services.comment_service import CommentService
+    CommentService.rebuild_closure(session)
+
+def _backfill_user_post_stats(session: Session) -> None:
+    from api.services.post_service import PostService
+    PostService.rebuild_rollups(session, models=(UserPostStats,))
+
+def _backfill_cluster_post_stats(session: Session) -> None:
+    from api.services.post_service import PostService
+    PostService.rebuild_rollups(session, models=(ClusterPostStats,))
+
+def _backfill_reconcile_state(session: Session) -> None:
+    from api.services.reconcile_service import ReconcileService
+    for kind in ReconcileService.KINDS:
+        ReconcileService.sweep(session, kind)
+
+# Derived tables rebuilt from existing rows the first time they are created
+_BACKFILLS = {
+    UserFeed.__tablename__: _backfill_user_feed,
+    PostTrending.__tablename__: _backfill_post_trending,
+    UserFollowStats.__tablename__: _backfill_follow_stats,
+    CommentClosure.__tablename__: _backfill_comment_closure,
+    UserPostStats.__tablename__: _backfill_user_post_stats,
+    ClusterPostStats.__tablename__: _backfill_cluster_post_stats,
+    ReconcileState.__tablename__: _backfill_reconcile_state,
+}
+
+
+def _backfill_comment_reply_counts(session: Session) -> None:
+    from api.services.comment_service import CommentService
+    CommentService.rebuild_reply_counts(session)
+
+def _backfill_post_reaction_counts(session: Session) -> None:
+    from api.services.reconcile_service import ReconcileService
+    ReconcileService.sweep(session, "post")
+
+def _backfill_comment_reaction_counts(session: Session) -> None:
+    from api.services.reconcile_service import ReconcileService
+    ReconcileService.sweep(session, "comment")
+
+# Added columns recomputed from existing rows once they appear: table -> [(columns, backfill)]
+_COLUMN_BACKFILLS = {
+    CommentStats.__tablename__: [
+        (("reply_count", "total_descendants"), _backfill_comment_reply_counts),
+        (("loves", "laughs", "sads", "wows", "angries"), _backfill_comment_reaction_counts),
+    ],
+    PostStats.__tablename__: [
+        (("loves", "laughs", "sads", "wows", "angries"), _backfill_post_reaction_counts),
+    ],
+}
+
+
+def _add_missing_columns(engine: Engine) -> list:
+    """
+    ALTER TABLE ... ADD COLUMN for every _ADDED_COLUMNS entry the database lacks.
+    Returns the added column names by table.
+    """
+    inspector = inspect(engine)
+    altered = {}
+    for model, names in _ADDED_COLUMNS.items():
+        table = model.__tablename__
+        if not inspector.has_table(table):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        for name in names:
+            if name in existing:
+                continue
+            column = model.__table__.c[name]
+            ddl = f"ALTER TABLE {table} ADD COLUMN {name} {column.type.compile(engine.dialect)}"
+            if column.server_default is not None:
+                ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+            with engine.begin() as conn:
+                conn.execute(text(ddl))
+            altered.setdefault(table, set()).add(name)
+    return altered
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """
+    Adds missing columns, tables and indexes, then backfills derived data that was just created.
+    """
+    altered = _add_missing_columns(engine)
+    inspector = inspect(engine)
+    created = []
+    for model in _ADDED_TABLES:
+        if not inspector.has_table(model.__tablename__):
+            model.__table__.create(engine, checkfirst=True)
+            created.append(model.__tablename__)
+
+    for model in _INDEXED_TABLES:
+        if not inspector.has_table(model.__tablename__):
+            continue
+        for idx in model.__table__.indexes:
+            idx.create(engine, checkfirst=True)
+
+    # Backfills read the base tables; skip them on a database that has none yet
+    if not inspector.has_table(PostCore.__tablename__):
+        return
+    # Triggers on tables created above (connections opened earlier never ran them),
+    # or in hook mode the removal of triggers left over from trigger mode
+    apply_counters_now(engine)
+    for name in created:
+        backfill = _BACKFILLS.get(name)
+        if backfill:
+            with Session(engine) as session:
+                backfill(session)
+    for name, added in altered.items():
+        for columns, backfill in _COLUMN_BACKFILLS.get(name, ()):
+            if added.intersection(columns):
+                with Session(engine) as session:
+                    backfill(session)
+
+    # Full-text search tables/indexes; filled from existing rows when first created
+    install_search(engine)
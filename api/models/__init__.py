@@ -7,14 +7,18 @@
 # or SQLAlchemy spins up, while providing convenient short import paths.
 # =====================================================================
 
-from .enums import UserRole, ClusterRole, PostType, ReactionType, MegaphoneType, EventRsvpStatus, RuleAction
+from .enums import UserRole, ClusterRole, PostType, ReactionType, MegaphoneType, EventRsvpStatus, RuleAction, ModerationStatus
 from .user import UserAuth, UserProfile
 from .cluster import ClusterCore, ClusterInfo, ClusterStats, ClusterMember, ClusterModerator, ClusterRule, ClusterBookmark
-from .follow import UserFollow
+from .follow import UserFollow, UserFollowStats
+from .feed import UserFeed
 from .post import (
     PostCore,
     PostContent,
     PostStats,
+    PostTrending,
+    UserPostStats,
+    ClusterPostStats,
     PostReaction,
     Window,
     Megaphone,
@@ -23,7 +27,9 @@ from .post import (
     MegaphoneEventMeta,
     MegaphoneEventRsvp,
 )
-from .comment import CommentCore, CommentContent, CommentStats, CommentReaction
+from .comment import CommentCore, CommentClosure, CommentContent, CommentStats, CommentReaction
+from .reconcile import CounterChange, ReconcileState
+from .moderation import ModerationItem
 
 __all__ = [
     # Cluster
@@ -45,6 +51,9 @@ __all__ = [
     "PostCore",
     "PostContent",
     "PostStats",
+    "PostTrending",
+    "UserPostStats",
+    "ClusterPostStats",
     "PostReaction",
     "Window",
     "Megaphone",
@@ -57,13 +66,24 @@ __all__ = [
     "MegaphoneType",
     "EventRsvpStatus",
     "UserFollow",
+    "UserFollowStats",
+    "UserFeed",
 
     # Comment
     "CommentCore",
+    "CommentClosure",
     "CommentContent",
     "CommentStats",
     "CommentReaction",
 
+    # Reconciliation
+    "CounterChange",
+    "ReconcileState",
+
+    # Moderation
+    "ModerationItem",
+    "ModerationStatus",
+
     # Rules / Other
     "RuleAction"
 ]
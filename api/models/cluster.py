@@ -1,6 +1,7 @@
 from typing import Optional
 from uuid import uuid4, UUID
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from api.models.enums import ClusterRole, RuleAction
 
@@ -8,7 +9,11 @@ class ClusterCore(SQLModel, table=True):
     """
     Contains the foundational data for a cluster including its identity and privacy.
     """
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_clustercore_name_cid", "name", "cid"),                                # Keyset: cluster listing
+        Index("ix_clustercore_category_name_cid", "category", "name", "cid"),           # Keyset: listing by category
+        {"extend_existing": True},
+    )
 
     cid         : UUID           = Field(default_factory=uuid4, primary_key=True) # Unique identifier for the cluster
     name        : str            = Field(index=True)                              # Display name of the cluster
@@ -1,6 +1,7 @@
 from typing import Optional
 from uuid import uuid4, UUID
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from api.models.enums import ReactionType
 
@@ -16,6 +17,21 @@ class CommentCore(SQLModel, table=True):
     parent_mid: Optional[UUID]   = Field(default=None, index=True, foreign_key="commentcore.mid") # Parent comment ID, for threads
     created_at: datetime         = Field(default_factory=lambda: datetime.now(), index=True)     # Timestamp when comment was created
 
+class CommentClosure(SQLModel, table=True):
+    """
+    Closure table over comment threads: one row per (ancestor, descendant) pair, including
+    each comment paired with itself at depth 0. Maintained by CommentService.
+    """
+    __table_args__ = (
+        Index("ix_commentclosure_ancestor_depth", "ancestor_mid", "depth"),            # Subtree / direct replies of a comment
+        Index("ix_commentclosure_descendant_depth", "descendant_mid", "depth"),        # Ancestry of a comment
+        {"extend_existing": True},
+    )
+
+    ancestor_mid  : UUID         = Field(primary_key=True, foreign_key="commentcore.mid") # Comment at the top of the path
+    descendant_mid: UUID         = Field(primary_key=True, foreign_key="commentcore.mid") # Comment at the bottom of the path
+    depth         : int                                                                   # Levels between them (0 = same comment)
+
 class CommentContent(SQLModel, table=True):
     """
     Stores the textual content body of a comment.
@@ -27,13 +43,20 @@ class CommentContent(SQLModel, table=True):
 
 class CommentStats(SQLModel, table=True):
     """
-    Aggregated interaction metrics such as likes and dislikes for a comment.
+    Aggregated interaction metrics for a comment: one counter per reaction type, plus reply counts.
     """
     __table_args__ = {"extend_existing": True}
 
     mid       : UUID             = Field(primary_key=True, foreign_key="commentcore.mid") # Foreign key linked to CommentCore
     likes     : int              = 0                                                      # Total number of likes
     dislikes  : int              = 0                                                      # Total number of dislikes
+    loves     : int              = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Total number of LOVE reactions
+    laughs    : int              = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Total number of LAUGH reactions
+    sads      : int              = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Total number of SAD reactions
+    wows      : int              = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Total number of WOW reactions
+    angries   : int              = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Total number of ANGRY reactions
+    reply_count      : int       = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Direct replies (trigger-maintained)
+    total_descendants: int       = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Replies at any depth (trigger-maintained)
 
 class CommentReaction(SQLModel, table=True):
     """
@@ -56,3 +56,11 @@ class RuleAction(str, Enum):
     """
     BLOCK    = "BLOCK"
     FLAG     = "FLAG"
+
+class ModerationStatus(str, Enum):
+    """
+    Enumerates the stages a flagged post or comment passes through in the moderation queue.
+    """
+    QUEUED   = "QUEUED"
+    OPEN     = "OPEN"
+    RESOLVED = "RESOLVED"
@@ -0,0 +1,23 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+
+class UserFeed(SQLModel, table=True):
+    """
+    Materialized home-feed entry: post `pid` is visible in the feed of member `uid`.
+    Rows are fanned out on post creation and backfilled/trimmed on join/leave.
+    """
+    __table_args__ = (
+        Index("ix_userfeed_uid_created_at_pid", "uid", "created_at", "pid"),            # Feed read: one range scan
+        Index("ix_userfeed_uid_cid", "uid", "cid"),                                     # Trim on leave
+        Index("ix_userfeed_cid", "cid"),                                                # Purge on cluster delete
+        {"extend_existing": True},
+    )
+
+    uid       : UUID     = Field(primary_key=True, foreign_key="userauth.uid")           # Feed owner
+    pid       : UUID     = Field(primary_key=True, foreign_key="postcore.pid", index=True) # Post shown in the feed
+    cid       : UUID     = Field(foreign_key="clustercore.cid")                          # Cluster the post lives in
+    created_at: datetime                                                                 # Copy of PostCore.created_at for ordering
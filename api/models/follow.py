@@ -1,6 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -8,8 +9,23 @@ class UserFollow(SQLModel, table=True):
     """
     Directed follow edge: follower_uid follows following_uid.
     """
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_userfollow_following_created_at_follower", "following_uid", "created_at", "follower_uid"),   # Keyset: followers of a user
+        Index("ix_userfollow_follower_created_at_following", "follower_uid", "created_at", "following_uid"),   # Keyset: users a user follows
+        {"extend_existing": True},
+    )
 
     follower_uid: UUID = Field(foreign_key="userauth.uid", primary_key=True, index=True)
     following_uid: UUID = Field(foreign_key="userauth.uid", primary_key=True, index=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now())
+
+
+class UserFollowStats(SQLModel, table=True):
+    """
+    Follower/following totals per user, maintained by the userfollow triggers.
+    """
+    __table_args__ = {"extend_existing": True}
+
+    uid            : UUID = Field(primary_key=True, foreign_key="userauth.uid")   # Foreign key linked to UserAuth
+    follower_count : int  = 0                                                      # Users following this user
+    following_count: int  = 0                                                      # Users this user follows
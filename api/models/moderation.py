@@ -0,0 +1,32 @@
+from typing import Optional
+from uuid import UUID, uuid4
+from datetime import datetime
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+from .enums import ModerationStatus
+
+class ModerationItem(SQLModel, table=True):
+    """
+    A post or comment that matched FLAG rules of its cluster. Inserted in the write's own
+    transaction as QUEUED; the moderation worker notifies the cluster's moderators in
+    batches and opens it for review.
+    """
+    __table_args__ = (
+        Index("ix_moderationitem_status_created", "status", "created_at"),                   # Worker: oldest QUEUED items first
+        Index("ix_moderationitem_cid_status_created", "cid", "status", "created_at", "qid"),  # Review queue of one cluster, keyset-paged
+        {"extend_existing": True},
+    )
+
+    qid         : UUID                       = Field(default_factory=uuid4, primary_key=True)           # Unique identifier for the queue item
+    cid         : UUID                       = Field(foreign_key="clustercore.cid")                     # Cluster whose rules were matched
+    kind        : str                                                                                   # "post" or "comment"
+    target      : UUID                                                                                  # pid / mid of the flagged content
+    uid         : UUID                       = Field(foreign_key="userauth.uid")                        # Author of the flagged content
+    rules       : str                                                                                   # Names of the matched FLAG rules, comma separated
+    status      : ModerationStatus           = Field(default=ModerationStatus.QUEUED)                   # QUEUED -> OPEN -> RESOLVED
+    created_at  : datetime                   = Field(default_factory=lambda: datetime.now())            # When the content was flagged
+    notified_at : Optional[datetime]         = None                                                     # When the worker notified the moderators
+    notified    : int                        = 0                                                        # Moderators notified
+    reviewed_by : Optional[UUID]             = Field(default=None, foreign_key="userauth.uid")          # Moderator who resolved the item
+    reviewed_at : Optional[datetime]         = None                                                     # When it was resolved
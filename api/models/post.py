@@ -1,6 +1,7 @@
 from typing import Optional
 from uuid import uuid4, UUID
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from api.models.enums import PostType, ReactionType, MegaphoneType, EventRsvpStatus
 
@@ -8,7 +9,12 @@ class PostCore(SQLModel, table=True):
     """
     Core attributes and relationships defining the existence of a post.
     """
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_postcore_created_at_pid", "created_at", "pid"),                       # Keyset: global listing
+        Index("ix_postcore_cid_created_at_pid", "cid", "created_at", "pid"),            # Keyset: cluster feeds
+        Index("ix_postcore_uid_created_at_pid", "uid", "created_at", "pid"),            # Keyset: profile feeds
+        {"extend_existing": True},
+    )
 
     pid       : UUID             = Field(default_factory=uuid4, primary_key=True)         # Unique identifier for the post
     uid       : UUID             = Field(index=True, foreign_key="userauth.uid")          # ID of the user who authored the post
@@ -29,13 +35,63 @@ class PostContent(SQLModel, table=True):
 
 class PostStats(SQLModel, table=True):
     """
-    Aggregated interaction metrics such as likes and dislikes for a post.
+    Aggregated interaction metrics for a post: one counter per reaction type.
     """
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_poststats_likes_pid", "likes", "pid"),                                # Keyset: like-ordered listings
+        {"extend_existing": True},
+    )
 
     pid       : UUID             = Field(primary_key=True, foreign_key="postcore.pid")    # Foreign key linked to PostCore
     likes     : int              = 0                                                      # Total number of likes
     dislikes  : int              = 0                                                      # Total number of dislikes
+    loves     : int              = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Total number of LOVE reactions
+    laughs    : int              = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Total number of LAUGH reactions
+    sads      : int              = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Total number of SAD reactions
+    wows      : int              = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Total number of WOW reactions
+    angries   : int              = Field(default=0, sa_column_kwargs={"server_default": "0"}) # Total number of ANGRY reactions
+
+class PostTrending(SQLModel, table=True):
+    """
+    Recency-boosted trending rank of a post, maintained incrementally on every reaction.
+    """
+    __table_args__ = (
+        Index("ix_posttrending_public_score_pid", "is_public", "score", "pid"),         # Top-N over public clusters
+        {"extend_existing": True},
+    )
+
+    pid       : UUID             = Field(primary_key=True, foreign_key="postcore.pid")    # Foreign key linked to PostCore
+    is_public : bool             = True                                                   # Copy of NOT ClusterCore.is_private (trg_trending_cluster_privacy)
+    score     : float            = 0.0                                                    # log2 net reactions plus a creation-time boost (see TrendingService)
+
+class UserPostStats(SQLModel, table=True):
+    """
+    Per-author rollup of posting activity, maintained by the post rollup triggers.
+    """
+    __table_args__ = (
+        Index("ix_userpoststats_post_count_uid", "post_count", "uid"),                  # Leaderboard: most active authors
+        Index("ix_userpoststats_total_likes_uid", "total_likes", "uid"),                # Leaderboard: most liked authors
+        {"extend_existing": True},
+    )
+
+    uid            : UUID        = Field(primary_key=True, foreign_key="userauth.uid")    # Foreign key linked to UserAuth
+    post_count     : int         = 0                                                      # Posts authored
+    total_likes    : int         = 0                                                      # Sum of PostStats.likes over those posts
+    total_reactions: int         = 0                                                      # PostReaction rows received on those posts
+
+class ClusterPostStats(SQLModel, table=True):
+    """
+    Per-cluster rollup of posting activity, maintained by the post rollup triggers.
+    """
+    __table_args__ = (
+        Index("ix_clusterpoststats_post_count_cid", "post_count", "cid"),               # Leaderboard: most active clusters
+        {"extend_existing": True},
+    )
+
+    cid            : UUID        = Field(primary_key=True, foreign_key="clustercore.cid") # Foreign key linked to ClusterCore
+    post_count     : int         = 0                                                      # Posts living in the cluster
+    total_likes    : int         = 0                                                      # Sum of PostStats.likes over those posts
+    total_reactions: int         = 0                                                      # PostReaction rows received on those posts
 
 class PostReaction(SQLModel, table=True):
     """
@@ -85,7 +141,10 @@ class MegaphonePollOption(SQLModel, table=True):
 
 class MegaphonePollVote(SQLModel, table=True):
     """One vote per cluster member per poll megaphone."""
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_megaphonepollvote_pid_option_idx", "pid", "option_idx"),            # Covering: per-option GROUP BY
+        {"extend_existing": True},
+    )
 
     pid        : UUID = Field(foreign_key="postcore.pid", primary_key=True)
     uid        : UUID = Field(foreign_key="userauth.uid", primary_key=True)
@@ -105,7 +164,10 @@ class MegaphoneEventMeta(SQLModel, table=True):
 
 class MegaphoneEventRsvp(SQLModel, table=True):
     """RSVP per user for EVENT megaphones (not a poll)."""
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_megaphoneeventrsvp_pid_status", "pid", "status"),                    # Covering: per-status GROUP BY
+        {"extend_existing": True},
+    )
 
     pid        : UUID = Field(foreign_key="postcore.pid", primary_key=True)
     uid        : UUID = Field(foreign_key="userauth.uid", primary_key=True)
@@ -0,0 +1,32 @@
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+class CounterChange(SQLModel, table=True):
+    """
+    Append-only log of rows whose denormalized counters may have changed, written by the
+    trg_log_* triggers and consumed by ReconcileService.
+    """
+    __table_args__ = (
+        Index("ix_counterchange_kind_seq", "kind", "seq"),                             # Pending changes of one kind, in order
+        {"extend_existing": True},
+    )
+
+    seq       : Optional[int]    = Field(default=None, primary_key=True)                  # Monotonic change number (rowid)
+    kind      : str                                                                       # "cluster", "post" or "comment"
+    key       : UUID                                                                      # cid / pid / mid whose counters to re-check
+
+class ReconcileState(SQLModel, table=True):
+    """
+    High-water mark and last-run results of the counter reconciler, one row per counter kind.
+    """
+    __table_args__ = {"extend_existing": True}
+
+    kind          : str                = Field(primary_key=True)                          # "cluster", "post" or "comment"
+    high_water    : int                = 0                                                # Highest CounterChange.seq examined (progress only; pending rows stay in the log)
+    last_run_at   : Optional[datetime] = None                                             # When the last pass finished
+    examined      : int                = 0                                                # Rows re-checked by the last pass
+    repaired      : int                = 0                                                # Drifted or missing stats rows fixed by the last pass
+    total_repaired: int                = 0                                                # Repairs since the state row was created
@@ -1,6 +1,7 @@
 from typing import Optional
 from uuid import uuid4, UUID
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 from api.models.enums import UserRole
 
@@ -21,7 +22,10 @@ class UserProfile(SQLModel, table=True):
     """
     Contains the public profile information and display settings for a user.
     """
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_userprofile_created_at_uid", "created_at", "uid"),                    # Keyset: user listing
+        {"extend_existing": True},
+    )
 
     uid          : UUID           = Field(primary_key=True, foreign_key="userauth.uid") # Foreign key linked to UserAuth
     name         : str                                                                  # Display name of the user
@@ -0,0 +1,97 @@
+"""
+api/pagination.py
+
+Opaque keyset (cursor) pagination shared by feed and listing endpoints.
+
+A cursor encodes the sort key of the last row on a page, e.g. (created_at, pid).
+The next page is fetched with a `WHERE (key, tie) < (:key, :tie)` predicate that
+is served straight from a composite index, so deep pages cost the same as the first
+one instead of scanning and discarding OFFSET rows.
+
+List endpoints keep returning plain JSON arrays; the cursor for the following page
+is sent in the `X-Next-Cursor` response header (absent on the last page).
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from fastapi import Response
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that was not produced by encode_cursor."""
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Packs the sort key of the last row of a page into an opaque, URL-safe token.
+    """
+    payload = []
+    for v in values:
+        if isinstance(v, datetime):
+            payload.append(["dt", v.isoformat()])
+        elif isinstance(v, UUID):
+            payload.append(["uuid", str(v)])
+        else:
+            payload.append(["raw", v])
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple:
+    """
+    Unpacks a token produced by encode_cursor. Raises InvalidCursor on malformed input.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = []
+        for kind, v in payload:
+            if kind == "dt":
+                values.append(datetime.fromisoformat(v))
+            elif kind == "uuid":
+                values.append(UUID(v))
+            else:
+                values.append(v)
+    except Exception as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+    if len(values) != size:
+        raise InvalidCursor("Invalid cursor")
+    return tuple(values)
+
+
+def keyset_after(sort_col, tie_col, cursor: Optional[str], descending: bool = True):
+    """
+    Builds the WHERE predicate that resumes a (sort_col, tie_col) ordered scan after `cursor`.
+    Returns None when no cursor was given (first page).
+    """
+    if not cursor:
+        return None
+    sort_value, tie_value = decode_cursor(cursor, 2)
+    if descending:
+        return or_(sort_col < sort_value, and_(sort_col == sort_value, tie_col < tie_value))
+    return or_(sort_col > sort_value, and_(sort_col == sort_value, tie_col > tie_value))
+
+
+def next_cursor(rows: Sequence, limit: int, key) -> Optional[str]:
+    """
+    Cursor for the page following `rows`, or None when the page was not full.
+    `key` maps the last row to its (sort, tie) values.
+    """
+    if limit <= 0 or len(rows) < limit:
+        return None
+    return encode_cursor(*key(rows[-1]))
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    """
+    Exposes the next-page cursor to clients via the X-Next-Cursor header.
+    """
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,104 @@
+"""
+api/pool.py
+
+Connection pools that record checkout metrics.
+
+MeteredQueuePool is a drop-in `poolclass` for create_engine. Every checkout is
+timed from the moment a request asks for a connection until it gets one, so
+the wait reflects queueing behind an exhausted pool (plus connect time when a
+new connection has to be opened). Checkouts that give up after `pool_timeout`
+are counted separately; those are the `QueuePool limit ... reached` errors.
+
+Use the numbers to size DB_POOL_SIZE / DB_MAX_OVERFLOW against the number of
+uvicorn workers and threadpool threads instead of guessing.
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Thread-safe counters for one pool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record_checkout(self, waited: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += waited
+            if waited > self.max_wait:
+                self.max_wait = waited
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts"  : self.checkouts,
+                "timeouts"   : self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class _MeteredPoolMixin:
+    """
+    Times QueuePool.connect() and counts checkout timeouts.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; carry the counters over
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Live pool occupancy merged with the accumulated checkout metrics.
+        """
+        return {
+            "pool_size"  : self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in" : self.checkedin(),
+            "overflow"   : self.overflow(),
+            **self.metrics.snapshot(),
+        }
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
@@ -0,0 +1,155 @@
+"""
+api/reactions.py
+
+The write path shared by post and comment reactions: a fixed number of statements per
+reaction, none of which read-then-write, so concurrent reactors on one post never
+race each other or trip the (target, uid) primary key.
+
+    1. UPDATE the stats row's per-type counters by the delta between the new reaction and the stored one.
+       The stored one is read by a subquery inside the UPDATE, which runs under the
+       stats row lock (the database write lock on SQLite), and the fresh counts come
+       back through RETURNING where the dialect has it.
+    2. Upsert the reaction row with the dialect's native statement:
+       INSERT ... ON CONFLICT DO UPDATE (SQLite, PostgreSQL) or
+       INSERT ... ON DUPLICATE KEY UPDATE (MySQL/MariaDB).
+
+Both run in the caller's transaction; the caller commits.
+
+With a CounterBuffer (api/counter_buffer.py) step 1 is skipped: the stored reaction is
+taken with DELETE ... RETURNING, the new one inserted, and the delta parked in the
+buffer, so the hot stats row is not written at all.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, insert, literal
+from sqlmodel import Session, select, update
+
+from api.models.enums import ReactionType
+
+# Counter column of each reaction type, identical on PostStats and CommentStats
+REACTION_COLUMNS = {
+    ReactionType.LIKE   : "likes",
+    ReactionType.DISLIKE: "dislikes",
+    ReactionType.LOVE   : "loves",
+    ReactionType.LAUGH  : "laughs",
+    ReactionType.SAD    : "sads",
+    ReactionType.WOW    : "wows",
+    ReactionType.ANGRY  : "angries",
+}
+
+
+def reaction_counts(stats) -> Dict[str, int]:
+    """
+    The per-type counters of a PostStats / CommentStats row (all zero for None).
+    """
+    return {column: getattr(stats, column) if stats else 0 for column in REACTION_COLUMNS.values()}
+
+
+def _stored(reaction_model, target_column, target, uid, reaction_type: ReactionType):
+    # 1 if the stored reaction of (target, uid) is `reaction_type`, else 0
+    return (
+        select(func.count()).select_from(reaction_model)
+        .where(target_column == target, reaction_model.uid == uid, reaction_model.reaction_type == reaction_type)
+        .scalar_subquery()
+    )
+
+
+def _upsert(session: Session, reaction_model, values: dict):
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(reaction_model).values(**values)
+        return statement.on_duplicate_key_update(
+            reaction_type=statement.inserted.reaction_type,
+            timestamp=statement.inserted.timestamp,
+        )
+    else:
+        return None
+
+    statement = dialect_insert(reaction_model).values(**values)
+    table = reaction_model.__table__
+    return statement.on_conflict_do_update(
+        index_elements=[column.name for column in table.primary_key.columns],
+        set_={"reaction_type": statement.excluded.reaction_type, "timestamp": statement.excluded.timestamp},
+        where=table.c.reaction_type != statement.excluded.reaction_type,
+    )
+
+
+def _apply_delta(session: Session, stats_model, stats_key, reaction_model, target_column,
+                 target, uid, reaction_type: Optional[ReactionType]) -> Dict[str, int]:
+    counts = {
+        column: getattr(stats_model, column)
+        + literal(int(reaction_type == counted))
+        - _stored(reaction_model, target_column, target, uid, counted)
+        for counted, column in REACTION_COLUMNS.items()
+    }
+    columns = [getattr(stats_model, column) for column in REACTION_COLUMNS.values()]
+    statement = update(stats_model).where(stats_key == target).values(**counts)
+    if session.get_bind().dialect.update_returning:
+        row = session.exec(statement.returning(*columns)).first()
+    else:
+        session.exec(statement)
+        row = session.exec(select(*columns).where(stats_key == target)).first()
+    return dict(zip(REACTION_COLUMNS.values(), row)) if row else reaction_counts(None)
+
+
+def _take(session: Session, reaction_model, target_column, target, uid) -> Optional[ReactionType]:
+    # Deletes the stored reaction of (target, uid), returning its type; the DELETE holds the lock
+    where = (target_column == target, reaction_model.uid == uid)
+    if session.get_bind().dialect.delete_returning:
+        return session.exec(delete(reaction_model).where(*where).returning(reaction_model.reaction_type)).scalar()
+    stored = session.exec(select(reaction_model.reaction_type).where(*where).with_for_update()).first()
+    if stored is not None:
+        session.exec(delete(reaction_model).where(*where))
+    return stored
+
+
+def _buffer_delta(session: Session, buffer, stats_model, stats_key, target,
+                  old: Optional[ReactionType], new: Optional[ReactionType]) -> Dict[str, int]:
+    deltas = {column: int(new == counted) - int(old == counted) for counted, column in REACTION_COLUMNS.items()}
+    buffer.add(target, deltas, session)
+    stats = session.exec(select(stats_model).where(stats_key == target)).first()
+    return buffer.merged(target, **reaction_counts(stats)) if stats else reaction_counts(None)
+
+
+def set_reaction(session: Session, stats_model, stats_key, reaction_model, target_column,
+                 target, uid, reaction_type: ReactionType, buffer=None) -> Dict[str, int]:
+    """
+    Makes `reaction_type` the reaction of `uid` on `target` and returns the fresh
+    per-type counters. Re-sending the stored reaction changes nothing.
+    """
+    values = {target_column.key: target, "uid": uid, "reaction_type": reaction_type, "timestamp": datetime.now()}
+    if buffer is not None:
+        old = _take(session, reaction_model, target_column, target, uid)
+        session.exec(insert(reaction_model).values(**values))
+        return _buffer_delta(session, buffer, stats_model, stats_key, target, old, reaction_type)
+
+    counts = _apply_delta(session, stats_model, stats_key, reaction_model, target_column, target, uid, reaction_type)
+    statement = _upsert(session, reaction_model, values)
+    if statement is None:
+        # No native upsert: replace the row; the delta above already holds the stats lock
+        session.exec(delete(reaction_model).where(target_column == target, reaction_model.uid == uid))
+        statement = insert(reaction_model).values(**values)
+    session.exec(statement)
+    return counts
+
+
+def clear_reaction(session: Session, stats_model, stats_key, reaction_model, target_column,
+                   target, uid, buffer=None) -> Optional[Dict[str, int]]:
+    """
+    Removes the reaction of `uid` on `target`; returns the fresh per-type counters,
+    or None if there was no reaction to remove.
+    """
+    if buffer is not None:
+        old = _take(session, reaction_model, target_column, target, uid)
+        return None if old is None else _buffer_delta(session, buffer, stats_model, stats_key, target, old, None)
+
+    counts = _apply_delta(session, stats_model, stats_key, reaction_model, target_column, target, uid, None)
+    removed = session.exec(delete(reaction_model).where(target_column == target, reaction_model.uid == uid)).rowcount
+    return counts if removed else None
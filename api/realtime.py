@@ -0,0 +1,142 @@
+"""
+api/realtime.py
+
+In-process publish/subscribe hub behind the megaphone engagement stream.
+
+Write paths publish the fresh engagement snapshot they already computed after
+committing; the hub keeps only the latest snapshot per pid and fans it out to
+every open stream at most once per COALESCE_INTERVAL seconds. A burst of votes
+therefore costs one frame per watcher, and watchers never query the database.
+
+Subscribers live on the server's event loop while publishers usually run in the
+threadpool that serves sync routes, so publish() hands work to the loop with
+call_soon_threadsafe. The hub is per process: with several workers, each one only
+sees the writes it served itself.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+from uuid import UUID
+
+from starlette.concurrency import run_in_threadpool
+
+COALESCE_INTERVAL  = float(os.getenv("ENGAGEMENT_COALESCE_INTERVAL", "0.5"))   # Minimum seconds between frames per pid
+HEARTBEAT_INTERVAL = float(os.getenv("ENGAGEMENT_HEARTBEAT_INTERVAL", "15"))   # Idle seconds before a keep-alive comment
+SUBSCRIBER_BACKLOG = 4                                                          # Frames buffered per slow subscriber
+
+
+class EngagementHub:
+    """
+    Coalescing fan-out of engagement snapshots, keyed by megaphone pid.
+    """
+
+    def __init__(self, interval: float = COALESCE_INTERVAL):
+        self.interval = interval
+        self._subscribers: dict[UUID, set[asyncio.Queue]] = {}
+        self._pending: dict[UUID, dict[str, Any]] = {}
+        self._scheduled: set[UUID] = set()
+        self._last_sent: dict[UUID, float] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, pid: UUID) -> asyncio.Queue:
+        """
+        Registers a stream for `pid`; must be called from the event loop.
+        """
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_BACKLOG)
+        with self._lock:
+            self._subscribers.setdefault(pid, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, pid: UUID, queue: asyncio.Queue) -> None:
+        with self._lock:
+            queues = self._subscribers.get(pid)
+            if queues is None:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[pid]
+                self._pending.pop(pid, None)
+                self._last_sent.pop(pid, None)
+
+    def subscriber_count(self, pid: UUID) -> int:
+        with self._lock:
+            return len(self._subscribers.get(pid, ()))
+
+    def publish(self, pid: UUID, snapshot: dict[str, Any]) -> None:
+        """
+        Records the latest snapshot for `pid`; safe to call from any thread.
+        A no-op when nobody is watching.
+        """
+        with self._lock:
+            if pid not in self._subscribers:
+                return
+            self._pending[pid] = snapshot
+            if pid in self._scheduled:
+                return      # A frame is already due; it will carry this snapshot
+            self._scheduled.add(pid)
+        loop = self._loop
+        try:
+            loop.call_soon_threadsafe(self._schedule_flush, pid)
+        except (AttributeError, RuntimeError):
+            # No loop yet, or it has shut down: nobody can receive the frame
+            with self._lock:
+                self._scheduled.discard(pid)
+
+    def _schedule_flush(self, pid: UUID) -> None:
+        wait = self._last_sent.get(pid, 0.0) + self.interval - time.monotonic()
+        if wait > 0:
+            self._loop.call_later(wait, self._flush, pid)
+        else:
+            self._flush(pid)
+
+    def _flush(self, pid: UUID) -> None:
+        with self._lock:
+            self._scheduled.discard(pid)
+            snapshot = self._pending.pop(pid, None)
+            queues = list(self._subscribers.get(pid, ()))
+            if snapshot is None or not queues:
+                return
+            self._last_sent[pid] = time.monotonic()
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()      # Slow reader: drop its oldest frame, keep the newest
+            queue.put_nowait(snapshot)
+
+
+hub = EngagementHub()
+
+
+def sse_frame(data: dict[str, Any], event: str = "engagement") -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def engagement_events(
+    pid: UUID,
+    load_initial: Callable[[], dict[str, Any]],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    source: EngagementHub = hub,
+) -> AsyncIterator[str]:
+    """
+    SSE body for one watcher: the initial snapshot, then every coalesced update,
+    with keep-alive comments while idle. Ends once the client disconnects.
+    `load_initial` reads the snapshot (in the threadpool) only after subscribing,
+    so a change published in between is delivered rather than lost.
+    """
+    queue = source.subscribe(pid)
+    try:
+        yield sse_frame(await run_in_threadpool(load_initial))
+        while not await is_disconnected():
+            try:
+                snapshot = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield sse_frame(snapshot)
+    finally:
+        source.unsubscribe(pid, queue)
@@ -0,0 +1,195 @@
+"""
+api/response_cache.py
+
+Response caching for read-heavy, caller-independent GET endpoints.
+
+    @router.get("/stats/top-by-members")
+    @cached_response(ttl=60, tags=("clusters", "members"))
+    def get_top_clusters_by_members(limit: int = 5, session: Session = Depends(get_read_session)):
+        ...
+
+The rendered JSON body is cached per route and query string, served with a strong
+ETag, and answered with 304 Not Modified when the client's If-None-Match matches.
+Only decorate endpoints whose output does not depend on the authenticated user.
+
+Invalidation is by tag: writes in the services call invalidate_tags("posts", ...).
+Each tag has a generation counter that is part of every cache key, so bumping it
+orphans all entries carrying the tag without enumerating them. The counters live in
+the same backend as the entries, so a shared backend (see set_backend) invalidates
+across workers; the default backend is an in-process LRU.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+from typing import Any, Callable, Iterable, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from sqlalchemy.engine import Row
+
+from api.cache import TTLCache
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))   # Entries kept by the in-process backend
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "1").lower() in ("1", "true", "yes")
+
+# Tag generations never expire on their own; a lost counter only means a cold cache
+_TAG_TTL = 365 * 24 * 3600
+
+
+class CacheBackend:
+    """
+    Storage interface for cached responses; subclass to plug in a shared store (e.g. Redis).
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class InMemoryBackend(CacheBackend):
+    """
+    Per-process LRU with per-entry TTLs.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self._cache = TTLCache(ttl=0, maxsize=maxsize)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        self._cache.invalidate(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+_backend: CacheBackend = InMemoryBackend()
+
+
+def set_backend(backend: CacheBackend) -> None:
+    global _backend
+    _backend = backend
+
+
+def get_backend() -> CacheBackend:
+    return _backend
+
+
+def _tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def _generation(tag: str) -> int:
+    return _backend.get(_tag_key(tag)) or 0
+
+
+def invalidate_tags(*tags: str) -> None:
+    """
+    Expires every cached response that carries any of `tags`.
+    """
+    for tag in tags:
+        _backend.set(_tag_key(tag), _generation(tag) + 1, _TAG_TTL)
+
+
+def clear() -> None:
+    _backend.clear()
+
+
+# Multi-column selects come back as Rows, which FastAPI cannot serialize; emit them as objects
+def _encode(result: Any) -> Any:
+    return jsonable_encoder(result, custom_encoder=_ENCODERS)
+
+
+_ENCODERS = {Row: lambda row: _encode(dict(row._mapping))}
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _render(request: Request, entry: tuple[bytes, str]) -> Response:
+    body, etag = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_response(ttl: float = 30, tags: Iterable[str] = ()) -> Callable:
+    """
+    Caches a GET endpoint's JSON body for `ttl` seconds, keyed by path, query string and
+    the current generation of each tag. Adds ETag handling to both hits and misses.
+    """
+    tags = tuple(tags)
+
+    def decorator(endpoint: Callable) -> Callable:
+        signature = inspect.signature(endpoint)
+        wants_request = "request" in signature.parameters
+
+        def _key(request: Request) -> str:
+            query = sorted(request.query_params.multi_items())
+            generations = [(tag, _generation(tag)) for tag in tags]
+            return json.dumps([request.url.path, query, generations], separators=(",", ":"))
+
+        def _store(key: str, result: Any) -> tuple[bytes, str]:
+            body = json.dumps(_encode(result), separators=(",", ":")).encode("utf-8")
+            entry = (body, _etag(body))
+            _backend.set(key, entry, ttl)
+            return entry
+
+        def _call_kwargs(request: Request, kwargs: dict) -> dict:
+            return {**kwargs, "request": request} if wants_request else kwargs
+
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapper(request: Request, **kwargs):
+                if not RESPONSE_CACHE_ENABLED:
+                    return _encode(await endpoint(**_call_kwargs(request, kwargs)))
+                key = _key(request)
+                entry = _backend.get(key)
+                if entry is None:
+                    entry = _store(key, await endpoint(**_call_kwargs(request, kwargs)))
+                return _render(request, entry)
+        else:
+            @functools.wraps(endpoint)
+            def wrapper(request: Request, **kwargs):
+                if not RESPONSE_CACHE_ENABLED:
+                    return _encode(endpoint(**_call_kwargs(request, kwargs)))
+                key = _key(request)
+                entry = _backend.get(key)
+                if entry is None:
+                    entry = _store(key, endpoint(**_call_kwargs(request, kwargs)))
+                return _render(request, entry)
+
+        # FastAPI reads the wrapper's signature: the endpoint's own parameters plus `request`
+        params = [p for p in signature.parameters.values() if p.name != "request"]
+        request_param = inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+        wrapper.__signature__ = signature.replace(
+            parameters=[p.replace(kind=inspect.Parameter.KEYWORD_ONLY) for p in params] + [request_param]
+        )
+        return wrapper
+
+    return decorator
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Depends, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Optional, Any
+from uuid import UUID
+
+from api.database import get_async_read_session
+from api.models.user import UserAuth
+from api.schemas.post import PostResponse
+from api.services.post_service import AsyncPostService
+from api.services.comment_service import AsyncCommentService
+from api.pagination import next_cursor, set_next_cursor
+from api.auth import get_current_user_async
+from api.routers.posts import _serialize_posts, _serialize_recent, _created_key
+from api.routers.comments import _rows_as_dicts
+
+# ---------------------------------------------------------------------------
+# Async read routes (opt-in with ASYNC_DB=1)
+# ---------------------------------------------------------------------------
+# Same paths and payloads as the sync handlers in posts.py / comments.py.
+# main.py mounts this router ahead of them, so these take precedence and the
+# feed reads run on the event loop instead of occupying threadpool workers.
+# Like the sync GET routes they read from a replica when DB_REPLICA_URLS is set
+# (get_async_read_session); get_current_user_async resolves through the user cache.
+# Row hydration reuses _serialize_posts through AsyncSession.run_sync.
+
+router = APIRouter()
+
+
+async def _serialize(session: AsyncSession, rows):
+    return await session.run_sync(lambda sync_session: _serialize_posts(rows, sync_session))
+
+
+@router.get("/posts/me/feed", response_model=List[Any], tags=["Posts"])
+async def get_my_homepage_feed(response: Response, limit: int = 50, cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_read_session), current_user: UserAuth = Depends(get_current_user_async)):
+    """
+    Generates a custom feed by extracting posts from clusters the user is a member of.
+    """
+    rows = await AsyncPostService.get_homepage_feed_for_user(session, current_user.uid, limit, cursor)
+    set_next_cursor(response, next_cursor(rows, limit, _created_key))
+    return await _serialize(session, rows)
+
+
+@router.get("/posts/trending/global", response_model=List[Any], tags=["Posts"])
+async def get_global_trending_posts(response: Response, limit: int = 20, cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_read_session)):
+    """
+    Retrieves universally trending content across all public clusters.
+    """
+    rows = await AsyncPostService.get_trending_posts_globally(session, limit, cursor)
+    set_next_cursor(response, next_cursor(rows, limit, lambda row: (row[3], row[0].pid)))
+    return await _serialize(session, [(core, content, stats) for core, content, stats, _score in rows])
+
+
+@router.get("/posts/", response_model=List[PostResponse], tags=["Posts"])
+async def list_posts(response: Response, skip: int = 0, limit: int = 100, cid: Optional[UUID] = None, cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_read_session)):
+    """
+    Lists posts newest first, optionally filtered by cluster.
+    """
+    rows = await AsyncPostService.list_posts(session, cid, limit, cursor, skip)
+    set_next_cursor(response, next_cursor(rows, limit, _created_key))
+    return await _serialize(session, rows)
+
+
+@router.get("/posts/cluster/{cid}/recent", response_model=List[Any], tags=["Posts"])
+async def get_recent_cluster_posts(cid: UUID, response: Response, limit: int = 50, cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_read_session)):
+    """
+    Feed generator for a specific cluster container.
+    """
+    rows = await AsyncPostService.get_recent_posts_for_cluster(session, cid, limit, cursor)
+    set_next_cursor(response, next_cursor(rows, limit, lambda row: (row.created_at, row.pid)))
+    return _serialize_recent(rows)
+
+
+@router.get("/posts/user/{uid}/recent", response_model=List[Any], tags=["Posts"])
+async def get_recent_user_posts(uid: UUID, response: Response, limit: int = 50, cursor: Optional[str] = None, session: AsyncSession = Depends(get_async_read_session)):
+    """
+    Feed generator for a specific user's public profile.
+    """
+    rows = await AsyncPostService.get_recent_posts_by_user(session, uid, limit, cursor)
+    set_next_cursor(response, next_cursor(rows, limit, lambda row: (row.created_at, row.pid)))
+    return _serialize_recent(rows)
+
+
+@router.get("/comments/post/{pid}/root", response_model=List[Any], tags=["Comments"])
+async def get_root_comments(pid: UUID, session: AsyncSession = Depends(get_async_read_session)):
+    """
+    Retrieves top-level (direct) comments responding to a specific post.
+    """
+    return _rows_as_dicts(await AsyncCommentService.get_root_comments_for_post(session, pid))
+
+
+@router.get("/comments/{parent_mid}/replies", response_model=List[Any], tags=["Comments"])
+async def get_comment_replies(parent_mid: UUID, session: AsyncSession = Depends(get_async_read_session)):
+    """
+    Retrieves all nested replies targeting a specific parent comment.
+    """
+    return _rows_as_dicts(await AsyncCommentService.get_replies_for_comment(session, parent_mid))
+
+
+@router.get("/comments/post/{pid}/top", response_model=List[Any], tags=["Comments"])
+async def get_top_comments(pid: UUID, limit: int = 10, session: AsyncSession = Depends(get_async_read_session)):
+    """
+    Algorithmically surfaces the most engaging comments (likes plus direct replies).
+    """
+    return _rows_as_dicts(await AsyncCommentService.get_top_comments_for_post(session, pid, limit))
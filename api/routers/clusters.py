@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlmodel import Session, select
 from typing import List, Any, Optional
 from uuid import UUID
 from pydantic import BaseModel
 
-from api.database import get_session
-from api.models.cluster import ClusterCore, ClusterInfo, ClusterStats, ClusterMember, ClusterBookmark, ClusterModerator
-from api.schemas.cluster import ClusterCreate, ClusterResponse, ClusterDetailResponse, ClusterMemberCreate
+from api.database import get_session, get_read_session
+from api.models.cluster import ClusterCore, ClusterInfo, ClusterStats, ClusterMember, ClusterBookmark, ClusterModerator, ClusterRule
+from api.schemas.cluster import ClusterCreate, ClusterResponse, ClusterDetailResponse, ClusterMemberCreate, ClusterRuleCreate, ClusterRuleUpdate, ModerationItemResponse
 from api.services.cluster_service import ClusterService
+from api.services.moderation_service import ModerationService
+from api.services.rule_service import RuleService
 from api.models.user import UserAuth
+from api.models.enums import ModerationStatus
+from api.models.moderation import ModerationItem
 from api.auth import get_current_user
+from api.pagination import next_cursor, set_next_cursor
+from api.response_cache import cached_response
 
 router = APIRouter(prefix="/clusters", tags=["Clusters"])
 
@@ -26,7 +32,7 @@ class AddModeratorPayload(BaseModel):
 # ---- Static-path endpoints (must be before /{cid} routes) -----------------
 
 @router.get("/memberships/me", response_model=Any)
-def get_my_memberships(session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+def get_my_memberships(session: Session = Depends(get_read_session), current_user: UserAuth = Depends(get_current_user)):
     """
     Returns a list of cluster IDs the authenticated user has joined.
     """
@@ -34,7 +40,7 @@ def get_my_memberships(session: Session = Depends(get_session), current_user: Us
     return {"cluster_ids": cluster_ids}
 
 @router.get("/bookmarks/me", response_model=List[Any])
-def get_my_bookmarks(session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+def get_my_bookmarks(session: Session = Depends(get_read_session), current_user: UserAuth = Depends(get_current_user)):
     """
     Returns all clusters the authenticated user has bookmarked,
     enriched with membership status and chat preferences.
@@ -62,7 +68,7 @@ def create_cluster(cluster_in: ClusterCreate, session: Session = Depends(get_ses
     }
 
 @router.get("/{cid}", response_model=ClusterDetailResponse)
-def get_cluster(cid: UUID, session: Session = Depends(get_session)):
+def get_cluster(cid: UUID, session: Session = Depends(get_read_session)):
     """
     Retrieves full details for a specified cluster including its extended info and stats.
     """
@@ -86,16 +92,13 @@ def get_cluster(cid: UUID, session: Session = Depends(get_session)):
     }
 
 @router.get("/", response_model=List[ClusterResponse])
-def list_clusters(skip: int = 0, limit: int = 100, category: str = None, session: Session = Depends(get_session)):
+def list_clusters(response: Response, skip: int = 0, limit: int = 100, category: str = None, cursor: Optional[str] = None, session: Session = Depends(get_read_session)):
     """
     Retrieves a paginated list of all active clusters in the system, optionally filtered by category.
+    Prefer `cursor` (from the X-Next-Cursor header) over `skip` for deep pages.
     """
-    statement = select(ClusterCore)
-    if category:
-        statement = statement.where(ClusterCore.category == category)
-    
-    statement = statement.offset(skip).limit(limit)
-    clusters = session.exec(statement).all()
+    clusters = ClusterService.list_clusters(session, category, limit, cursor, skip)
+    set_next_cursor(response, next_cursor(clusters, limit, lambda c: (c.name, c.cid)))
     return clusters
 
 @router.delete("/{cid}")
@@ -156,35 +159,94 @@ def set_chat_option(cid: UUID, payload: ChatOptionPayload, session: Session = De
     return {"message": "Chat option updated", "chat_enabled": result.chat_enabled}
 
 @router.get("/public/popular", response_model=List[Any])
-def get_popular_public_clusters(limit: int = 10, session: Session = Depends(get_session)):
+@cached_response(ttl=60, tags=("clusters", "members"))
+def get_popular_public_clusters(limit: int = 10, session: Session = Depends(get_read_session)):
     """
     Lists public clusters sorted by their member count.
     """
     return ClusterService.get_public_clusters_by_popularity(session, limit)
 
 @router.get("/search/{query_term}", response_model=List[ClusterResponse])
-def search_clusters(query_term: str, session: Session = Depends(get_session)):
+def search_clusters(query_term: str, session: Session = Depends(get_read_session)):
     """
     Retrieves clusters matching a specific name pattern.
     """
     return ClusterService.search_clusters_by_name(session, query_term)
 
 @router.get("/category/{category}", response_model=List[Any])
-def get_clusters_by_category(category: str, limit: int = 10, session: Session = Depends(get_session)):
+def get_clusters_by_category(category: str, limit: int = 10, session: Session = Depends(get_read_session)):
     """
     Fetches clusters within a target category, sorted by member count.
     """
     return ClusterService.get_clusters_by_category(session, category, limit)
 
 @router.get("/{cid}/rules", response_model=List[Any])
-def list_cluster_rules(cid: UUID, session: Session = Depends(get_session)):
+def list_cluster_rules(cid: UUID, session: Session = Depends(get_read_session)):
     """
     Retrieves moderation pattern rules configured for a cluster.
     """
     return ClusterService.list_cluster_rules(session, cid)
 
+def _require_moderator(session: Session, cid: UUID, current_user: UserAuth) -> None:
+    if not ClusterService.is_cluster_moderator(session, cid, current_user.uid):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only cluster moderators can perform this action")
+
+@router.post("/{cid}/rules", response_model=Any, status_code=status.HTTP_201_CREATED)
+def create_cluster_rule(cid: UUID, rule_in: ClusterRuleCreate, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+    """
+    Adds a BLOCK or FLAG rule, enforced on every post and comment written to the cluster from now on.
+    """
+    _require_moderator(session, cid, current_user)
+    try:
+        return RuleService.create_rule(session, cid, rule_in)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+@router.patch("/{cid}/rules/{rid}", response_model=Any)
+def update_cluster_rule(cid: UUID, rid: UUID, rule_in: ClusterRuleUpdate, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+    _require_moderator(session, cid, current_user)
+    rule = session.get(ClusterRule, rid)
+    if not rule or rule.cid != cid:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    try:
+        return RuleService.update_rule(session, rid, rule_in)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+@router.delete("/{cid}/rules/{rid}")
+def delete_cluster_rule(cid: UUID, rid: UUID, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+    _require_moderator(session, cid, current_user)
+    rule = session.get(ClusterRule, rid)
+    if not rule or rule.cid != cid:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    RuleService.delete_rule(session, rid)
+    return {"message": "Rule deleted successfully"}
+
+@router.get("/{cid}/moderation", response_model=List[ModerationItemResponse])
+def list_moderation_queue(cid: UUID, response: Response, item_status: ModerationStatus = Query(ModerationStatus.OPEN, alias="status"), limit: int = 50, cursor: Optional[str] = None, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+    """
+    Content flagged by the cluster's FLAG rules, oldest first, for its moderators to review.
+    OPEN items have been announced to the moderators; QUEUED ones are still waiting for the worker.
+    Pages with the cursor from the X-Next-Cursor header.
+    """
+    _require_moderator(session, cid, current_user)
+    items = ModerationService.list_queue(session, cid, item_status, limit, cursor)
+    set_next_cursor(response, next_cursor(items, limit, lambda i: (i.created_at, i.qid)))
+    return items
+
+@router.post("/{cid}/moderation/{qid}/resolve", response_model=ModerationItemResponse)
+def resolve_moderation_item(cid: UUID, qid: UUID, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+    """
+    Marks a flagged item as reviewed. Content that should go is removed through the usual delete endpoints.
+    """
+    _require_moderator(session, cid, current_user)
+    item = session.get(ModerationItem, qid)
+    if not item or item.cid != cid:
+        raise HTTPException(status_code=404, detail="Moderation item not found")
+    return ModerationService.resolve(session, qid, current_user.uid)
+
 @router.get("/{cid}/creator", response_model=Any)
-def get_cluster_creator(cid: UUID, session: Session = Depends(get_session)):
+def get_cluster_creator(cid: UUID, session: Session = Depends(get_read_session)):
     """
     Retrieves public information about the user who created this cluster.
     """
@@ -194,49 +256,52 @@ def get_cluster_creator(cid: UUID, session: Session = Depends(get_session)):
     return result
 
 @router.get("/{cid}/moderators", response_model=List[Any])
-def list_cluster_moderators(cid: UUID, session: Session = Depends(get_session)):
+def list_cluster_moderators(cid: UUID, session: Session = Depends(get_read_session)):
     """
     Lists all users holding explicitly assigned moderator roles in the cluster.
     """
     return ClusterService.list_cluster_moderators(session, cid)
 
 @router.get("/{cid}/members", response_model=List[Any])
-def list_cluster_members(cid: UUID, limit: int = 50, session: Session = Depends(get_session)):
+def list_cluster_members(cid: UUID, limit: int = 50, session: Session = Depends(get_read_session)):
     """
     Lists baseline membership representations.
     """
     return ClusterService.list_cluster_members(session, cid, limit)
 
 @router.get("/stats/top-by-members", response_model=List[Any])
-def get_top_clusters_by_members(limit: int = 5, session: Session = Depends(get_session)):
+@cached_response(ttl=60, tags=("clusters", "members"))
+def get_top_clusters_by_members(limit: int = 5, session: Session = Depends(get_read_session)):
     """
     Analytical ranking of clusters by maximum population.
     """
     return ClusterService.get_top_clusters_by_members(session, limit)
 
 @router.get("/stats/top-active", response_model=List[Any])
-def get_top_active_clusters(limit: int = 5, session: Session = Depends(get_session)):
+@cached_response(ttl=60, tags=("clusters", "posts"))
+def get_top_active_clusters(limit: int = 5, session: Session = Depends(get_read_session)):
     """
     Analytical ranking of clusters by maximum content creation volume.
     """
     return ClusterService.get_top_active_clusters(session, limit)
 
 @router.get("/stats/top-categories", response_model=List[Any])
-def get_top_categories(limit: int = 5, session: Session = Depends(get_session)):
+@cached_response(ttl=300, tags=("clusters",))
+def get_top_categories(limit: int = 5, session: Session = Depends(get_read_session)):
     """
     Analytical ranking of system categories by how many clusters represent them.
     """
     return ClusterService.get_top_categories(session, limit)
 
 @router.get("/me/recommendations", response_model=List[Any])
-def get_cluster_recommendations(limit: int = 5, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+def get_cluster_recommendations(limit: int = 5, session: Session = Depends(get_read_session), current_user: UserAuth = Depends(get_current_user)):
     """
     Suggests new clusters for a user based on the categories of clusters they already joined.
     """
     return ClusterService.get_cluster_recommendations_for_user(session, current_user.uid, limit)
 
 @router.get("/{cid}/membership/me", response_model=Any)
-def check_my_membership(cid: UUID, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+def check_my_membership(cid: UUID, session: Session = Depends(get_read_session), current_user: UserAuth = Depends(get_current_user)):
     """
     Returns whether the current user is a member of the cluster and their role.
     """
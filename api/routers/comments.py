@@ -1,19 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session, select
 from typing import List, Optional, Any
 from uuid import UUID
 
-from api.database import get_session
+from api.database import get_session, get_read_session
 from api.models.comment import CommentCore, CommentContent, CommentStats, CommentReaction
-from api.schemas.comment import CommentCreate, CommentResponse, CommentReactionCreate
+from api.schemas.comment import CommentCreate, CommentResponse, CommentReactionCreate, CommentThreadNode
 from api.services.comment_service import CommentService
 from api.services.cluster_service import ClusterService
 from api.models.post import PostCore
 from api.models.user import UserAuth
 from api.auth import get_current_user
+from api.pagination import set_next_cursor
 
 router = APIRouter(prefix="/comments", tags=["Comments"])
 
+
+def _rows_as_dicts(rows):
+    """
+    Converts labelled result rows into plain dicts the JSON encoder understands.
+    """
+    return [dict(row._mapping) for row in rows]
+
+
 @router.post("/", response_model=CommentResponse)
 def create_comment(comment_in: CommentCreate, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
     """
@@ -36,32 +45,63 @@ def create_comment(comment_in: CommentCreate, session: Session = Depends(get_ses
         "content"   : content.content,
         "created_at": core_comment.created_at,
         "likes"     : stats.likes,
-        "dislikes"  : stats.dislikes
+        "dislikes"  : stats.dislikes,
+        "reply_count"      : stats.reply_count,
+        "total_descendants": stats.total_descendants,
     }
 
 @router.get("/post/{pid}", response_model=List[CommentResponse])
-def get_comments_for_post(pid: UUID, session: Session = Depends(get_session)):
+def get_comments_for_post(pid: UUID, session: Session = Depends(get_read_session)):
     """
     Retrieves a list of all comments associated with a specific post.
     """
-    statement = select(CommentCore).where(CommentCore.pid == pid).order_by(CommentCore.created_at.desc())
-    comments_core = session.exec(statement).all()
-    
-    response_list = []
-    for core in comments_core:
-        content = session.get(CommentContent, core.mid)
-        stats = session.get(CommentStats, core.mid)
-        response_list.append({
-            "mid"       : core.mid,
-            "uid"       : core.uid,
-            "pid"       : core.pid,
-            "parent_mid": core.parent_mid,
-            "content"   : content.content if content else None,
-            "created_at": core.created_at,
-            "likes"     : stats.likes if stats else 0,
-            "dislikes"  : stats.dislikes if stats else 0
-        })
-    return response_list
+    return _rows_as_dicts(CommentService.get_comments_for_post(session, pid))
+
+@router.get("/post/{pid}/thread", response_model=List[CommentThreadNode])
+def get_post_thread(
+    pid: UUID,
+    response: Response,
+    limit: int = 20,
+    max_depth: int = 3,
+    max_replies: int = 5,
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_read_session),
+):
+    """
+    Loads a page of root comments with their nested replies in a single query.
+    The next page of roots is in the X-Next-Cursor header; comments with unshown replies carry
+    `has_more_replies` and continue via /comments/{mid}/thread?cursor={more_replies_cursor}.
+    """
+    try:
+        tree, cursor_out = CommentService.get_thread(
+            session, pid=pid, limit=limit, max_depth=max_depth, max_replies=max_replies, cursor=cursor
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    set_next_cursor(response, cursor_out)
+    return tree
+
+@router.get("/{mid}/thread", response_model=List[CommentThreadNode])
+def get_comment_thread(
+    mid: UUID,
+    response: Response,
+    limit: int = 20,
+    max_depth: int = 3,
+    max_replies: int = 5,
+    cursor: Optional[str] = None,
+    session: Session = Depends(get_read_session),
+):
+    """
+    Loads the replies to a comment as a nested tree; the "load more" continuation of /post/{pid}/thread.
+    """
+    try:
+        tree, cursor_out = CommentService.get_thread(
+            session, parent_mid=mid, limit=limit, max_depth=max_depth, max_replies=max_replies, cursor=cursor
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    set_next_cursor(response, cursor_out)
+    return tree
 
 @router.delete("/{mid}")
 def delete_comment(mid: UUID, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
@@ -103,35 +143,56 @@ def react_to_comment(mid: UUID, reaction_in: CommentReactionCreate, session: Ses
     }
 
 @router.get("/post/{pid}/root", response_model=List[Any])
-def get_root_comments_for_post(pid: UUID, session: Session = Depends(get_session)):
+def get_root_comments_for_post(pid: UUID, session: Session = Depends(get_read_session)):
     """
     Retrieves top-level (direct) comments responding to a specific post.
     """
-    return CommentService.get_root_comments_for_post(session, pid)
+    return _rows_as_dicts(CommentService.get_root_comments_for_post(session, pid))
 
 @router.get("/{parent_mid}/replies", response_model=List[Any])
-def get_replies_for_comment(parent_mid: UUID, session: Session = Depends(get_session)):
+def get_replies_for_comment(parent_mid: UUID, session: Session = Depends(get_read_session)):
     """
     Retrieves all nested replies targeting a specific parent comment.
     """
-    return CommentService.get_replies_for_comment(session, parent_mid)
+    return _rows_as_dicts(CommentService.get_replies_for_comment(session, parent_mid))
+
+@router.get("/{mid}/subtree", response_model=List[Any])
+def get_comment_subtree(mid: UUID, max_depth: Optional[int] = None, sort: str = "oldest", session: Session = Depends(get_read_session)):
+    """
+    Retrieves a comment and all its descendants as a flat, sorted list with relative depths.
+    """
+    try:
+        rows = CommentService.get_subtree(session, mid, max_depth=max_depth, sort=sort)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if not rows:
+        raise HTTPException(status_code=404, detail="Comment not found")
+    return _rows_as_dicts(rows)
 
 @router.get("/post/{pid}/top", response_model=List[Any])
-def get_top_comments_for_post(pid: UUID, limit: int = 10, session: Session = Depends(get_session)):
+def get_top_comments_for_post(pid: UUID, limit: int = 10, session: Session = Depends(get_read_session)):
     """
-    Algorithmically surfaces the most constructive (highest likes - dislikes ratio) comments.
+    Algorithmically surfaces the most engaging comments (likes plus direct replies).
     """
-    return CommentService.get_top_comments_for_post(session, pid, limit)
+    return _rows_as_dicts(CommentService.get_top_comments_for_post(session, pid, limit))
 
 @router.get("/{mid}/likes", response_model=List[Any])
-def list_comment_likers(mid: UUID, session: Session = Depends(get_session)):
+def list_comment_likers(mid: UUID, session: Session = Depends(get_read_session)):
     """
     Retrieves the profiles of users who left positive engagement on a comment.
     """
     return CommentService.list_users_who_liked_comment(session, mid)
 
+@router.get("/{mid}/reactions/stats", response_model=List[Any])
+def get_comment_reaction_stats(mid: UUID, session: Session = Depends(get_read_session)):
+    """
+    Per-type reaction breakdown of a comment, e.g. [{"reaction_type": "LOVE", "count": 3}].
+    """
+    rows = CommentService.count_comment_reactions_by_type(session, mid)
+    return [{"reaction_type": reaction_type.name, "count": count} for reaction_type, count in rows]
+
 @router.get("/{mid}/reaction/me", response_model=Any)
-def check_my_reaction_to_comment(mid: UUID, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+def check_my_reaction_to_comment(mid: UUID, session: Session = Depends(get_read_session), current_user: UserAuth = Depends(get_current_user)):
     """
     Checks if the authenticated user reacted to a comment and retrieves the state.
     """
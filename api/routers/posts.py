@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select, desc
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select, col
 from typing import List, Optional, Any
 from uuid import UUID
 from datetime import datetime
 
-from api.database import get_session
+from api.database import get_session, get_read_session, get_read_engine
 from api.models.post import (
     PostCore,
     PostContent,
@@ -22,40 +24,104 @@ from api.services.post_service import PostService
 from api.services.cluster_service import ClusterService
 from api.services.megaphone_engagement_service import (
     get_poll_summary,
+    get_poll_summaries,
     get_event_summary,
+    get_event_summaries,
     cast_poll_vote,
     set_event_rsvp,
+    poll_snapshot,
+    event_snapshot,
 )
+from api.realtime import engagement_events
 from api.models.user import UserAuth
 from api.models.enums import MegaphoneType, PostType, EventRsvpStatus
 from api.auth import get_current_user, get_current_user_optional
+from api.counter_buffer import counter_buffer
+from api.pagination import next_cursor, set_next_cursor
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
 
+def _type_str(value) -> str:
+    return value.value if hasattr(value, "value") else str(value)
+
+
 def _serialize_post(core: PostCore, content: PostContent | None, stats: PostStats | None, session: Session = None) -> dict:
     """Convert a (PostCore, PostContent, PostStats) set to a JSON-serializable dict."""
-    data = {
-        "pid"       : str(core.pid),
-        "uid"       : str(core.uid),
-        "cid"       : str(core.cid),
-        "type"      : core.type if isinstance(core.type, str) else core.type.value,
-        "content"   : content.content if content else None,
-        "tags"      : content.tags if content else None,
-        "created_at": core.created_at.isoformat() if core.created_at else None,
-        "likes"     : stats.likes if stats else 0,
-        "dislikes"  : stats.dislikes if stats else 0,
-        "megaphone" : None,
-        "window_origin": None
-    }
+    return _serialize_posts([(core, content, stats)], session)[0]
+
 
-    if session:
-        # Attach megaphone metadata if a Megaphone record exists for this post
-        meg = session.get(Megaphone, core.pid)
+def _serialize_posts(rows, session: Session = None) -> list[dict]:
+    """
+    Convert a page of (PostCore, PostContent, PostStats) rows to JSON-serializable dicts.
+
+    Megaphone metadata, window origins, clusters and authors are hydrated for the whole
+    page at once, so the number of queries stays fixed no matter how many rows are passed.
+    """
+    rows = list(rows)
+    out = []
+    for core, content, stats in rows:
+        counts = counter_buffer.merged(core.pid, likes=stats.likes, dislikes=stats.dislikes) if stats else {"likes": 0, "dislikes": 0}
+        out.append({
+            "pid"       : str(core.pid),
+            "uid"       : str(core.uid),
+            "cid"       : str(core.cid),
+            "type"      : core.type if isinstance(core.type, str) else core.type.value,
+            "content"   : content.content if content else None,
+            "tags"      : content.tags if content else None,
+            "created_at": core.created_at.isoformat() if core.created_at else None,
+            "likes"     : counts["likes"],
+            "dislikes"  : counts["dislikes"],
+            "megaphone" : None,
+            "window_origin": None
+        })
+
+    if not session or not rows:
+        return out
+
+    pids = [core.pid for core, _, _ in rows]
+    window_pids = [core.pid for core, _, _ in rows if _type_str(core.type) == PostType.WINDOW.value]
+
+    # 1. Megaphones and windows attached to this page
+    megaphones = {m.pid: m for m in session.exec(select(Megaphone).where(col(Megaphone.pid).in_(pids))).all()}
+    windows = {}
+    if window_pids:
+        windows = {w.wid: w for w in session.exec(select(Window).where(col(Window.wid).in_(window_pids))).all()}
+
+    # 2. Origin posts referenced by windows
+    origins = {}
+    origin_pids = {w.origin_pid for w in windows.values()}
+    if origin_pids:
+        origin_rows = session.exec(
+            select(PostCore, PostContent)
+            .outerjoin(PostContent, PostCore.pid == PostContent.pid)
+            .where(col(PostCore.pid).in_(origin_pids))
+        ).all()
+        origins = {origin_core.pid: (origin_core, origin_content) for origin_core, origin_content in origin_rows}
+
+    # 3. Clusters (megaphone hosts and window origins) and origin authors
+    cids = {core.cid for core, _, _ in rows if core.pid in megaphones}
+    cids.update(origin_core.cid for origin_core, _ in origins.values())
+    clusters = {}
+    if cids:
+        clusters = {c.cid: c for c in session.exec(select(ClusterCore).where(col(ClusterCore.cid).in_(cids))).all()}
+    author_uids = {origin_core.uid for origin_core, _ in origins.values()}
+    authors = {}
+    if author_uids:
+        authors = {a.uid: a for a in session.exec(select(UserProfile).where(col(UserProfile.uid).in_(author_uids))).all()}
+
+    # 4. Poll / event summaries for every megaphone on the page
+    poll_pids = [pid for pid, m in megaphones.items() if _type_str(m.type) == MegaphoneType.POLL.value]
+    event_pids = [pid for pid, m in megaphones.items() if _type_str(m.type) == MegaphoneType.EVENT.value]
+    polls = get_poll_summaries(session, poll_pids, None)
+    events = get_event_summaries(session, event_pids, None)
+
+    for data, (core, _, _) in zip(out, rows):
+        meg = megaphones.get(core.pid)
         if meg:
-            mt = meg.type.value if hasattr(meg.type, "value") else str(meg.type)
-            cl = session.get(ClusterCore, core.cid)
+            mt = _type_str(meg.type)
+            cl = clusters.get(core.cid)
             mdict: dict = {
                 "start_time": meg.start_time.isoformat(),
                 "end_time": meg.end_time.isoformat(),
@@ -66,33 +132,27 @@ def _serialize_post(core: PostCore, content: PostContent | None, stats: PostStat
                 "cluster_name": cl.name if cl else None,
             }
             if mt == "POLL":
-                mdict["poll"] = get_poll_summary(session, core.pid, None)
+                mdict["poll"] = polls[core.pid]
             if mt == "EVENT":
-                mdict["event"] = get_event_summary(session, core.pid, None)
+                mdict["event"] = events[core.pid]
             data["megaphone"] = mdict
 
-        # Attach window metadata if this is a WINDOW type post
-        is_window = (core.type == PostType.WINDOW) or (hasattr(core.type, "value") and core.type.value == "WINDOW") or (core.type == "WINDOW")
-        if is_window:
-            window = session.get(Window, core.pid)
-            if window:
-                origin_core = session.get(PostCore, window.origin_pid)
-                if origin_core:
-                    origin_content = session.get(PostContent, window.origin_pid)
-                    cluster = session.get(ClusterCore, origin_core.cid)
-                    author = session.exec(select(UserProfile).where(UserProfile.uid == origin_core.uid)).first()
-                    
-                    data["window_origin"] = {
-                        "origin_pid": str(origin_core.pid),
-                        "origin_cid": str(origin_core.cid),
-                        "cluster_name": cluster.name if cluster else None,
-                        "author_name": author.name if author else None,
-                        "author_uid": str(origin_core.uid),
-                        "content": origin_content.content if origin_content else None,
-                        "created_at": origin_core.created_at.isoformat() if origin_core.created_at else None,
-                    }
-
-    return data
+        window = windows.get(core.pid)
+        if window and window.origin_pid in origins:
+            origin_core, origin_content = origins[window.origin_pid]
+            cluster = clusters.get(origin_core.cid)
+            author = authors.get(origin_core.uid)
+            data["window_origin"] = {
+                "origin_pid": str(origin_core.pid),
+                "origin_cid": str(origin_core.cid),
+                "cluster_name": cluster.name if cluster else None,
+                "author_name": author.name if author else None,
+                "author_uid": str(origin_core.uid),
+                "content": origin_content.content if origin_content else None,
+                "created_at": origin_core.created_at.isoformat() if origin_core.created_at else None,
+            }
+
+    return out
 
 
 @router.post("/", response_model=PostResponse)
@@ -111,26 +171,41 @@ def create_post(post_in: PostCreate, session: Session = Depends(get_session), cu
     return _serialize_post(core_post, content, stats, session)
 
 
+def _serialize_recent(rows):
+    """
+    Flattens (pid, content, likes, created_at) rows from the recent-posts feeds.
+    """
+    return [{"pid": str(pid), "content": content, "likes": counter_buffer.merged(pid, likes=likes)["likes"], "created_at": ca.isoformat() if ca else None}
+            for pid, content, likes, ca in rows]
+
+
+def _created_key(row):
+    return row[0].created_at, row[0].pid
+
+
 @router.get("/me/feed", response_model=List[Any])
-def get_my_homepage_feed(limit: int = 50, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+def get_my_homepage_feed(response: Response, limit: int = 50, cursor: Optional[str] = None, session: Session = Depends(get_read_session), current_user: UserAuth = Depends(get_current_user)):
     """
     Generates a custom feed by extracting posts from clusters the user is a member of.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
-    rows = PostService.get_homepage_feed_for_user(session, current_user.uid, limit)
-    return [_serialize_post(core, content, stats, session) for core, content, stats in rows]
+    rows = PostService.get_homepage_feed_for_user(session, current_user.uid, limit, cursor)
+    set_next_cursor(response, next_cursor(rows, limit, _created_key))
+    return _serialize_posts(rows, session)
 
 
 @router.get("/trending/global", response_model=List[Any])
-def get_global_trending_posts(limit: int = 20, session: Session = Depends(get_session)):
+def get_global_trending_posts(response: Response, limit: int = 20, cursor: Optional[str] = None, session: Session = Depends(get_read_session)):
     """
     Retrieves universally trending content across all public clusters based on like velocity.
     """
-    rows = PostService.get_trending_posts_globally(session, limit)
-    return [_serialize_post(core, content, stats, session) for core, content, stats in rows]
+    rows = PostService.get_trending_posts_globally(session, limit, cursor)
+    set_next_cursor(response, next_cursor(rows, limit, lambda row: (row[3], row[0].pid)))
+    return _serialize_posts([(core, content, stats) for core, content, stats, _score in rows], session)
 
 
 @router.get("/megaphones/active", response_model=List[Any])
-def get_active_megaphones(session: Session = Depends(get_session)):
+def get_active_megaphones(session: Session = Depends(get_read_session)):
     """
     Fetches currently promoted global posts.
     """
@@ -142,7 +217,7 @@ def get_active_megaphones(session: Session = Depends(get_session)):
 
 
 @router.get("/{pid}", response_model=PostResponse)
-def get_post(pid: UUID, session: Session = Depends(get_session)):
+def get_post(pid: UUID, session: Session = Depends(get_read_session)):
     """
     Retrieves a single post by ID including its content and interaction stats.
     """
@@ -155,23 +230,14 @@ def get_post(pid: UUID, session: Session = Depends(get_session)):
 
 
 @router.get("/", response_model=List[PostResponse])
-def list_posts(skip: int = 0, limit: int = 100, cid: Optional[UUID] = None, session: Session = Depends(get_session)):
+def list_posts(response: Response, skip: int = 0, limit: int = 100, cid: Optional[UUID] = None, cursor: Optional[str] = None, session: Session = Depends(get_read_session)):
     """
     Fetches a paginated list of posts, optionally filtered by a specific cluster ID.
+    Prefer `cursor` (from the X-Next-Cursor header) over `skip` for deep pages.
     """
-    statement = select(PostCore)
-    if cid:
-        statement = statement.where(PostCore.cid == cid)
-
-    statement = statement.order_by(desc(PostCore.created_at)).offset(skip).limit(limit)
-    posts_core = session.exec(statement).all()
-
-    response_list = []
-    for core in posts_core:
-        content = session.get(PostContent, core.pid)
-        stats = session.get(PostStats, core.pid)
-        response_list.append(_serialize_post(core, content, stats, session))
-    return response_list
+    rows = PostService.list_posts(session, cid, limit, cursor, skip)
+    set_next_cursor(response, next_cursor(rows, limit, _created_key))
+    return _serialize_posts(rows, session)
 
 
 @router.post("/{pid}/react")
@@ -218,7 +284,7 @@ def remove_reaction(pid: UUID, session: Session = Depends(get_session), current_
 
 
 @router.get("/{pid}/reaction/me", response_model=Any)
-def get_my_reaction(pid: UUID, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+def get_my_reaction(pid: UUID, session: Session = Depends(get_read_session), current_user: UserAuth = Depends(get_current_user)):
     """
     Returns the current user's reaction on a post, or null if none exists.
     """
@@ -366,42 +432,42 @@ def create_megaphone(
 
 
 @router.get("/cluster/{cid}/recent", response_model=List[Any])
-def get_recent_cluster_posts(cid: UUID, limit: int = 50, session: Session = Depends(get_session)):
+def get_recent_cluster_posts(cid: UUID, response: Response, limit: int = 50, cursor: Optional[str] = None, session: Session = Depends(get_read_session)):
     """
     Feed generator for a specific cluster container.
     """
-    rows = PostService.get_recent_posts_for_cluster(session, cid, limit)
-    return [{"pid": str(pid), "content": content, "likes": likes, "created_at": ca.isoformat() if ca else None}
-            for pid, content, likes, ca in rows]
+    rows = PostService.get_recent_posts_for_cluster(session, cid, limit, cursor)
+    set_next_cursor(response, next_cursor(rows, limit, lambda row: (row.created_at, row.pid)))
+    return _serialize_recent(rows)
 
 
 @router.get("/user/{uid}/recent", response_model=List[Any])
-def get_recent_user_posts(uid: UUID, limit: int = 50, session: Session = Depends(get_session)):
+def get_recent_user_posts(uid: UUID, response: Response, limit: int = 50, cursor: Optional[str] = None, session: Session = Depends(get_read_session)):
     """
     Feed generator for a specific user's public profile.
     """
-    rows = PostService.get_recent_posts_by_user(session, uid, limit)
-    return [{"pid": str(pid), "content": content, "likes": likes, "created_at": ca.isoformat() if ca else None}
-            for pid, content, likes, ca in rows]
+    rows = PostService.get_recent_posts_by_user(session, uid, limit, cursor)
+    set_next_cursor(response, next_cursor(rows, limit, lambda row: (row.created_at, row.pid)))
+    return _serialize_recent(rows)
 
 
 @router.get("/cluster/{cid}/top-liked", response_model=List[Any])
-def get_top_liked_posts_in_cluster(cid: UUID, limit: int = 5, session: Session = Depends(get_session)):
+def get_top_liked_posts_in_cluster(cid: UUID, limit: int = 5, session: Session = Depends(get_read_session)):
     return PostService.get_top_liked_posts_in_cluster(session, cid, limit)
 
 
 @router.get("/cluster/{cid}/controversial", response_model=List[Any])
-def get_most_controversial_posts_in_cluster(cid: UUID, limit: int = 5, session: Session = Depends(get_session)):
+def get_most_controversial_posts_in_cluster(cid: UUID, limit: int = 5, session: Session = Depends(get_read_session)):
     return PostService.get_most_controversial_posts_in_cluster(session, cid, limit)
 
 
 @router.get("/{pid}/likes", response_model=List[Any])
-def list_post_likers(pid: UUID, session: Session = Depends(get_session)):
+def list_post_likers(pid: UUID, session: Session = Depends(get_read_session)):
     return PostService.list_users_who_liked_post(session, pid)
 
 
 @router.get("/{pid}/reactions/stats", response_model=List[Any])
-def get_post_reaction_stats(pid: UUID, session: Session = Depends(get_session)):
+def get_post_reaction_stats(pid: UUID, session: Session = Depends(get_read_session)):
     rows = PostService.count_post_reactions_by_type(session, pid)
     out = []
     for row in rows:
@@ -415,12 +481,12 @@ def get_post_reaction_stats(pid: UUID, session: Session = Depends(get_session)):
 
 
 @router.get("/{pid}/windows", response_model=List[Any])
-def get_post_windows(pid: UUID, session: Session = Depends(get_session)):
+def get_post_windows(pid: UUID, session: Session = Depends(get_read_session)):
     return PostService.get_windows_for_post(session, pid)
 
 
 @router.get("/{pid}/window-origin", response_model=Any)
-def get_window_origin(pid: UUID, session: Session = Depends(get_session)):
+def get_window_origin(pid: UUID, session: Session = Depends(get_read_session)):
     """
     For a WINDOW-type post identified by pid, returns the original post data
     (content, cluster name, author name) so the UI can show "Originally posted in..."
@@ -439,6 +505,7 @@ def get_window_origin(pid: UUID, session: Session = Depends(get_session)):
 
     origin_content = session.get(PostContent, window.origin_pid)
     origin_stats = session.get(PostStats, window.origin_pid)
+    counts = counter_buffer.merged(window.origin_pid, likes=origin_stats.likes, dislikes=origin_stats.dislikes) if origin_stats else {"likes": 0, "dislikes": 0}
 
     # Resolve cluster name
     cluster = session.get(ClusterCore, origin_core.cid)
@@ -457,13 +524,13 @@ def get_window_origin(pid: UUID, session: Session = Depends(get_session)):
         "content": origin_content.content if origin_content else None,
         "tags": origin_content.tags if origin_content else None,
         "created_at": origin_core.created_at.isoformat() if origin_core.created_at else None,
-        "likes": origin_stats.likes if origin_stats else 0,
-        "dislikes": origin_stats.dislikes if origin_stats else 0,
+        "likes": counts["likes"],
+        "dislikes": counts["dislikes"],
     }
 
 
 @router.get("/{pid}/megaphone-info", response_model=Any)
-def get_megaphone_info(pid: UUID, session: Session = Depends(get_session)):
+def get_megaphone_info(pid: UUID, session: Session = Depends(get_read_session)):
     """
     Returns megaphone metadata for a promoted post (cluster, schedule, poll/event summaries).
     """
@@ -490,6 +557,40 @@ def get_megaphone_info(pid: UUID, session: Session = Depends(get_session)):
     return out
 
 
+@router.get("/{pid}/megaphone/stream")
+def stream_megaphone_engagement(
+    pid: UUID,
+    request: Request,
+    bind: Engine = Depends(get_read_engine),
+):
+    """
+    Server-sent events for a poll/event megaphone: the current counts, then one
+    `engagement` frame per coalescing interval whenever votes or RSVPs change.
+    Database reads use short sessions, so open streams hold no pooled connection.
+    """
+    with Session(bind) as session:
+        meg = session.get(Megaphone, pid)
+        if not meg:
+            raise HTTPException(status_code=404, detail="No megaphone record for this post")
+        mt = meg.type.value if hasattr(meg.type, "value") else str(meg.type)
+    if mt == "POLL":
+        summarize, snapshot = get_poll_summary, poll_snapshot
+    elif mt == "EVENT":
+        summarize, snapshot = get_event_summary, event_snapshot
+    else:
+        raise HTTPException(status_code=400, detail="Only poll and event megaphones have live engagement")
+
+    def load_initial():
+        with Session(bind) as session:
+            return snapshot(pid, summarize(session, pid, None))
+
+    return StreamingResponse(
+        engagement_events(pid, load_initial, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 class PollVotePayload(BaseModel):
     option_index: int
 
@@ -501,12 +602,12 @@ class EventRsvpPayload(BaseModel):
 @router.get("/{pid}/megaphone/engagement", response_model=Any)
 def get_megaphone_engagement(
     pid: UUID,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
     current_user: Optional[UserAuth] = Depends(get_current_user_optional),
 ):
     """
     Live megaphone engagement: poll counts and per-user vote, or event RSVP totals and mine.
-    Poll periodically from the client for real-time updates.
+    For real-time updates subscribe to /posts/{pid}/megaphone/stream instead of polling.
     """
     meg = session.get(Megaphone, pid)
     if not meg:
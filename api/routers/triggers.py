@@ -1,7 +1,7 @@
 """
 api/routers/triggers.py
 
-Endpoints that demonstrate and verify the 5 SQL triggers in action.
+Endpoints that demonstrate and verify the SQL triggers in action.
 Each endpoint queries the database to show the state that triggers maintain.
 """
 
@@ -10,7 +10,10 @@ from sqlmodel import Session, select, text
 from typing import Any, List
 from uuid import UUID
 
+from api.auth import get_current_admin
 from api.database import get_session
+from api.models.user import UserAuth
+from api.services.reconcile_service import ReconcileService
 
 router = APIRouter(prefix="/triggers", tags=["Triggers"])
 
@@ -136,11 +139,115 @@ def verify_last_active_trigger(uid: UUID, session: Session = Depends(get_session
     }
 
 
+@router.get("/verify/follow-counts/{uid}", response_model=Any)
+def verify_follow_counts_trigger(uid: UUID, session: Session = Depends(get_session)):
+    """
+    Triggers 6 & 7: trg_increment_follow_counts / trg_decrement_follow_counts
+    Shows the actual follow edges for a user vs the trigger-maintained
+    counts in userfollowstats. They should match.
+    """
+    actual_followers = session.exec(
+        text("SELECT COUNT(*) FROM userfollow WHERE following_uid = :uid"), params={"uid": uid.hex}
+    ).first()[0]
+    actual_following = session.exec(
+        text("SELECT COUNT(*) FROM userfollow WHERE follower_uid = :uid"), params={"uid": uid.hex}
+    ).first()[0]
+    stats = session.exec(
+        text("SELECT follower_count, following_count FROM userfollowstats WHERE uid = :uid"), params={"uid": uid.hex}
+    ).first()
+    trigger_followers, trigger_following = (stats[0], stats[1]) if stats else (0, 0)
+
+    return {
+        "trigger": "trg_increment/decrement_follow_counts",
+        "description": "AFTER INSERT/DELETE on userfollow → updates userfollowstats follower/following counts",
+        "actual_followers": actual_followers,
+        "actual_following": actual_following,
+        "trigger_maintained_followers": trigger_followers,
+        "trigger_maintained_following": trigger_following,
+        "counts_match": actual_followers == trigger_followers and actual_following == trigger_following,
+    }
+
+
+@router.get("/verify/reply-counts/{mid}", response_model=Any)
+def verify_reply_counts_trigger(mid: UUID, session: Session = Depends(get_session)):
+    """
+    Triggers 8 & 9: trg_increment_reply_counts / trg_decrement_reply_counts
+    Shows the actual direct replies and descendants of a comment vs the
+    trigger-maintained counters in commentstats. They should match.
+    """
+    actual_replies = session.exec(
+        text("SELECT COUNT(*) FROM commentcore WHERE parent_mid = :mid"), params={"mid": mid.hex}
+    ).first()[0]
+    actual_descendants = session.exec(
+        text("SELECT COUNT(*) FROM commentclosure WHERE ancestor_mid = :mid AND depth > 0"), params={"mid": mid.hex}
+    ).first()[0]
+    stats = session.exec(
+        text("SELECT reply_count, total_descendants FROM commentstats WHERE mid = :mid"), params={"mid": mid.hex}
+    ).first()
+    trigger_replies, trigger_descendants = (stats[0], stats[1]) if stats else (0, 0)
+
+    return {
+        "trigger": "trg_increment/decrement_reply_counts",
+        "description": "AFTER INSERT/DELETE on commentcore → updates commentstats reply_count/total_descendants",
+        "actual_replies": actual_replies,
+        "actual_descendants": actual_descendants,
+        "trigger_maintained_replies": trigger_replies,
+        "trigger_maintained_descendants": trigger_descendants,
+        "counts_match": actual_replies == trigger_replies and actual_descendants == trigger_descendants,
+    }
+
+
+@router.get("/verify/post-rollups/{uid}", response_model=Any)
+def verify_post_rollups_trigger(uid: UUID, session: Session = Depends(get_session)):
+    """
+    Triggers 10-15: trg_rollup_*
+    Recomputes a user's post count, likes and reactions received from the base tables
+    and compares them with the trigger-maintained userpoststats row.
+    """
+    actual = session.exec(
+        text(
+            "SELECT COUNT(*), COALESCE(SUM(s.likes), 0), "
+            "(SELECT COUNT(*) FROM postreaction r JOIN postcore c ON c.pid = r.pid WHERE c.uid = :uid) "
+            "FROM postcore p LEFT JOIN poststats s ON s.pid = p.pid WHERE p.uid = :uid"
+        ),
+        params={"uid": uid.hex},
+    ).first()
+    stats = session.exec(
+        text("SELECT post_count, total_likes, total_reactions FROM userpoststats WHERE uid = :uid"), params={"uid": uid.hex}
+    ).first()
+    actual = {"post_count": actual[0], "total_likes": actual[1], "total_reactions": actual[2]}
+    maintained = {"post_count": stats[0], "total_likes": stats[1], "total_reactions": stats[2]} if stats else {"post_count": 0, "total_likes": 0, "total_reactions": 0}
+
+    return {
+        "trigger": "trg_rollup_*",
+        "description": "AFTER INSERT/UPDATE/DELETE on postcore, poststats, postreaction → updates userpoststats/clusterpoststats",
+        "actual": actual,
+        "trigger_maintained": maintained,
+        "counts_match": actual == maintained,
+    }
+
+
+@router.post("/reconcile", response_model=Any)
+def run_reconciliation(
+    sweep: bool = False,
+    session: Session = Depends(get_session),
+    admin: UserAuth = Depends(get_current_admin),
+):
+    """
+    Runs a reconciliation pass now instead of waiting for the background loop.
+    With sweep=true every stats row is re-checked, not only those in the change log.
+    Admins only: a sweep rewrites every stats table.
+    """
+    if sweep:
+        return {kind: ReconcileService.sweep(session, kind) for kind in ReconcileService.KINDS}
+    return ReconcileService.run(session)
+
+
 @router.get("/dashboard", response_model=Any)
 def trigger_dashboard(session: Session = Depends(get_session)):
     """
-    Aggregate dashboard showing all 5 triggers and summary statistics
-    proving they are active and working.
+    Aggregate dashboard showing all triggers and the health of the counters they maintain.
+    Counter accuracy comes from the reconciler's stored results, so no table is scanned here.
     """
     # 1. Count registered triggers
     triggers = session.exec(
@@ -148,28 +255,10 @@ def trigger_dashboard(session: Session = Depends(get_session)):
     ).all()
     trigger_names = [row[0] for row in triggers]
 
-    # 2. Post stats coverage (trg_init_post_stats)
-    total_posts = session.exec(text("SELECT COUNT(*) FROM postcore")).first()[0]
-    posts_with_stats = session.exec(text("SELECT COUNT(*) FROM poststats")).first()[0]
-
-    # 3. Comment stats coverage (trg_init_comment_stats)
-    total_comments = session.exec(text("SELECT COUNT(*) FROM commentcore")).first()[0]
-    comments_with_stats = session.exec(text("SELECT COUNT(*) FROM commentstats")).first()[0]
-
-    # 4. Member count accuracy (trg_increment/decrement_member_count)
-    # Check a sample of clusters
-    mismatches = session.exec(text("""
-        SELECT cs.cid, cs.member_count AS trigger_count, 
-               (SELECT COUNT(*) FROM clustermember cm WHERE cm.cid = cs.cid) AS actual_count
-        FROM clusterstats cs
-        WHERE cs.member_count != (SELECT COUNT(*) FROM clustermember cm WHERE cm.cid = cs.cid)
-        LIMIT 5
-    """)).all()
-
-    # 5. Total clusters
-    total_clusters = session.exec(text("SELECT COUNT(*) FROM clustercore")).first()[0]
+    # 2. Last reconciliation results per counter kind
+    reconcile = ReconcileService.get_status(session)
 
-    # 6. Recent user activity (trg_update_last_active)
+    # 3. Recent user activity (trg_update_last_active)
     recently_active = session.exec(text("""
         SELECT up.name, up.last_active 
         FROM userprofile up 
@@ -182,21 +271,16 @@ def trigger_dashboard(session: Session = Depends(get_session)):
         "trigger_count": len(trigger_names),
         "trg_init_post_stats": {
             "description": "AFTER INSERT on postcore → auto-creates poststats(pid, 0, 0)",
-            "total_posts": total_posts,
-            "posts_with_stats": posts_with_stats,
-            "coverage": f"{(posts_with_stats/total_posts*100):.1f}%" if total_posts > 0 else "N/A",
+            "reconciler": reconcile["post"],
         },
         "trg_init_comment_stats": {
             "description": "AFTER INSERT on commentcore → auto-creates commentstats(mid, 0, 0)",
-            "total_comments": total_comments,
-            "comments_with_stats": comments_with_stats,
-            "coverage": f"{(comments_with_stats/total_comments*100):.1f}%" if total_comments > 0 else "N/A",
+            "reconciler": reconcile["comment"],
         },
         "trg_member_count": {
             "description": "AFTER INSERT/DELETE on clustermember → increments/decrements clusterstats.member_count",
-            "total_clusters": total_clusters,
-            "mismatched_clusters": len(mismatches),
-            "all_counts_accurate": len(mismatches) == 0,
+            "reconciler": reconcile["cluster"],
+            "all_counts_accurate": reconcile["cluster"]["repaired"] == 0,
         },
         "trg_update_last_active": {
             "description": "AFTER INSERT on postcore → updates userprofile.last_active = CURRENT_TIMESTAMP",
@@ -1,30 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session, select
-from typing import List, Any
+from typing import List, Any, Optional
 from uuid import UUID
 
-from api.database import get_session
+from api.database import get_session, get_read_session
 from api.models.user import UserAuth, UserProfile
 from api.models.follow import UserFollow
-from api.models.post import PostCore, PostContent, PostStats
 from api.models.comment import CommentCore, CommentContent, CommentStats
 from api.schemas.user import UserCreate, UserResponse, UserProfileResponse, UserUpdate
 from api.services.user_service import UserService
 from api.auth import create_access_token, get_current_user
+from api.security import get_password_hash_async
+from api.pagination import next_cursor, set_next_cursor
+from api.response_cache import cached_response
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
 def _follow_counts(session: Session, uid: UUID) -> tuple[int, int]:
     """How many users follow `uid`, and how many users `uid` follows."""
-    follower_count = len(
-        session.exec(select(UserFollow).where(UserFollow.following_uid == uid)).all()
-    )
-    following_count = len(
-        session.exec(select(UserFollow).where(UserFollow.follower_uid == uid)).all()
-    )
-    return follower_count, following_count
+    return UserService.get_follow_counts(session, uid)
 
 
 def _profile_response_with_follow_counts(session: Session, profile: UserProfile) -> UserProfileResponse:
@@ -33,23 +30,25 @@ def _profile_response_with_follow_counts(session: Session, profile: UserProfile)
     return base.model_copy(update={"follower_count": fc, "following_count": fg})
 
 @router.post("/", response_model=UserResponse)
-def create_user(user_in: UserCreate, session: Session = Depends(get_session)):
+async def create_user(user_in: UserCreate, session: Session = Depends(get_session)):
     """
     Registers a new user setting up their authentication credentials and public profile.
+    The password is hashed on the bcrypt pool; database work runs on the threadpool.
     """
     if user_in.email:
         statement = select(UserAuth).where(UserAuth.email == user_in.email)
-        existing_user = session.exec(statement).first()
+        existing_user = await run_in_threadpool(lambda: session.exec(statement).first())
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already registered")
 
-    auth_user, profile = UserService.register_user(session, user_in)
+    password_hash = await get_password_hash_async(user_in.password)
+    auth_user, profile = await run_in_threadpool(UserService.register_user, session, user_in, password_hash)
     return auth_user
 
 # ---- Static-path endpoints MUST come before /{uid} dynamic routes ------------
 
 @router.get("/search", response_model=List[UserProfileResponse])
-def search_users(q: str = "", limit: int = 20, session: Session = Depends(get_session)):
+def search_users(q: str = "", limit: int = 20, session: Session = Depends(get_read_session)):
     """
     Searches users by name (case-insensitive substring match).
     """
@@ -62,7 +61,7 @@ def search_users(q: str = "", limit: int = 20, session: Session = Depends(get_se
     return session.exec(statement).all()
 
 @router.get("/me/profile", response_model=UserProfileResponse)
-def get_my_profile(session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+def get_my_profile(session: Session = Depends(get_read_session), current_user: UserAuth = Depends(get_current_user)):
     """
     Retrieves the public profile for the currently authenticated user.
     """
@@ -101,21 +100,24 @@ def verify_my_account(new_email: str, session: Session = Depends(get_session), c
     return {"message": "Account verified successfully"}
 
 @router.get("/stats/most-active-verified", response_model=List[Any])
-def get_most_active_verified(limit: int = 5, session: Session = Depends(get_session)):
+@cached_response(ttl=60, tags=("users", "posts"))
+def get_most_active_verified(limit: int = 5, session: Session = Depends(get_read_session)):
     """
     Ranks top verified users based purely on contribution volume (post count).
     """
     return UserService.get_most_active_verified_users(session, limit)
 
 @router.get("/stats/most-liked", response_model=List[Any])
-def get_most_liked(limit: int = 5, session: Session = Depends(get_session)):
+@cached_response(ttl=60, tags=("users", "posts", "reactions"))
+def get_most_liked(limit: int = 5, session: Session = Depends(get_read_session)):
     """
     Ranks top overall users based on total aggregate likes accumulated across all posts.
     """
     return UserService.get_most_liked_users(session, limit)
 
 @router.get("/stats/most-engaged", response_model=List[Any])
-def get_most_engaged(limit: int = 5, session: Session = Depends(get_session)):
+@cached_response(ttl=60, tags=("users", "reactions"))
+def get_most_engaged(limit: int = 5, session: Session = Depends(get_read_session)):
     """
     Ranks top users based on how frequently they leave reactions on others' posts.
     """
@@ -124,7 +126,7 @@ def get_most_engaged(limit: int = 5, session: Session = Depends(get_session)):
 # ---- Dynamic /{uid} routes ----------------------------------------------------
 
 @router.get("/{uid}", response_model=UserProfileResponse)
-def get_user(uid: UUID, session: Session = Depends(get_session)):
+def get_user(uid: UUID, session: Session = Depends(get_read_session)):
     """
     Retrieves the public profile for a specific user ID.
     """
@@ -135,19 +137,22 @@ def get_user(uid: UUID, session: Session = Depends(get_session)):
     return _profile_response_with_follow_counts(session, profile)
 
 @router.get("/", response_model=List[UserProfileResponse])
-def list_users(skip: int = 0, limit: int = 100, session: Session = Depends(get_session)):
+def list_users(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, session: Session = Depends(get_read_session)):
     """
-    Returns a paginated list of all user profiles.
+    Returns a paginated list of all user profiles, newest first.
+    Prefer `cursor` (from the X-Next-Cursor header) over `skip` for deep pages.
     """
-    statement = select(UserProfile).offset(skip).limit(limit)
-    return session.exec(statement).all()
+    profiles = UserService.list_user_profiles(session, limit, cursor, skip)
+    set_next_cursor(response, next_cursor(profiles, limit, lambda p: (p.created_at, p.uid)))
+    return profiles
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
     """
     Authenticates a user and returns a JWT token.
+    Answers 503 when the bcrypt pool is saturated instead of queueing without bound.
     """
-    user = UserService.verify_login_credentials(session, form_data.username, form_data.password)
+    user = await UserService.verify_login_credentials_async(session, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -160,7 +165,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = D
 # ---- Follow / Unfollow --------------------------------------------------------
 
 @router.get("/{uid}/follow/me", response_model=Any)
-def check_follow_status(uid: UUID, session: Session = Depends(get_session), current_user: UserAuth = Depends(get_current_user)):
+def check_follow_status(uid: UUID, session: Session = Depends(get_read_session), current_user: UserAuth = Depends(get_current_user)):
     """
     Returns whether the current user follows the target user.
     """
@@ -204,63 +209,53 @@ def unfollow_user(uid: UUID, current_user: UserAuth = Depends(get_current_user),
     return {"message": "Unfollowed", "follower_count": fc}
 
 @router.get("/{uid}/followers", response_model=Any)
-def get_followers(uid: UUID, session: Session = Depends(get_session)):
+def get_followers(uid: UUID, response: Response, limit: int = 100, cursor: Optional[str] = None, session: Session = Depends(get_read_session)):
     """
-    Returns the list of users who follow the given uid.
+    Returns users who follow the given uid, most recent first.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
-    rows = session.exec(select(UserFollow).where(UserFollow.following_uid == uid)).all()
-    profiles = []
-    for row in rows:
-        p = session.get(UserProfile, row.follower_uid)
-        if p:
-            profiles.append({"uid": str(p.uid), "name": p.name, "bio": p.bio})
-    return profiles
+    rows = UserService.list_followers(session, uid, limit, cursor)
+    set_next_cursor(response, next_cursor(rows, limit, lambda row: (row[0].created_at, row[0].follower_uid)))
+    return [{"uid": str(p.uid), "name": p.name, "bio": p.bio} for _edge, p in rows]
 
 @router.get("/{uid}/following", response_model=Any)
-def get_following(uid: UUID, session: Session = Depends(get_session)):
+def get_following(uid: UUID, response: Response, limit: int = 100, cursor: Optional[str] = None, session: Session = Depends(get_read_session)):
     """
-    Returns the list of users the given uid follows.
+    Returns users the given uid follows, most recent first.
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the next page.
     """
-    rows = session.exec(select(UserFollow).where(UserFollow.follower_uid == uid)).all()
-    profiles = []
-    for row in rows:
-        p = session.get(UserProfile, row.following_uid)
-        if p:
-            profiles.append({"uid": str(p.uid), "name": p.name, "bio": p.bio})
-    return profiles
+    rows = UserService.list_following(session, uid, limit, cursor)
+    set_next_cursor(response, next_cursor(rows, limit, lambda row: (row[0].created_at, row[0].following_uid)))
+    return [{"uid": str(p.uid), "name": p.name, "bio": p.bio} for _edge, p in rows]
 
 # ---- Public user data ---------------------------------------------------------
 
 @router.get("/{uid}/posts", response_model=List[Any])
-def get_user_posts(uid: UUID, session: Session = Depends(get_session)):
+def get_user_posts(uid: UUID, response: Response, limit: Optional[int] = None, cursor: Optional[str] = None, session: Session = Depends(get_read_session)):
     """
     Lists all posts by a user with the same shape as GET /posts (including megaphone metadata).
+    Pass `limit` (and then `cursor` from the X-Next-Cursor header) to page through them.
     """
-    from api.routers.posts import _serialize_post
+    from api.routers.posts import _serialize_posts, _created_key
 
-    rows = UserService.get_user_posts_across_clusters(session, uid)
-    return [_serialize_post(core, content, stats, session) for core, content, stats in rows]
+    rows = UserService.get_user_posts_across_clusters(session, uid, limit, cursor)
+    if limit is not None:
+        set_next_cursor(response, next_cursor(rows, limit, _created_key))
+    return _serialize_posts(rows, session)
 
 @router.get("/{uid}/recent-posts", response_model=List[Any])
-def get_user_recent_posts(uid: UUID, limit: int = 30, session: Session = Depends(get_session)):
+def get_user_recent_posts(uid: UUID, response: Response, limit: int = 30, cursor: Optional[str] = None, session: Session = Depends(get_read_session)):
     """
     Returns recent posts by a user in full PostResponse shape (including megaphone metadata).
     """
-    from api.routers.posts import _serialize_post
+    from api.routers.posts import _serialize_posts, _created_key
 
-    statement = (
-        select(PostCore, PostContent, PostStats)
-        .join(PostContent, PostCore.pid == PostContent.pid)
-        .join(PostStats, PostCore.pid == PostStats.pid)
-        .where(PostCore.uid == uid)
-        .order_by(PostCore.created_at.desc())
-        .limit(limit)
-    )
-    results = session.exec(statement).all()
-    return [_serialize_post(core, content, stats, session) for core, content, stats in results]
+    results = UserService.get_user_posts_across_clusters(session, uid, limit, cursor)
+    set_next_cursor(response, next_cursor(results, limit, _created_key))
+    return _serialize_posts(results, session)
 
 @router.get("/{uid}/recent-comments", response_model=List[Any])
-def get_user_recent_comments(uid: UUID, limit: int = 30, session: Session = Depends(get_session)):
+def get_user_recent_comments(uid: UUID, limit: int = 30, session: Session = Depends(get_read_session)):
     """
     Returns recent comments by a user.
     """
@@ -283,7 +278,7 @@ def get_user_recent_comments(uid: UUID, limit: int = 30, session: Session = Depe
     ]
 
 @router.get("/{uid}/post-distribution", response_model=List[Any])
-def get_user_post_distribution(uid: UUID, session: Session = Depends(get_session)):
+def get_user_post_distribution(uid: UUID, session: Session = Depends(get_read_session)):
     """
     Analyzes a user's posting behavior across multiple clusters.
     """
@@ -294,7 +289,7 @@ def get_user_post_distribution(uid: UUID, session: Session = Depends(get_session
     ]
 
 @router.get("/{uid}/top-comments", response_model=List[Any])
-def get_top_comments(uid: UUID, limit: int = 5, session: Session = Depends(get_session)):
+def get_top_comments(uid: UUID, limit: int = 5, session: Session = Depends(get_read_session)):
     """
     Retrieves the most liked comments ever made by a user.
     """
@@ -305,7 +300,7 @@ def get_top_comments(uid: UUID, limit: int = 5, session: Session = Depends(get_s
     ]
 
 @router.get("/{uid}/top-posts", response_model=List[Any])
-def get_top_posts(uid: UUID, limit: int = 5, session: Session = Depends(get_session)):
+def get_top_posts(uid: UUID, limit: int = 5, session: Session = Depends(get_read_session)):
     """
     Retrieves the most positively received posts authored by a user.
     """
@@ -313,7 +308,7 @@ def get_top_posts(uid: UUID, limit: int = 5, session: Session = Depends(get_sess
     return [{"pid": str(r[0]), "content": r[1], "likes": r[2]} for r in rows]
 
 @router.get("/{uid}/most-disliked-posts", response_model=List[Any])
-def get_most_disliked_posts(uid: UUID, limit: int = 5, session: Session = Depends(get_session)):
+def get_most_disliked_posts(uid: UUID, limit: int = 5, session: Session = Depends(get_read_session)):
     """
     Retrieves the most negatively received posts authored by a user.
     """
@@ -0,0 +1,475 @@
+"""
+api/rules.py
+
+Compiled matchers for ClusterRule patterns, evaluated on the post and comment write paths.
+
+A cluster's rules are compiled once into a RuleSet:
+
+    literal rules   patterns with no regex syntax (after unescaping) go into one
+                    Aho-Corasick automaton, so a thousand banned words cost one pass
+                    over the text
+    regex rules     compiled one by one into a SafePattern; each pattern's leading
+                    literal text goes into a second automaton per action, so only the
+                    patterns whose prefix occurs in the text are run (patterns without
+                    one always run)
+
+Matching is case-insensitive. Regex rules never run on `re`: its backtracking engine
+has no timeout and holds the GIL while it matches, so one rule such as (a|aa)+b or
+a.*a.*a.*b could freeze the whole process on a long enough post. SafePattern matches
+with a DFA built lazily from the pattern's Thompson NFA, in time linear in the text.
+Constructs an automaton cannot express (backreferences, lookarounds, atomic groups,
+possessive repeats) are rejected when a rule is saved. Regex rules scan the first
+RULES_MAX_SCAN_CHARS characters of a text; literal rules always see the whole text.
+"""
+
+import logging
+import os
+import re
+from collections import deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:                                      # Python < 3.11
+    import sre_constants, sre_parse
+
+from api.models.enums import RuleAction
+
+RULES_MAX_PATTERN_LENGTH = int(os.getenv("RULES_MAX_PATTERN_LENGTH", "512"))      # Longest pattern a rule may store
+RULES_MAX_SCAN_CHARS     = int(os.getenv("RULES_MAX_SCAN_CHARS", "20000"))        # Characters a regex rule scans per text
+RULES_MAX_PATTERN_STATES = int(os.getenv("RULES_MAX_PATTERN_STATES", "2000"))     # Automaton states a pattern may expand to
+RULES_MAX_DFA_STATES     = int(os.getenv("RULES_MAX_DFA_STATES", "2000"))         # Cached DFA states per pattern before the table is rebuilt
+
+logger = logging.getLogger(__name__)
+
+
+
+class RuleViolation(ValueError):
+    """Raised when content matches a BLOCK rule of the cluster it is written to."""
+
+    def __init__(self, rule: "RuleMatch"):
+        super().__init__(f"Content violates the cluster rule '{rule.name}'")
+        self.rule = rule
+
+
+class RuleMatch(NamedTuple):
+    rid: object
+    name: str
+    action: RuleAction
+
+
+class Verdict(NamedTuple):
+    blocked: Optional[RuleMatch]                         # First BLOCK rule found, if any
+    flagged: List[RuleMatch]                             # FLAG rules found (only looked for when not blocked)
+
+
+# ---------------------------------------------------------------------------
+# Linear-time regex engine
+# ---------------------------------------------------------------------------
+
+# What lies on either side of a position, for ^ $ \b \B
+_START, _END, _NEWLINE, _LAST_NEWLINE, _WORD, _OTHER = range(6)
+
+_MATCHED = object()
+
+
+def _kind(char: str) -> int:
+    if char == "\n":
+        return _NEWLINE
+    return _WORD if char.isalnum() or char == "_" else _OTHER
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT    : str.isdecimal,
+    sre_constants.CATEGORY_NOT_DIGIT: lambda c: not c.isdecimal(),
+    sre_constants.CATEGORY_SPACE    : str.isspace,
+    sre_constants.CATEGORY_NOT_SPACE: lambda c: not c.isspace(),
+    sre_constants.CATEGORY_WORD     : _is_word,
+    sre_constants.CATEGORY_NOT_WORD : lambda c: not _is_word(c),
+}
+
+_UNSUPPORTED = {
+    sre_constants.GROUPREF        : "Backreferences are not allowed in rule patterns",
+    sre_constants.GROUPREF_EXISTS : "Backreferences are not allowed in rule patterns",
+    sre_constants.ASSERT          : "Lookahead and lookbehind are not allowed in rule patterns",
+    sre_constants.ASSERT_NOT      : "Lookahead and lookbehind are not allowed in rule patterns",
+}
+for _name in ("ATOMIC_GROUP", "POSSESSIVE_REPEAT"):                # Python 3.11+
+    if hasattr(sre_constants, _name):
+        _UNSUPPORTED[getattr(sre_constants, _name)] = "Atomic groups and possessive repeats are not allowed in rule patterns"
+
+
+def _folded(base: Callable[[str], bool]) -> Callable[[str], bool]:
+    # Case-insensitive: a character matches if any single-character case form does
+    def matches(char: str) -> bool:
+        return any(base(form) for form in (char, char.lower(), char.upper()) if len(form) == 1)
+    return matches
+
+
+class _Nfa:
+    """
+    Thompson NFA of a parsed pattern: consuming edges (predicate, target), empty edges,
+    and position assertions (check(before, after), target). Raises ValueError for
+    constructs a finite automaton cannot express and for patterns that expand past
+    RULES_MAX_PATTERN_STATES states (large counted repeats).
+    """
+
+    def __init__(self, parsed):
+        self.flags = parsed.state.flags
+        self.steps: List[List[Tuple[Callable[[str], bool], int]]] = []
+        self.empty: List[List[int]] = []
+        self.asserts: List[List[Tuple[Callable[[int, int], bool], int]]] = []
+        self.start = self._new()
+        self.accept = self._sequence(parsed, self.start)
+
+    def _new(self) -> int:
+        if len(self.steps) >= RULES_MAX_PATTERN_STATES:
+            raise ValueError("Rule pattern is too complex (expand large counted repeats)")
+        self.steps.append([])
+        self.empty.append([])
+        self.asserts.append([])
+        return len(self.steps) - 1
+
+    def _step(self, state: int, predicate: Callable[[str], bool]) -> int:
+        target = self._new()
+        self.steps[state].append((predicate, target))
+        return target
+
+    def _sequence(self, items, state: int) -> int:
+        for op, av in items:
+            state = self._item(op, av, state)
+        return state
+
+    def _item(self, op, av, state: int) -> int:
+        if op is sre_constants.LITERAL:
+            char = chr(av)
+            return self._step(state, _folded(lambda c: c == char))
+        if op is sre_constants.NOT_LITERAL:
+            same = _folded(lambda c, char=chr(av): c == char)
+            return self._step(state, lambda c: not same(c))
+        if op is sre_constants.ANY:
+            dotall = bool(self.flags & re.DOTALL)
+            return self._step(state, lambda c: dotall or c != "\n")
+        if op is sre_constants.IN:
+            return self._step(state, self._char_class(av))
+        if op is sre_constants.SUBPATTERN:
+            return self._sequence(av[-1], state)
+        if op is sre_constants.BRANCH:
+            end = self._new()
+            for alternative in av[1]:
+                self.empty[self._sequence(alternative, state)].append(end)
+            return end
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            low, high, body = av
+            for _ in range(low):
+                state = self._sequence(body, state)
+            if high == sre_constants.MAXREPEAT:
+                loop = self._new()
+                self.empty[state].append(loop)
+                self.empty[self._sequence(body, loop)].append(loop)
+                return loop
+            end = self._new()
+            self.empty[state].append(end)
+            for _ in range(high - low):
+                state = self._sequence(body, state)
+                self.empty[state].append(end)
+            return end
+        if op is sre_constants.AT:
+            target = self._new()
+            self.asserts[state].append((self._position(av), target))
+            return target
+        raise ValueError(_UNSUPPORTED.get(op, f"{op} is not allowed in rule patterns"))
+
+    @staticmethod
+    def _char_class(items) -> Callable[[str], bool]:
+        negate = False
+        tests = []
+        for op, av in items:
+            if op is sre_constants.NEGATE:
+                negate = True
+            elif op is sre_constants.LITERAL:
+                tests.append(lambda c, char=chr(av): c == char)
+            elif op is sre_constants.RANGE:
+                tests.append(lambda c, low=av[0], high=av[1]: low <= ord(c) <= high)
+            elif op is sre_constants.CATEGORY and av in _CATEGORIES:
+                tests.append(_CATEGORIES[av])
+            else:
+                raise ValueError(f"{op} {av} is not allowed in rule patterns")
+        member = _folded(lambda c: any(test(c) for test in tests))
+        return (lambda c: not member(c)) if negate else member
+
+    def _position(self, at) -> Callable[[int, int], bool]:
+        multiline = bool(self.flags & re.MULTILINE)
+        if at is sre_constants.AT_BEGINNING:
+            return (lambda before, after: before in (_START, _NEWLINE)) if multiline else (lambda before, after: before == _START)
+        if at is sre_constants.AT_BEGINNING_STRING:
+            return lambda before, after: before == _START
+        if at is sre_constants.AT_END:
+            ends = (_END, _LAST_NEWLINE, _NEWLINE) if multiline else (_END, _LAST_NEWLINE)
+            return lambda before, after: after in ends
+        if at is sre_constants.AT_END_STRING:
+            return lambda before, after: after == _END
+        if at is sre_constants.AT_BOUNDARY:
+            return lambda before, after: (before == _WORD) != (after == _WORD)
+        if at is sre_constants.AT_NON_BOUNDARY:
+            return lambda before, after: (before == _WORD) == (after == _WORD)
+        raise ValueError(f"{at} is not allowed in rule patterns")
+
+    def closure(self, states, before: int, after: int) -> Set[int]:
+        reached = set(states)
+        stack = list(states)
+        while stack:
+            state = stack.pop()
+            targets = list(self.empty[state])
+            targets += [target for check, target in self.asserts[state] if check(before, after)]
+            for target in targets:
+                if target not in reached:
+                    reached.add(target)
+                    stack.append(target)
+        return reached
+
+
+class _DfaState:
+    __slots__ = ("nfa_states", "before", "moves")
+
+    def __init__(self, nfa_states: frozenset, before: int):
+        self.nfa_states = nfa_states
+        self.before = before
+        self.moves: Dict[str, object] = {}
+
+
+class SafePattern:
+    """
+    A rule regex matched by a lazily built DFA instead of `re`'s backtracking engine, so
+    a search costs O(len(text)) whatever the pattern: (a|aa)+b or a.*a.*a.*b cannot
+    blow up. Supports literals, classes, ., alternation, groups, repeats and ^ $ \\b \\B;
+    validate_pattern rejects the rest. Matching is case-insensitive. Safe to share
+    between threads: DFA states are only ever added, and the table is replaced (not
+    emptied) once it holds RULES_MAX_DFA_STATES states.
+    """
+
+    def __init__(self, pattern: str):
+        self._nfa = _Nfa(_parse(pattern))
+        self._states: Dict[Tuple[frozenset, int], _DfaState] = {}
+
+    def _state(self, nfa_states: frozenset, before: int) -> _DfaState:
+        states = self._states
+        if len(states) >= RULES_MAX_DFA_STATES:
+            states = self._states = {}
+        key = (nfa_states, before)
+        return states.get(key) or states.setdefault(key, _DfaState(nfa_states, before))
+
+    def _advance(self, state: _DfaState, char: Optional[str], after: int) -> Optional[frozenset]:
+        # The NFA states after consuming `char`; None once the pattern has matched
+        nfa = self._nfa
+        reached = nfa.closure(state.nfa_states | {nfa.start}, state.before, after)
+        if nfa.accept in reached:
+            return None
+        if char is None:
+            return frozenset()
+        return frozenset(target for source in reached for test, target in nfa.steps[source] if test(char))
+
+    def search(self, text: str) -> bool:
+        state = self._state(frozenset(), _START)
+        last = len(text) - 1
+        for position, char in enumerate(text):
+            # A trailing newline is special to $, so it is never cached as a plain move
+            final_newline = position == last and char == "\n"
+            move = None if final_newline else state.moves.get(char)
+            if move is None:
+                advanced = self._advance(state, char, _LAST_NEWLINE if final_newline else _kind(char))
+                move = _MATCHED if advanced is None else self._state(advanced, _kind(char))
+                if not final_newline:
+                    state.moves[char] = move
+            if move is _MATCHED:
+                return True
+            state = move
+        return self._advance(state, None, _END) is None
+
+
+# ---------------------------------------------------------------------------
+# Pattern checks
+# ---------------------------------------------------------------------------
+
+def _parse(pattern: str):
+    try:
+        return sre_parse.parse(pattern, re.IGNORECASE)
+    except re.error as exc:
+        raise ValueError(f"Invalid rule pattern: {exc}") from exc
+
+
+def validate_pattern(pattern: str) -> None:
+    """
+    Raises ValueError for a pattern that is empty, too long, not a valid regex, or
+    outside the subset SafePattern can match in linear time.
+    """
+    if not pattern:
+        raise ValueError("Rule pattern must not be empty")
+    if len(pattern) > RULES_MAX_PATTERN_LENGTH:
+        raise ValueError(f"Rule pattern is longer than {RULES_MAX_PATTERN_LENGTH} characters")
+    _Nfa(_parse(pattern))
+
+
+def literal_text(pattern: str) -> Optional[str]:
+    """
+    The plain text a pattern matches if it has no regex syntax (escapes allowed), else None.
+    """
+    parsed = _parse(pattern)
+    if not parsed or any(op is not sre_constants.LITERAL for op, _ in parsed):
+        return None
+    return "".join(chr(code) for _, code in parsed)
+
+
+def literal_prefix(pattern: str) -> str:
+    """
+    The ASCII text every match of a pattern starts with ("" if none). Kept to ASCII so
+    the casefolded automaton never misses a match `re.IGNORECASE` would find.
+    """
+    chars = []
+    for op, av in _parse(pattern):
+        if op is not sre_constants.LITERAL or not chr(av).isascii():
+            break
+        chars.append(chr(av))
+    return "".join(chars)
+
+
+# ---------------------------------------------------------------------------
+# Aho-Corasick
+# ---------------------------------------------------------------------------
+
+class AhoCorasick:
+    """
+    Multi-literal matcher: reports which of the added words occur in a text in one pass.
+    Words and text are compared casefolded.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[int]] = [set()]
+
+    def add(self, word: str, value: int) -> None:
+        node = 0
+        for char in word.casefold():
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+            node = nxt
+        self._out[node].add(value)
+
+    def build(self) -> "AhoCorasick":
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] |= self._out[self._fail[child]]
+        return self
+
+    def search(self, text: str) -> Set[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        node = 0
+        for char in text.casefold():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1
+
+
+# ---------------------------------------------------------------------------
+# Rule sets
+# ---------------------------------------------------------------------------
+
+class _Regexes:
+    """
+    Regex rules of one action. A pattern is only run when its literal_prefix occurs in
+    the text; one Aho-Corasick pass finds those, so a thousand rules do not mean a
+    thousand scans.
+    """
+
+    def __init__(self, indexed: List[Tuple[int, str]]):
+        self._compiled = {i: SafePattern(pattern) for i, pattern in indexed}
+        self._prefixes = AhoCorasick()
+        self._always: Set[int] = set()
+        for i, pattern in indexed:
+            prefix = literal_prefix(pattern)
+            if prefix:
+                self._prefixes.add(prefix, i)
+            else:
+                self._always.add(i)
+        self._prefixes.build()
+
+    def _candidates(self, text: str) -> List[int]:
+        found = self._prefixes.search(text) if self._prefixes else set()
+        return sorted(found | self._always)
+
+    def first(self, text: str) -> Optional[int]:
+        return next((i for i in self._candidates(text) if self._compiled[i].search(text)), None)
+
+    def all(self, text: str) -> Set[int]:
+        return {i for i in self._candidates(text) if self._compiled[i].search(text)}
+
+
+class RuleSet:
+    """
+    The compiled rules of one cluster. Built from (rid, name, pattern, action) rows;
+    rows whose pattern no longer passes validate_pattern are skipped with a warning.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[object, str, str, RuleAction]]):
+        self.rules: List[RuleMatch] = []
+        literals = {action: AhoCorasick() for action in RuleAction}
+        regexes: Dict[RuleAction, List[Tuple[int, str]]] = {action: [] for action in RuleAction}
+        for rid, name, pattern, action in rules:
+            try:
+                validate_pattern(pattern)
+            except ValueError as exc:
+                logger.warning("Skipping cluster rule %s (%s): %s", rid, name, exc)
+                continue
+            index = len(self.rules)
+            self.rules.append(RuleMatch(rid, name, RuleAction(action)))
+            literal = literal_text(pattern)
+            if literal is not None:
+                literals[RuleAction(action)].add(literal, index)
+            else:
+                regexes[RuleAction(action)].append((index, pattern))
+        self._literals = {action: automaton.build() for action, automaton in literals.items()}
+        self._regexes = {action: _Regexes(indexed) for action, indexed in regexes.items()}
+
+    def evaluate(self, text: Optional[str]) -> Verdict:
+        if not text or not self.rules:
+            return Verdict(None, [])
+        head = text[:RULES_MAX_SCAN_CHARS]
+
+        hits = self._literals[RuleAction.BLOCK].search(text) if self._literals[RuleAction.BLOCK] else set()
+        if not hits:
+            index = self._regexes[RuleAction.BLOCK].first(head)
+            hits = {index} if index is not None else set()
+        if hits:
+            return Verdict(self.rules[min(hits)], [])
+
+        flagged = self._literals[RuleAction.FLAG].search(text) if self._literals[RuleAction.FLAG] else set()
+        flagged |= self._regexes[RuleAction.FLAG].all(head)
+        return Verdict(None, [self.rules[i] for i in sorted(flagged)])
+
+    def __len__(self) -> int:
+        return len(self.rules)
@@ -2,7 +2,7 @@ from pydantic import BaseModel
 from typing import Optional, List
 from uuid import UUID
 from datetime import datetime
-from api.models.enums import ClusterRole
+from api.models.enums import ClusterRole, ModerationStatus, RuleAction
 
 class ClusterCreate(BaseModel):
     """
@@ -42,3 +42,36 @@ class ClusterMemberCreate(BaseModel):
     """
     uid         : UUID                                                             # Referencing user's system ID
     role        : Optional[ClusterRole] = ClusterRole.MEMBER                       # Target role within the cluster context
+
+class ClusterRuleCreate(BaseModel):
+    """
+    Schema for adding an automated moderation rule to a cluster.
+    """
+    name        : str                                                              # Human-readable name of the rule
+    pattern     : str                                                              # Literal text or regex matched case-insensitively
+    action      : RuleAction                                                       # BLOCK rejects the write, FLAG lets it through for review
+    description : Optional[str]      = None                                        # Expanded explanation of the rule's purpose
+
+class ClusterRuleUpdate(BaseModel):
+    """
+    Schema for partially editing a cluster rule; only the fields sent are changed.
+    """
+    name        : Optional[str]        = None                                      # New rule name
+    pattern     : Optional[str]        = None                                      # New pattern
+    action      : Optional[RuleAction] = None                                      # New action
+    description : Optional[str]        = None                                      # New description
+
+class ModerationItemResponse(BaseModel):
+    """
+    Schema for one entry of a cluster's moderation queue.
+    """
+    qid         : UUID                                                             # Queue item identifier
+    kind        : str                                                              # "post" or "comment"
+    target      : UUID                                                             # pid / mid of the flagged content
+    uid         : UUID                                                             # Author of the flagged content
+    rules       : str                                                              # Names of the matched FLAG rules
+    status      : ModerationStatus                                                 # QUEUED, OPEN or RESOLVED
+    created_at  : datetime                                                         # When the content was flagged
+    notified_at : Optional[datetime]   = None                                      # When moderators were notified
+    reviewed_by : Optional[UUID]       = None                                      # Moderator who resolved it
+    reviewed_at : Optional[datetime]   = None                                      # When it was resolved
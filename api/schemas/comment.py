@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 from api.models.enums import ReactionType
@@ -25,6 +25,18 @@ class CommentResponse(BaseModel):
     created_at: datetime                                                       # Timestamp of creation
     likes     : int            = 0                                             # Total likes accrued
     dislikes  : int            = 0                                             # Total dislikes accrued
+    reply_count      : int     = 0                                             # Direct replies
+    total_descendants: int     = 0                                             # Replies at any depth
+
+class CommentThreadNode(CommentResponse):
+    """
+    A comment within a nested thread, with the loaded part of its reply subtree.
+    """
+    content            : Optional[str] = None                                  # Display content (None if missing)
+    depth              : int                                                   # Levels below the requested top level
+    has_more_replies   : bool           = False                                # Replies exist beyond the depth/breadth limits
+    more_replies_cursor: Optional[str]  = None                                 # Cursor for /comments/{mid}/thread, if resuming mid-list
+    replies            : List["CommentThreadNode"] = []                        # Loaded direct replies, oldest first
 
 class CommentReactionCreate(BaseModel):
     """
@@ -0,0 +1,446 @@
+"""
+api/search.py
+
+Pluggable full-text search behind the global /search endpoint.
+
+Backends:
+    fts5   SQLite FTS5 virtual tables kept in sync by triggers, ranked by bm25()
+    mysql  InnoDB FULLTEXT indexes queried with MATCH ... AGAINST in boolean mode
+    like   the original OR'ed ILIKE scan, used when neither index is available
+
+Queries are tokenized into words that must all match; the last word is a prefix
+so results update while the user is still typing ("clust" finds "cluster").
+
+The backend is picked from the connection dialect, or forced with
+SEARCH_BACKEND=fts5|mysql|like. Rebuild the indexes from existing rows with:
+
+    python -m api.search reindex
+"""
+
+import os
+import re
+import sys
+from typing import Dict, List
+from uuid import UUID
+
+from sqlalchemy import or_, text
+from sqlalchemy.engine import Connection, Engine
+from sqlmodel import Session, select
+
+from api.models.cluster import ClusterCore
+from api.models.comment import CommentCore, CommentContent
+from api.models.post import PostCore, PostContent, PostStats
+from api.models.user import UserProfile
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto").strip().lower()
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(q: str) -> List[str]:
+    """
+    Splits a raw query into lowercase word tokens, dropping punctuation and operators.
+    """
+    return _TOKEN.findall(q.lower())
+
+
+def _empty_results() -> Dict[str, list]:
+    return {"users": [], "clusters": [], "posts": [], "comments": []}
+
+
+def _post_result(core: PostCore, content: PostContent, stats: PostStats, cluster: ClusterCore) -> dict:
+    return {
+        "pid": str(core.pid), "uid": str(core.uid), "cid": str(core.cid),
+        "cluster_name": cluster.name,
+        "content": content.content[:280], "tags": content.tags,
+        "likes": stats.likes, "dislikes": stats.dislikes,
+    }
+
+
+def _comment_result(core: CommentCore, content: CommentContent) -> dict:
+    return {
+        "mid": str(core.mid), "uid": str(core.uid),
+        "pid": str(core.pid) if core.pid else None,
+        "content": content.content[:280],
+    }
+
+
+def _in_rank_order(ids: List[UUID], rows, key) -> list:
+    """
+    Reorders rows fetched with an IN query back into the ranking returned by the index.
+    """
+    by_id = {key(row): row for row in rows}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+class SearchBackend:
+    """
+    Interface every search backend implements.
+    """
+
+    name = "base"
+
+    def install(self, engine: Engine) -> bool:
+        """
+        Creates the index structures if missing. Returns True when they were just created
+        and need a reindex to cover existing rows.
+        """
+        return False
+
+    def uninstall(self, engine: Engine) -> None:
+        """
+        Drops the index structures (used when tearing down test databases).
+        """
+
+    def reindex(self, session: Session) -> None:
+        """
+        Rebuilds the index from the base tables.
+        """
+
+    def search(self, session: Session, q: str, limit: int = 15) -> Dict[str, list]:
+        raise NotImplementedError
+
+
+class IndexedSearchBackend(SearchBackend):
+    """
+    Shared hydration for backends whose index returns ranked primary keys.
+    """
+
+    def _ranked_ids(self, session: Session, kind: str, tokens: List[str], limit: int) -> List[UUID]:
+        raise NotImplementedError
+
+    def search(self, session: Session, q: str, limit: int = 15) -> Dict[str, list]:
+        results = _empty_results()
+        tokens = tokenize(q)
+        if not tokens:
+            return results
+
+        uids = self._ranked_ids(session, "users", tokens, limit)
+        if uids:
+            profiles = session.exec(select(UserProfile).where(UserProfile.uid.in_(uids))).all()
+            results["users"] = [
+                {"uid": str(u.uid), "name": u.name, "bio": u.bio}
+                for u in _in_rank_order(uids, profiles, lambda u: u.uid)
+            ]
+
+        cids = self._ranked_ids(session, "clusters", tokens, limit)
+        if cids:
+            clusters = session.exec(select(ClusterCore).where(ClusterCore.cid.in_(cids))).all()
+            results["clusters"] = [
+                {"cid": str(c.cid), "name": c.name, "category": c.category}
+                for c in _in_rank_order(cids, clusters, lambda c: c.cid)
+            ]
+
+        pids = self._ranked_ids(session, "posts", tokens, limit)
+        if pids:
+            rows = session.exec(
+                select(PostCore, PostContent, PostStats, ClusterCore)
+                .join(PostContent, PostCore.pid == PostContent.pid)
+                .join(PostStats, PostCore.pid == PostStats.pid)
+                .join(ClusterCore, PostCore.cid == ClusterCore.cid)
+                .where(PostCore.pid.in_(pids))
+            ).all()
+            results["posts"] = [_post_result(*row) for row in _in_rank_order(pids, rows, lambda r: r[0].pid)]
+
+        mids = self._ranked_ids(session, "comments", tokens, limit)
+        if mids:
+            rows = session.exec(
+                select(CommentCore, CommentContent)
+                .join(CommentContent, CommentCore.mid == CommentContent.mid)
+                .where(CommentCore.mid.in_(mids))
+            ).all()
+            results["comments"] = [_comment_result(*row) for row in _in_rank_order(mids, rows, lambda r: r[0].mid)]
+
+        return results
+
+
+# ---------------------------------------------------------------------------
+# SQLite FTS5
+# ---------------------------------------------------------------------------
+# Each FTS table mirrors one base table. The FTS rowid is the base row's rowid,
+# so trigger updates and deletes are rowid lookups; the UUID key is stored
+# UNINDEXED for joining back. VACUUM may renumber implicit rowids, so run the
+# reindex command after a VACUUM.
+
+# kind -> (fts table, base table, key column, indexed columns with bm25 weights)
+_FTS_TABLES = {
+    "users"   : ("profile_fts", "userprofile", "uid", {"name": 4.0, "bio": 1.0}),
+    "clusters": ("cluster_fts", "clustercore", "cid", {"name": 4.0, "category": 1.0}),
+    "posts"   : ("post_fts", "postcontent", "pid", {"content": 1.0, "tags": 2.0}),
+    "comments": ("comment_fts", "commentcontent", "mid", {"content": 1.0}),
+}
+
+# Parent rows deleted without their content rows; drop the index entry with them
+_FTS_PARENT_DELETES = {
+    "users"   : ("userauth", "uid"),
+    "posts"   : ("postcore", "pid"),
+    "comments": ("commentcore", "mid"),
+}
+
+
+def _fts_ddl() -> List[str]:
+    statements = []
+    for kind, (fts, base, key, columns) in _FTS_TABLES.items():
+        names = ", ".join(columns)
+        values = ", ".join(f"COALESCE(NEW.{c}, '')" for c in columns)
+        statements.append(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{key} UNINDEXED, {names}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+        )
+        statements.append(f"""
+CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert
+AFTER INSERT ON {base}
+FOR EACH ROW
+BEGIN
+    INSERT INTO {fts} (rowid, {key}, {names}) VALUES (NEW.rowid, NEW.{key}, {values});
+END
+""")
+        statements.append(f"""
+CREATE TRIGGER IF NOT EXISTS trg_{fts}_update
+AFTER UPDATE OF {names} ON {base}
+FOR EACH ROW
+BEGIN
+    DELETE FROM {fts} WHERE rowid = OLD.rowid;
+    INSERT INTO {fts} (rowid, {key}, {names}) VALUES (NEW.rowid, NEW.{key}, {values});
+END
+""")
+        statements.append(f"""
+CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete
+AFTER DELETE ON {base}
+FOR EACH ROW
+BEGIN
+    DELETE FROM {fts} WHERE rowid = OLD.rowid;
+END
+""")
+        if kind in _FTS_PARENT_DELETES:
+            parent, parent_key = _FTS_PARENT_DELETES[kind]
+            statements.append(f"""
+CREATE TRIGGER IF NOT EXISTS trg_{fts}_{parent}_delete
+AFTER DELETE ON {parent}
+FOR EACH ROW
+BEGIN
+    DELETE FROM {fts} WHERE rowid = (SELECT rowid FROM {base} WHERE {key} = OLD.{parent_key});
+END
+""")
+    return statements
+
+
+def _fts_match(tokens: List[str]) -> str:
+    """
+    Builds an FTS5 MATCH expression: every token quoted, the last one as a prefix.
+    """
+    terms = ['"' + t + '"' for t in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class FTS5SearchBackend(IndexedSearchBackend):
+    name = "fts5"
+
+    def install(self, engine: Engine) -> bool:
+        with engine.connect() as conn:
+            created = not self._installed(conn)
+            for ddl in _fts_ddl():
+                conn.execute(text(ddl))
+            conn.commit()
+        return created
+
+    def uninstall(self, engine: Engine) -> None:
+        # Triggers go with their base tables; the virtual tables must be dropped explicitly
+        with engine.connect() as conn:
+            for fts, _base, _key, _columns in _FTS_TABLES.values():
+                conn.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+            conn.commit()
+
+    @staticmethod
+    def _installed(conn: Connection) -> bool:
+        fts = _FTS_TABLES["posts"][0]
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+        ).first() is not None
+
+    def reindex(self, session: Session) -> None:
+        for fts, base, key, columns in _FTS_TABLES.values():
+            names = ", ".join(columns)
+            values = ", ".join(f"COALESCE({c}, '')" for c in columns)
+            session.exec(text(f"DELETE FROM {fts}"))
+            session.exec(text(f"INSERT INTO {fts} (rowid, {key}, {names}) SELECT rowid, {key}, {values} FROM {base}"))
+            session.exec(text(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')"))
+        session.commit()
+
+    def _ranked_ids(self, session: Session, kind: str, tokens: List[str], limit: int) -> List[UUID]:
+        fts, _base, key, columns = _FTS_TABLES[kind]
+        weights = ", ".join(str(w) for w in (0.0, *columns.values()))
+        rows = session.exec(
+            text(f"SELECT {key} FROM {fts} WHERE {fts} MATCH :match ORDER BY bm25({fts}, {weights}) LIMIT :limit"),
+            params={"match": _fts_match(tokens), "limit": limit},
+        ).all()
+        return [UUID(row[0]) for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# MySQL FULLTEXT
+# ---------------------------------------------------------------------------
+# InnoDB maintains FULLTEXT indexes on every write, so no triggers are needed.
+
+# kind -> (table, key column, indexed columns, index name)
+_MYSQL_FULLTEXT = {
+    "users"   : ("userprofile", "uid", ("name", "bio"), "ft_userprofile_name_bio"),
+    "clusters": ("clustercore", "cid", ("name", "category"), "ft_clustercore_name_category"),
+    "posts"   : ("postcontent", "pid", ("content", "tags"), "ft_postcontent_content_tags"),
+    "comments": ("commentcontent", "mid", ("content",), "ft_commentcontent_content"),
+}
+
+
+def _boolean_match(tokens: List[str]) -> str:
+    """
+    Builds a boolean-mode AGAINST expression: every token required, the last one as a prefix.
+    """
+    terms = ["+" + t for t in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class MySQLFulltextSearchBackend(IndexedSearchBackend):
+    name = "mysql"
+
+    def install(self, engine: Engine) -> bool:
+        with engine.connect() as conn:
+            for table, _key, columns, index in _MYSQL_FULLTEXT.values():
+                exists = conn.execute(
+                    text(
+                        "SELECT 1 FROM information_schema.statistics "
+                        "WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index"
+                    ),
+                    {"table": table, "index": index},
+                ).first()
+                if not exists:
+                    conn.execute(text(f"ALTER TABLE {table} ADD FULLTEXT INDEX {index} ({', '.join(columns)})"))
+            conn.commit()
+        # ADD FULLTEXT INDEX already indexes the existing rows, so no reindex is needed
+        return False
+
+    def reindex(self, session: Session) -> None:
+        for table, _key, _columns, _index in _MYSQL_FULLTEXT.values():
+            session.exec(text(f"OPTIMIZE TABLE {table}"))
+        session.commit()
+
+    def _ranked_ids(self, session: Session, kind: str, tokens: List[str], limit: int) -> List[UUID]:
+        table, key, columns, _index = _MYSQL_FULLTEXT[kind]
+        match = f"MATCH ({', '.join(columns)}) AGAINST (:against IN BOOLEAN MODE)"
+        rows = session.exec(
+            text(f"SELECT {key} FROM {table} WHERE {match} ORDER BY {match} DESC LIMIT :limit"),
+            params={"against": _boolean_match(tokens), "limit": limit},
+        ).all()
+        return [UUID(str(row[0])) for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# LIKE fallback
+# ---------------------------------------------------------------------------
+
+class LikeSearchBackend(SearchBackend):
+    """
+    Unindexed substring matching: any token against any searchable column.
+    """
+
+    name = "like"
+
+    def search(self, session: Session, q: str, limit: int = 15) -> Dict[str, list]:
+        results = _empty_results()
+        tokens = list(dict.fromkeys(tokenize(q)))
+        if not tokens:
+            return results
+
+        user_rows = session.exec(
+            select(UserProfile).where(or_(*[UserProfile.name.ilike(f"%{t}%") for t in tokens])).limit(limit)
+        ).all()
+        results["users"] = [{"uid": str(u.uid), "name": u.name, "bio": u.bio} for u in user_rows]
+
+        cluster_conditions = []
+        for t in tokens:
+            cluster_conditions.append(ClusterCore.name.ilike(f"%{t}%"))
+            cluster_conditions.append(ClusterCore.category.ilike(f"%{t}%"))
+        cluster_rows = session.exec(select(ClusterCore).where(or_(*cluster_conditions)).limit(limit)).all()
+        results["clusters"] = [{"cid": str(c.cid), "name": c.name, "category": c.category} for c in cluster_rows]
+
+        post_conditions = []
+        for t in tokens:
+            post_conditions.append(PostContent.content.ilike(f"%{t}%"))
+            post_conditions.append(PostContent.tags.ilike(f"%{t}%"))
+        post_rows = session.exec(
+            select(PostCore, PostContent, PostStats, ClusterCore)
+            .join(PostContent, PostCore.pid == PostContent.pid)
+            .join(PostStats, PostCore.pid == PostStats.pid)
+            .join(ClusterCore, PostCore.cid == ClusterCore.cid)
+            .where(or_(*post_conditions))
+            .order_by(PostStats.likes.desc())
+            .limit(limit)
+        ).all()
+        results["posts"] = [_post_result(*row) for row in post_rows]
+
+        comment_rows = session.exec(
+            select(CommentCore, CommentContent)
+            .join(CommentContent, CommentCore.mid == CommentContent.mid)
+            .where(or_(*[CommentContent.content.ilike(f"%{t}%") for t in tokens]))
+            .limit(limit)
+        ).all()
+        results["comments"] = [_comment_result(*row) for row in comment_rows]
+
+        return results
+
+
+# ---------------------------------------------------------------------------
+# Backend selection
+# ---------------------------------------------------------------------------
+
+_BACKENDS = {
+    "fts5" : FTS5SearchBackend(),
+    "mysql": MySQLFulltextSearchBackend(),
+    "like" : LikeSearchBackend(),
+}
+
+
+def get_search_backend(bind) -> SearchBackend:
+    """
+    Picks the backend for an engine or connection: SEARCH_BACKEND when set,
+    otherwise FTS5 on SQLite, FULLTEXT on MySQL and LIKE elsewhere.
+    Raises ValueError for an unknown SEARCH_BACKEND.
+    """
+    if SEARCH_BACKEND != "auto":
+        if SEARCH_BACKEND not in _BACKENDS:
+            raise ValueError(f"SEARCH_BACKEND must be one of {'|'.join(_BACKENDS)}|auto, not {SEARCH_BACKEND!r}")
+        return _BACKENDS[SEARCH_BACKEND]
+    dialect = bind.dialect.name
+    if dialect == "sqlite":
+        return _BACKENDS["fts5"]
+    if dialect in ("mysql", "mariadb"):
+        return _BACKENDS["mysql"]
+    return _BACKENDS["like"]
+
+
+def install_search(engine: Engine) -> None:
+    """
+    Creates the search index structures and fills them if they were just created.
+    """
+    backend = get_search_backend(engine)
+    if backend.install(engine):
+        with Session(engine) as session:
+            backend.reindex(session)
+
+
+def uninstall_search(engine: Engine) -> None:
+    get_search_backend(engine).uninstall(engine)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["reindex"]:
+        sys.exit("usage: python -m api.search reindex")
+
+    from api.database import engine
+
+    backend = get_search_backend(engine)
+    backend.install(engine)
+    with Session(engine) as session:
+        backend.reindex(session)
+    print(f"Rebuilt {backend.name} search index")
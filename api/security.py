@@ -1,18 +1,123 @@
+"""
+api/security.py
+
+Password hashing. bcrypt is deliberately slow (~100-300 ms of CPU per call at the
+default cost), so every hash/verify runs on a small dedicated thread pool instead of
+the request threadpool; bcrypt releases the GIL, so threads run in parallel. The pool
+admits at most BCRYPT_POOL_SIZE running + BCRYPT_MAX_PENDING queued calls; beyond that
+HashingPoolSaturated is raised and the API answers 503 rather than letting a login
+burst starve every other route.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
 import bcrypt
 
+BCRYPT_ROUNDS      = int(os.getenv("BCRYPT_ROUNDS", "12"))                                  # Cost factor for new hashes (2^rounds iterations)
+BCRYPT_POOL_SIZE   = int(os.getenv("BCRYPT_POOL_SIZE", str(min(4, os.cpu_count() or 1))))   # Hashes computed concurrently
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "32"))                             # Calls allowed to wait for a worker
+
+
+class HashingPoolSaturated(RuntimeError):
+    """Raised when the hashing pool already holds its maximum number of pending calls."""
+
+
+class HashingPool:
+    """
+    Fixed-size thread pool with an admission cap on queued work.
+    """
+
+    def __init__(self, workers: int = BCRYPT_POOL_SIZE, max_pending: int = BCRYPT_MAX_PENDING):
+        self.workers = workers
+        self.capacity = workers + max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingPoolSaturated("Authentication is busy, please retry shortly")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _f: self._release())
+        return future
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Runs `fn` on the pool and blocks the calling thread for the result."""
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Runs `fn` on the pool without holding the event loop or a threadpool worker."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+            }
+
+
+hashing_pool = HashingPool()
+
+
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+def _hashpw(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Takes a plain text password and verifies it against the hashed signature.
     """
-    password_byte_enc = plain_password.encode('utf-8')
-    hashed_password_byte_enc = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password_byte_enc, hashed_password_byte_enc)
+    return hashing_pool.run(_checkpw, plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """
     Takes a plain text password and encrypts it securely using bcrypt.
     """
-    pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(pwd_bytes, salt)
-    return hashed_password.decode('utf-8')
+    return hashing_pool.run(_hashpw, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Awaitable verify_password for async handlers.
+    """
+    return await hashing_pool.run_async(_checkpw, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Awaitable get_password_hash for async handlers.
+    """
+    return await hashing_pool.run_async(_hashpw, password)
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    True when a stored hash was made with a different cost factor than BCRYPT_ROUNDS.
+    """
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
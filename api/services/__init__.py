@@ -10,10 +10,18 @@ from .cluster_service import ClusterService
 from .post_service import PostService
 from .comment_service import CommentService
 from .user_service import UserService
+from .feed_service import FeedService
+from .trending_service import TrendingService
+from .rule_service import RuleService
+from .moderation_service import ModerationService
 
 __all__ = [
     "ClusterService",
     "PostService",
     "CommentService",
-    "UserService"
+    "UserService",
+    "FeedService",
+    "TrendingService",
+    "RuleService",
+    "ModerationService"
 ]
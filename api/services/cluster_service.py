@@ -5,7 +5,10 @@ from uuid import UUID
 
 from api.models.cluster import ClusterCore, ClusterInfo, ClusterStats, ClusterMember, ClusterModerator, ClusterRule, ClusterBookmark
 from api.models.user import UserProfile
-from api.models.post import PostCore
+from api.models.post import PostCore, ClusterPostStats
+from api.pagination import keyset_after
+from api.response_cache import invalidate_tags
+from api.services.feed_service import FeedService
 
 class ClusterService:
     """
@@ -28,6 +31,23 @@ class ClusterService:
         )
         return session.exec(statement).all()
 
+    @staticmethod
+    def list_clusters(session: Session, category: Optional[str] = None, limit: int = 100, cursor: Optional[str] = None, skip: int = 0):
+        """
+        Lists clusters alphabetically, optionally within one category.
+        Pages with a (name, cid) keyset cursor; `skip` is only honoured without a cursor.
+        """
+        statement = select(ClusterCore)
+        if category:
+            statement = statement.where(ClusterCore.category == category)
+        after = keyset_after(ClusterCore.name, ClusterCore.cid, cursor, descending=False)
+        if after is not None:
+            statement = statement.where(after)
+        elif skip:
+            statement = statement.offset(skip)
+        statement = statement.order_by(ClusterCore.name, ClusterCore.cid).limit(limit)
+        return session.exec(statement).all()
+
     @staticmethod
     def search_clusters_by_name(session: Session, query_term: str):
         """
@@ -148,12 +168,13 @@ class ClusterService:
         """
         Analytical ranking of clusters by maximum content creation volume.
         Maps to: TOP 5 ACTIVE CLUSTERS BY POST COUNT
+        Reads the trigger-maintained ClusterPostStats rollup instead of grouping PostCore.
         """
         statement = (
-            select(ClusterCore.name, func.count(PostCore.pid).label("post_count"))
-            .join(PostCore, ClusterCore.cid == PostCore.cid)
-            .group_by(ClusterCore.cid, ClusterCore.name)
-            .order_by(desc("post_count"))
+            select(ClusterCore.name, ClusterPostStats.post_count)
+            .join(ClusterPostStats, ClusterCore.cid == ClusterPostStats.cid)
+            .where(ClusterPostStats.post_count > 0)
+            .order_by(desc(ClusterPostStats.post_count))
             .limit(limit)
         )
         return session.exec(statement).all()
@@ -245,6 +266,7 @@ class ClusterService:
             session.add(moderator)
 
             session.commit()
+            invalidate_tags("clusters")
             session.expire_all()
             session.refresh(core_cluster)
             session.refresh(info)
@@ -262,14 +284,16 @@ class ClusterService:
         """
         cluster = session.get(ClusterCore, cid)
         if not cluster: return False
+        FeedService.remove_cluster(session, cid)
         session.delete(cluster)
         session.commit()
+        invalidate_tags("clusters", "members", "posts")
         return True
 
     @staticmethod
     def add_user_to_cluster(session: Session, cid: UUID, uid: UUID, role: str = "MEMBER"):
         """
-        Joins a user to a cluster.
+        Joins a user to a cluster and backfills the cluster's recent posts into their feed.
         ClusterStats.member_count is incremented by trg_increment_member_count.
         """
         existing = session.exec(select(ClusterMember).where(ClusterMember.cid == cid, ClusterMember.uid == uid)).first()
@@ -279,7 +303,10 @@ class ClusterService:
         try:
             member = ClusterMember(cid=cid, uid=uid, role=role)
             session.add(member)
+            session.flush()
+            FeedService.backfill_member(session, cid, uid)
             session.commit()
+            invalidate_tags("members")
             return member
         except IntegrityError:
             session.rollback()
@@ -291,14 +318,16 @@ class ClusterService:
     @staticmethod
     def remove_user_from_cluster(session: Session, cid: UUID, uid: UUID):
         """
-        Removes a user from a cluster.
+        Removes a user from a cluster and trims the cluster's posts from their feed.
         ClusterStats.member_count is decremented by trg_decrement_member_count.
         """
         statement = select(ClusterMember).where(ClusterMember.cid == cid, ClusterMember.uid == uid)
         member = session.exec(statement).first()
         if member:
+            FeedService.trim_member(session, cid, uid)
             session.delete(member)
             session.commit()
+            invalidate_tags("members")
             session.expire_all()
             return True
         return False
@@ -1,9 +1,15 @@
-from sqlalchemy.exc import IntegrityError
-from sqlmodel import Session, select, update
-from typing import List, Optional
+from sqlalchemy import case, delete, insert, literal
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select, update, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, List, Optional
 from uuid import UUID
 
-from api.models.comment import CommentCore, CommentContent, CommentStats, CommentReaction
+from api.models.comment import CommentCore, CommentClosure, CommentContent, CommentStats, CommentReaction
+from api.pagination import encode_cursor, keyset_after, next_cursor
+from api.reactions import REACTION_COLUMNS, reaction_counts, set_reaction
+from api.services.moderation_service import ModerationService
+from api.services.rule_service import RuleService
 from api.models.post import PostCore
 from api.models.user import UserProfile
 from api.models.enums import ReactionType
@@ -13,13 +19,165 @@ class CommentService:
     Handles retrieving, threading, and statistically ranking comments.
     """
 
+    @staticmethod
+    def get_comments_for_post(session: Session, pid: UUID):
+        """
+        Every comment on a post, newest first, with its content and stats in one query.
+        """
+        return session.exec(CommentService.post_comments_statement(pid)).all()
+
+    @staticmethod
+    def post_comments_statement(pid: UUID):
+        """
+        Builds the get_comments_for_post query.
+        """
+        return (
+            select(
+                CommentCore.mid, CommentCore.uid, CommentCore.pid, CommentCore.parent_mid, CommentCore.created_at,
+                CommentContent.content,
+                func.coalesce(CommentStats.likes, 0).label("likes"),
+                func.coalesce(CommentStats.dislikes, 0).label("dislikes"),
+                func.coalesce(CommentStats.reply_count, 0).label("reply_count"),
+                func.coalesce(CommentStats.total_descendants, 0).label("total_descendants"),
+            )
+            .outerjoin(CommentContent, CommentCore.mid == CommentContent.mid)
+            .outerjoin(CommentStats, CommentCore.mid == CommentStats.mid)
+            .where(CommentCore.pid == pid)
+            .order_by(CommentCore.created_at.desc())
+        )
+
+    @staticmethod
+    def thread_statement(
+        pid: Optional[UUID],
+        parent_mid: Optional[UUID],
+        limit: int,
+        max_depth: int,
+        max_replies: int,
+        cursor: Optional[str] = None,
+    ):
+        """
+        Builds the get_thread query: a recursive CTE over parent_mid seeded with one page of
+        top-level comments (roots of `pid`, or replies to `parent_mid`), joined to content and
+        stats. Siblings are ranked per parent so the breadth limit is applied in SQL; one level
+        past `max_depth` is fetched (first row per parent only) to tell which leaves have replies.
+        """
+        seed = select(CommentCore.mid).order_by(CommentCore.created_at, CommentCore.mid).limit(limit)
+        if parent_mid is not None:
+            seed = seed.where(CommentCore.parent_mid == parent_mid)
+        else:
+            seed = seed.where(CommentCore.pid == pid, CommentCore.parent_mid == None)
+        resume = keyset_after(CommentCore.created_at, CommentCore.mid, cursor, descending=False)
+        if resume is not None:
+            seed = seed.where(resume)
+        seed = seed.subquery("seed")
+
+        thread = select(seed.c.mid.label("mid"), literal(0).label("depth")).cte("thread", recursive=True)
+        child = aliased(CommentCore)
+        thread = thread.union_all(
+            select(child.mid, thread.c.depth + 1)
+            .join(thread, child.parent_mid == thread.c.mid)
+            .where(thread.c.depth <= max_depth)
+        )
+
+        ranked = (
+            select(
+                CommentCore.mid, CommentCore.uid, CommentCore.pid, CommentCore.parent_mid, CommentCore.created_at,
+                CommentContent.content,
+                func.coalesce(CommentStats.likes, 0).label("likes"),
+                func.coalesce(CommentStats.dislikes, 0).label("dislikes"),
+                func.coalesce(CommentStats.reply_count, 0).label("reply_count"),
+                func.coalesce(CommentStats.total_descendants, 0).label("total_descendants"),
+                thread.c.depth,
+                func.row_number().over(
+                    partition_by=CommentCore.parent_mid, order_by=(CommentCore.created_at, CommentCore.mid)
+                ).label("rn"),
+                func.count().over(partition_by=CommentCore.parent_mid).label("siblings"),
+            )
+            .select_from(thread)
+            .join(CommentCore, CommentCore.mid == thread.c.mid)
+            .outerjoin(CommentContent, CommentCore.mid == CommentContent.mid)
+            .outerjoin(CommentStats, CommentCore.mid == CommentStats.mid)
+            .subquery("ranked")
+        )
+        return (
+            select(*ranked.c)
+            .where(ranked.c.rn <= case((ranked.c.depth == 0, limit), (ranked.c.depth > max_depth, 1), else_=max_replies))
+            .order_by(ranked.c.depth, ranked.c.created_at, ranked.c.mid)
+        )
+
+    @staticmethod
+    def get_thread(
+        session: Session,
+        pid: Optional[UUID] = None,
+        parent_mid: Optional[UUID] = None,
+        limit: int = 20,
+        max_depth: int = 3,
+        max_replies: int = 5,
+        cursor: Optional[str] = None,
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """
+        Loads a page of comment threads as a nested tree in a single query.
+        Top level is the roots of `pid` or the replies to `parent_mid`, `limit` per page; below
+        that at most `max_replies` replies per comment and `max_depth` levels are included.
+        A comment with unshown replies has `has_more_replies` set; load them with
+        get_thread(parent_mid=mid, cursor=more_replies_cursor). Returns (tree, next page cursor).
+        """
+        if limit < 1 or max_replies < 1 or max_depth < 0:
+            raise ValueError("limit and max_replies must be positive and max_depth non-negative")
+        rows = session.exec(
+            CommentService.thread_statement(pid, parent_mid, limit, max_depth, max_replies, cursor)
+        ).all()
+
+        top: list[dict[str, Any]] = []
+        nodes: dict[UUID, dict[str, Any]] = {}
+        for row in rows:
+            parent = nodes.get(row.parent_mid)
+            if row.depth > max_depth:
+                # Probe row: only tells its parent (a depth-limited leaf) that replies exist
+                if parent is not None:
+                    parent["has_more_replies"] = True
+                continue
+            if row.depth > 0:
+                if parent is None:
+                    continue        # Ancestor was cut by the breadth limit
+                if row.rn == max_replies and row.siblings > max_replies:
+                    parent["has_more_replies"] = True
+                    parent["more_replies_cursor"] = encode_cursor(row.created_at, row.mid)
+            node = {
+                "mid"                : row.mid,
+                "uid"                : row.uid,
+                "pid"                : row.pid,
+                "parent_mid"         : row.parent_mid,
+                "content"            : row.content,
+                "created_at"         : row.created_at,
+                "likes"              : row.likes,
+                "dislikes"           : row.dislikes,
+                "reply_count"        : row.reply_count,
+                "total_descendants"  : row.total_descendants,
+                "depth"              : row.depth,
+                "has_more_replies"   : False,
+                "more_replies_cursor": None,
+                "replies"            : [],
+            }
+            nodes[row.mid] = node
+            (parent["replies"] if row.depth > 0 else top).append(node)
+
+        return top, next_cursor(top, limit, key=lambda n: (n["created_at"], n["mid"]))
+
     @staticmethod
     def get_root_comments_for_post(session: Session, pid: UUID):
         """
         Retrieves top-level (direct) comments responding to a specific post.
         Maps to: GET ALL ROOT COMMENTS FOR A POST
         """
-        statement = (
+        return session.exec(CommentService.root_comments_statement(pid)).all()
+
+    @staticmethod
+    def root_comments_statement(pid: UUID):
+        """
+        Builds the get_root_comments_for_post query; shared by the sync and async services.
+        """
+        return (
             select(CommentCore.mid, CommentContent.content, CommentStats.likes, CommentCore.created_at)
             .join(CommentContent, CommentCore.mid == CommentContent.mid)
             .join(CommentStats, CommentCore.mid == CommentStats.mid)
@@ -27,7 +185,6 @@ class CommentService:
             .where(CommentCore.parent_mid == None)
             .order_by(CommentCore.created_at)
         )
-        return session.exec(statement).all()
 
     @staticmethod
     def get_replies_for_comment(session: Session, parent_mid: UUID):
@@ -35,35 +192,52 @@ class CommentService:
         Retrieves all nested replies targeting a specific parent comment.
         Maps to: GET REPLIES TO A SPECIFIC COMMENT
         """
-        statement = (
+        return session.exec(CommentService.replies_statement(parent_mid)).all()
+
+    @staticmethod
+    def replies_statement(parent_mid: UUID):
+        """
+        Builds the get_replies_for_comment query; shared by the sync and async services.
+        """
+        return (
             select(CommentCore.mid, CommentContent.content, CommentStats.likes, CommentCore.created_at)
             .join(CommentContent, CommentCore.mid == CommentContent.mid)
             .join(CommentStats, CommentCore.mid == CommentStats.mid)
             .where(CommentCore.parent_mid == parent_mid)
             .order_by(CommentCore.created_at)
         )
-        return session.exec(statement).all()
 
     @staticmethod
     def get_top_comments_for_post(session: Session, pid: UUID, limit: int = 10):
         """
-        Algorithmically surfaces the most constructive (highest likes - dislikes ratio) comments.
+        Algorithmically surfaces the most engaging comments (likes plus direct replies).
         Maps to: GET TOP RANKED COMMENTS FOR A POST
         """
-        statement = (
+        return session.exec(CommentService.top_comments_statement(pid, limit)).all()
+
+    @staticmethod
+    def top_comments_statement(pid: UUID, limit: int = 10):
+        """
+        Builds the get_top_comments_for_post query; shared by the sync and async services.
+        Ranks on the trigger-maintained counters, so it is a plain join with no subqueries.
+        """
+        engagement = CommentStats.likes + CommentStats.reply_count
+        return (
             select(
+                CommentCore.mid,
                 CommentContent.content,
                 CommentStats.likes,
                 CommentStats.dislikes,
-                (CommentStats.likes - CommentStats.dislikes).label("score")
+                CommentStats.reply_count,
+                engagement.label("score")
             )
+            .select_from(CommentCore)
             .join(CommentContent, CommentCore.mid == CommentContent.mid)
             .join(CommentStats, CommentCore.mid == CommentStats.mid)
             .where(CommentCore.pid == pid)
-            .order_by((CommentStats.likes - CommentStats.dislikes).desc())
+            .order_by(engagement.desc(), CommentCore.created_at)
             .limit(limit)
         )
-        return session.exec(statement).all()
 
     @staticmethod
     def list_users_who_liked_comment(session: Session, mid: UUID):
@@ -79,6 +253,15 @@ class CommentService:
         )
         return session.exec(statement).all()
 
+    @staticmethod
+    def count_comment_reactions_by_type(session: Session, mid: UUID):
+        """
+        (reaction_type, count) for every type with at least one reaction on a comment,
+        read from the per-type CommentStats counters by primary key.
+        """
+        counts = reaction_counts(session.get(CommentStats, mid))
+        return [(reaction_type, counts[column]) for reaction_type, column in REACTION_COLUMNS.items() if counts[column]]
+
     @staticmethod
     def check_user_reaction_to_comment(session: Session, mid: UUID, uid: UUID):
         """
@@ -97,6 +280,7 @@ class CommentService:
         """
         Spawns a new comment entity and its content text.
         CommentStats is auto-created by the trg_init_comment_stats trigger.
+        Raises RuleViolation (a ValueError) when the content matches a BLOCK rule of the post's cluster.
         """
         try:
             pid = comment_in.pid
@@ -113,8 +297,10 @@ class CommentService:
                     raise ValueError("Reply post id does not match parent comment")
                 pid = parent_comment.pid
 
-            if not pid or not session.get(PostCore, pid):
+            post = session.get(PostCore, pid) if pid else None
+            if not post:
                 raise ValueError("Post not found")
+            verdict = RuleService.enforce(session, post.cid, comment_in.content)
 
             core_comment = CommentCore(
                 uid        = comment_in.uid,
@@ -123,12 +309,14 @@ class CommentService:
             )
             session.add(core_comment)
             session.flush()  # generate mid before FK inserts
+            CommentService._link_closure(session, core_comment.mid, parent_mid)
 
             content = CommentContent(
                 mid     = core_comment.mid,
                 content = comment_in.content
             )
             session.add(content)
+            ModerationService.enqueue(session, post.cid, "comment", core_comment.mid, core_comment.uid, verdict.flagged)
             session.commit()          # trigger fires here, creating CommentStats
             stats = session.get(CommentStats, core_comment.mid)
 
@@ -141,44 +329,184 @@ class CommentService:
     def delete_comment(session: Session, mid: UUID):
         """
         Wipes a comment entity and cascade sweeps its descendants.
+        The subtree is read from the closure table in one query; rows are then removed
+        bottom-up, one level at a time, so no foreign key ever dangles mid-statement.
+        Each level's closure rows go just before its commentcore rows: the delete trigger
+        only reads the closure rows of the parent, which sit one level up (or outside the
+        subtree) and are still there, so every ancestor's reply counters are decremented.
         """
         comment = session.get(CommentCore, mid)
         if not comment: return False
-        session.delete(comment)
+        subtree = session.exec(
+            select(CommentClosure.descendant_mid, CommentClosure.depth)
+            .where(CommentClosure.ancestor_mid == mid)
+        ).all()
+        levels: dict[int, list[UUID]] = {0: [mid]}
+        for descendant, depth in subtree:
+            if depth > 0:
+                levels.setdefault(depth, []).append(descendant)
+        mids = [m for level in levels.values() for m in level]
+
+        session.exec(delete(CommentReaction).where(CommentReaction.mid.in_(mids)))
+        session.exec(delete(CommentContent).where(CommentContent.mid.in_(mids)))
+        session.exec(delete(CommentStats).where(CommentStats.mid.in_(mids)))
+        for depth in sorted(levels, reverse=True):
+            session.exec(delete(CommentClosure).where(CommentClosure.descendant_mid.in_(levels[depth])))
+            session.exec(delete(CommentCore).where(CommentCore.mid.in_(levels[depth])))
         session.commit()
         return True
 
+    @staticmethod
+    def _link_closure(session: Session, mid: UUID, parent_mid: Optional[UUID]) -> None:
+        """
+        Adds the closure rows for a new comment: itself at depth 0, plus every ancestor
+        of its parent one level further down.
+        """
+        session.add(CommentClosure(ancestor_mid=mid, descendant_mid=mid, depth=0))
+        if parent_mid:
+            session.exec(insert(CommentClosure).from_select(
+                ["ancestor_mid", "descendant_mid", "depth"],
+                select(CommentClosure.ancestor_mid, literal(mid, CommentCore.mid.type), CommentClosure.depth + 1)
+                .where(CommentClosure.descendant_mid == parent_mid),
+            ))
+
+    @staticmethod
+    def get_subtree(session: Session, mid: UUID, max_depth: Optional[int] = None, sort: str = "oldest"):
+        """
+        A comment and all of its descendants (up to `max_depth` levels below it) in one query,
+        each row carrying its depth relative to `mid`.
+        sort: "oldest" | "newest" | "top" (likes - dislikes), applied across the whole subtree.
+        """
+        orderings = {
+            "oldest": (CommentCore.created_at, CommentCore.mid),
+            "newest": (CommentCore.created_at.desc(), CommentCore.mid.desc()),
+            "top": ((CommentStats.likes - CommentStats.dislikes).desc(), CommentCore.created_at),
+        }
+        if sort not in orderings:
+            raise ValueError("sort must be one of: oldest, newest, top")
+        statement = (
+            select(
+                CommentCore.mid, CommentCore.uid, CommentCore.pid, CommentCore.parent_mid, CommentCore.created_at,
+                CommentContent.content,
+                func.coalesce(CommentStats.likes, 0).label("likes"),
+                func.coalesce(CommentStats.dislikes, 0).label("dislikes"),
+                func.coalesce(CommentStats.reply_count, 0).label("reply_count"),
+                func.coalesce(CommentStats.total_descendants, 0).label("total_descendants"),
+                CommentClosure.depth,
+            )
+            .select_from(CommentClosure)
+            .join(CommentCore, CommentCore.mid == CommentClosure.descendant_mid)
+            .outerjoin(CommentContent, CommentCore.mid == CommentContent.mid)
+            .outerjoin(CommentStats, CommentCore.mid == CommentStats.mid)
+            .where(CommentClosure.ancestor_mid == mid)
+            .order_by(*orderings[sort])
+        )
+        if max_depth is not None:
+            statement = statement.where(CommentClosure.depth <= max_depth)
+        return session.exec(statement).all()
+
+    @staticmethod
+    def get_ancestors(session: Session, mid: UUID) -> List[UUID]:
+        """
+        The ids on the path from the thread root down to (excluding) `mid`.
+        """
+        return list(session.exec(
+            select(CommentClosure.ancestor_mid)
+            .where(CommentClosure.descendant_mid == mid, CommentClosure.depth > 0)
+            .order_by(CommentClosure.depth.desc())
+        ).all())
+
+    @staticmethod
+    def get_reply_counts(session: Session, mids: List[UUID]) -> dict:
+        """
+        Direct replies and total descendants for a batch of comments, keyed by mid.
+        """
+        counts = {m: {"replies": 0, "descendants": 0} for m in mids}
+        if not mids:
+            return counts
+        rows = session.exec(
+            select(
+                CommentClosure.ancestor_mid,
+                func.sum(case((CommentClosure.depth == 1, 1), else_=0)),
+                func.count(),
+            )
+            .where(CommentClosure.ancestor_mid.in_(mids), CommentClosure.depth > 0)
+            .group_by(CommentClosure.ancestor_mid)
+        ).all()
+        for ancestor, replies, descendants in rows:
+            counts[ancestor] = {"replies": int(replies), "descendants": descendants}
+        return counts
+
+    @staticmethod
+    def rebuild_closure(session: Session):
+        """
+        Recomputes the whole closure table from parent_mid, one INSERT per thread level.
+        """
+        session.exec(delete(CommentClosure))
+        session.exec(insert(CommentClosure).from_select(
+            ["ancestor_mid", "descendant_mid", "depth"],
+            select(CommentCore.mid, CommentCore.mid, literal(0)),
+        ))
+        level = 0
+        while True:
+            result = session.exec(insert(CommentClosure).from_select(
+                ["ancestor_mid", "descendant_mid", "depth"],
+                select(CommentClosure.ancestor_mid, CommentCore.mid, CommentClosure.depth + 1)
+                .join(CommentCore, CommentCore.parent_mid == CommentClosure.descendant_mid)
+                .where(CommentClosure.depth == level),
+            ))
+            if not result.rowcount:
+                break
+            level += 1
+        session.commit()
+
+    @staticmethod
+    def rebuild_reply_counts(session: Session):
+        """
+        Recomputes reply_count and total_descendants on every CommentStats row.
+        Reads the closure table, so run rebuild_closure first if it may be stale.
+        """
+        replies = (
+            select(func.count()).select_from(CommentCore)
+            .where(CommentCore.parent_mid == CommentStats.mid)
+            .scalar_subquery()
+        )
+        descendants = (
+            select(func.count()).select_from(CommentClosure)
+            .where(CommentClosure.ancestor_mid == CommentStats.mid, CommentClosure.depth > 0)
+            .scalar_subquery()
+        )
+        session.exec(update(CommentStats).values(reply_count=replies, total_descendants=descendants))
+        session.commit()
+
     @staticmethod
     def add_reaction_to_comment(session: Session, mid: UUID, uid: UUID, reaction_type):
         """
         Appends or updates a user rating action on a specific comment.
+        One stats UPDATE plus one native upsert (see api/reactions.py); returns the stored reaction.
         """
         try:
-            existing_Reaction = session.exec(select(CommentReaction).where(CommentReaction.mid == mid, CommentReaction.uid == uid)).first()
-            stats = session.get(CommentStats, mid)
-            
-            if existing_Reaction:
-                if existing_Reaction.reaction_type == reaction_type:
-                    return existing_Reaction
-                if existing_Reaction.reaction_type.name == "LIKE" and stats:
-                    session.exec(update(CommentStats).where(CommentStats.mid == mid).values(likes=CommentStats.likes - 1))
-                elif existing_Reaction.reaction_type.name == "DISLIKE" and stats:
-                    session.exec(update(CommentStats).where(CommentStats.mid == mid).values(dislikes=CommentStats.dislikes - 1))
-                session.delete(existing_Reaction)
-            
-            reaction = CommentReaction(mid=mid, uid=uid, reaction_type=reaction_type)
-            session.add(reaction)
-            
-            if reaction_type.name == "LIKE" and stats:
-                session.exec(update(CommentStats).where(CommentStats.mid == mid).values(likes=CommentStats.likes + 1))
-            elif reaction_type.name == "DISLIKE" and stats:
-                session.exec(update(CommentStats).where(CommentStats.mid == mid).values(dislikes=CommentStats.dislikes + 1))
-            
+            set_reaction(session, CommentStats, CommentStats.mid, CommentReaction, CommentReaction.mid, mid, uid, reaction_type)
             session.commit()
-            return reaction
-        except IntegrityError:
-            session.rollback()
-            return session.exec(select(CommentReaction).where(CommentReaction.mid == mid, CommentReaction.uid == uid)).first()
+            return session.get(CommentReaction, {"mid": mid, "uid": uid}, populate_existing=True)
         except Exception as e:
             session.rollback()
             raise e
+
+
+class AsyncCommentService:
+    """
+    Async twins of the CommentService read paths, for handlers running on an AsyncSession.
+    """
+
+    @staticmethod
+    async def get_root_comments_for_post(session: AsyncSession, pid: UUID):
+        return (await session.exec(CommentService.root_comments_statement(pid))).all()
+
+    @staticmethod
+    async def get_replies_for_comment(session: AsyncSession, parent_mid: UUID):
+        return (await session.exec(CommentService.replies_statement(parent_mid))).all()
+
+    @staticmethod
+    async def get_top_comments_for_post(session: AsyncSession, pid: UUID, limit: int = 10):
+        return (await session.exec(CommentService.top_comments_statement(pid, limit))).all()
@@ -0,0 +1,131 @@
+import os
+from sqlalchemy import delete, insert, literal
+from sqlmodel import Session, select, desc, exists
+from typing import Optional
+from uuid import UUID
+
+from api.models.feed import UserFeed
+from api.models.post import PostCore, PostContent, PostStats
+from api.models.cluster import ClusterMember
+from api.pagination import keyset_after
+
+FEED_BACKFILL_LIMIT = int(os.getenv("FEED_BACKFILL_LIMIT", "200"))   # Newest posts of a cluster copied into a joiner's feed (<= 0 copies all)
+
+
+class FeedService:
+    """
+    Maintains the materialized per-user home feed (UserFeed) so reading a feed is a
+    single indexed range scan instead of a PostCore x ClusterMember join and sort.
+
+    The feed is capped by design: joining a cluster (or a rebuild) copies only its newest
+    FEED_BACKFILL_LIMIT posts, so older posts of that cluster are reachable from the
+    cluster page but not from the home feed. Every post created after the join is fanned
+    out. Set FEED_BACKFILL_LIMIT <= 0 to copy a cluster's whole history instead.
+    """
+
+    @staticmethod
+    def fan_out_post(session: Session, core: PostCore):
+        """
+        Appends a freshly flushed post to the feed of every member of its cluster.
+        Runs inside the caller's transaction.
+        """
+        members = select(
+            ClusterMember.uid,
+            literal(core.pid, UserFeed.__table__.c.pid.type),
+            literal(core.cid, UserFeed.__table__.c.cid.type),
+            literal(core.created_at, UserFeed.__table__.c.created_at.type),
+        ).where(ClusterMember.cid == core.cid)
+        session.exec(insert(UserFeed).from_select(["uid", "pid", "cid", "created_at"], members))
+
+    @staticmethod
+    def backfill_member(session: Session, cid: UUID, uid: UUID, limit: int = FEED_BACKFILL_LIMIT):
+        """
+        Copies the most recent `limit` posts of a cluster (all of them if `limit` <= 0)
+        into a new member's feed. Runs inside the caller's transaction.
+        """
+        already = exists().where(UserFeed.uid == uid, UserFeed.pid == PostCore.pid)
+        recent = (
+            select(
+                literal(uid, UserFeed.__table__.c.uid.type),
+                PostCore.pid,
+                PostCore.cid,
+                PostCore.created_at,
+            )
+            .where(PostCore.cid == cid)
+            .where(~already)
+            .order_by(desc(PostCore.created_at))
+        )
+        if limit > 0:
+            recent = recent.limit(limit)
+        session.exec(insert(UserFeed).from_select(["uid", "pid", "cid", "created_at"], recent))
+
+    @staticmethod
+    def trim_member(session: Session, cid: UUID, uid: UUID):
+        """
+        Drops a cluster's posts from the feed of a member who left it.
+        Runs inside the caller's transaction.
+        """
+        session.exec(delete(UserFeed).where(UserFeed.uid == uid, UserFeed.cid == cid))
+
+    @staticmethod
+    def remove_post(session: Session, pid: UUID):
+        """
+        Removes a deleted post from every feed it was fanned out to.
+        Runs inside the caller's transaction.
+        """
+        session.exec(delete(UserFeed).where(UserFeed.pid == pid))
+
+    @staticmethod
+    def remove_cluster(session: Session, cid: UUID):
+        """
+        Removes a deleted cluster's posts from every feed.
+        Runs inside the caller's transaction.
+        """
+        session.exec(delete(UserFeed).where(UserFeed.cid == cid))
+
+    @staticmethod
+    def remove_user(session: Session, uid: UUID):
+        """
+        Drops the feed of a deleted user.
+        Runs inside the caller's transaction.
+        """
+        session.exec(delete(UserFeed).where(UserFeed.uid == uid))
+
+    @staticmethod
+    def get_feed(session: Session, uid: UUID, limit: int = 50, cursor: Optional[str] = None):
+        """
+        Reads a page of (PostCore, PostContent, PostStats) from the user's materialized feed,
+        newest first, resuming after a (created_at, pid) keyset cursor.
+        """
+        return session.exec(FeedService.feed_statement(uid, limit, cursor)).all()
+
+    @staticmethod
+    def feed_statement(uid: UUID, limit: int = 50, cursor: Optional[str] = None):
+        """
+        Builds the get_feed query; shared by the sync and async services.
+        """
+        statement = (
+            select(PostCore, PostContent, PostStats)
+            .select_from(UserFeed)
+            .join(PostCore, UserFeed.pid == PostCore.pid)
+            .join(PostContent, UserFeed.pid == PostContent.pid)
+            .join(PostStats, UserFeed.pid == PostStats.pid)
+            .where(UserFeed.uid == uid)
+        )
+        after = keyset_after(UserFeed.created_at, UserFeed.pid, cursor)
+        if after is not None:
+            statement = statement.where(after)
+        return statement.order_by(desc(UserFeed.created_at), desc(UserFeed.pid)).limit(limit)
+
+    @staticmethod
+    def rebuild(session: Session, limit: int = FEED_BACKFILL_LIMIT):
+        """
+        Rebuilds every feed from current memberships (one-off migration / repair).
+        """
+        session.exec(delete(UserFeed))
+        memberships = session.exec(select(ClusterMember.cid, ClusterMember.uid)).all()
+        for i, (cid, uid) in enumerate(memberships, start=1):
+            FeedService.backfill_member(session, cid, uid, limit)
+            if i % 500 == 0:
+                session.commit()
+        session.commit()
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import copy
+import os
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Callable, Iterable, Optional
 from uuid import UUID
 
-from sqlmodel import Session, select, col
+from sqlmodel import Session, select, col, func
+
+from api.cache import TTLCache
+from api.realtime import hub
 
 from api.models.enums import MegaphoneType, EventRsvpStatus
 from api.models.post import (
@@ -24,29 +29,92 @@ def megaphone_is_live(meg: Megaphone) -> bool:
     return meg.end_time > datetime.now()
 
 
+# Shared (user-independent) part of each summary, keyed by pid. Votes and RSVPs
+# made through this process invalidate their pid; other workers converge within the TTL.
+SUMMARY_CACHE_TTL = float(os.getenv("MEGAPHONE_SUMMARY_TTL", "2"))
+_poll_cache = TTLCache(ttl=SUMMARY_CACHE_TTL)
+_event_cache = TTLCache(ttl=SUMMARY_CACHE_TTL)
+
+
+def _cached_summaries(
+    cache: TTLCache, pids: list[UUID], compute: Callable[[list[UUID]], dict[UUID, dict[str, Any]]]
+) -> dict[UUID, dict[str, Any]]:
+    """
+    Serves pids from `cache` and computes the misses in a single batch. Callers get deep
+    copies, so mutating a summary never reaches the cached entry.
+    """
+    found: dict[UUID, dict[str, Any]] = {}
+    missing: list[UUID] = []
+    for pid in pids:
+        hit = cache.get(pid)
+        if hit is None:
+            missing.append(pid)
+        else:
+            found[pid] = copy.deepcopy(hit)
+    if missing:
+        for pid, shared in compute(missing).items():
+            cache.set(pid, shared)
+            found[pid] = copy.deepcopy(shared)
+    return found
+
+
+def invalidate_summaries(pid: UUID) -> None:
+    _poll_cache.invalidate(pid)
+    _event_cache.invalidate(pid)
+
+
 def get_poll_summary(session: Session, pid: UUID, uid: Optional[UUID]) -> dict[str, Any]:
+    return get_poll_summaries(session, [pid], uid)[pid]
+
+
+def _poll_counts(session: Session, pids: list[UUID]) -> dict[UUID, dict[str, Any]]:
     opts = session.exec(
-        select(MegaphonePollOption).where(MegaphonePollOption.pid == pid).order_by(col(MegaphonePollOption.idx))
+        select(MegaphonePollOption)
+        .where(col(MegaphonePollOption.pid).in_(pids))
+        .order_by(col(MegaphonePollOption.pid), col(MegaphonePollOption.idx))
     ).all()
-    votes = session.exec(select(MegaphonePollVote).where(MegaphonePollVote.pid == pid)).all()
-    counts: dict[int, int] = {o.idx: 0 for o in opts}
-    for v in votes:
-        counts[v.option_idx] = counts.get(v.option_idx, 0) + 1
-    total = len(votes)
-    my_vote: Optional[int] = None
-    if uid:
-        row = session.exec(
-            select(MegaphonePollVote).where(MegaphonePollVote.pid == pid, MegaphonePollVote.uid == uid)
-        ).first()
-        if row:
-            my_vote = row.option_idx
+    # One row per (pid, option) with votes; served from ix_megaphonepollvote_pid_option_idx
+    tallies = session.exec(
+        select(MegaphonePollVote.pid, MegaphonePollVote.option_idx, func.count())
+        .where(col(MegaphonePollVote.pid).in_(pids))
+        .group_by(MegaphonePollVote.pid, MegaphonePollVote.option_idx)
+    ).all()
+
+    counts: dict[UUID, dict[int, int]] = {pid: {} for pid in pids}
+    for pid, option_idx, n in tallies:
+        counts[pid][option_idx] = n
+    opts_by_pid: dict[UUID, list[MegaphonePollOption]] = {pid: [] for pid in pids}
+    for o in opts:
+        opts_by_pid[o.pid].append(o)
     return {
-        "options": [{"idx": o.idx, "label": o.label, "votes": counts.get(o.idx, 0)} for o in opts],
-        "total_votes": total,
-        "my_vote": my_vote,
+        pid: {
+            "options": [{"idx": o.idx, "label": o.label, "votes": counts[pid].get(o.idx, 0)} for o in opts_by_pid[pid]],
+            "total_votes": sum(counts[pid].values()),
+        }
+        for pid in pids
     }
 
 
+def get_poll_summaries(session: Session, pids: Iterable[UUID], uid: Optional[UUID]) -> dict[UUID, dict[str, Any]]:
+    """
+    Poll summaries for a whole page of megaphones, keyed by pid.
+    Vote totals are aggregated in SQL and cached per pid; only the caller's own
+    vote is looked up on every request.
+    """
+    pids = list(dict.fromkeys(pids))
+    if not pids:
+        return {}
+    shared = _cached_summaries(_poll_cache, pids, lambda missing: _poll_counts(session, missing))
+    my_votes: dict[UUID, int] = {}
+    if uid:
+        mine = session.exec(
+            select(MegaphonePollVote.pid, MegaphonePollVote.option_idx)
+            .where(col(MegaphonePollVote.pid).in_(pids), MegaphonePollVote.uid == uid)
+        ).all()
+        my_votes = {pid: option_idx for pid, option_idx in mine}
+    return {pid: {**shared[pid], "my_vote": my_votes.get(pid)} for pid in pids}
+
+
 def _rsvp_status_str(status: Any) -> str:
     s = status
     v = s.value if hasattr(s, "value") else str(s)
@@ -54,26 +122,74 @@ def _rsvp_status_str(status: Any) -> str:
 
 
 def get_event_summary(session: Session, pid: UUID, uid: Optional[UUID]) -> dict[str, Any]:
-    meta = session.get(MegaphoneEventMeta, pid)
-    rsvps = session.exec(select(MegaphoneEventRsvp).where(MegaphoneEventRsvp.pid == pid)).all()
-    going = sum(1 for r in rsvps if _rsvp_status_str(r.status) == EventRsvpStatus.GOING.value)
-    maybe = sum(1 for r in rsvps if _rsvp_status_str(r.status) == EventRsvpStatus.MAYBE.value)
-    not_going = sum(1 for r in rsvps if _rsvp_status_str(r.status) == EventRsvpStatus.NOT_GOING.value)
-    total = len(rsvps)
-    my_status: Optional[str] = None
-    if uid:
-        row = session.exec(
-            select(MegaphoneEventRsvp).where(MegaphoneEventRsvp.pid == pid, MegaphoneEventRsvp.uid == uid)
-        ).first()
-        if row:
-            my_status = _rsvp_status_str(row.status)
-    return {
-        "starts_at": meta.starts_at.isoformat() if meta and meta.starts_at else None,
-        "ends_at": meta.ends_at.isoformat() if meta and meta.ends_at else None,
-        "location": meta.location if meta else None,
-        "counts": {"GOING": going, "MAYBE": maybe, "NOT_GOING": not_going, "total_rsvps": total},
-        "my_status": my_status,
+    return get_event_summaries(session, [pid], uid)[pid]
+
+
+def _event_counts(session: Session, pids: list[UUID]) -> dict[UUID, dict[str, Any]]:
+    metas = {
+        m.pid: m
+        for m in session.exec(select(MegaphoneEventMeta).where(col(MegaphoneEventMeta.pid).in_(pids))).all()
+    }
+    # One row per (pid, status); served from ix_megaphoneeventrsvp_pid_status
+    tallies = session.exec(
+        select(MegaphoneEventRsvp.pid, MegaphoneEventRsvp.status, func.count())
+        .where(col(MegaphoneEventRsvp.pid).in_(pids))
+        .group_by(MegaphoneEventRsvp.pid, MegaphoneEventRsvp.status)
+    ).all()
+
+    counts: dict[UUID, dict[str, int]] = {
+        pid: {s.value: 0 for s in EventRsvpStatus} for pid in pids
     }
+    for pid, st, n in tallies:
+        counts[pid][_rsvp_status_str(st)] = n
+    out: dict[UUID, dict[str, Any]] = {}
+    for pid in pids:
+        meta = metas.get(pid)
+        c = counts[pid]
+        out[pid] = {
+            "starts_at": meta.starts_at.isoformat() if meta and meta.starts_at else None,
+            "ends_at": meta.ends_at.isoformat() if meta and meta.ends_at else None,
+            "location": meta.location if meta else None,
+            "counts": {
+                "GOING": c[EventRsvpStatus.GOING.value],
+                "MAYBE": c[EventRsvpStatus.MAYBE.value],
+                "NOT_GOING": c[EventRsvpStatus.NOT_GOING.value],
+                "total_rsvps": sum(c.values()),
+            },
+        }
+    return out
+
+
+def get_event_summaries(session: Session, pids: Iterable[UUID], uid: Optional[UUID]) -> dict[UUID, dict[str, Any]]:
+    """
+    Event summaries for a whole page of megaphones, keyed by pid.
+    RSVP totals are aggregated in SQL and cached per pid; only the caller's own
+    status is looked up on every request.
+    """
+    pids = list(dict.fromkeys(pids))
+    if not pids:
+        return {}
+    shared = _cached_summaries(_event_cache, pids, lambda missing: _event_counts(session, missing))
+    my_status: dict[UUID, str] = {}
+    if uid:
+        mine = session.exec(
+            select(MegaphoneEventRsvp.pid, MegaphoneEventRsvp.status)
+            .where(col(MegaphoneEventRsvp.pid).in_(pids), MegaphoneEventRsvp.uid == uid)
+        ).all()
+        my_status = {pid: _rsvp_status_str(st) for pid, st in mine}
+    return {pid: {**shared[pid], "my_status": my_status.get(pid)} for pid in pids}
+
+
+def poll_snapshot(pid: UUID, summary: dict[str, Any]) -> dict[str, Any]:
+    """Watcher-independent stream frame for a poll (drops the caller's own vote)."""
+    return {"pid": str(pid), "type": MegaphoneType.POLL.value,
+            "poll": {k: v for k, v in summary.items() if k != "my_vote"}}
+
+
+def event_snapshot(pid: UUID, summary: dict[str, Any]) -> dict[str, Any]:
+    """Watcher-independent stream frame for an event (drops the caller's own status)."""
+    return {"pid": str(pid), "type": MegaphoneType.EVENT.value,
+            "event": {k: v for k, v in summary.items() if k != "my_status"}}
 
 
 def _meg_type_str(m: Megaphone) -> str:
@@ -111,7 +227,10 @@ def cast_poll_vote(
     else:
         session.add(MegaphonePollVote(pid=pid, uid=uid, option_idx=option_idx))
     session.commit()
-    return get_poll_summary(session, pid, uid)
+    invalidate_summaries(pid)
+    summary = get_poll_summary(session, pid, uid)
+    hub.publish(pid, poll_snapshot(pid, summary))
+    return summary
 
 
 def set_event_rsvp(
@@ -138,4 +257,7 @@ def set_event_rsvp(
     else:
         session.add(MegaphoneEventRsvp(pid=pid, uid=uid, status=status))
     session.commit()
-    return get_event_summary(session, pid, uid)
+    invalidate_summaries(pid)
+    summary = get_event_summary(session, pid, uid)
+    hub.publish(pid, event_snapshot(pid, summary))
+    return summary
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import Session, select, update
+
+from api.models.enums import ModerationStatus
+from api.models.moderation import ModerationItem
+from api.pagination import keyset_after
+from api.rules import RuleMatch
+from api.services.cluster_service import ClusterService
+
+MODERATION_INTERVAL   = float(os.getenv("MODERATION_INTERVAL", "5"))     # Seconds between worker passes (<= 0 disables)
+MODERATION_BATCH_SIZE = int(os.getenv("MODERATION_BATCH_SIZE", "200"))   # Queued items handled per transaction
+
+logger = logging.getLogger(__name__)
+
+
+class ModerationService:
+    """
+    The moderation queue behind FLAG rules. A flagged write only inserts one QUEUED
+    ModerationItem in its own transaction; the worker started from the app lifespan
+    later notifies each cluster's moderators in batches and opens the items for review.
+    """
+
+    @staticmethod
+    def enqueue(session: Session, cid: UUID, kind: str, target: UUID, uid: UUID,
+                flagged: List[RuleMatch]) -> Optional[ModerationItem]:
+        """
+        Adds a QUEUED item for `target` if any FLAG rule matched. Does not commit: the
+        item is written with the post or comment it refers to, or not at all.
+        """
+        if not flagged:
+            return None
+        item = ModerationItem(
+            cid    = cid,
+            kind   = kind,
+            target = target,
+            uid    = uid,
+            rules  = ", ".join(rule.name for rule in flagged),
+        )
+        session.add(item)
+        return item
+
+    @staticmethod
+    def _notify(cid: UUID, moderators: list, count: int) -> None:
+        # No notification channel exists yet; the opened items are what moderators review
+        logger.info(
+            "%d flagged item(s) awaiting review in cluster %s; notifying %s",
+            count, cid, ", ".join(str(moderator.uid) for moderator in moderators) or "no moderators",
+        )
+
+    @staticmethod
+    def process_batch(session: Session, batch_size: int = MODERATION_BATCH_SIZE) -> int:
+        """
+        Opens up to `batch_size` of the oldest QUEUED items and notifies their clusters'
+        moderators, one lookup and one UPDATE per cluster. Returns the items opened.
+        """
+        queued = session.exec(
+            select(ModerationItem.qid, ModerationItem.cid)
+            .where(ModerationItem.status == ModerationStatus.QUEUED)
+            .order_by(ModerationItem.created_at)
+            .limit(batch_size)
+        ).all()
+        by_cluster = defaultdict(list)
+        for qid, cid in queued:
+            by_cluster[cid].append(qid)
+
+        opened = 0
+        now = datetime.now()
+        for cid, qids in by_cluster.items():
+            moderators = ClusterService.list_cluster_moderators(session, cid)
+            # The status check claims the rows, so a second worker never opens them twice
+            claimed = session.exec(
+                update(ModerationItem)
+                .where(ModerationItem.qid.in_(qids), ModerationItem.status == ModerationStatus.QUEUED)
+                .values(status=ModerationStatus.OPEN, notified_at=now, notified=len(moderators))
+            ).rowcount
+            if claimed:
+                ModerationService._notify(cid, moderators, claimed)
+            opened += claimed
+        session.commit()
+        return opened
+
+    @staticmethod
+    def run(session: Session, batch_size: int = MODERATION_BATCH_SIZE, max_batches: Optional[int] = None) -> int:
+        """
+        Processes batches until the queue is empty (or `max_batches` ran); returns the items opened.
+        """
+        opened = batches = 0
+        while max_batches is None or batches < max_batches:
+            count = ModerationService.process_batch(session, batch_size)
+            opened += count
+            batches += 1
+            if count < batch_size:
+                break
+        return opened
+
+    @staticmethod
+    def list_queue(session: Session, cid: UUID, status: ModerationStatus = ModerationStatus.OPEN,
+                   limit: int = 50, cursor: Optional[str] = None):
+        """
+        Items of one cluster in one status, oldest first.
+        Pages with a (created_at, qid) keyset cursor.
+        """
+        statement = select(ModerationItem).where(ModerationItem.cid == cid, ModerationItem.status == status)
+        after = keyset_after(ModerationItem.created_at, ModerationItem.qid, cursor, descending=False)
+        if after is not None:
+            statement = statement.where(after)
+        statement = statement.order_by(ModerationItem.created_at, ModerationItem.qid).limit(limit)
+        return session.exec(statement).all()
+
+    @staticmethod
+    def resolve(session: Session, qid: UUID, reviewer_uid: UUID) -> Optional[ModerationItem]:
+        """
+        Marks an item RESOLVED by `reviewer_uid`; returns None if it does not exist.
+        Removing the content itself goes through the regular delete endpoints.
+        """
+        item = session.get(ModerationItem, qid)
+        if not item:
+            return None
+        item.status = ModerationStatus.RESOLVED
+        item.reviewed_by = reviewer_uid
+        item.reviewed_at = datetime.now()
+        session.add(item)
+        session.commit()
+        session.refresh(item)
+        return item
+
+
+def _run_once(engine: Engine) -> int:
+    with Session(engine) as session:
+        return ModerationService.run(session)
+
+
+async def moderate_forever(engine: Engine, interval: float = MODERATION_INTERVAL) -> None:
+    """
+    Background loop started from the app lifespan: drains the queue every `interval`
+    seconds, off the event loop. A failed pass is logged and retried on the next tick.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(_run_once, engine)
+        except Exception:
+            logger.exception("Moderation queue pass failed")
@@ -1,13 +1,21 @@
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import delete, insert
 from sqlmodel import Session, select, func, desc, or_, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
 
-from api.models.post import PostCore, PostContent, PostStats, PostReaction, Window, Megaphone
-from api.models.cluster import ClusterMember
+from api.models.post import PostCore, PostContent, PostStats, PostReaction, Window, Megaphone, UserPostStats, ClusterPostStats
 from api.models.user import UserProfile
 from api.models.enums import ReactionType
+from api.counter_buffer import counter_buffer
+from api.pagination import keyset_after
+from api.reactions import REACTION_COLUMNS, reaction_counts, set_reaction, clear_reaction
+from api.response_cache import invalidate_tags
+from api.services.feed_service import FeedService
+from api.services.moderation_service import ModerationService
+from api.services.rule_service import RuleService
+from api.services.trending_service import TrendingService
 
 class PostService:
     """
@@ -29,36 +37,79 @@ class PostService:
         return session.exec(statement).first()
 
     @staticmethod
-    def get_recent_posts_for_cluster(session: Session, cid: UUID, limit: int = 50):
+    def list_posts(session: Session, cid: Optional[UUID] = None, limit: int = 100, cursor: Optional[str] = None, skip: int = 0):
+        """
+        Lists (PostCore, PostContent, PostStats) rows newest first, optionally within one cluster.
+        Pages with a (created_at, pid) keyset cursor; `skip` is only honoured without a cursor.
+        """
+        return session.exec(PostService.list_posts_statement(cid, limit, cursor, skip)).all()
+
+    @staticmethod
+    def list_posts_statement(cid: Optional[UUID] = None, limit: int = 100, cursor: Optional[str] = None, skip: int = 0):
+        """
+        Builds the list_posts query; shared by the sync and async services.
+        """
+        statement = (
+            select(PostCore, PostContent, PostStats)
+            .outerjoin(PostContent, PostCore.pid == PostContent.pid)
+            .outerjoin(PostStats, PostCore.pid == PostStats.pid)
+        )
+        if cid:
+            statement = statement.where(PostCore.cid == cid)
+        after = keyset_after(PostCore.created_at, PostCore.pid, cursor)
+        if after is not None:
+            statement = statement.where(after)
+        elif skip:
+            statement = statement.offset(skip)
+        return statement.order_by(desc(PostCore.created_at), desc(PostCore.pid)).limit(limit)
+
+    @staticmethod
+    def get_recent_posts_for_cluster(session: Session, cid: UUID, limit: int = 50, cursor: Optional[str] = None):
         """
         Feed generator for a specific cluster container.
         Maps to: LIST ALL POSTS IN A SPECIFIC CLUSTER
         """
+        return session.exec(PostService.recent_posts_for_cluster_statement(cid, limit, cursor)).all()
+
+    @staticmethod
+    def recent_posts_for_cluster_statement(cid: UUID, limit: int = 50, cursor: Optional[str] = None):
+        """
+        Builds the get_recent_posts_for_cluster query; shared by the sync and async services.
+        """
         statement = (
             select(PostCore.pid, PostContent.content, PostStats.likes, PostCore.created_at)
             .join(PostContent, PostCore.pid == PostContent.pid)
             .join(PostStats, PostCore.pid == PostStats.pid)
             .where(PostCore.cid == cid)
-            .order_by(desc(PostCore.created_at))
-            .limit(limit)
         )
-        return session.exec(statement).all()
+        after = keyset_after(PostCore.created_at, PostCore.pid, cursor)
+        if after is not None:
+            statement = statement.where(after)
+        return statement.order_by(desc(PostCore.created_at), desc(PostCore.pid)).limit(limit)
 
     @staticmethod
-    def get_recent_posts_by_user(session: Session, uid: UUID, limit: int = 50):
+    def get_recent_posts_by_user(session: Session, uid: UUID, limit: int = 50, cursor: Optional[str] = None):
         """
         Feed generator for a specific user's public profile.
         Maps to: LIST ALL POSTS BY A SPECIFIC USER
         """
+        return session.exec(PostService.recent_posts_by_user_statement(uid, limit, cursor)).all()
+
+    @staticmethod
+    def recent_posts_by_user_statement(uid: UUID, limit: int = 50, cursor: Optional[str] = None):
+        """
+        Builds the get_recent_posts_by_user query; shared by the sync and async services.
+        """
         statement = (
             select(PostCore.pid, PostContent.content, PostStats.likes, PostCore.created_at)
             .join(PostContent, PostCore.pid == PostContent.pid)
             .join(PostStats, PostCore.pid == PostStats.pid)
             .where(PostCore.uid == uid)
-            .order_by(desc(PostCore.created_at))
-            .limit(limit)
         )
-        return session.exec(statement).all()
+        after = keyset_after(PostCore.created_at, PostCore.pid, cursor)
+        if after is not None:
+            statement = statement.where(after)
+        return statement.order_by(desc(PostCore.created_at), desc(PostCore.pid)).limit(limit)
 
     @staticmethod
     def get_top_liked_posts_in_cluster(session: Session, cid: UUID, limit: int = 5):
@@ -109,15 +160,14 @@ class PostService:
     @staticmethod
     def count_post_reactions_by_type(session: Session, pid: UUID):
         """
-        Aggregates reaction distributions for charting.
+        Aggregates reaction distributions for charting: (reaction_type, count) for every type
+        with at least one reaction, read from the per-type PostStats counters by primary key.
         Maps to: COUNT REACTIONS BY TYPE FOR A POST
         """
-        statement = (
-            select(PostReaction.reaction_type, func.count(PostReaction.reaction_type).label("count"))
-            .where(PostReaction.pid == pid)
-            .group_by(PostReaction.reaction_type)
-        )
-        return session.exec(statement).all()
+        counts = reaction_counts(session.get(PostStats, pid))
+        if counter_buffer.enabled:
+            counts = counter_buffer.merged(pid, **counts)
+        return [(reaction_type, counts[column]) for reaction_type, column in REACTION_COLUMNS.items() if counts[column]]
 
     @staticmethod
     def get_active_megaphones(session: Session):
@@ -149,43 +199,36 @@ class PostService:
         return session.exec(statement).all()
 
     @staticmethod
-    def get_homepage_feed_for_user(session: Session, uid: UUID, limit: int = 50):
+    def get_homepage_feed_for_user(session: Session, uid: UUID, limit: int = 50, cursor: Optional[str] = None):
         """
-        Generates a custom feed by extracting posts only from clusters the user is a member of.
+        Generates a custom feed of posts from clusters the user is a member of.
+        Served from the materialized UserFeed table maintained by FeedService.
         """
-        statement = (
-            select(PostCore, PostContent, PostStats)
-            .join(PostContent, PostCore.pid == PostContent.pid)
-            .join(PostStats, PostCore.pid == PostStats.pid)
-            .join(ClusterMember, PostCore.cid == ClusterMember.cid)
-            .where(ClusterMember.uid == uid)
-            .order_by(desc(PostCore.created_at))
-            .limit(limit)
-        )
-        return session.exec(statement).all()
+        return FeedService.get_feed(session, uid, limit, cursor)
 
     @staticmethod
-    def get_trending_posts_globally(session: Session, limit: int = 20):
+    def get_trending_posts_globally(session: Session, limit: int = 20, cursor: Optional[str] = None):
         """
         Retrieves universally trending content across all public clusters based on like velocity.
+        Returns (PostCore, PostContent, PostStats, score) rows ranked by the recency-boosted
+        score that TrendingService maintains on every reaction.
         """
-        statement = (
-            select(PostCore, PostContent, PostStats)
-            .join(PostContent, PostCore.pid == PostContent.pid)
-            .join(PostStats, PostCore.pid == PostStats.pid)
-            # .join(ClusterCore).where(ClusterCore.is_private == False)
-            .order_by(desc(PostStats.likes)) # Simple approximation of trending
-            .limit(limit)
-        )
-        return session.exec(statement).all()
+        return TrendingService.get_trending(session, limit, cursor)
+
+    @staticmethod
+    def _rule_text(content: Optional[str], tags: Optional[str]) -> str:
+        # What cluster rules are matched against: the body and its tags
+        return "\n".join(part for part in (content, tags) if part)
 
     @staticmethod
     def create_post(session: Session, post_in):
         """
         Initializes a post including its content payload.
         PostStats is auto-created by the trg_init_post_stats trigger.
+        Raises RuleViolation (a ValueError) when the content matches a BLOCK rule of the cluster.
         """
         try:
+            verdict = RuleService.enforce(session, post_in.cid, PostService._rule_text(post_in.content, post_in.tags))
             core_post = PostCore(
                 uid  = post_in.uid,
                 cid  = post_in.cid,
@@ -200,7 +243,11 @@ class PostService:
                 tags    = post_in.tags
             )
             session.add(content)
+            ModerationService.enqueue(session, core_post.cid, "post", core_post.pid, core_post.uid, verdict.flagged)
+            FeedService.fan_out_post(session, core_post)
+            TrendingService.track_post(session, core_post)
             session.commit()          # trigger fires here, creating PostStats
+            invalidate_tags("posts")
             stats = session.get(PostStats, core_post.pid)
 
             return core_post, content, stats
@@ -216,6 +263,10 @@ class PostService:
         try:
             # 1. Get origin details to copy content/tags if needed (though Window usually just points)
             origin_content = session.get(PostContent, origin_pid)
+            flagged = []
+            if origin_content:
+                text = PostService._rule_text(origin_content.content, origin_content.tags)
+                flagged = RuleService.enforce(session, target_cid, text).flagged
             
             # 2. Create the new PostCore (type=WINDOW)
             core_post = PostCore(
@@ -243,8 +294,12 @@ class PostService:
                 created_at=datetime.now()
             )
             session.add(window)
-            
+            ModerationService.enqueue(session, target_cid, "post", core_post.pid, uid, flagged)
+            FeedService.fan_out_post(session, core_post)
+            TrendingService.track_post(session, core_post)
+
             session.commit()
+            invalidate_tags("posts")
             stats = session.get(PostStats, core_post.pid)
             return core_post, content, stats
         except Exception as e:
@@ -258,63 +313,36 @@ class PostService:
         """
         post = session.get(PostCore, pid)
         if not post: return False
+        FeedService.remove_post(session, pid)
+        TrendingService.remove_post(session, pid)
         session.delete(post)
         session.commit()
+        invalidate_tags("posts", "reactions")
         return True
 
+    @staticmethod
+    def _after_reaction(session: Session, pid: UUID, buffer):
+        # Buffered counters reach PostStats (and the trending score) at the next flush
+        if buffer is None:
+            TrendingService.refresh_post(session, pid)
+        session.commit()
+        invalidate_tags("reactions")
+        if buffer is not None and buffer.due():
+            buffer.flush(session)
+
     @staticmethod
     def add_reaction_to_post(session: Session, pid: UUID, uid: UUID, reaction_type):
         """
         Registers a reaction and updates the aggregated statistics payload.
         Returns a dict with updated likes, dislikes, and current_reaction.
+        One stats UPDATE plus one native upsert, so concurrent reactors never collide (see api/reactions.py);
+        with COUNTER_BUFFER on, the counter delta is parked in api/counter_buffer.py instead.
         """
+        buffer = counter_buffer if counter_buffer.enabled else None
         try:
-            # Ensure only 1 reaction per user per post exists by clearing previous
-            existing_Reaction = session.exec(select(PostReaction).where(PostReaction.pid == pid, PostReaction.uid == uid)).first()
-            stats = session.get(PostStats, pid)
-            
-            if existing_Reaction:
-                if existing_Reaction.reaction_type == reaction_type:
-                    # No change — return current state
-                    return {
-                        "likes": stats.likes if stats else 0,
-                        "dislikes": stats.dislikes if stats else 0,
-                        "current_reaction": existing_Reaction.reaction_type.name,
-                    }
-                # Decrease old stat counter (LIKE/DISLIKE only; LOVE is tracked only on PostReaction rows)
-                if existing_Reaction.reaction_type.name == "LIKE" and stats:
-                    session.exec(update(PostStats).where(PostStats.pid == pid).values(likes=PostStats.likes - 1))
-                elif existing_Reaction.reaction_type.name == "DISLIKE" and stats:
-                    session.exec(update(PostStats).where(PostStats.pid == pid).values(dislikes=PostStats.dislikes - 1))
-                session.delete(existing_Reaction)
-            
-            reaction = PostReaction(pid=pid, uid=uid, reaction_type=reaction_type)
-            session.add(reaction)
-            
-            if reaction_type.name == "LIKE" and stats:
-                session.exec(update(PostStats).where(PostStats.pid == pid).values(likes=PostStats.likes + 1))
-            elif reaction_type.name == "DISLIKE" and stats:
-                session.exec(update(PostStats).where(PostStats.pid == pid).values(dislikes=PostStats.dislikes + 1))
-
-            session.commit()
-            fresh_stats = session.get(PostStats, pid)
-
-            return {
-                "likes": fresh_stats.likes if fresh_stats else 0,
-                "dislikes": fresh_stats.dislikes if fresh_stats else 0,
-                "current_reaction": reaction_type.name,
-            }
-        except IntegrityError:
-            session.rollback()
-            existing = session.exec(select(PostReaction).where(PostReaction.pid == pid, PostReaction.uid == uid)).first()
-            fresh_stats = session.get(PostStats, pid)
-            if existing:
-                return {
-                    "likes": fresh_stats.likes if fresh_stats else 0,
-                    "dislikes": fresh_stats.dislikes if fresh_stats else 0,
-                    "current_reaction": existing.reaction_type.name,
-                }
-            raise
+            counts = set_reaction(session, PostStats, PostStats.pid, PostReaction, PostReaction.pid, pid, uid, reaction_type, buffer)
+            PostService._after_reaction(session, pid, buffer)
+            return {"likes": counts["likes"], "dislikes": counts["dislikes"], "current_reaction": reaction_type.name}
         except Exception as e:
             session.rollback()
             raise e
@@ -325,23 +353,14 @@ class PostService:
         Unregisters a user's reaction from a post and decrements stats.
         Returns a dict with updated likes, dislikes, and current_reaction=None.
         """
+        buffer = counter_buffer if counter_buffer.enabled else None
         try:
-            existing_Reaction = session.exec(select(PostReaction).where(PostReaction.pid == pid, PostReaction.uid == uid)).first()
-            if existing_Reaction:
-                stats = session.get(PostStats, pid)
-                if existing_Reaction.reaction_type.name == "LIKE" and stats:
-                    session.exec(update(PostStats).where(PostStats.pid == pid).values(likes=PostStats.likes - 1))
-                elif existing_Reaction.reaction_type.name == "DISLIKE" and stats:
-                    session.exec(update(PostStats).where(PostStats.pid == pid).values(dislikes=PostStats.dislikes - 1))
-                session.delete(existing_Reaction)
-                session.commit()
-                fresh_stats = session.get(PostStats, pid)
-                return {
-                    "likes": fresh_stats.likes if fresh_stats else 0,
-                    "dislikes": fresh_stats.dislikes if fresh_stats else 0,
-                    "current_reaction": None,
-                }
-            return None
+            counts = clear_reaction(session, PostStats, PostStats.pid, PostReaction, PostReaction.pid, pid, uid, buffer)
+            if counts is None:
+                session.rollback()
+                return None
+            PostService._after_reaction(session, pid, buffer)
+            return {"likes": counts["likes"], "dislikes": counts["dislikes"], "current_reaction": None}
         except Exception as e:
             session.rollback()
             raise e
@@ -357,3 +376,58 @@ class PostService:
         if reaction:
             return reaction.reaction_type.name
         return None
+
+    @staticmethod
+    def rebuild_rollups(session: Session, models=(UserPostStats, ClusterPostStats)):
+        """
+        Recomputes the UserPostStats / ClusterPostStats rollups from postcore, poststats and postreaction.
+        """
+        keys = {UserPostStats: PostCore.uid, ClusterPostStats: PostCore.cid}
+        for model in models:
+            key = keys[model]
+            posts = (
+                select(key.label("key"), func.count(PostCore.pid).label("posts"), func.coalesce(func.sum(PostStats.likes), 0).label("likes"))
+                .outerjoin(PostStats, PostStats.pid == PostCore.pid)
+                .group_by(key)
+                .subquery()
+            )
+            reactions = (
+                select(key.label("key"), func.count().label("n"))
+                .join(PostReaction, PostReaction.pid == PostCore.pid)
+                .group_by(key)
+                .subquery()
+            )
+            session.exec(delete(model))
+            session.exec(insert(model).from_select(
+                [key.name, "post_count", "total_likes", "total_reactions"],
+                select(posts.c.key, posts.c.posts, posts.c.likes, func.coalesce(reactions.c.n, 0))
+                .outerjoin(reactions, reactions.c.key == posts.c.key),
+            ))
+        session.commit()
+
+
+class AsyncPostService:
+    """
+    Async twins of the hot PostService feed reads, for handlers running on an AsyncSession.
+    Statements are built by PostService/FeedService/TrendingService so both paths stay identical.
+    """
+
+    @staticmethod
+    async def list_posts(session: AsyncSession, cid: Optional[UUID] = None, limit: int = 100, cursor: Optional[str] = None, skip: int = 0):
+        return (await session.exec(PostService.list_posts_statement(cid, limit, cursor, skip))).all()
+
+    @staticmethod
+    async def get_recent_posts_for_cluster(session: AsyncSession, cid: UUID, limit: int = 50, cursor: Optional[str] = None):
+        return (await session.exec(PostService.recent_posts_for_cluster_statement(cid, limit, cursor))).all()
+
+    @staticmethod
+    async def get_recent_posts_by_user(session: AsyncSession, uid: UUID, limit: int = 50, cursor: Optional[str] = None):
+        return (await session.exec(PostService.recent_posts_by_user_statement(uid, limit, cursor))).all()
+
+    @staticmethod
+    async def get_homepage_feed_for_user(session: AsyncSession, uid: UUID, limit: int = 50, cursor: Optional[str] = None):
+        return (await session.exec(FeedService.feed_statement(uid, limit, cursor))).all()
+
+    @staticmethod
+    async def get_trending_posts_globally(session: AsyncSession, limit: int = 20, cursor: Optional[str] = None):
+        return (await session.exec(TrendingService.trending_statement(limit, cursor))).all()
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, insert, exists
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import Session, select, func, or_, update
+
+from api.counter_buffer import counter_buffer
+from api.models.cluster import ClusterCore, ClusterStats, ClusterMember
+from api.models.post import PostCore, PostStats, PostReaction
+from api.models.comment import CommentCore, CommentStats, CommentReaction
+from api.models.enums import ReactionType
+from api.models.reconcile import CounterChange, ReconcileState
+from api.reactions import REACTION_COLUMNS
+
+RECONCILE_INTERVAL   = float(os.getenv("RECONCILE_INTERVAL", "60"))    # Seconds between background passes (<= 0 disables)
+RECONCILE_CHUNK_SIZE = int(os.getenv("RECONCILE_CHUNK_SIZE", "500"))   # Change-log rows (or stats rows in a sweep) per transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _reaction_count(model, key_column, target, reaction_type: ReactionType):
+    return (
+        select(func.count()).select_from(model)
+        .where(key_column == target, model.reaction_type == reaction_type)
+        .scalar_subquery()
+    )
+
+
+def _reaction_columns(model, key_column) -> Dict[str, Callable]:
+    # One counter per reaction type; the default argument pins each lambda to its type
+    return {
+        column: lambda t, reaction_type=reaction_type: _reaction_count(model, key_column, t, reaction_type)
+        for reaction_type, column in REACTION_COLUMNS.items()
+    }
+
+
+def _member_count(target):
+    return select(func.count()).select_from(ClusterMember).where(ClusterMember.cid == target).scalar_subquery()
+
+
+class _Counters:
+    """
+    How to recompute one kind of denormalized counters: the stats table, its key, the
+    core table it belongs to, and a correlated subquery per counter column. `buffer` is
+    the write-behind buffer holding deltas of these counters, if any.
+    """
+
+    def __init__(self, stats, stats_key, core_key, columns: Dict[str, Callable], buffer=None):
+        self.stats = stats
+        self.stats_key = stats_key
+        self.core_key = core_key
+        self.columns = columns
+        self.buffer = buffer
+
+    def settle(self, keys) -> Tuple[list, set]:
+        """
+        Splits `keys` into those safe to repair and those with buffered deltas still
+        unwritten; repairing the latter would count their reactions twice after the flush.
+        """
+        if self.buffer is None or not self.buffer.enabled:
+            return list(keys), set()
+        held = self.buffer.held(keys)
+        return [key for key in keys if key not in held], held
+
+    def repair(self, session: Session, keys) -> int:
+        """
+        Rewrites drifted counters and creates missing stats rows for `keys`; returns rows fixed.
+        Each counter is recomputed inside the UPDATE itself, so a concurrent write cannot
+        slip between the count and the fix.
+        """
+        actual = {name: build(self.stats_key) for name, build in self.columns.items()}
+        drifted = or_(*[getattr(self.stats, name) != value for name, value in actual.items()])
+        fixed = session.exec(
+            update(self.stats).where(self.stats_key.in_(keys), drifted).values(**actual)
+        ).rowcount
+
+        missing = (
+            select(self.core_key, *[build(self.core_key) for build in self.columns.values()])
+            .where(self.core_key.in_(keys), ~exists().where(self.stats_key == self.core_key))
+        )
+        fixed += session.exec(
+            insert(self.stats).from_select([self.stats_key.name, *self.columns], missing)
+        ).rowcount
+        return fixed
+
+
+_KINDS: Dict[str, _Counters] = {
+    "cluster": _Counters(ClusterStats, ClusterStats.cid, ClusterCore.cid, {
+        "member_count": _member_count,
+    }),
+    "post": _Counters(PostStats, PostStats.pid, PostCore.pid, _reaction_columns(PostReaction, PostReaction.pid), buffer=counter_buffer),
+    "comment": _Counters(CommentStats, CommentStats.mid, CommentCore.mid, _reaction_columns(CommentReaction, CommentReaction.mid)),
+}
+
+
+class ReconcileService:
+    """
+    Repairs drift in ClusterStats.member_count and the PostStats / CommentStats reaction counters.
+
+    The trg_log_* triggers append the owning cid/pid/mid to counterchange on every membership
+    or reaction write. A pass consumes that log oldest first in chunks: it recomputes the
+    counters of just those rows, then deletes exactly the entries it read, so its cost
+    follows the write volume since the last pass rather than the table sizes. The log
+    itself is the queue; the high-water mark only records how far passes have got.
+    """
+
+    KINDS = tuple(_KINDS)
+
+    @staticmethod
+    def _state(session: Session, kind: str) -> ReconcileState:
+        return session.get(ReconcileState, kind) or ReconcileState(kind=kind)
+
+    @staticmethod
+    def _record(session: Session, state: ReconcileState, examined: int, repaired: int) -> dict:
+        state.last_run_at = datetime.now()
+        state.examined = examined
+        state.repaired = repaired
+        state.total_repaired += repaired
+        session.add(state)
+        session.commit()
+        return {"examined": examined, "repaired": repaired, "high_water": state.high_water}
+
+    @staticmethod
+    def _flush_buffer(session: Session, counters: _Counters) -> None:
+        # Buffered deltas are written first, so as few keys as possible are held back
+        if counters.buffer is not None and counters.buffer.enabled:
+            counters.buffer.flush(session)
+
+    @staticmethod
+    def run(session: Session, chunk_size: int = RECONCILE_CHUNK_SIZE, max_chunks: Optional[int] = None) -> dict:
+        """
+        One incremental pass over every kind. `max_chunks` bounds the work per kind;
+        whatever is left stays above the high-water mark for the next pass.
+        """
+        return {kind: ReconcileService.run_kind(session, kind, chunk_size, max_chunks) for kind in ReconcileService.KINDS}
+
+    @staticmethod
+    def run_kind(session: Session, kind: str, chunk_size: int = RECONCILE_CHUNK_SIZE, max_chunks: Optional[int] = None) -> dict:
+        counters = _KINDS[kind]
+        ReconcileService._flush_buffer(session, counters)
+        state = ReconcileService._state(session, kind)
+        examined = repaired = chunks = 0
+        held = set()
+        while max_chunks is None or chunks < max_chunks:
+            # Oldest rows still in the log, not rows past the mark: seqs are handed out
+            # at insert time, so a writer that commits late can land below the mark
+            changes = session.exec(
+                select(CounterChange.seq, CounterChange.key)
+                .where(CounterChange.kind == kind)
+                .order_by(CounterChange.seq)
+                .limit(chunk_size)
+            ).all()
+            if not changes:
+                break
+            keys, still_held = counters.settle(list({change.key for change in changes}))
+            held |= still_held
+            if keys:
+                repaired += counters.repair(session, keys)
+            examined += len(keys)
+            state.high_water = max(state.high_water, changes[-1].seq)
+            # Only the rows just read: a range delete would also drop late commits never examined
+            session.exec(delete(CounterChange).where(CounterChange.seq.in_([change.seq for change in changes])))
+            session.add(state)
+            session.commit()
+            chunks += 1
+            if len(changes) < chunk_size:
+                break
+        # Held keys go back into the log, past the mark, for the next pass
+        session.add_all([CounterChange(kind=kind, key=key) for key in held])
+        return ReconcileService._record(session, state, examined, repaired)
+
+    @staticmethod
+    def sweep(session: Session, kind: str, chunk_size: int = RECONCILE_CHUNK_SIZE) -> dict:
+        """
+        Re-checks every row of one kind in keyset-ordered chunks, regardless of the change log.
+        For drift that predates the log (or writes made with the triggers absent).
+        """
+        counters = _KINDS[kind]
+        ReconcileService._flush_buffer(session, counters)
+        state = ReconcileService._state(session, kind)
+        examined = repaired = 0
+        after = None
+        while True:
+            statement = select(counters.core_key).order_by(counters.core_key).limit(chunk_size)
+            if after is not None:
+                statement = statement.where(counters.core_key > after)
+            keys = session.exec(statement).all()
+            if not keys:
+                break
+            after = keys[-1]
+            keys, _ = counters.settle(keys)
+            if keys:
+                repaired += counters.repair(session, keys)
+            examined += len(keys)
+            session.commit()
+        return ReconcileService._record(session, state, examined, repaired)
+
+    @staticmethod
+    def get_status(session: Session) -> dict:
+        """
+        Stored results of the last pass per kind, plus the backlog still waiting in the log.
+        """
+        pending = dict(session.exec(
+            select(CounterChange.kind, func.count()).group_by(CounterChange.kind)
+        ).all())
+        status = {}
+        for kind in ReconcileService.KINDS:
+            state = session.get(ReconcileState, kind)
+            status[kind] = {
+                "high_water": state.high_water if state else 0,
+                "last_run_at": state.last_run_at if state else None,
+                "examined": state.examined if state else 0,
+                "repaired": state.repaired if state else 0,
+                "total_repaired": state.total_repaired if state else 0,
+                "pending_changes": pending.get(kind, 0),
+            }
+        return status
+
+
+def _run_once(engine: Engine) -> dict:
+    with Session(engine) as session:
+        return ReconcileService.run(session)
+
+
+async def reconcile_forever(engine: Engine, interval: float = RECONCILE_INTERVAL) -> None:
+    """
+    Background loop started from the app lifespan: one pass every `interval` seconds,
+    off the event loop. A failed pass is logged and retried on the next tick.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(_run_once, engine)
+        except Exception:
+            logger.exception("Counter reconciliation pass failed")
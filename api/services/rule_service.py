@@ -0,0 +1,100 @@
+import os
+from typing import Optional
+from uuid import UUID
+
+from sqlmodel import Session, select
+
+from api.cache import TTLCache
+from api.models.cluster import ClusterRule
+from api.rules import RuleSet, RuleViolation, Verdict, validate_pattern
+
+RULES_CACHE_TTL  = float(os.getenv("RULES_CACHE_TTL", "300"))     # Seconds a compiled RuleSet is reused (other workers converge within this)
+RULES_CACHE_SIZE = int(os.getenv("RULES_CACHE_SIZE", "1000"))     # Clusters whose RuleSet is kept compiled
+
+_rule_sets = TTLCache(ttl=RULES_CACHE_TTL, maxsize=RULES_CACHE_SIZE)
+
+
+class RuleService:
+    """
+    Manages ClusterRule rows and enforces them on the post and comment write paths.
+    Each cluster's rules are compiled into one RuleSet (api/rules.py), cached per cid
+    and dropped whenever one of its rules is created, changed or deleted.
+    """
+
+    @staticmethod
+    def get_rule_set(session: Session, cid: UUID) -> RuleSet:
+        def compile_rules():
+            rows = session.exec(
+                select(ClusterRule.rid, ClusterRule.name, ClusterRule.pattern, ClusterRule.action)
+                .where(ClusterRule.cid == cid)
+            ).all()
+            return RuleSet(rows)
+        return _rule_sets.get_or_set(cid, compile_rules)
+
+    @staticmethod
+    def invalidate(cid: UUID) -> None:
+        _rule_sets.invalidate(cid)
+
+    @staticmethod
+    def clear_cache() -> None:
+        _rule_sets.clear()
+
+    @staticmethod
+    def enforce(session: Session, cid: UUID, text: Optional[str]) -> Verdict:
+        """
+        Checks text about to be written to cluster `cid`. Raises RuleViolation for a BLOCK
+        match; FLAG matches are returned for the caller to queue (ModerationService.enqueue).
+        """
+        verdict = RuleService.get_rule_set(session, cid).evaluate(text)
+        if verdict.blocked:
+            raise RuleViolation(verdict.blocked)
+        return verdict
+
+    @staticmethod
+    def create_rule(session: Session, cid: UUID, rule_in) -> ClusterRule:
+        """
+        Adds a rule to a cluster. Raises ValueError for a pattern validate_pattern rejects.
+        """
+        validate_pattern(rule_in.pattern)
+        rule = ClusterRule(
+            cid         = cid,
+            name        = rule_in.name,
+            pattern     = rule_in.pattern,
+            action      = rule_in.action,
+            description = rule_in.description,
+        )
+        session.add(rule)
+        session.commit()
+        session.refresh(rule)
+        RuleService.invalidate(cid)
+        return rule
+
+    @staticmethod
+    def update_rule(session: Session, rid: UUID, rule_in) -> Optional[ClusterRule]:
+        """
+        Applies the fields set on `rule_in`; returns None if the rule does not exist.
+        """
+        rule = session.get(ClusterRule, rid)
+        if not rule:
+            return None
+        changes = rule_in.model_dump(exclude_unset=True)
+        if "pattern" in changes:
+            validate_pattern(changes["pattern"])
+        for field, value in changes.items():
+            setattr(rule, field, value)
+        session.add(rule)
+        session.commit()
+        session.refresh(rule)
+        RuleService.invalidate(rule.cid)
+        return rule
+
+    @staticmethod
+    def delete_rule(session: Session, rid: UUID) -> bool:
+        rule = session.get(ClusterRule, rid)
+        if not rule:
+            return False
+        cid = rule.cid
+        session.delete(rule)
+        session.commit()
+        RuleService.invalidate(cid)
+        return True
@@ -0,0 +1,131 @@
+import math
+import os
+from datetime import datetime
+from sqlalchemy import delete, update
+from sqlmodel import Session, select, desc
+from typing import Optional
+from uuid import UUID
+
+from api.models.post import PostCore, PostContent, PostStats, PostTrending
+from api.models.cluster import ClusterCore
+from api.pagination import keyset_after
+
+# Extra age that costs a post as much rank as halving its net reactions
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "12"))
+
+# Fixed reference point for creation times; any constant works since only ordering matters
+_EPOCH = datetime(2024, 1, 1)
+
+
+class TrendingService:
+    """
+    Maintains a recency-boosted log rank per post (the Reddit-style "hot" formula):
+
+        score = sign(net) * log2(1 + |net|) + (created_at - epoch) / half_life
+
+    Every half_life of newer creation time is worth a doubling of net reactions, so
+    fresh engagement outranks old. The score depends only on the reaction counts and
+    the creation time, not on the current time, so it is rewritten only when a post's
+    reactions change, never as time passes, and the top N is a backwards scan of
+    ix_posttrending_public_score_pid.
+
+    It is not a decayed weight such as net * 2^(-age / half_life): for net > 0 the
+    two orderings agree up to the +1 inside the log, but a net-negative post gains
+    rank as it gets newer here, where a decayed weight would sink it further.
+    """
+
+    @staticmethod
+    def compute_score(likes: int, dislikes: int, created_at: datetime) -> float:
+        net = (likes or 0) - (dislikes or 0)
+        magnitude = math.log2(1 + abs(net))
+        age_units = (created_at - _EPOCH).total_seconds() / (TRENDING_HALF_LIFE_HOURS * 3600)
+        return math.copysign(magnitude, net) + age_units
+
+    @staticmethod
+    def track_post(session: Session, core: PostCore):
+        """
+        Registers a freshly flushed post with a zero-reaction score.
+        Runs inside the caller's transaction.
+        """
+        cluster = session.get(ClusterCore, core.cid)
+        session.add(PostTrending(
+            pid       = core.pid,
+            is_public = not (cluster and cluster.is_private),
+            score     = TrendingService.compute_score(0, 0, core.created_at),
+        ))
+
+    @staticmethod
+    def refresh_post(session: Session, pid: UUID):
+        """
+        Rewrites a post's score from its current PostStats counters.
+        Call after the counters changed, inside the same transaction.
+        """
+        row = session.exec(
+            select(PostStats.likes, PostStats.dislikes, PostCore.created_at)
+            .join(PostCore, PostCore.pid == PostStats.pid)
+            .where(PostStats.pid == pid)
+        ).first()
+        if not row:
+            return
+        likes, dislikes, created_at = row
+        score = TrendingService.compute_score(likes, dislikes, created_at)
+        session.exec(update(PostTrending).where(PostTrending.pid == pid).values(score=score))
+
+    @staticmethod
+    def remove_post(session: Session, pid: UUID):
+        """
+        Drops a deleted post from the trending index.
+        Runs inside the caller's transaction.
+        """
+        session.exec(delete(PostTrending).where(PostTrending.pid == pid))
+
+    @staticmethod
+    def get_trending(session: Session, limit: int = 20, cursor: Optional[str] = None):
+        """
+        Top posts across public clusters as (PostCore, PostContent, PostStats, score) rows,
+        resuming after a (score, pid) keyset cursor.
+        """
+        return session.exec(TrendingService.trending_statement(limit, cursor)).all()
+
+    @staticmethod
+    def trending_statement(limit: int = 20, cursor: Optional[str] = None):
+        """
+        Builds the get_trending query; shared by the sync and async services.
+        """
+        statement = (
+            select(PostCore, PostContent, PostStats, PostTrending.score)
+            .select_from(PostTrending)
+            .join(PostCore, PostTrending.pid == PostCore.pid)
+            .join(PostContent, PostTrending.pid == PostContent.pid)
+            .join(PostStats, PostTrending.pid == PostStats.pid)
+            .where(PostTrending.is_public == True)
+        )
+        after = keyset_after(PostTrending.score, PostTrending.pid, cursor)
+        if after is not None:
+            statement = statement.where(after)
+        return statement.order_by(desc(PostTrending.score), desc(PostTrending.pid)).limit(limit)
+
+    @staticmethod
+    def rebuild(session: Session, batch_size: int = 5000):
+        """
+        Recomputes every post's score from PostStats (one-off migration / repair).
+        """
+        session.exec(delete(PostTrending))
+        rows = session.exec(
+            select(PostCore.pid, PostCore.created_at, PostStats.likes, PostStats.dislikes, ClusterCore.is_private)
+            .join(PostStats, PostCore.pid == PostStats.pid)
+            .join(ClusterCore, PostCore.cid == ClusterCore.cid)
+        ).all()
+        batch = []
+        for pid, created_at, likes, dislikes, is_private in rows:
+            batch.append(PostTrending(
+                pid       = pid,
+                is_public = not is_private,
+                score     = TrendingService.compute_score(likes, dislikes, created_at),
+            ))
+            if len(batch) >= batch_size:
+                session.add_all(batch)
+                session.commit()
+                batch = []
+        session.add_all(batch)
+        session.commit()
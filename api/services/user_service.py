@@ -1,12 +1,26 @@
-from sqlmodel import Session, select, func, desc, update
+from sqlalchemy import delete, insert
+from starlette.concurrency import run_in_threadpool
+from sqlmodel import Session, select, func, desc, or_, update
 from typing import List, Optional
 from uuid import UUID
 
 from api.models.user import UserAuth, UserProfile
-from api.models.post import PostCore, PostContent, PostStats, PostReaction
+from api.models.post import PostCore, PostContent, PostStats, PostReaction, UserPostStats
 from api.models.comment import CommentCore, CommentContent, CommentStats
 from api.models.cluster import ClusterCore
-from api.security import get_password_hash, verify_password
+from api.models.follow import UserFollow, UserFollowStats
+from api.security import (
+    get_password_hash,
+    get_password_hash_async,
+    needs_rehash,
+    verify_password,
+    verify_password_async,
+)
+from api.pagination import keyset_after
+from api.services.feed_service import FeedService
+from api.auth import invalidate_cached_user
+from api.response_cache import invalidate_tags
+from api.models.enums import UserRole
 
 class UserService:
     """
@@ -24,8 +38,37 @@ class UserService:
         
         if not user or not verify_password(password_plain, user.password_hash):
             return None
+        if needs_rehash(user.password_hash):
+            UserService.update_password_hash(session, user, get_password_hash(password_plain))
         return user
 
+    @staticmethod
+    async def verify_login_credentials_async(session: Session, email: str, password_plain: str):
+        """
+        verify_login_credentials for async handlers: bcrypt runs on the hashing pool and the
+        database calls on the threadpool, so no worker is held while a hash is computed.
+        """
+        statement = select(UserAuth).where(UserAuth.email == email)
+        user = await run_in_threadpool(lambda: session.exec(statement).first())
+
+        if not user or not await verify_password_async(password_plain, user.password_hash):
+            return None
+        if needs_rehash(user.password_hash):
+            new_hash = await get_password_hash_async(password_plain)
+            await run_in_threadpool(UserService.update_password_hash, session, user, new_hash)
+        return user
+
+    @staticmethod
+    def update_password_hash(session: Session, user: UserAuth, password_hash: str):
+        """
+        Stores a freshly computed hash, e.g. after the bcrypt cost factor changed.
+        """
+        user.password_hash = password_hash
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        invalidate_cached_user(user.uid)
+
     @staticmethod
     def get_user_profile_stats(session: Session, email: str, password_plain: str):
         """
@@ -41,19 +84,113 @@ class UserService:
         return session.exec(statement).first()
 
     @staticmethod
-    def get_user_posts_across_clusters(session: Session, uid: UUID):
+    def list_user_profiles(session: Session, limit: int = 100, cursor: Optional[str] = None, skip: int = 0):
         """
-        Lists all posts authored by a user with content and stats (for profile feeds).
+        Lists public profiles newest first.
+        Pages with a (created_at, uid) keyset cursor; `skip` is only honoured without a cursor.
+        """
+        statement = select(UserProfile)
+        after = keyset_after(UserProfile.created_at, UserProfile.uid, cursor)
+        if after is not None:
+            statement = statement.where(after)
+        elif skip:
+            statement = statement.offset(skip)
+        statement = statement.order_by(desc(UserProfile.created_at), desc(UserProfile.uid)).limit(limit)
+        return session.exec(statement).all()
+
+    @staticmethod
+    def get_user_posts_across_clusters(session: Session, uid: UUID, limit: Optional[int] = None, cursor: Optional[str] = None):
+        """
+        Lists posts authored by a user with content and stats (for profile feeds).
+        Pages with a (created_at, pid) keyset cursor when `limit` is given.
         """
         statement = (
             select(PostCore, PostContent, PostStats)
             .join(PostContent, PostCore.pid == PostContent.pid)
             .join(PostStats, PostCore.pid == PostStats.pid)
             .where(PostCore.uid == uid)
-            .order_by(desc(PostCore.created_at))
         )
+        after = keyset_after(PostCore.created_at, PostCore.pid, cursor)
+        if after is not None:
+            statement = statement.where(after)
+        statement = statement.order_by(desc(PostCore.created_at), desc(PostCore.pid))
+        if limit is not None:
+            statement = statement.limit(limit)
         return session.exec(statement).all()
 
+    @staticmethod
+    def get_follow_counts(session: Session, uid: UUID):
+        """
+        Returns (follower_count, following_count) from the trigger-maintained UserFollowStats row.
+        """
+        stats = session.get(UserFollowStats, uid)
+        if not stats:
+            return 0, 0
+        return stats.follower_count, stats.following_count
+
+    @staticmethod
+    def list_followers(session: Session, uid: UUID, limit: int = 100, cursor: Optional[str] = None):
+        """
+        Lists (UserFollow, UserProfile) for users following `uid`, most recent first.
+        Pages with a (created_at, follower_uid) keyset cursor.
+        """
+        statement = (
+            select(UserFollow, UserProfile)
+            .join(UserProfile, UserFollow.follower_uid == UserProfile.uid)
+            .where(UserFollow.following_uid == uid)
+        )
+        after = keyset_after(UserFollow.created_at, UserFollow.follower_uid, cursor)
+        if after is not None:
+            statement = statement.where(after)
+        statement = statement.order_by(desc(UserFollow.created_at), desc(UserFollow.follower_uid)).limit(limit)
+        return session.exec(statement).all()
+
+    @staticmethod
+    def list_following(session: Session, uid: UUID, limit: int = 100, cursor: Optional[str] = None):
+        """
+        Lists (UserFollow, UserProfile) for users that `uid` follows, most recent first.
+        Pages with a (created_at, following_uid) keyset cursor.
+        """
+        statement = (
+            select(UserFollow, UserProfile)
+            .join(UserProfile, UserFollow.following_uid == UserProfile.uid)
+            .where(UserFollow.follower_uid == uid)
+        )
+        after = keyset_after(UserFollow.created_at, UserFollow.following_uid, cursor)
+        if after is not None:
+            statement = statement.where(after)
+        statement = statement.order_by(desc(UserFollow.created_at), desc(UserFollow.following_uid)).limit(limit)
+        return session.exec(statement).all()
+
+    @staticmethod
+    def rebuild_follow_stats(session: Session):
+        """
+        Recomputes every UserFollowStats row from the userfollow edges.
+        """
+        followers = (
+            select(UserFollow.following_uid.label("uid"), func.count().label("n"))
+            .group_by(UserFollow.following_uid)
+            .subquery()
+        )
+        following = (
+            select(UserFollow.follower_uid.label("uid"), func.count().label("n"))
+            .group_by(UserFollow.follower_uid)
+            .subquery()
+        )
+        session.exec(delete(UserFollowStats))
+        session.exec(insert(UserFollowStats).from_select(
+            ["uid", "follower_count", "following_count"],
+            select(
+                UserAuth.uid,
+                func.coalesce(followers.c.n, 0),
+                func.coalesce(following.c.n, 0),
+            )
+            .outerjoin(followers, followers.c.uid == UserAuth.uid)
+            .outerjoin(following, following.c.uid == UserAuth.uid)
+            .where(or_(followers.c.n != None, following.c.n != None)),
+        ))
+        session.commit()
+
     @staticmethod
     def get_user_post_distribution(session: Session, uid: UUID):
         """
@@ -122,13 +259,13 @@ class UserService:
         """
         Ranks top verified users based purely on contribution volume (post count).
         Maps to: LIST TOP 5 USERS BASED ON POST COUNT
+        Reads the trigger-maintained UserPostStats rollup instead of counting posts.
         """
         statement = (
-            select(PostCore.uid, func.count(PostCore.pid).label("post_count"))
-            .join(UserAuth, PostCore.uid == UserAuth.uid)
-            .where(UserAuth.is_verified == True)
-            .group_by(PostCore.uid)
-            .order_by(desc("post_count"))
+            select(UserPostStats.uid, UserPostStats.post_count)
+            .join(UserAuth, UserPostStats.uid == UserAuth.uid)
+            .where(UserAuth.is_verified == True, UserPostStats.post_count > 0)
+            .order_by(desc(UserPostStats.post_count))
             .limit(limit)
         )
         return session.exec(statement).all()
@@ -138,12 +275,12 @@ class UserService:
         """
         Ranks top overall users based on total aggregate likes accumulated across all posts.
         Maps to: LIST TOP 5 USERS BASED ON AGGREGATE REACTIONS COUNT
+        Reads the trigger-maintained UserPostStats rollup instead of summing PostStats.
         """
         statement = (
-            select(PostCore.uid, func.sum(PostStats.likes).label("total_likes"), func.count(PostCore.pid).label("post_count"))
-            .join(PostStats, PostCore.pid == PostStats.pid)
-            .group_by(PostCore.uid)
-            .order_by(desc("total_likes"))
+            select(UserPostStats.uid, UserPostStats.total_likes, UserPostStats.post_count)
+            .where(UserPostStats.post_count > 0)
+            .order_by(desc(UserPostStats.total_likes))
             .limit(limit)
         )
         return session.exec(statement).all()
@@ -175,15 +312,28 @@ class UserService:
         )
         session.exec(statement)
         session.commit()
+        invalidate_cached_user(uid)
+        invalidate_tags("users")
         return True
 
     @staticmethod
-    def register_user(session: Session, user_in):
+    def update_user_role(session: Session, uid: UUID, role: UserRole):
+        """
+        Changes a user's system role. Returns False when the user does not exist.
+        """
+        result = session.exec(update(UserAuth).where(UserAuth.uid == uid).values(role=role))
+        session.commit()
+        invalidate_cached_user(uid)
+        return result.rowcount > 0
+
+    @staticmethod
+    def register_user(session: Session, user_in, password_hash: Optional[str] = None):
         """
         Registers a new identity and constructs their public profile skeleton.
+        Pass `password_hash` when the caller already hashed the password off-thread.
         """
         # Hash the incoming plain text password before persistence
-        hashed_password = get_password_hash(user_in.password)
+        hashed_password = password_hash or get_password_hash(user_in.password)
         
         try:
             auth_user = UserAuth(
@@ -225,6 +375,7 @@ class UserService:
                 
         session.add(profile)
         session.commit()
+        invalidate_tags("users")
         session.refresh(profile)
         return profile
 
@@ -235,6 +386,9 @@ class UserService:
         """
         auth = session.get(UserAuth, uid)
         if not auth: return False
+        FeedService.remove_user(session, uid)
         session.delete(auth)
         session.commit()
+        invalidate_cached_user(uid)
+        invalidate_tags("users", "posts", "reactions", "members")
         return True
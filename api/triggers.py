@@ -64,12 +64,277 @@ BEGIN
 END
 """
 
+_TRIGGER_INCREMENT_FOLLOW_COUNTS = """
+CREATE TRIGGER IF NOT EXISTS trg_increment_follow_counts
+AFTER INSERT ON userfollow
+FOR EACH ROW
+BEGIN
+    INSERT OR IGNORE INTO userfollowstats (uid, follower_count, following_count)
+    VALUES (NEW.following_uid, 0, 0), (NEW.follower_uid, 0, 0);
+    UPDATE userfollowstats
+    SET    follower_count = follower_count + 1
+    WHERE  uid = NEW.following_uid;
+    UPDATE userfollowstats
+    SET    following_count = following_count + 1
+    WHERE  uid = NEW.follower_uid;
+END
+"""
+
+_TRIGGER_DECREMENT_FOLLOW_COUNTS = """
+CREATE TRIGGER IF NOT EXISTS trg_decrement_follow_counts
+AFTER DELETE ON userfollow
+FOR EACH ROW
+BEGIN
+    UPDATE userfollowstats
+    SET    follower_count = MAX(0, follower_count - 1)
+    WHERE  uid = OLD.following_uid;
+    UPDATE userfollowstats
+    SET    following_count = MAX(0, following_count - 1)
+    WHERE  uid = OLD.follower_uid;
+END
+"""
+
+# Reply counters. Ancestors are read from the parent's commentclosure rows, which
+# already exist when a reply is inserted (SQLite allows no recursive CTE in triggers).
+_TRIGGER_INCREMENT_REPLY_COUNTS = """
+CREATE TRIGGER IF NOT EXISTS trg_increment_reply_counts
+AFTER INSERT ON commentcore
+FOR EACH ROW
+WHEN NEW.parent_mid IS NOT NULL
+BEGIN
+    UPDATE commentstats
+    SET    reply_count = reply_count + 1
+    WHERE  mid = NEW.parent_mid;
+    UPDATE commentstats
+    SET    total_descendants = total_descendants + 1
+    WHERE  mid IN (SELECT ancestor_mid FROM commentclosure WHERE descendant_mid = NEW.parent_mid);
+END
+"""
+
+_TRIGGER_DECREMENT_REPLY_COUNTS = """
+CREATE TRIGGER IF NOT EXISTS trg_decrement_reply_counts
+AFTER DELETE ON commentcore
+FOR EACH ROW
+WHEN OLD.parent_mid IS NOT NULL
+BEGIN
+    UPDATE commentstats
+    SET    reply_count = MAX(0, reply_count - 1)
+    WHERE  mid = OLD.parent_mid;
+    UPDATE commentstats
+    SET    total_descendants = MAX(0, total_descendants - 1)
+    WHERE  mid IN (SELECT ancestor_mid FROM commentclosure WHERE descendant_mid = OLD.parent_mid);
+END
+"""
+
+# Author and cluster rollups behind the leaderboards. A post's rows in poststats and
+# postreaction may be deleted before or after the post itself: whichever side is deleted
+# second still finds the other and subtracts its share, so the totals stay exact.
+_TRIGGER_ROLLUP_POST_INSERT = """
+CREATE TRIGGER IF NOT EXISTS trg_rollup_post_insert
+AFTER INSERT ON postcore
+FOR EACH ROW
+BEGIN
+    INSERT OR IGNORE INTO userpoststats (uid, post_count, total_likes, total_reactions)
+    VALUES (NEW.uid, 0, 0, 0);
+    INSERT OR IGNORE INTO clusterpoststats (cid, post_count, total_likes, total_reactions)
+    VALUES (NEW.cid, 0, 0, 0);
+    UPDATE userpoststats
+    SET    post_count = post_count + 1
+    WHERE  uid = NEW.uid;
+    UPDATE clusterpoststats
+    SET    post_count = post_count + 1
+    WHERE  cid = NEW.cid;
+END
+"""
+
+_TRIGGER_ROLLUP_POST_DELETE = """
+CREATE TRIGGER IF NOT EXISTS trg_rollup_post_delete
+AFTER DELETE ON postcore
+FOR EACH ROW
+BEGIN
+    UPDATE userpoststats
+    SET    post_count      = MAX(0, post_count - 1),
+           total_likes     = MAX(0, total_likes - COALESCE((SELECT likes FROM poststats WHERE pid = OLD.pid), 0)),
+           total_reactions = MAX(0, total_reactions - (SELECT COUNT(*) FROM postreaction WHERE pid = OLD.pid))
+    WHERE  uid = OLD.uid;
+    UPDATE clusterpoststats
+    SET    post_count      = MAX(0, post_count - 1),
+           total_likes     = MAX(0, total_likes - COALESCE((SELECT likes FROM poststats WHERE pid = OLD.pid), 0)),
+           total_reactions = MAX(0, total_reactions - (SELECT COUNT(*) FROM postreaction WHERE pid = OLD.pid))
+    WHERE  cid = OLD.cid;
+END
+"""
+
+_TRIGGER_ROLLUP_LIKES_UPDATE = """
+CREATE TRIGGER IF NOT EXISTS trg_rollup_likes_update
+AFTER UPDATE OF likes ON poststats
+FOR EACH ROW
+WHEN NEW.likes <> OLD.likes
+BEGIN
+    UPDATE userpoststats
+    SET    total_likes = MAX(0, total_likes + NEW.likes - OLD.likes)
+    WHERE  uid = (SELECT uid FROM postcore WHERE pid = NEW.pid);
+    UPDATE clusterpoststats
+    SET    total_likes = MAX(0, total_likes + NEW.likes - OLD.likes)
+    WHERE  cid = (SELECT cid FROM postcore WHERE pid = NEW.pid);
+END
+"""
+
+_TRIGGER_ROLLUP_LIKES_DELETE = """
+CREATE TRIGGER IF NOT EXISTS trg_rollup_likes_delete
+AFTER DELETE ON poststats
+FOR EACH ROW
+WHEN OLD.likes <> 0
+BEGIN
+    UPDATE userpoststats
+    SET    total_likes = MAX(0, total_likes - OLD.likes)
+    WHERE  uid = (SELECT uid FROM postcore WHERE pid = OLD.pid);
+    UPDATE clusterpoststats
+    SET    total_likes = MAX(0, total_likes - OLD.likes)
+    WHERE  cid = (SELECT cid FROM postcore WHERE pid = OLD.pid);
+END
+"""
+
+_TRIGGER_ROLLUP_REACTION_INSERT = """
+CREATE TRIGGER IF NOT EXISTS trg_rollup_reaction_insert
+AFTER INSERT ON postreaction
+FOR EACH ROW
+BEGIN
+    UPDATE userpoststats
+    SET    total_reactions = total_reactions + 1
+    WHERE  uid = (SELECT uid FROM postcore WHERE pid = NEW.pid);
+    UPDATE clusterpoststats
+    SET    total_reactions = total_reactions + 1
+    WHERE  cid = (SELECT cid FROM postcore WHERE pid = NEW.pid);
+END
+"""
+
+_TRIGGER_ROLLUP_REACTION_DELETE = """
+CREATE TRIGGER IF NOT EXISTS trg_rollup_reaction_delete
+AFTER DELETE ON postreaction
+FOR EACH ROW
+BEGIN
+    UPDATE userpoststats
+    SET    total_reactions = MAX(0, total_reactions - 1)
+    WHERE  uid = (SELECT uid FROM postcore WHERE pid = OLD.pid);
+    UPDATE clusterpoststats
+    SET    total_reactions = MAX(0, total_reactions - 1)
+    WHERE  cid = (SELECT cid FROM postcore WHERE pid = OLD.pid);
+END
+"""
+
+# Change log for ReconcileService: every write that can move member_count or a
+# likes/dislikes counter records the owning row, so a pass only re-checks those.
+_TRIGGER_LOG_MEMBER_INSERT = """
+CREATE TRIGGER IF NOT EXISTS trg_log_member_insert
+AFTER INSERT ON clustermember
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('cluster', NEW.cid);
+END
+"""
+
+_TRIGGER_LOG_MEMBER_DELETE = """
+CREATE TRIGGER IF NOT EXISTS trg_log_member_delete
+AFTER DELETE ON clustermember
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('cluster', OLD.cid);
+END
+"""
+
+_TRIGGER_LOG_POST_REACTION_INSERT = """
+CREATE TRIGGER IF NOT EXISTS trg_log_post_reaction_insert
+AFTER INSERT ON postreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('post', NEW.pid);
+END
+"""
+
+_TRIGGER_LOG_POST_REACTION_UPDATE = """
+CREATE TRIGGER IF NOT EXISTS trg_log_post_reaction_update
+AFTER UPDATE ON postreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('post', NEW.pid);
+END
+"""
+
+_TRIGGER_LOG_POST_REACTION_DELETE = """
+CREATE TRIGGER IF NOT EXISTS trg_log_post_reaction_delete
+AFTER DELETE ON postreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('post', OLD.pid);
+END
+"""
+
+_TRIGGER_LOG_COMMENT_REACTION_INSERT = """
+CREATE TRIGGER IF NOT EXISTS trg_log_comment_reaction_insert
+AFTER INSERT ON commentreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('comment', NEW.mid);
+END
+"""
+
+_TRIGGER_LOG_COMMENT_REACTION_UPDATE = """
+CREATE TRIGGER IF NOT EXISTS trg_log_comment_reaction_update
+AFTER UPDATE ON commentreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('comment', NEW.mid);
+END
+"""
+
+_TRIGGER_LOG_COMMENT_REACTION_DELETE = """
+CREATE TRIGGER IF NOT EXISTS trg_log_comment_reaction_delete
+AFTER DELETE ON commentreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('comment', OLD.mid);
+END
+"""
+
+# PostTrending.is_public is a copy of NOT clustercore.is_private, kept for the top-N index scan
+_TRIGGER_TRENDING_CLUSTER_PRIVACY = """
+CREATE TRIGGER IF NOT EXISTS trg_trending_cluster_privacy
+AFTER UPDATE OF is_private ON clustercore
+FOR EACH ROW
+WHEN NEW.is_private IS NOT OLD.is_private
+BEGIN
+    UPDATE posttrending
+    SET    is_public = NOT NEW.is_private
+    WHERE  pid IN (SELECT pid FROM postcore WHERE cid = NEW.cid);
+END
+"""
+
 _ALL_TRIGGERS = [
     _TRIGGER_INIT_POST_STATS,
     _TRIGGER_INIT_COMMENT_STATS,
     _TRIGGER_INCREMENT_MEMBER_COUNT,
     _TRIGGER_DECREMENT_MEMBER_COUNT,
     _TRIGGER_UPDATE_LAST_ACTIVE,
+    _TRIGGER_INCREMENT_FOLLOW_COUNTS,
+    _TRIGGER_DECREMENT_FOLLOW_COUNTS,
+    _TRIGGER_INCREMENT_REPLY_COUNTS,
+    _TRIGGER_DECREMENT_REPLY_COUNTS,
+    _TRIGGER_ROLLUP_POST_INSERT,
+    _TRIGGER_ROLLUP_POST_DELETE,
+    _TRIGGER_ROLLUP_LIKES_UPDATE,
+    _TRIGGER_ROLLUP_LIKES_DELETE,
+    _TRIGGER_ROLLUP_REACTION_INSERT,
+    _TRIGGER_ROLLUP_REACTION_DELETE,
+    _TRIGGER_LOG_MEMBER_INSERT,
+    _TRIGGER_LOG_MEMBER_DELETE,
+    _TRIGGER_LOG_POST_REACTION_INSERT,
+    _TRIGGER_LOG_POST_REACTION_UPDATE,
+    _TRIGGER_LOG_POST_REACTION_DELETE,
+    _TRIGGER_LOG_COMMENT_REACTION_INSERT,
+    _TRIGGER_LOG_COMMENT_REACTION_UPDATE,
+    _TRIGGER_LOG_COMMENT_REACTION_DELETE,
+    _TRIGGER_TRENDING_CLUSTER_PRIVACY,
 ]
 
 # ---------------------------------------------------------------------------
@@ -101,6 +366,13 @@ def register_triggers(engine: Engine) -> None:
         cursor.close()
 
 
+def trigger_names() -> list:
+    """
+    Names of every application trigger, in creation order.
+    """
+    return [ddl.split()[5] for ddl in _ALL_TRIGGERS]
+
+
 def apply_triggers_now(engine: Engine) -> None:
     """
     Immediately execute all trigger DDL against the current live connection.
@@ -112,3 +384,13 @@ def apply_triggers_now(engine: Engine) -> None:
         for ddl in _ALL_TRIGGERS:
             conn.execute(text(ddl))
         conn.commit()
+
+
+def drop_triggers_now(engine: Engine) -> None:
+    """
+    Removes every application trigger, e.g. when switching to COUNTER_MODE=hooks.
+    """
+    with engine.connect() as conn:
+        for name in trigger_names():
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        conn.commit()
@@ -44,4 +44,230 @@ BEGIN
     UPDATE userprofile
     SET    last_active = CURRENT_TIMESTAMP
     WHERE  uid = NEW.uid;
-END;
\ No newline at end of file
+END;
+
+-- TRIGGER 6: trg_increment_follow_counts
+CREATE TRIGGER IF NOT EXISTS trg_increment_follow_counts
+AFTER INSERT ON userfollow
+FOR EACH ROW
+BEGIN
+    INSERT OR IGNORE INTO userfollowstats (uid, follower_count, following_count)
+    VALUES (NEW.following_uid, 0, 0), (NEW.follower_uid, 0, 0);
+    UPDATE userfollowstats
+    SET    follower_count = follower_count + 1
+    WHERE  uid = NEW.following_uid;
+    UPDATE userfollowstats
+    SET    following_count = following_count + 1
+    WHERE  uid = NEW.follower_uid;
+END;
+
+-- TRIGGER 7: trg_decrement_follow_counts
+CREATE TRIGGER IF NOT EXISTS trg_decrement_follow_counts
+AFTER DELETE ON userfollow
+FOR EACH ROW
+BEGIN
+    UPDATE userfollowstats
+    SET    follower_count = MAX(0, follower_count - 1)
+    WHERE  uid = OLD.following_uid;
+    UPDATE userfollowstats
+    SET    following_count = MAX(0, following_count - 1)
+    WHERE  uid = OLD.follower_uid;
+END;
+
+-- TRIGGER 8: trg_increment_reply_counts
+-- Ancestors come from the parent's commentclosure rows (no recursive CTE inside triggers).
+CREATE TRIGGER IF NOT EXISTS trg_increment_reply_counts
+AFTER INSERT ON commentcore
+FOR EACH ROW
+WHEN NEW.parent_mid IS NOT NULL
+BEGIN
+    UPDATE commentstats
+    SET    reply_count = reply_count + 1
+    WHERE  mid = NEW.parent_mid;
+    UPDATE commentstats
+    SET    total_descendants = total_descendants + 1
+    WHERE  mid IN (SELECT ancestor_mid FROM commentclosure WHERE descendant_mid = NEW.parent_mid);
+END;
+
+-- TRIGGER 9: trg_decrement_reply_counts
+CREATE TRIGGER IF NOT EXISTS trg_decrement_reply_counts
+AFTER DELETE ON commentcore
+FOR EACH ROW
+WHEN OLD.parent_mid IS NOT NULL
+BEGIN
+    UPDATE commentstats
+    SET    reply_count = MAX(0, reply_count - 1)
+    WHERE  mid = OLD.parent_mid;
+    UPDATE commentstats
+    SET    total_descendants = MAX(0, total_descendants - 1)
+    WHERE  mid IN (SELECT ancestor_mid FROM commentclosure WHERE descendant_mid = OLD.parent_mid);
+END;
+
+-- Leaderboard rollups (userpoststats / clusterpoststats). A post's poststats and postreaction
+-- rows may be deleted before or after the post; whichever goes second subtracts its share.
+
+-- TRIGGER 10: trg_rollup_post_insert
+CREATE TRIGGER IF NOT EXISTS trg_rollup_post_insert
+AFTER INSERT ON postcore
+FOR EACH ROW
+BEGIN
+    INSERT OR IGNORE INTO userpoststats (uid, post_count, total_likes, total_reactions)
+    VALUES (NEW.uid, 0, 0, 0);
+    INSERT OR IGNORE INTO clusterpoststats (cid, post_count, total_likes, total_reactions)
+    VALUES (NEW.cid, 0, 0, 0);
+    UPDATE userpoststats
+    SET    post_count = post_count + 1
+    WHERE  uid = NEW.uid;
+    UPDATE clusterpoststats
+    SET    post_count = post_count + 1
+    WHERE  cid = NEW.cid;
+END;
+
+-- TRIGGER 11: trg_rollup_post_delete
+CREATE TRIGGER IF NOT EXISTS trg_rollup_post_delete
+AFTER DELETE ON postcore
+FOR EACH ROW
+BEGIN
+    UPDATE userpoststats
+    SET    post_count      = MAX(0, post_count - 1),
+           total_likes     = MAX(0, total_likes - COALESCE((SELECT likes FROM poststats WHERE pid = OLD.pid), 0)),
+           total_reactions = MAX(0, total_reactions - (SELECT COUNT(*) FROM postreaction WHERE pid = OLD.pid))
+    WHERE  uid = OLD.uid;
+    UPDATE clusterpoststats
+    SET    post_count      = MAX(0, post_count - 1),
+           total_likes     = MAX(0, total_likes - COALESCE((SELECT likes FROM poststats WHERE pid = OLD.pid), 0)),
+           total_reactions = MAX(0, total_reactions - (SELECT COUNT(*) FROM postreaction WHERE pid = OLD.pid))
+    WHERE  cid = OLD.cid;
+END;
+
+-- TRIGGER 12: trg_rollup_likes_update
+CREATE TRIGGER IF NOT EXISTS trg_rollup_likes_update
+AFTER UPDATE OF likes ON poststats
+FOR EACH ROW
+WHEN NEW.likes <> OLD.likes
+BEGIN
+    UPDATE userpoststats
+    SET    total_likes = MAX(0, total_likes + NEW.likes - OLD.likes)
+    WHERE  uid = (SELECT uid FROM postcore WHERE pid = NEW.pid);
+    UPDATE clusterpoststats
+    SET    total_likes = MAX(0, total_likes + NEW.likes - OLD.likes)
+    WHERE  cid = (SELECT cid FROM postcore WHERE pid = NEW.pid);
+END;
+
+-- TRIGGER 13: trg_rollup_likes_delete
+CREATE TRIGGER IF NOT EXISTS trg_rollup_likes_delete
+AFTER DELETE ON poststats
+FOR EACH ROW
+WHEN OLD.likes <> 0
+BEGIN
+    UPDATE userpoststats
+    SET    total_likes = MAX(0, total_likes - OLD.likes)
+    WHERE  uid = (SELECT uid FROM postcore WHERE pid = OLD.pid);
+    UPDATE clusterpoststats
+    SET    total_likes = MAX(0, total_likes - OLD.likes)
+    WHERE  cid = (SELECT cid FROM postcore WHERE pid = OLD.pid);
+END;
+
+-- TRIGGER 14: trg_rollup_reaction_insert
+CREATE TRIGGER IF NOT EXISTS trg_rollup_reaction_insert
+AFTER INSERT ON postreaction
+FOR EACH ROW
+BEGIN
+    UPDATE userpoststats
+    SET    total_reactions = total_reactions + 1
+    WHERE  uid = (SELECT uid FROM postcore WHERE pid = NEW.pid);
+    UPDATE clusterpoststats
+    SET    total_reactions = total_reactions + 1
+    WHERE  cid = (SELECT cid FROM postcore WHERE pid = NEW.pid);
+END;
+
+-- TRIGGER 15: trg_rollup_reaction_delete
+CREATE TRIGGER IF NOT EXISTS trg_rollup_reaction_delete
+AFTER DELETE ON postreaction
+FOR EACH ROW
+BEGIN
+    UPDATE userpoststats
+    SET    total_reactions = MAX(0, total_reactions - 1)
+    WHERE  uid = (SELECT uid FROM postcore WHERE pid = OLD.pid);
+    UPDATE clusterpoststats
+    SET    total_reactions = MAX(0, total_reactions - 1)
+    WHERE  cid = (SELECT cid FROM postcore WHERE pid = OLD.pid);
+END;
+
+-- Change log read by the counter reconciler (counterchange): each write that can move
+-- member_count or a likes/dislikes counter records the row whose stats to re-check.
+
+-- TRIGGER 16: trg_log_member_insert
+CREATE TRIGGER IF NOT EXISTS trg_log_member_insert
+AFTER INSERT ON clustermember
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('cluster', NEW.cid);
+END;
+
+-- TRIGGER 17: trg_log_member_delete
+CREATE TRIGGER IF NOT EXISTS trg_log_member_delete
+AFTER DELETE ON clustermember
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('cluster', OLD.cid);
+END;
+
+-- TRIGGER 18: trg_log_post_reaction_insert
+CREATE TRIGGER IF NOT EXISTS trg_log_post_reaction_insert
+AFTER INSERT ON postreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('post', NEW.pid);
+END;
+
+-- TRIGGER 19: trg_log_post_reaction_update
+CREATE TRIGGER IF NOT EXISTS trg_log_post_reaction_update
+AFTER UPDATE ON postreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('post', NEW.pid);
+END;
+
+-- TRIGGER 20: trg_log_post_reaction_delete
+CREATE TRIGGER IF NOT EXISTS trg_log_post_reaction_delete
+AFTER DELETE ON postreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('post', OLD.pid);
+END;
+
+-- TRIGGER 21: trg_log_comment_reaction_insert
+CREATE TRIGGER IF NOT EXISTS trg_log_comment_reaction_insert
+AFTER INSERT ON commentreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('comment', NEW.mid);
+END;
+
+-- TRIGGER 22: trg_log_comment_reaction_update
+CREATE TRIGGER IF NOT EXISTS trg_log_comment_reaction_update
+AFTER UPDATE ON commentreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('comment', NEW.mid);
+END;
+
+-- TRIGGER 23: trg_log_comment_reaction_delete
+CREATE TRIGGER IF NOT EXISTS trg_log_comment_reaction_delete
+AFTER DELETE ON commentreaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO counterchange (kind, key) VALUES ('comment', OLD.mid);
+END;
+
+-- TRIGGER 24: trg_trending_cluster_privacy
+CREATE TRIGGER IF NOT EXISTS trg_trending_cluster_privacy
+AFTER UPDATE OF is_private ON clustercore
+FOR EACH ROW
+WHEN NEW.is_private IS NOT OLD.is_private
+BEGIN
+    UPDATE posttrending
+    SET    is_public = NOT NEW.is_private
+    WHERE  pid IN (SELECT pid FROM postcore WHERE cid = NEW.cid);
+END;
@@ -5,10 +5,15 @@ from sqlmodel.pool import StaticPool
 from uuid import uuid4
 
 from api.main import app
-from api.database import get_session
+from api.database import get_session, get_read_engine
+from api.auth import user_cache
+from api import response_cache
+from api.counter_buffer import counter_buffer
+from api.services.rule_service import RuleService
 from api.models.user import UserAuth, UserProfile, UserRole
 from api.security import get_password_hash
-from api.triggers import apply_triggers_now
+from api.counters import apply_counters_now
+from api.search import install_search, uninstall_search
 from api.models.follow import UserFollow  # noqa: F401
 from api.models.post import (  # noqa: F401
     MegaphonePollOption,
@@ -28,10 +33,16 @@ engine = create_engine(
 @pytest.fixture(name="session")
 def session_fixture():
     SQLModel.metadata.create_all(engine)
-    apply_triggers_now(engine)       # install the 5 SQLite triggers on the live connection
+    apply_counters_now(engine)       # SQLite triggers on the live connection (or session hooks under COUNTER_MODE=hooks)
+    install_search(engine)           # FTS5 tables and their sync triggers
     with Session(engine) as session:
         yield session
     SQLModel.metadata.drop_all(engine)
+    uninstall_search(engine)
+    user_cache.clear()
+    response_cache.clear()
+    counter_buffer.clear()
+    RuleService.clear_cache()
 
 @pytest.fixture(name="client")
 def client_fixture(session: Session):
@@ -39,6 +50,7 @@ def client_fixture(session: Session):
         return session
     
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_engine] = lambda: engine
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
@@ -78,6 +90,18 @@ def test_user_fixture(session: Session, test_password):
     
     return user
 
+@pytest.fixture(name="make_users")
+def make_users_fixture(session: Session):
+    """Factory for extra users (auth row and profile); returns their uids."""
+    def make_users(count: int):
+        uids = [uuid4() for _ in range(count)]
+        for uid in uids:
+            session.add(UserAuth(uid=uid, email=f"{uid.hex}@example.com", password_hash="x"))
+            session.add(UserProfile(uid=uid, name=f"User {uid.hex[:8]}"))
+        session.commit()
+        return uids
+    return make_users
+
 from api.models.cluster import ClusterCore, ClusterInfo, ClusterStats, ClusterMember
 from api.models.post import PostCore, PostContent, PostStats, PostType
 from api.models.comment import CommentCore, CommentContent, CommentStats
@@ -0,0 +1,155 @@
+import asyncio
+import pytest
+from uuid import uuid4
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.pool import NullPool
+from sqlmodel import Session, SQLModel, create_engine
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from api.main import app
+from api.auth import create_access_token
+from api import database
+from api.database import get_session, get_async_session
+from api.routers import async_reads
+from api.models.user import UserAuth, UserProfile, UserRole
+from api.models.cluster import ClusterCore, ClusterInfo, ClusterStats
+from api.models.post import PostType
+from api.schemas.post import PostCreate
+from api.services.cluster_service import ClusterService
+from api.services.comment_service import CommentService
+from api.services.post_service import PostService
+from api.security import get_password_hash
+from api.triggers import apply_triggers_now
+
+# Both engines must see the same data, so these tests use a SQLite file
+# instead of the shared in-memory database from conftest.
+
+@pytest.fixture(name="db_path")
+def db_path_fixture(tmp_path):
+    path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(sync_engine)
+    apply_triggers_now(sync_engine)
+    yield path
+    sync_engine.dispose()
+
+@pytest.fixture(name="seeded")
+def seeded_fixture(db_path):
+    sync_engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    with Session(sync_engine) as session:
+        uid, cid = uuid4(), uuid4()
+        session.add(UserAuth(uid=uid, email="async@example.com", password_hash=get_password_hash("pw"), role=UserRole.VERIFIED, is_verified=True))
+        session.add(UserProfile(uid=uid, name="Async Reader"))
+        session.add(ClusterCore(cid=cid, name="Async Cluster", category="Testing", is_private=False))
+        session.add(ClusterInfo(cid=cid, description="", creator_uid=uid))
+        session.add(ClusterStats(cid=cid, member_count=0))
+        session.commit()
+        ClusterService.add_user_to_cluster(session, cid, uid)
+
+        pids = []
+        for i in range(3):
+            core, _, _ = PostService.create_post(session, PostCreate(uid=uid, cid=cid, type=PostType.TEXT, content=f"async post {i}"))
+            pids.append(core.pid)
+
+        class MockCommentIn:
+            pass
+        comment_in = MockCommentIn()
+        comment_in.uid, comment_in.pid, comment_in.parent_mid, comment_in.content = uid, pids[0], None, "root"
+        root, _, _ = CommentService.create_comment(session, comment_in)
+        comment_in.pid, comment_in.parent_mid, comment_in.content = None, root.mid, "reply"
+        CommentService.create_comment(session, comment_in)
+        root_mid = root.mid
+    sync_engine.dispose()
+    return {"uid": uid, "cid": cid, "pids": pids, "root_mid": root_mid}
+
+@pytest.fixture(name="clients")
+def clients_fixture(db_path):
+    sync_engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    # NullPool: TestClient may run each request on a fresh event loop
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+
+    def get_session_override():
+        with Session(sync_engine) as session:
+            yield session
+
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    async_app = FastAPI()
+    async_app.include_router(async_reads.router)
+    async_app.dependency_overrides[get_async_session] = get_async_session_override
+    app.dependency_overrides[get_session] = get_session_override
+
+    yield TestClient(app), TestClient(async_app)
+
+    app.dependency_overrides.clear()
+    sync_engine.dispose()
+
+def test_async_routes_match_sync_routes(clients, seeded):
+    sync_client, async_client = clients
+    token = create_access_token(data={"sub": str(seeded["uid"])})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    paths = [
+        "/posts/me/feed?limit=2",
+        "/posts/trending/global?limit=2",
+        f"/posts/?cid={seeded['cid']}",
+        f"/posts/cluster/{seeded['cid']}/recent?limit=2",
+        f"/posts/user/{seeded['uid']}/recent",
+        f"/comments/post/{seeded['pids'][0]}/root",
+        f"/comments/{seeded['root_mid']}/replies",
+        f"/comments/post/{seeded['pids'][0]}/top",
+    ]
+    for path in paths:
+        expected = sync_client.get(path, headers=headers)
+        actual = async_client.get(path, headers=headers)
+        assert expected.status_code == 200, path
+        assert actual.status_code == 200, path
+        assert actual.json() == expected.json(), path
+        assert actual.headers.get("X-Next-Cursor") == expected.headers.get("X-Next-Cursor"), path
+
+def test_async_feed_follows_cursor(clients, seeded):
+    _sync_client, async_client = clients
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(seeded['uid'])})}"}
+
+    first = async_client.get("/posts/me/feed?limit=2", headers=headers)
+    cursor = first.headers["X-Next-Cursor"]
+    second = async_client.get(f"/posts/me/feed?limit=2&cursor={cursor}", headers=headers)
+
+    seen = [p["pid"] for p in first.json() + second.json()]
+    assert seen == [str(pid) for pid in reversed(seeded["pids"])]
+    assert "X-Next-Cursor" not in second.headers
+
+def test_async_auth_rejects_bad_token(clients):
+    _sync_client, async_client = clients
+    response = async_client.get("/posts/me/feed", headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+
+def test_async_reads_follow_replica_routing(clients, seeded, tmp_path, monkeypatch):
+    _sync_client, async_client = clients
+    replica = database.create_replica_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    SQLModel.metadata.create_all(replica)
+    monkeypatch.setattr(database, "replica_engines", [replica])
+    monkeypatch.setattr(database, "_primary_pins", {})
+    monkeypatch.setattr(database, "_async_replica_engines", {})
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(seeded['uid'])})}"}
+    path = f"/posts/user/{seeded['uid']}/recent"
+
+    assert async_client.get(path, headers=headers).json() == []          # the empty replica answered
+    database.pin_to_primary(headers["Authorization"])
+    assert len(async_client.get(path, headers=headers).json()) == 3     # read-your-writes: the primary
+
+    async_replica = database.get_async_replica_engine(replica)
+    asyncio.run(async_replica.dispose())
+    replica.dispose()
+
+def test_async_url_swaps_in_the_async_driver():
+    assert database.async_url("sqlite:///tmp/a.db") == "sqlite+aiosqlite:///tmp/a.db"
+    assert database.async_url("mysql+pymysql://u:p@db:3306/app") == "mysql+asyncmy://u:p@db:3306/app"
+
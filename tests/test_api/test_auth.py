@@ -0,0 +1,62 @@
+"""
+tests/test_api/test_auth.py
+
+Validates the resolved-user cache behind get_current_user and its invalidation.
+"""
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from api import auth
+from api.auth import create_access_token, get_current_user, user_cache
+from api.models.enums import UserRole
+from api.services.user_service import UserService
+
+
+def _userauth_queries(session: Session, call):
+    statements = []
+    def _record(_conn, _cursor, statement, *_args):
+        if "FROM userauth" in statement:
+            statements.append(statement)
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    return len(statements)
+
+def test_repeat_requests_skip_user_lookup(client, session: Session, auth_headers):
+    assert _userauth_queries(session, lambda: client.get("/users/me/profile", headers=auth_headers)) == 1
+    assert _userauth_queries(session, lambda: client.get("/users/me/profile", headers=auth_headers)) == 0
+
+def test_each_request_gets_its_own_instance(session: Session, test_user):
+    uid = test_user.uid
+    token = create_access_token(data={"sub": str(uid)})
+    first = get_current_user(token, session)
+    second = get_current_user(token, session)
+    assert first is not second
+    assert second.uid == uid and second.email == "test@example.com"
+
+def test_role_change_and_verification_invalidate(session: Session, test_user):
+    uid = test_user.uid
+    token = create_access_token(data={"sub": str(uid)})
+    assert get_current_user(token, session).role == UserRole.VERIFIED
+
+    UserService.update_user_role(session, uid, UserRole.ADMIN)
+    assert get_current_user(token, session).role == UserRole.ADMIN
+
+    UserService.verify_user_account(session, uid, "new@example.com")
+    assert get_current_user(token, session).email == "new@example.com"
+
+def test_deleted_account_loses_access(client, auth_headers):
+    assert client.get("/users/me/profile", headers=auth_headers).status_code == 200
+    assert client.delete("/users/me/account", headers=auth_headers).status_code == 200
+    assert client.get("/users/me/profile", headers=auth_headers).status_code == 401
+
+def test_cache_size_is_bounded(session: Session, test_user, monkeypatch):
+    from api.cache import TTLCache
+    monkeypatch.setattr(auth, "user_cache", TTLCache(ttl=60, maxsize=1))
+    get_current_user(create_access_token(data={"sub": str(test_user.uid)}), session)
+    assert len(auth.user_cache) == 1
+    assert len(user_cache) == 0
@@ -60,3 +60,62 @@ def test_list_clusters(client: TestClient, test_user, auth_headers):
     response_cat1 = client.get("/clusters/?category=Cat1")
     assert response_cat1.status_code == 200
     assert all(c["category"] == "Cat1" for c in response_cat1.json())
+
+def test_cluster_rule_endpoints(client: TestClient, test_user, test_cluster, auth_headers):
+    cid = test_cluster.cid
+    created = client.post(f"/clusters/{cid}/rules", json={"name": "spam", "pattern": "spam", "action": "BLOCK"}, headers=auth_headers)
+    assert created.status_code == 201
+    rid = created.json()["rid"]
+
+    post = {"uid": str(test_user.uid), "cid": str(cid), "content": "cheap SPAM"}
+    blocked = client.post("/posts/", json=post, headers=auth_headers)
+    assert blocked.status_code == 400
+    assert blocked.json()["rule"] == "spam"
+
+    assert client.post(f"/clusters/{cid}/rules", json={"name": "x", "pattern": r"(a)\1", "action": "FLAG"}, headers=auth_headers).status_code == 400
+    assert client.patch(f"/clusters/{cid}/rules/{rid}", json={"action": "FLAG"}, headers=auth_headers).json()["action"] == "FLAG"
+    assert client.post("/posts/", json=post, headers=auth_headers).status_code == 200
+    assert client.delete(f"/clusters/{cid}/rules/{rid}", headers=auth_headers).status_code == 200
+    assert client.get(f"/clusters/{cid}/rules").json() == []
+
+def test_cluster_rules_need_a_moderator(client: TestClient, session: Session, test_cluster):
+    from api.auth import create_access_token
+    from api.models.user import UserAuth
+    outsider = UserAuth(uid=uuid4(), email="outsider@example.com", password_hash="x")
+    session.add(outsider)
+    session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(outsider.uid)})}"}
+    response = client.post(f"/clusters/{test_cluster.cid}/rules", json={"name": "n", "pattern": "p", "action": "FLAG"}, headers=headers)
+    assert response.status_code == 403
+
+def test_moderation_queue_endpoints(client: TestClient, session: Session, test_user, test_cluster, auth_headers):
+    from api.services.moderation_service import ModerationService
+    cid = test_cluster.cid
+    client.post(f"/clusters/{cid}/rules", json={"name": "links", "pattern": "http", "action": "FLAG"}, headers=auth_headers)
+    for n in range(3):
+        post = {"uid": str(test_user.uid), "cid": str(cid), "content": f"see http://x/{n}"}
+        assert client.post("/posts/", json=post, headers=auth_headers).status_code == 200
+
+    queued = client.get(f"/clusters/{cid}/moderation?status=QUEUED", headers=auth_headers).json()
+    assert len(queued) == 3
+    assert ModerationService.run(session) == 3
+
+    first = client.get(f"/clusters/{cid}/moderation?limit=2", headers=auth_headers)
+    assert len(first.json()) == 2
+    rest = client.get(f"/clusters/{cid}/moderation?limit=2&cursor={first.headers['X-Next-Cursor']}", headers=auth_headers)
+    assert len(rest.json()) == 1
+
+    qid = rest.json()[0]["qid"]
+    resolved = client.post(f"/clusters/{cid}/moderation/{qid}/resolve", headers=auth_headers)
+    assert resolved.json()["status"] == "RESOLVED"
+    assert resolved.json()["reviewed_by"] == str(test_user.uid)
+    assert client.post(f"/clusters/{cid}/moderation/{uuid4()}/resolve", headers=auth_headers).status_code == 404
+
+def test_moderation_queue_needs_a_moderator(client: TestClient, session: Session, test_cluster):
+    from api.auth import create_access_token
+    from api.models.user import UserAuth
+    outsider = UserAuth(uid=uuid4(), email="outsider@example.com", password_hash="x")
+    session.add(outsider)
+    session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(outsider.uid)})}"}
+    assert client.get(f"/clusters/{test_cluster.cid}/moderation", headers=headers).status_code == 403
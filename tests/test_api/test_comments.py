@@ -91,3 +91,62 @@ def test_create_comment_reply_with_invalid_parent_returns_400(client: TestClient
     response = client.post("/comments/", json=reply_data, headers=auth_headers)
     assert response.status_code == 400
     assert response.json()["detail"] == "Parent comment not found"
+
+def test_get_comments_for_post_single_query(client: TestClient, session: Session, test_user, test_post, test_comment):
+    from sqlalchemy import event
+    from api.models.comment import CommentCore, CommentContent
+    pid = test_post.pid
+    for i in range(3):
+        mid = uuid4()
+        session.add(CommentCore(mid=mid, uid=test_user.uid, pid=pid, parent_mid=test_comment.mid))
+        session.add(CommentContent(mid=mid, content=f"reply {i}"))
+    session.commit()
+
+    statements = []
+    engine = session.get_bind()
+    listener = lambda *_args: statements.append(1)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(f"/comments/post/{pid}")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    assert len(response.json()) == 4
+    assert len(statements) == 1
+
+def test_post_thread_endpoint(client: TestClient, test_user, test_post, test_comment, auth_headers):
+    for i in range(3):
+        client.post("/comments/", json={"uid": str(test_user.uid), "content": f"reply {i}",
+                                        "parent_mid": str(test_comment.mid)}, headers=auth_headers)
+
+    response = client.get(f"/comments/post/{test_post.pid}/thread", params={"max_replies": 2})
+    assert response.status_code == 200
+    root = response.json()[0]
+    assert root["mid"] == str(test_comment.mid)
+    assert [r["content"] for r in root["replies"]] == ["reply 0", "reply 1"]
+    assert root["has_more_replies"]
+
+    more = client.get(f"/comments/{test_comment.mid}/thread", params={"cursor": root["more_replies_cursor"]})
+    assert [r["content"] for r in more.json()] == ["reply 2"]
+
+    assert client.get(f"/comments/post/{test_post.pid}/thread", params={"cursor": "garbage"}).status_code == 400
+    assert client.get(f"/comments/post/{test_post.pid}/thread", params={"max_replies": 0}).status_code == 400
+
+def test_comment_subtree_endpoint(client: TestClient, test_user, test_comment, auth_headers):
+    reply = client.post("/comments/", json={"uid": str(test_user.uid), "content": "nested",
+                                            "parent_mid": str(test_comment.mid)}, headers=auth_headers).json()
+    client.post("/comments/", json={"uid": str(test_user.uid), "content": "deeper",
+                                    "parent_mid": reply["mid"]}, headers=auth_headers)
+
+    response = client.get(f"/comments/{reply['mid']}/subtree")
+    assert response.status_code == 200
+    assert [(c["content"], c["depth"]) for c in response.json()] == [("nested", 0), ("deeper", 1)]
+    assert client.get(f"/comments/{reply['mid']}/subtree", params={"sort": "sideways"}).status_code == 400
+    assert client.get(f"/comments/{uuid4()}/subtree").status_code == 404
+
+def test_comment_reaction_stats_endpoint(client: TestClient, test_user, test_comment, auth_headers):
+    mid = test_comment.mid
+    assert client.get(f"/comments/{mid}/reactions/stats").json() == []
+    payload = {"uid": str(test_user.uid), "reaction_type": "WOW"}
+    assert client.post(f"/comments/{mid}/react", json=payload, headers=auth_headers).status_code == 200
+    assert client.get(f"/comments/{mid}/reactions/stats").json() == [{"reaction_type": "WOW", "count": 1}]
@@ -52,3 +52,89 @@ def test_react_to_post(client: TestClient, test_post, test_user, session: Sessio
     # Verify in DB
     stats = session.get(PostStats, test_post.pid)
     assert stats.likes == 1
+
+def _seed_mixed_posts(session: Session, uid, cid, count: int):
+    """Inserts `count` groups of (text post, window of it, poll megaphone) in one cluster."""
+    from datetime import datetime, timedelta
+    from api.models.post import Window, Megaphone, MegaphonePollOption, PostType
+    from api.models.enums import MegaphoneType
+
+    for _ in range(count):
+        origin = PostCore(uid=uid, cid=cid, type=PostType.TEXT)
+        window = PostCore(uid=uid, cid=cid, type=PostType.WINDOW)
+        poll = PostCore(uid=uid, cid=cid, type=PostType.TEXT)
+        session.add_all([origin, window, poll])
+        session.flush()
+        session.add_all([
+            PostContent(pid=origin.pid, content="origin"),
+            PostContent(pid=window.pid, content="origin"),
+            PostContent(pid=poll.pid, content="poll"),
+            Window(wid=window.pid, origin_pid=origin.pid, shared_by_uid=uid, shared_into_cid=cid),
+            Megaphone(pid=poll.pid, start_time=datetime.now(), end_time=datetime.now() + timedelta(hours=1),
+                      type=MegaphoneType.POLL),
+            MegaphonePollOption(pid=poll.pid, idx=0, label="yes"),
+            MegaphonePollOption(pid=poll.pid, idx=1, label="no"),
+        ])
+    session.commit()
+
+def test_user_posts_query_count_is_constant(client: TestClient, session: Session, test_user, test_cluster):
+    from sqlalchemy import event
+
+    statements = []
+    def _count(*_args):
+        statements.append(1)
+
+    def _queries_for_listing():
+        statements.clear()
+        engine = session.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            response = client.get(f"/users/{test_user.uid}/posts")
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+        assert response.status_code == 200
+        return response.json(), len(statements)
+
+    _seed_mixed_posts(session, test_user.uid, test_cluster.cid, 2)
+    small_page, small_count = _queries_for_listing()
+
+    _seed_mixed_posts(session, test_user.uid, test_cluster.cid, 8)
+    large_page, large_count = _queries_for_listing()
+
+    assert len(small_page) == 6
+    assert len(large_page) == 30
+    assert large_count == small_count
+
+    windows = [p for p in large_page if p["type"] == "WINDOW"]
+    assert all(p["window_origin"]["author_name"] == "Test User" for p in windows)
+    assert all(p["window_origin"]["cluster_name"] == "Global Test Cluster" for p in windows)
+    polls = [p for p in large_page if p["megaphone"]]
+    assert len(polls) == 10
+    assert all(p["megaphone"]["poll"]["total_votes"] == 0 for p in polls)
+    assert all(len(p["megaphone"]["poll"]["options"]) == 2 for p in polls)
+
+def test_list_posts_cursor_pagination(client: TestClient, session: Session, test_user, test_cluster):
+    for i in range(5):
+        core = PostCore(uid=test_user.uid, cid=test_cluster.cid)
+        session.add(core)
+        session.flush()
+        session.add(PostContent(pid=core.pid, content=f"paged {i}"))
+    session.commit()
+
+    pids = []
+    response = client.get(f"/posts/?cid={test_cluster.cid}&limit=2")
+    while True:
+        assert response.status_code == 200
+        pids.extend(p["pid"] for p in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        response = client.get(f"/posts/?cid={test_cluster.cid}&limit=2&cursor={cursor}")
+
+    assert len(pids) == 5
+    assert len(set(pids)) == 5
+
+def test_list_posts_invalid_cursor(client: TestClient):
+    response = client.get("/posts/?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,61 @@
+import pytest
+from uuid import uuid4
+from sqlmodel import Session, SQLModel
+
+from api import database
+from api.models.cluster import ClusterCore, ClusterInfo, ClusterStats, ClusterBookmark
+
+# The conftest in-memory database acts as the primary; a second SQLite file
+# stands in for a replica that holds different data, so every response shows
+# which database served it.
+
+@pytest.fixture(name="replica_cid")
+def replica_fixture(tmp_path, monkeypatch):
+    replica = database.create_replica_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    SQLModel.metadata.create_all(replica)
+    cid = uuid4()
+    with Session(replica) as session:
+        session.add(ClusterCore(cid=cid, name="Replica Only", category="Testing"))
+        session.add(ClusterInfo(cid=cid, description="lives on the replica", creator_uid=uuid4()))
+        session.add(ClusterStats(cid=cid))
+        session.commit()
+
+    monkeypatch.setattr(database, "replica_engines", [replica])
+    monkeypatch.setattr(database, "_primary_pins", {})
+    yield cid
+    replica.dispose()
+
+def test_reads_go_to_replica(client, test_cluster, replica_cid):
+    assert client.get(f"/clusters/{replica_cid}").status_code == 200
+    assert client.get(f"/clusters/{test_cluster.cid}").status_code == 404
+
+def test_writes_always_hit_primary(client, session, test_user, test_cluster, replica_cid, auth_headers):
+    replica = database.replica_engines[0]
+    checkouts = replica.pool.stats()["checkouts"]
+    response = client.post(f"/clusters/{test_cluster.cid}/bookmark", headers=auth_headers)
+    assert response.status_code == 200
+
+    # The replica pool was never touched, and the row landed on the primary
+    assert replica.pool.stats()["checkouts"] == checkouts
+    assert session.get(ClusterBookmark, (test_user.uid, test_cluster.cid)) is not None
+    with Session(replica) as replica_session:
+        assert replica_session.get(ClusterBookmark, (test_user.uid, test_cluster.cid)) is None
+
+def test_reads_stick_to_primary_after_write(client, test_cluster, replica_cid, auth_headers):
+    client.post(f"/clusters/{test_cluster.cid}/bookmark", headers=auth_headers)
+
+    # The writer now reads from the primary...
+    assert client.get(f"/clusters/{test_cluster.cid}", headers=auth_headers).status_code == 200
+    assert client.get(f"/clusters/{replica_cid}", headers=auth_headers).status_code == 404
+    # ...while other clients keep using the replica
+    assert client.get(f"/clusters/{test_cluster.cid}").status_code == 404
+
+def test_stickiness_expires(client, test_cluster, replica_cid, auth_headers, monkeypatch):
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 0)
+    client.post(f"/clusters/{test_cluster.cid}/bookmark", headers=auth_headers)
+
+    assert client.get(f"/clusters/{replica_cid}", headers=auth_headers).status_code == 200
+
+def test_without_replicas_reads_use_primary(client, test_cluster):
+    assert database.replica_engines == []
+    assert client.get(f"/clusters/{test_cluster.cid}").status_code == 200
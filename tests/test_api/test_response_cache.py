@@ -0,0 +1,105 @@
+"""
+tests/test_api/test_response_cache.py
+
+Validates the cached_response decorator in api/response_cache.py: ETag/304 handling,
+query-param keys and tag invalidation from service writes.
+"""
+
+from uuid import uuid4
+from sqlmodel import Session
+
+from api import response_cache
+from api.models.cluster import ClusterCore
+from api.models.user import UserAuth, UserProfile
+from api.response_cache import InMemoryBackend, invalidate_tags
+from api.services.cluster_service import ClusterService
+
+
+def _second_user(session: Session) -> UserAuth:
+    user = UserAuth(uid=uuid4(), email="other@example.com", password_hash="x")
+    session.add(user)
+    session.add(UserProfile(uid=user.uid, name="Other"))
+    session.commit()
+    return user
+
+
+def test_etag_and_not_modified(client, test_cluster):
+    first = client.get("/clusters/stats/top-by-members")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert first.json()[0]["name"] == "Global Test Cluster"
+
+    again = client.get("/clusters/stats/top-by-members", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+
+    assert client.get("/clusters/stats/top-by-members", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_hit_skips_the_endpoint(client, session: Session, test_cluster):
+    body = client.get("/clusters/stats/top-by-members").json()
+    # A write that bypasses the services is invisible until the TTL lapses
+    session.add(UserAuth(uid=uuid4(), email="silent@example.com", password_hash="x"))
+    session.commit()
+    assert client.get("/clusters/stats/top-by-members").json() == body
+
+
+def test_query_params_are_part_of_the_key(client, test_cluster):
+    assert client.get("/clusters/stats/top-by-members?limit=1").status_code == 200
+    assert client.get("/clusters/stats/top-by-members?limit=0").json() == []
+
+
+def test_join_invalidates_member_rankings(client, session: Session, test_cluster):
+    other = _second_user(session)
+    cid = test_cluster.cid
+    before = client.get("/clusters/stats/top-by-members")
+    members = before.json()[0]["member_count"]
+
+    ClusterService.add_user_to_cluster(session, cid, other.uid)
+
+    after = client.get("/clusters/stats/top-by-members", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.json()[0]["member_count"] == members + 1
+    assert after.headers["ETag"] != before.headers["ETag"]
+
+
+def test_reaction_invalidates_like_rankings(client, test_post, test_user, auth_headers):
+    pid, uid = test_post.pid, test_user.uid
+    assert client.get("/users/stats/most-liked").json()[0]["total_likes"] == 0
+    assert client.post(f"/posts/{pid}/react", json={"uid": str(uid), "reaction_type": "LIKE"}, headers=auth_headers).status_code == 200
+    assert client.get("/users/stats/most-liked").json()[0]["total_likes"] == 1
+
+
+def test_invalidation_is_scoped_to_tags(client, session: Session, test_cluster):
+    body = client.get("/clusters/stats/top-categories").json()
+    session.add(ClusterCore(cid=uuid4(), name="Unseen", category="Elsewhere", is_private=False))
+    session.commit()
+
+    invalidate_tags("reactions", "posts")
+    assert client.get("/clusters/stats/top-categories").json() == body
+    invalidate_tags("clusters")
+    assert len(client.get("/clusters/stats/top-categories").json()) == len(body) + 1
+
+
+def test_backend_is_pluggable(client, test_cluster):
+    class Recording(InMemoryBackend):
+        def __init__(self):
+            super().__init__()
+            self.writes = []
+
+        def set(self, key, value, ttl):
+            self.writes.append(key)
+            super().set(key, value, ttl)
+
+    original = response_cache.get_backend()
+    recording = Recording()
+    response_cache.set_backend(recording)
+    try:
+        client.get("/clusters/public/popular?limit=3")
+        client.get("/clusters/public/popular?limit=3")
+    finally:
+        response_cache.set_backend(original)
+    assert len(recording.writes) == 1
+    assert "limit" in recording.writes[0]
@@ -0,0 +1,107 @@
+"""
+tests/test_api/test_search.py
+
+Validates the full-text search backends in api/search.py and the /search endpoint.
+"""
+
+import pytest
+from uuid import uuid4
+from sqlmodel import Session, text
+
+from api import search
+from api.models.post    import PostCore, PostContent, PostType
+from api.models.comment import CommentCore, CommentContent
+from api.models.user    import UserProfile
+from api.search         import FTS5SearchBackend, LikeSearchBackend
+
+
+def _add_post(session: Session, test_user, test_cluster, content: str, tags: str = None):
+    pid = uuid4()
+    session.add(PostCore(pid=pid, uid=test_user.uid, cid=test_cluster.cid, type=PostType.TEXT))
+    session.add(PostContent(pid=pid, content=content, tags=tags))
+    session.commit()
+    return pid
+
+
+def test_posts_ranked_by_relevance(client, session: Session, test_user, test_cluster):
+    passing = _add_post(session, test_user, test_cluster, "A long post that mentions gardening once among many other words about weather")
+    focused = _add_post(session, test_user, test_cluster, "Gardening tips", tags="gardening")
+    _add_post(session, test_user, test_cluster, "Nothing relevant here")
+
+    posts = client.get("/search", params={"q": "gardening"}).json()["posts"]
+    assert [p["pid"] for p in posts] == [str(focused), str(passing)]
+
+
+def test_last_token_matches_as_prefix(client, session: Session, test_user, test_cluster):
+    pid = _add_post(session, test_user, test_cluster, "Weekly cluster meetup notes")
+
+    assert [p["pid"] for p in client.get("/search", params={"q": "meetup clu"}).json()["posts"]] == [str(pid)]
+    # Every token must match
+    assert client.get("/search", params={"q": "meetup zebra"}).json()["posts"] == []
+
+
+def test_index_follows_edits_and_deletes(client, session: Session, test_user, test_cluster):
+    pid = _add_post(session, test_user, test_cluster, "original wording")
+
+    content = session.get(PostContent, pid)
+    content.content = "revised wording"
+    session.add(content)
+    session.commit()
+    assert client.get("/search", params={"q": "original"}).json()["posts"] == []
+    assert len(client.get("/search", params={"q": "revised"}).json()["posts"]) == 1
+
+    session.delete(session.get(PostCore, pid))
+    session.commit()
+    remaining = session.exec(text("SELECT COUNT(*) FROM post_fts")).one()[0]
+    assert remaining == 0
+
+
+def test_profiles_clusters_and_comments_indexed(client, session: Session, test_user, test_post):
+    mid = uuid4()
+    session.add(CommentCore(mid=mid, uid=test_user.uid, pid=test_post.pid))
+    session.add(CommentContent(mid=mid, content="Insightful remark about telescopes"))
+    profile = session.get(UserProfile, test_user.uid)
+    profile.name = "Stargazer Sam"
+    session.add(profile)
+    session.commit()
+
+    results = client.get("/search", params={"q": "telescope"}).json()
+    assert [c["mid"] for c in results["comments"]] == [str(mid)]
+
+    results = client.get("/search", params={"q": "stargaz"}).json()
+    assert [u["uid"] for u in results["users"]] == [str(test_user.uid)]
+
+    results = client.get("/search", params={"q": "global test"}).json()
+    assert results["clusters"][0]["name"] == "Global Test Cluster"
+
+
+def test_reindex_rebuilds_from_base_tables(session: Session, test_user, test_cluster):
+    pid = _add_post(session, test_user, test_cluster, "indexed before the wipe")
+    session.exec(text("DELETE FROM post_fts"))
+    session.commit()
+
+    backend = FTS5SearchBackend()
+    assert backend.search(session, "wipe")["posts"] == []
+    backend.reindex(session)
+    assert [p["pid"] for p in backend.search(session, "wipe")["posts"]] == [str(pid)]
+
+
+def test_like_backend_matches_shape(client, session: Session, test_user, test_cluster, monkeypatch):
+    _add_post(session, test_user, test_cluster, "fallback search content")
+    monkeypatch.setattr(search, "SEARCH_BACKEND", "like")
+
+    results = client.get("/search", params={"q": "fallback"}).json()
+    assert set(results) == {"users", "clusters", "posts", "comments"}
+    assert len(results["posts"]) == 1
+    assert LikeSearchBackend().search(session, "   ") == {"users": [], "clusters": [], "posts": [], "comments": []}
+
+
+def test_unknown_backend_setting_is_a_clear_error(session: Session, monkeypatch):
+    monkeypatch.setattr(search, "SEARCH_BACKEND", "elastic")
+    with pytest.raises(ValueError, match=r"fts5\|mysql\|like\|auto"):
+        search.get_search_backend(session.get_bind())
+
+
+@pytest.mark.parametrize("q", ["", "   ", "\"*)(-"])
+def test_queries_without_words_return_nothing(client, q):
+    assert client.get("/search", params={"q": q}).json() == {"users": [], "clusters": [], "posts": [], "comments": []}
@@ -67,3 +67,31 @@ def test_get_my_profile_success(client: TestClient, auth_headers):
     response = client.get("/users/me/profile", headers=auth_headers)
     assert response.status_code == 200
     assert response.json()["name"] == "Test User"
+
+def test_followers_paginated_with_counts(client: TestClient, session: Session, test_user):
+    from api.auth import create_access_token
+
+    fans = []
+    for i in range(5):
+        uid = uuid4()
+        session.add(UserAuth(uid=uid, email=f"fan{i}@example.com", password_hash="x"))
+        session.add(UserProfile(uid=uid, name=f"Fan {i}"))
+        fans.append(uid)
+    session.commit()
+    for uid in fans:
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(uid)})}"}
+        assert client.post(f"/users/{test_user.uid}/follow", headers=headers).status_code == 200
+
+    profile = client.get(f"/users/{test_user.uid}").json()
+    assert profile["follower_count"] == 5
+    assert profile["following_count"] == 0
+
+    first = client.get(f"/users/{test_user.uid}/followers?limit=3")
+    second = client.get(f"/users/{test_user.uid}/followers?limit=3&cursor={first.headers['X-Next-Cursor']}")
+    seen = [u["uid"] for u in first.json() + second.json()]
+    assert len(first.json()) == 3
+    assert sorted(seen) == sorted(str(uid) for uid in fans)
+    assert "X-Next-Cursor" not in second.headers
+
+    following = client.get(f"/users/{fans[0]}/following").json()
+    assert [u["uid"] for u in following] == [str(test_user.uid)]
@@ -109,3 +109,166 @@ def test_add_reaction_to_comment_duplicate_is_idempotent(session: Session, test_
     stats = session.get(CommentStats, test_comment.mid)
     assert stats.likes == 1
     assert stats.dislikes == 0
+
+def _seed_thread(session: Session, uid, pid):
+    """
+    r0 ─┬─ a ── a1 ── a11
+        ├─ b
+        └─ c
+    r1
+    r2
+    Returns {label: mid}; siblings are created in label order.
+    """
+    from datetime import datetime, timedelta
+    base = datetime(2026, 1, 1)
+    shape = [("r0", None), ("r1", None), ("r2", None), ("a", "r0"), ("b", "r0"), ("c", "r0"),
+             ("a1", "a"), ("a11", "a1")]
+    mids = {}
+    for i, (label, parent) in enumerate(shape):
+        mid = uuid4()
+        session.add(CommentCore(mid=mid, uid=uid, pid=pid, parent_mid=mids.get(parent),
+                                created_at=base + timedelta(minutes=i)))
+        session.add(CommentContent(mid=mid, content=label))
+        mids[label] = mid
+    session.commit()
+    return mids
+
+def test_get_thread_nests_replies_in_one_query(session: Session, test_user, test_post):
+    from sqlalchemy import event
+    pid = test_post.pid
+    mids = _seed_thread(session, test_user.uid, pid)
+
+    statements = []
+    engine = session.get_bind()
+    listener = lambda *_args: statements.append(1)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        tree, cursor = CommentService.get_thread(session, pid=pid)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len(statements) == 1
+    assert cursor is None
+    assert [n["content"] for n in tree] == ["r0", "r1", "r2"]
+    r0 = tree[0]
+    assert r0["reply_count"] == 3
+    assert [n["content"] for n in r0["replies"]] == ["a", "b", "c"]
+    assert r0["replies"][0]["replies"][0]["replies"][0]["mid"] == mids["a11"]
+    assert r0["replies"][0]["replies"][0]["replies"][0]["depth"] == 3
+
+def test_get_thread_depth_and_breadth_limits(session: Session, test_user, test_post):
+    mids = _seed_thread(session, test_user.uid, test_post.pid)
+
+    tree, cursor = CommentService.get_thread(session, pid=test_post.pid, limit=2, max_depth=1, max_replies=2)
+    assert [n["content"] for n in tree] == ["r0", "r1"]
+    r0 = tree[0]
+    # Breadth: two of three replies, resumable after "b"
+    assert [n["content"] for n in r0["replies"]] == ["a", "b"]
+    assert r0["has_more_replies"] and r0["reply_count"] == 3
+    more, _ = CommentService.get_thread(session, parent_mid=r0["mid"], cursor=r0["more_replies_cursor"])
+    assert [n["content"] for n in more] == ["c"]
+    # Depth: "a" is a leaf here but is flagged as having replies
+    a = r0["replies"][0]
+    assert a["replies"] == [] and a["has_more_replies"] and a["reply_count"] == 1
+    assert a["more_replies_cursor"] is None
+    deeper, _ = CommentService.get_thread(session, parent_mid=mids["a"])
+    assert [n["content"] for n in deeper] == ["a1"]
+    assert deeper[0]["replies"][0]["content"] == "a11"
+
+    # Next page of roots
+    rest, cursor = CommentService.get_thread(session, pid=test_post.pid, limit=2, cursor=cursor)
+    assert [n["content"] for n in rest] == ["r2"]
+    assert cursor is None
+
+def test_get_thread_rejects_bad_limits(session: Session, test_post):
+    with pytest.raises(ValueError):
+        CommentService.get_thread(session, pid=test_post.pid, limit=0)
+
+def _reply(session: Session, uid, parent_mid, text: str):
+    class MockReplyIn:
+        pid = None
+        content = text
+    payload = MockReplyIn()
+    payload.uid, payload.parent_mid = uid, parent_mid
+    core, _content, _stats = CommentService.create_comment(session, payload)
+    return core.mid
+
+def test_closure_tracks_subtree_and_ancestry(session: Session, test_user, test_comment):
+    root = test_comment.mid
+    a = _reply(session, test_user.uid, root, "a")
+    a1 = _reply(session, test_user.uid, a, "a1")
+    b = _reply(session, test_user.uid, root, "b")
+
+    rows = CommentService.get_subtree(session, root)
+    assert [(r.mid, r.depth) for r in rows] == [(root, 0), (a, 1), (a1, 2), (b, 1)]
+    assert [r.mid for r in CommentService.get_subtree(session, root, sort="newest")][0] == b
+    assert [r.mid for r in CommentService.get_subtree(session, root, max_depth=1)] == [root, a, b]
+    assert CommentService.get_ancestors(session, a1) == [root, a]
+
+    counts = CommentService.get_reply_counts(session, [root, a, b])
+    assert counts[root] == {"replies": 2, "descendants": 3}
+    assert counts[a] == {"replies": 1, "descendants": 1}
+    assert counts[b] == {"replies": 0, "descendants": 0}
+
+def test_delete_comment_sweeps_descendants(session: Session, test_user, test_comment):
+    root = test_comment.mid
+    a = _reply(session, test_user.uid, root, "a")
+    a1 = _reply(session, test_user.uid, a, "a1")
+    CommentService.add_reaction_to_comment(session, a1, test_user.uid, ReactionType.LIKE)
+
+    assert CommentService.delete_comment(session, a)
+    assert session.exec(select(CommentCore).where(CommentCore.mid.in_([a, a1]))).all() == []
+    assert session.exec(select(CommentContent).where(CommentContent.mid.in_([a, a1]))).all() == []
+    assert session.exec(select(CommentReaction).where(CommentReaction.mid == a1)).all() == []
+    assert [r.mid for r in CommentService.get_subtree(session, root)] == [root]
+
+def test_delete_comment_respects_foreign_keys(session: Session, test_user, test_comment):
+    root = test_comment.mid
+    a = _reply(session, test_user.uid, root, "a")
+    a1 = _reply(session, test_user.uid, a, "a1")
+    _reply(session, test_user.uid, a1, "a11")
+    session.connection().exec_driver_sql("PRAGMA foreign_keys=ON")
+    try:
+        assert CommentService.delete_comment(session, a)
+    finally:
+        session.connection().exec_driver_sql("PRAGMA foreign_keys=OFF")
+    assert [r.mid for r in CommentService.get_subtree(session, root)] == [root]
+    stats = session.get(CommentStats, root)
+    session.refresh(stats)
+    assert (stats.reply_count, stats.total_descendants) == (0, 0)
+
+def test_rebuild_closure_backfills_existing_comments(session: Session, test_user, test_post):
+    from api.models.comment import CommentClosure
+    mids = _seed_thread(session, test_user.uid, test_post.pid)   # inserted without closure rows
+    assert CommentService.get_subtree(session, mids["r0"]) == []
+
+    CommentService.rebuild_closure(session)
+    rows = CommentService.get_subtree(session, mids["r0"])
+    assert [r.content for r in rows] == ["r0", "a", "b", "c", "a1", "a11"]
+    assert CommentService.get_ancestors(session, mids["a11"]) == [mids["r0"], mids["a"], mids["a1"]]
+    assert len(session.exec(select(CommentClosure)).all()) == 16   # 8 self rows, 5 parents, 2 grandparents, 1 great-grandparent
+
+def test_top_comments_rank_by_likes_plus_replies(session: Session, test_user, test_post):
+    class CommentIn:
+        def __init__(self, content, parent_mid=None):
+            self.uid, self.pid, self.content, self.parent_mid = test_user.uid, test_post.pid, content, parent_mid
+
+    liked, _, _ = CommentService.create_comment(session, CommentIn("liked"))
+    discussed, _, _ = CommentService.create_comment(session, CommentIn("discussed"))
+    liked_mid, discussed_mid = liked.mid, discussed.mid
+    CommentService.add_reaction_to_comment(session, liked_mid, test_user.uid, ReactionType.LIKE)
+    for i in range(2):
+        CommentService.create_comment(session, CommentIn(f"reply {i}", parent_mid=discussed_mid))
+
+    top = CommentService.get_top_comments_for_post(session, test_post.pid, limit=2)
+    assert [(r.content, r.score, r.reply_count) for r in top] == [("discussed", 2, 2), ("liked", 1, 0)]
+
+def test_rebuild_reply_counts(session: Session, test_user, test_post):
+    mids = _seed_thread(session, test_user.uid, test_post.pid)   # no closure rows yet
+    CommentService.rebuild_closure(session)
+    CommentService.rebuild_reply_counts(session)
+    session.expire_all()
+
+    stats = session.get(CommentStats, mids["r0"])
+    assert (stats.reply_count, stats.total_descendants) == (3, 5)
+    assert session.get(CommentStats, mids["a1"]).total_descendants == 1
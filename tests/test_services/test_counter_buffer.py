@@ -0,0 +1,151 @@
+"""
+tests/test_services/test_counter_buffer.py
+
+Validates the write-behind like/dislike buffer in api/counter_buffer.py: buffered
+reactions leave PostStats alone until a flush, reads merge what is pending, and lost
+deltas are recoverable from the PostReaction rows.
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, select, update
+
+from api.counter_buffer import counter_buffer
+from api.models.enums import ReactionType
+from api.models.post import PostStats, PostReaction, PostTrending
+from api.models.reconcile import CounterChange
+from api.services.post_service import PostService
+from api.services.reconcile_service import ReconcileService
+
+
+@pytest.fixture(name="buffered")
+def buffered_fixture(session: Session):
+    counter_buffer.enabled = True
+    yield counter_buffer
+    counter_buffer.enabled = False
+    counter_buffer.clear()
+
+
+def _stored(session: Session, pid):
+    session.expire_all()
+    stats = session.get(PostStats, pid)
+    return stats.likes, stats.dislikes
+
+
+def test_reactions_are_buffered_and_merged_into_reads(buffered, client, session: Session, test_post, make_users):
+    pid = test_post.pid
+    fans = make_users(3)
+    for fan in fans:
+        PostService.add_reaction_to_post(session, pid, fan, ReactionType.LIKE)
+    result = PostService.add_reaction_to_post(session, pid, fans[0], ReactionType.DISLIKE)
+
+    assert (result["likes"], result["dislikes"]) == (2, 1)
+    assert _stored(session, pid) == (0, 0)
+    assert buffered.pending(pid) == {"likes": 2, "dislikes": 1}
+    body = client.get(f"/posts/{pid}").json()
+    assert (body["likes"], body["dislikes"]) == (2, 1)
+
+    assert PostService.remove_reaction_from_post(session, pid, fans[1])["likes"] == 1
+    assert PostService.remove_reaction_from_post(session, pid, fans[1]) is None
+
+
+def test_flush_writes_all_posts_in_batched_updates(buffered, session: Session, test_user, test_post, make_users):
+    from api.schemas.post import PostCreate
+    other, _, _ = PostService.create_post(session, PostCreate(uid=test_user.uid, cid=test_post.cid, content="second"))
+    pids = [test_post.pid, other.pid]
+    fans = make_users(2)
+    for pid in pids:
+        for fan in fans:
+            PostService.add_reaction_to_post(session, pid, fan, ReactionType.LIKE)
+    score_before = session.get(PostTrending, pids[1]).score   # the fixture post has no trending row
+
+    updates = []
+    def count_updates(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE poststats"):
+            updates.append(statement)
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", count_updates)
+    try:
+        assert buffered.flush(session) == 2
+    finally:
+        event.remove(engine, "before_cursor_execute", count_updates)
+
+    assert len(updates) == 1                            # both posts moved by (+2, 0)
+    assert _stored(session, pids[0]) == _stored(session, pids[1]) == (2, 0)
+    assert buffered.pending(pids[0]) == {}
+    assert session.get(PostTrending, pids[1]).score > score_before
+
+
+def test_event_threshold_flushes_from_the_request(buffered, session: Session, test_post, monkeypatch, make_users):
+    monkeypatch.setattr(buffered, "max_events", 2)
+    fans = make_users(2)
+    PostService.add_reaction_to_post(session, test_post.pid, fans[0], ReactionType.LIKE)
+    assert _stored(session, test_post.pid) == (0, 0)
+    PostService.add_reaction_to_post(session, test_post.pid, fans[1], ReactionType.LIKE)
+    assert _stored(session, test_post.pid) == (2, 0)
+
+
+def test_rolled_back_reaction_takes_its_delta_back(buffered, session: Session, test_post, make_users):
+    from api.reactions import set_reaction
+    fan, = make_users(1)
+    set_reaction(session, PostStats, PostStats.pid, PostReaction, PostReaction.pid, test_post.pid, fan, ReactionType.LIKE, buffered)
+    assert buffered.pending(test_post.pid) == {"likes": 1}
+    session.rollback()
+    assert buffered.pending(test_post.pid) == {}
+
+
+def test_lost_deltas_are_reconciled_from_reaction_rows(buffered, session: Session, test_post, make_users):
+    pid = test_post.pid
+    fans = make_users(3)
+    for fan in fans:
+        PostService.add_reaction_to_post(session, pid, fan, ReactionType.LIKE)
+    PostService.add_reaction_to_post(session, pid, fans[2], ReactionType.DISLIKE)
+
+    buffered.clear()                                    # the process dies before a flush
+    assert _stored(session, pid) == (0, 0)
+
+    assert ReconcileService.run_kind(session, "post")["repaired"] == 1
+    assert _stored(session, pid) == (2, 1)
+    rows = session.exec(select(PostReaction.reaction_type).where(PostReaction.pid == pid)).all()
+    assert sorted(rows) == sorted([ReactionType.LIKE, ReactionType.LIKE, ReactionType.DISLIKE])
+
+
+def test_reconciler_holds_back_pids_with_pending_deltas(buffered, session: Session, test_post, monkeypatch, make_users):
+    pid = test_post.pid
+    fan, = make_users(1)
+    PostService.add_reaction_to_post(session, pid, fan, ReactionType.LIKE)
+
+    real_flush = buffered.flush
+    monkeypatch.setattr(buffered, "flush", lambda session: 0)   # deltas stay pending through the pass
+    result = ReconcileService.run_kind(session, "post")
+    assert (result["examined"], result["repaired"]) == (0, 0)
+    assert ("post", pid) in session.exec(select(CounterChange.kind, CounterChange.key)).all()
+    assert _stored(session, pid) == (0, 0)
+
+    real_flush(session)
+    assert _stored(session, pid) == (1, 0)
+    assert ReconcileService.run_kind(session, "post")["repaired"] == 0
+    assert _stored(session, pid) == (1, 0)
+
+
+def test_reconcile_between_drain_and_commit_leaves_the_flushed_pid_alone(buffered, session: Session, test_post, make_users):
+    pid = test_post.pid
+    fan, = make_users(1)
+    PostService.add_reaction_to_post(session, pid, fan, ReactionType.LIKE)
+
+    passes = []
+
+    def reconcile_mid_flush(flushing):
+        # Another worker's pass, after the flush drained its deltas but before it commits
+        with Session(session.get_bind()) as other:
+            passes.append(ReconcileService.run_kind(other, "post"))
+
+    event.listen(session, "before_commit", reconcile_mid_flush, once=True)
+    assert buffered.flush(session) == 1
+    assert (passes[0]["examined"], passes[0]["repaired"]) == (0, 0)
+    assert _stored(session, pid) == (1, 0)
+    assert buffered.held([pid]) == set()
+
+    assert ReconcileService.run_kind(session, "post")["examined"] == 1
+    assert _stored(session, pid) == (1, 0)
+
@@ -0,0 +1,142 @@
+"""
+tests/test_services/test_counters.py
+
+Validates the session-hook counter maintenance in api/counters.py (the MySQL path)
+by running it against SQLite with the triggers removed.
+"""
+
+import pytest
+from types import SimpleNamespace
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from api import counters
+from api.models.cluster import ClusterStats, ClusterMember
+from api.models.comment import CommentStats
+from api.models.enums import ReactionType
+from api.models.follow import UserFollow, UserFollowStats
+from api.models.post import PostStats, PostReaction, UserPostStats, ClusterPostStats
+from api.models.reconcile import CounterChange
+from api.models.user import UserProfile
+from api.schemas.post import PostCreate
+from api.services.comment_service import CommentService
+from api.services.post_service import PostService
+from api.triggers import drop_triggers_now
+
+
+@pytest.fixture(name="hooks")
+def hooks_fixture(session: Session):
+    """Switches the test engine to hook mode; list it before fixtures that write rows."""
+    engine = session.get_bind()
+    drop_triggers_now(engine)
+    counters.enable_hooks(engine)
+    yield engine
+    counters.disable_hooks(engine)
+
+
+def test_mode_follows_dialect(monkeypatch):
+    monkeypatch.setattr(counters, "COUNTER_MODE", "")
+    assert counters.counter_mode(SimpleNamespace(dialect=SimpleNamespace(name="sqlite"))) == "triggers"
+    mysql = SimpleNamespace(dialect=SimpleNamespace(name="mysql"))
+    assert counters.counter_mode(mysql) == "hooks"
+    monkeypatch.setattr(counters, "COUNTER_MODE", "triggers")
+    with pytest.raises(ValueError):
+        counters.install_counters(mysql)
+
+
+def test_create_post_gets_stats_and_rollups(hooks, session: Session, test_user, test_cluster):
+    uid, cid = test_user.uid, test_cluster.cid
+    before = session.get(UserProfile, uid).last_active
+
+    core, _, stats = PostService.create_post(session, PostCreate(uid=uid, cid=cid, content="hello"))
+    assert stats is not None and (stats.likes, stats.dislikes) == (0, 0)
+    session.expire_all()
+    assert session.get(UserPostStats, uid).post_count == 1
+    assert session.get(ClusterPostStats, cid).post_count == 1
+    assert session.get(UserProfile, uid).last_active >= before
+
+
+def test_member_counts_are_batched_per_flush(hooks, session: Session, test_cluster, make_users):
+    cid = test_cluster.cid
+    assert session.get(ClusterStats, cid).member_count == 1
+    fans = make_users(3)
+
+    updates = []
+    def count_updates(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE clusterstats"):
+            updates.append(statement)
+    event.listen(hooks, "before_cursor_execute", count_updates)
+    try:
+        session.add_all([ClusterMember(cid=cid, uid=fan) for fan in fans])
+        session.commit()
+    finally:
+        event.remove(hooks, "before_cursor_execute", count_updates)
+
+    assert len(updates) == 1
+    session.expire_all()
+    assert session.get(ClusterStats, cid).member_count == 4
+    assert len(session.exec(select(CounterChange).where(CounterChange.kind == "cluster")).all()) == 4
+
+    session.delete(session.get(ClusterMember, {"cid": cid, "uid": fans[0]}))
+    session.commit()
+    session.expire_all()
+    assert session.get(ClusterStats, cid).member_count == 3
+
+
+def test_follow_counts(hooks, session: Session, test_user, make_users):
+    fans = make_users(2)
+    session.add_all([UserFollow(follower_uid=fan, following_uid=test_user.uid) for fan in fans])
+    session.commit()
+    session.expire_all()
+    assert session.get(UserFollowStats, test_user.uid).follower_count == 2
+    assert session.get(UserFollowStats, fans[0]).following_count == 1
+
+
+def test_bulk_like_updates_reach_rollups(hooks, session: Session, test_user, test_post, make_users):
+    uid, cid, pid = test_user.uid, test_post.cid, test_post.pid
+    fans = make_users(2)
+    PostService.add_reaction_to_post(session, pid, fans[0], ReactionType.LIKE)
+    PostService.add_reaction_to_post(session, pid, fans[1], ReactionType.LIKE)
+    PostService.add_reaction_to_post(session, pid, fans[1], ReactionType.DISLIKE)
+    session.expire_all()
+
+    stats = session.get(PostStats, pid)
+    assert (stats.likes, stats.dislikes) == (1, 1)
+    rollup = session.get(UserPostStats, uid)
+    assert (rollup.total_likes, rollup.total_reactions) == (1, 2)
+    assert session.get(ClusterPostStats, cid).total_likes == 1
+    assert ("post", pid) in session.exec(select(CounterChange.kind, CounterChange.key)).all()
+
+
+def test_deleting_post_with_its_rows_in_one_flush(hooks, session: Session, test_user, test_post, make_users):
+    uid, pid = test_user.uid, test_post.pid
+    fan, = make_users(1)
+    PostService.add_reaction_to_post(session, pid, fan, ReactionType.LIKE)
+
+    session.delete(session.get(PostReaction, {"pid": pid, "uid": fan}))
+    session.delete(session.get(PostStats, pid))
+    PostService.delete_post(session, pid)
+    session.expire_all()
+    rollup = session.get(UserPostStats, uid)
+    assert (rollup.post_count, rollup.total_likes, rollup.total_reactions) == (0, 0, 0)
+
+
+def test_reply_counts_through_bulk_delete(hooks, session: Session, test_user, test_post):
+    class CommentIn:
+        def __init__(self, parent_mid=None, pid=None):
+            self.uid, self.content, self.parent_mid, self.pid = test_user.uid, "c", parent_mid, pid
+
+    root, _, stats = CommentService.create_comment(session, CommentIn(pid=test_post.pid))
+    assert stats is not None
+    root_mid = root.mid
+    child, _, _ = CommentService.create_comment(session, CommentIn(parent_mid=root_mid))
+    child_mid = child.mid
+    CommentService.create_comment(session, CommentIn(parent_mid=child_mid))
+    session.expire_all()
+    stats = session.get(CommentStats, root_mid)
+    assert (stats.reply_count, stats.total_descendants) == (1, 2)
+
+    CommentService.delete_comment(session, child_mid)      # bulk DELETE statements, level by level
+    session.expire_all()
+    stats = session.get(CommentStats, root_mid)
+    assert (stats.reply_count, stats.total_descendants) == (0, 0)
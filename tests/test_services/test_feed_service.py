@@ -0,0 +1,88 @@
+import pytest
+from uuid import uuid4
+from sqlmodel import Session, select
+from api.services.post_service import PostService
+from api.services.cluster_service import ClusterService
+from api.services.user_service import UserService
+from api.services.feed_service import FeedService
+from api.models.feed import UserFeed
+from api.models.post import PostType
+from api.models.user import UserAuth, UserProfile
+from api.security import get_password_hash
+
+def _make_post(session: Session, uid, cid, text: str):
+    class MockPostIn:
+        type = PostType.TEXT
+        tags = None
+    payload = MockPostIn()
+    payload.uid, payload.cid, payload.content = uid, cid, text
+    core, _content, _stats = PostService.create_post(session, payload)
+    return core
+
+@pytest.fixture(name="second_user")
+def second_user_fixture(session: Session):
+    uid = uuid4()
+    session.add(UserAuth(uid=uid, email="feed2@example.com", password_hash=get_password_hash("pw")))
+    session.add(UserProfile(uid=uid, name="Feed Reader"))
+    session.commit()
+    return uid
+
+def test_create_post_fans_out_to_members(session: Session, test_user, test_cluster):
+    core = _make_post(session, test_user.uid, test_cluster.cid, "fan out")
+
+    feed = PostService.get_homepage_feed_for_user(session, test_user.uid)
+    assert [c.pid for c, _, _ in feed] == [core.pid]
+
+def test_join_backfills_and_leave_trims(session: Session, test_user, test_cluster, second_user):
+    first = _make_post(session, test_user.uid, test_cluster.cid, "before join")
+    assert PostService.get_homepage_feed_for_user(session, second_user) == []
+
+    ClusterService.add_user_to_cluster(session, test_cluster.cid, second_user)
+    feed = PostService.get_homepage_feed_for_user(session, second_user)
+    assert [c.pid for c, _, _ in feed] == [first.pid]
+
+    second = _make_post(session, test_user.uid, test_cluster.cid, "after join")
+    feed = PostService.get_homepage_feed_for_user(session, second_user)
+    assert [c.pid for c, _, _ in feed] == [second.pid, first.pid]
+
+    ClusterService.remove_user_from_cluster(session, test_cluster.cid, second_user)
+    assert PostService.get_homepage_feed_for_user(session, second_user) == []
+    assert len(PostService.get_homepage_feed_for_user(session, test_user.uid)) == 2
+
+def test_delete_post_removes_feed_entries(session: Session, test_user, test_cluster):
+    core = _make_post(session, test_user.uid, test_cluster.cid, "short lived")
+    PostService.delete_post(session, core.pid)
+
+    rows = session.exec(select(UserFeed).where(UserFeed.pid == core.pid)).all()
+    assert rows == []
+
+def test_rebuild_restores_feeds(session: Session, test_user, test_cluster, test_post):
+    # test_post is inserted directly, bypassing the fan-out path
+    assert PostService.get_homepage_feed_for_user(session, test_user.uid) == []
+
+    FeedService.rebuild(session)
+    feed = PostService.get_homepage_feed_for_user(session, test_user.uid)
+    assert [c.pid for c, _, _ in feed] == [test_post.pid]
+
+def test_join_backfills_only_the_newest_posts(session: Session, test_user, test_cluster, second_user):
+    posts = [_make_post(session, test_user.uid, test_cluster.cid, f"post {i}") for i in range(5)]
+
+    ClusterService.add_user_to_cluster(session, test_cluster.cid, second_user)
+    FeedService.trim_member(session, test_cluster.cid, second_user)
+    FeedService.backfill_member(session, test_cluster.cid, second_user, limit=3)
+    feed = PostService.get_homepage_feed_for_user(session, second_user)
+    assert {c.pid for c, _, _ in feed} == {p.pid for p in posts[2:]}   # the cap is by design
+
+    FeedService.backfill_member(session, test_cluster.cid, second_user, limit=0)
+    assert len(PostService.get_homepage_feed_for_user(session, second_user)) == 5
+
+def test_deleting_cluster_or_user_clears_their_feed_rows(session: Session, test_user, test_cluster, second_user):
+    ClusterService.add_user_to_cluster(session, test_cluster.cid, second_user)
+    _make_post(session, test_user.uid, test_cluster.cid, "soon orphaned")
+    assert len(session.exec(select(UserFeed)).all()) == 2
+
+    UserService.delete_user_account(session, second_user)
+    assert session.exec(select(UserFeed).where(UserFeed.uid == second_user)).all() == []
+
+    ClusterService.delete_cluster(session, test_cluster.cid)
+    assert session.exec(select(UserFeed)).all() == []
@@ -0,0 +1,107 @@
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlmodel import Session
+
+from api.cache import TTLCache
+from api.models.cluster import ClusterMember
+from api.models.enums import MegaphoneType, EventRsvpStatus
+from api.models.post import Megaphone, MegaphonePollOption, MegaphonePollVote, MegaphoneEventRsvp
+from api.models.user import UserAuth
+from api.security import get_password_hash
+from api.services import megaphone_engagement_service as engagement
+
+def _make_megaphone(session: Session, test_post, kind: MegaphoneType):
+    session.add(Megaphone(pid=test_post.pid, start_time=datetime.now(),
+                          end_time=datetime.now() + timedelta(hours=1), type=kind))
+    if kind == MegaphoneType.POLL:
+        session.add_all([MegaphonePollOption(pid=test_post.pid, idx=i, label=l) for i, l in enumerate("abc")])
+    session.commit()
+    return test_post.pid
+
+def _add_members(session: Session, cid, count: int):
+    uids = [uuid4() for _ in range(count)]
+    for i, uid in enumerate(uids):
+        session.add(UserAuth(uid=uid, email=f"voter{i}@example.com", password_hash=get_password_hash("pw")))
+        session.add(ClusterMember(cid=cid, uid=uid))
+    session.commit()
+    return uids
+
+def test_poll_counts_are_grouped_per_option(session: Session, test_user, test_post):
+    pid = _make_megaphone(session, test_post, MegaphoneType.POLL)
+    for i, uid in enumerate(_add_members(session, test_post.cid, 5)):
+        engagement.cast_poll_vote(session, pid, uid, i % 2)
+
+    summary = engagement.cast_poll_vote(session, pid, test_user.uid, 2)
+    assert [o["votes"] for o in summary["options"]] == [3, 2, 1]
+    assert summary["total_votes"] == 6
+    assert summary["my_vote"] == 2
+
+    # Changing a vote moves it between options without double counting
+    summary = engagement.cast_poll_vote(session, pid, test_user.uid, 0)
+    assert [o["votes"] for o in summary["options"]] == [4, 2, 0]
+    assert summary["total_votes"] == 6
+
+def test_event_counts_are_grouped_per_status(session: Session, test_user, test_post):
+    pid = _make_megaphone(session, test_post, MegaphoneType.EVENT)
+    statuses = [EventRsvpStatus.GOING, EventRsvpStatus.GOING, EventRsvpStatus.MAYBE]
+    for uid, st in zip(_add_members(session, test_post.cid, 3), statuses):
+        engagement.set_event_rsvp(session, pid, uid, st)
+
+    summary = engagement.set_event_rsvp(session, pid, test_user.uid, EventRsvpStatus.NOT_GOING)
+    assert summary["counts"] == {"GOING": 2, "MAYBE": 1, "NOT_GOING": 1, "total_rsvps": 4}
+    assert summary["my_status"] == "NOT_GOING"
+    assert engagement.get_event_summary(session, pid, None)["my_status"] is None
+
+def test_summary_is_cached_until_vote(session: Session, test_user, test_post):
+    pid = _make_megaphone(session, test_post, MegaphoneType.POLL)
+    assert engagement.get_poll_summary(session, pid, None)["total_votes"] == 0
+
+    # Rows written behind the service's back stay hidden until the entry expires...
+    other = _add_members(session, test_post.cid, 1)[0]
+    session.add(MegaphonePollVote(pid=pid, uid=other, option_idx=1))
+    session.commit()
+    assert engagement.get_poll_summary(session, pid, None)["total_votes"] == 0
+
+    # ...but a vote through the service invalidates the pid straight away
+    summary = engagement.cast_poll_vote(session, pid, test_user.uid, 0)
+    assert summary["total_votes"] == 2
+    # The caller's own vote is never served from the cache
+    assert engagement.get_poll_summary(session, pid, other)["my_vote"] == 1
+
+def test_rsvp_invalidates_event_summary(session: Session, test_user, test_post):
+    pid = _make_megaphone(session, test_post, MegaphoneType.EVENT)
+    assert engagement.get_event_summary(session, pid, None)["counts"]["total_rsvps"] == 0
+
+    engagement.set_event_rsvp(session, pid, test_user.uid, EventRsvpStatus.GOING)
+    assert engagement.get_event_summary(session, pid, None)["counts"]["GOING"] == 1
+
+def test_mutating_a_poll_summary_leaves_the_cache_alone(session: Session, test_user, test_post):
+    pid = _make_megaphone(session, test_post, MegaphoneType.POLL)
+    summary = engagement.get_poll_summary(session, pid, None)
+    summary["options"][0]["votes"] = 99
+    summary["options"].clear()
+    assert [o["votes"] for o in engagement.get_poll_summary(session, pid, None)["options"]] == [0, 0, 0]
+
+def test_mutating_an_event_summary_leaves_the_cache_alone(session: Session, test_user, test_post):
+    pid = _make_megaphone(session, test_post, MegaphoneType.EVENT)
+    engagement.set_event_rsvp(session, pid, test_user.uid, EventRsvpStatus.GOING)
+    counts = engagement.get_event_summary(session, pid, None)["counts"]
+    counts["GOING"] = 99
+    assert engagement.get_event_summary(session, pid, None)["counts"]["GOING"] == 1
+
+def test_ttl_cache_expiry_and_eviction(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("api.cache.time.monotonic", lambda: clock[0])
+    cache = TTLCache(ttl=2, maxsize=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)                 # "b" is least recently used
+    assert "b" not in cache
+    assert cache.get_or_set("a", lambda: pytest.fail("should be cached")) == 1
+
+    clock[0] += 2
+    assert cache.get("a") is None
+    assert cache.get_or_set("a", lambda: 5) == 5
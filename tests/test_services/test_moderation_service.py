@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlmodel import Session, select
+
+from api.models.cluster import ClusterModerator
+from api.models.enums import ModerationStatus, RuleAction
+from api.models.moderation import ModerationItem
+from api.pagination import encode_cursor
+from api.rules import RuleMatch
+from api.schemas.cluster import ClusterRuleCreate
+from api.services.comment_service import CommentService
+from api.services.moderation_service import ModerationService
+from api.services.rule_service import RuleService
+
+def _flag(name="links"):
+    return [RuleMatch(uuid4(), name, RuleAction.FLAG)]
+
+def _queue(session: Session, cid, uid, count):
+    items = [ModerationService.enqueue(session, cid, "post", uuid4(), uid, _flag()) for _ in range(count)]
+    session.commit()
+    return items
+
+def test_enqueue_without_flags_adds_nothing(session: Session, test_user, test_cluster):
+    assert ModerationService.enqueue(session, test_cluster.cid, "post", uuid4(), test_user.uid, []) is None
+    session.commit()
+    assert session.exec(select(ModerationItem)).all() == []
+
+def test_flagged_comment_is_queued_with_the_comment(session: Session, test_user, test_post):
+    RuleService.create_rule(session, test_post.cid, ClusterRuleCreate(name="rude", pattern="idiot", action=RuleAction.FLAG))
+
+    class CommentIn:
+        uid, pid, parent_mid, content = test_user.uid, test_post.pid, None, "you idiot"
+
+    core, _, _ = CommentService.create_comment(session, CommentIn)
+    item = session.exec(select(ModerationItem)).one()
+    assert (item.kind, item.target, item.cid, item.rules) == ("comment", core.mid, test_post.cid, "rude")
+
+def test_worker_opens_items_in_batches_and_notifies_moderators(session: Session, test_user, test_cluster):
+    session.add(ClusterModerator(cid=test_cluster.cid, uid=test_user.uid))
+    session.commit()
+    _queue(session, test_cluster.cid, test_user.uid, 5)
+
+    assert ModerationService.process_batch(session, batch_size=2) == 2
+    assert ModerationService.run(session, batch_size=2) == 3
+    assert ModerationService.run(session) == 0
+
+    items = session.exec(select(ModerationItem)).all()
+    assert all(item.status == ModerationStatus.OPEN and item.notified == 1 and item.notified_at for item in items)
+
+def test_review_queue_pages_oldest_first(session: Session, test_user, test_cluster):
+    start = datetime(2024, 1, 1)
+    items = _queue(session, test_cluster.cid, test_user.uid, 5)
+    for offset, item in enumerate(items):
+        item.created_at = start + timedelta(minutes=offset)
+        session.add(item)
+    session.commit()
+    ModerationService.run(session)
+
+    first = ModerationService.list_queue(session, test_cluster.cid, limit=3)
+    assert [item.qid for item in first] == [item.qid for item in items[:3]]
+    cursor = encode_cursor(first[-1].created_at, first[-1].qid)
+    rest = ModerationService.list_queue(session, test_cluster.cid, limit=3, cursor=cursor)
+    assert [item.qid for item in rest] == [item.qid for item in items[3:]]
+    assert ModerationService.list_queue(session, test_cluster.cid, ModerationStatus.QUEUED) == []
+
+def test_resolve_records_the_reviewer(session: Session, test_user, test_cluster):
+    item, = _queue(session, test_cluster.cid, test_user.uid, 1)
+    resolved = ModerationService.resolve(session, item.qid, test_user.uid)
+    assert resolved.status == ModerationStatus.RESOLVED
+    assert resolved.reviewed_by == test_user.uid and resolved.reviewed_at is not None
+    assert ModerationService.resolve(session, uuid4(), test_user.uid) is None
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import create_engine, event, exc, text
+
+from api.database import set_sqlite_pragma, SQLITE_CACHE_SIZE, SQLITE_BUSY_TIMEOUT
+from api.pool import MeteredQueuePool
+from api.auth import user_cache
+from api.models.user import UserRole
+
+
+@pytest.fixture(name="metered_engine")
+def metered_engine_fixture(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        connect_args={"check_same_thread": False},
+        poolclass=MeteredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    event.listen(engine, "connect", set_sqlite_pragma)
+    yield engine
+    engine.dispose()
+
+def test_checkouts_are_counted(metered_engine):
+    for _ in range(3):
+        with metered_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    stats = metered_engine.pool.stats()
+    assert stats["checkouts"] == 3
+    assert stats["timeouts"] == 0
+    assert stats["checked_out"] == 0
+    assert stats["max_wait_ms"] >= stats["avg_wait_ms"] >= 0
+
+def test_exhausted_pool_records_timeout(metered_engine):
+    held = metered_engine.connect()
+    try:
+        with pytest.raises(exc.TimeoutError):
+            metered_engine.connect()
+    finally:
+        held.close()
+
+    stats = metered_engine.pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["checkouts"] == 1
+
+def test_metrics_survive_dispose(metered_engine):
+    with metered_engine.connect():
+        pass
+    metered_engine.dispose()
+    with metered_engine.connect():
+        pass
+    assert metered_engine.pool.stats()["checkouts"] == 2
+
+def test_sqlite_pragmas_applied(metered_engine):
+    with metered_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == SQLITE_CACHE_SIZE
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_BUSY_TIMEOUT
+        assert conn.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+
+def test_pool_metrics_endpoint(client, session, test_user, auth_headers):
+    assert client.get("/metrics/db-pool").status_code == 401
+    assert client.get("/metrics/db-pool", headers=auth_headers).status_code == 403
+
+    test_user.role = UserRole.ADMIN
+    session.add(test_user)
+    session.commit()
+    user_cache.clear()
+    response = client.get("/metrics/db-pool", headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["settings"]["pool_size"] >= 1
+    assert {"checkouts", "timeouts", "avg_wait_ms", "checked_out"} <= set(body["sync"])
@@ -1,6 +1,6 @@
 import pytest
 from uuid import uuid4
-from sqlmodel import Session, select
+from sqlmodel import Session, select, func
 from api.services.post_service import PostService
 from api.services.cluster_service import ClusterService
 from api.models.post import PostCore, PostContent, PostStats, PostType, PostReaction
@@ -88,3 +88,102 @@ def test_add_reaction_to_post_duplicate_is_idempotent(session: Session, test_pos
     stats = session.get(PostStats, test_post.pid)
     assert stats.likes == 1
     assert stats.dislikes == 0
+
+def test_reaction_switches_through_uncounted_type(session: Session, test_post, test_user):
+    pid, uid = test_post.pid, test_user.uid
+    assert PostService.add_reaction_to_post(session, pid, uid, ReactionType.LIKE)["likes"] == 1
+    love = PostService.add_reaction_to_post(session, pid, uid, ReactionType.LOVE)
+    assert (love["likes"], love["dislikes"], love["current_reaction"]) == (0, 0, "LOVE")
+    dislike = PostService.add_reaction_to_post(session, pid, uid, ReactionType.DISLIKE)
+    assert (dislike["likes"], dislike["dislikes"]) == (0, 1)
+    assert session.get(PostReaction, {"pid": pid, "uid": uid}).reaction_type == ReactionType.DISLIKE
+
+    assert PostService.remove_reaction_from_post(session, pid, uid)["dislikes"] == 0
+    assert PostService.remove_reaction_from_post(session, pid, uid) is None
+
+def test_per_type_counters_match_reaction_rows(session: Session, test_post, test_user):
+    from api.models.user import UserAuth
+    pid = test_post.pid
+    fans = [uuid4() for _ in range(3)]
+    session.add_all([UserAuth(uid=fan, email=f"{fan.hex}@example.com", password_hash="x") for fan in fans])
+    session.commit()
+    PostService.add_reaction_to_post(session, pid, fans[0], ReactionType.LOVE)
+    PostService.add_reaction_to_post(session, pid, fans[1], ReactionType.LOVE)
+    PostService.add_reaction_to_post(session, pid, fans[2], ReactionType.LAUGH)
+    PostService.add_reaction_to_post(session, pid, fans[1], ReactionType.ANGRY)
+    PostService.remove_reaction_from_post(session, pid, fans[2])
+
+    session.expire_all()
+    stats = session.get(PostStats, pid)
+    assert (stats.loves, stats.laughs, stats.angries, stats.likes) == (1, 0, 1, 0)
+    grouped = session.exec(
+        select(PostReaction.reaction_type, func.count()).where(PostReaction.pid == pid).group_by(PostReaction.reaction_type)
+    ).all()
+    assert sorted(PostService.count_post_reactions_by_type(session, pid)) == sorted(grouped)
+
+def test_concurrent_reactors_on_one_post(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from sqlmodel import SQLModel, create_engine
+    from api import counters
+    from api.models.cluster import ClusterCore
+    from api.models.user import UserAuth
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'reactions.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    SQLModel.metadata.create_all(engine)
+    counters.apply_counters_now(engine)
+    try:
+        uids = [uuid4() for _ in range(16)]
+        cid, pid = uuid4(), uuid4()
+        with Session(engine) as session:
+            session.add_all([UserAuth(uid=uid, email=f"{uid.hex}@example.com", password_hash="x") for uid in uids])
+            session.add(ClusterCore(cid=cid, name="busy", category="Testing"))
+            session.add(PostCore(pid=pid, uid=uids[0], cid=cid, type=PostType.TEXT))
+            session.commit()
+
+        def react(uid, reaction_type):
+            with Session(engine) as session:
+                return PostService.add_reaction_to_post(session, pid, uid, reaction_type)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(react, uids, [ReactionType.LIKE] * len(uids)))
+            list(pool.map(react, uids[:6], [ReactionType.DISLIKE] * 6))
+
+        with Session(engine) as session:
+            stats = session.get(PostStats, pid)
+            assert (stats.likes, stats.dislikes) == (10, 6)
+            assert len(session.exec(select(PostReaction).where(PostReaction.pid == pid)).all()) == 16
+    finally:
+        counters.disable_hooks(engine)
+        engine.dispose()
+
+def test_recent_posts_for_cluster_keyset_pagination(session: Session, test_user, test_cluster):
+    from datetime import datetime, timedelta
+    from api.pagination import encode_cursor
+
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    created = []
+    for i in range(5):
+        core = PostCore(uid=test_user.uid, cid=test_cluster.cid, type=PostType.TEXT, created_at=base + timedelta(minutes=i))
+        session.add(core)
+        session.flush()
+        session.add(PostContent(pid=core.pid, content=f"post {i}"))
+        created.append(core.pid)
+    # Two posts sharing a timestamp must still be split deterministically by pid
+    twin = PostCore(uid=test_user.uid, cid=test_cluster.cid, type=PostType.TEXT, created_at=base + timedelta(minutes=2))
+    session.add(twin)
+    session.flush()
+    session.add(PostContent(pid=twin.pid, content="twin"))
+    session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        page = PostService.get_recent_posts_for_cluster(session, test_cluster.cid, limit=2, cursor=cursor)
+        if not page:
+            break
+        seen.extend(row.pid for row in page)
+        cursor = encode_cursor(page[-1].created_at, page[-1].pid)
+
+    assert len(seen) == 6
+    assert set(seen) == set(created) | {twin.pid}
+    assert seen[0] == created[-1]
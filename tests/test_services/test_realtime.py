@@ -0,0 +1,131 @@
+"""
+tests/test_services/test_realtime.py
+
+Validates the coalescing engagement hub in api/realtime.py and the megaphone SSE stream.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from sqlmodel import Session
+
+from api.models.enums import MegaphoneType
+from api.models.post import Megaphone, MegaphonePollOption
+from api.realtime import EngagementHub, engagement_events, hub
+
+
+def _make_poll(session: Session, test_post, kind: MegaphoneType = MegaphoneType.POLL):
+    session.add(Megaphone(pid=test_post.pid, start_time=datetime.now(),
+                          end_time=datetime.now() + timedelta(hours=1), type=kind))
+    session.add_all([MegaphonePollOption(pid=test_post.pid, idx=0, label="yes"),
+                     MegaphonePollOption(pid=test_post.pid, idx=1, label="no")])
+    session.commit()
+    return test_post.pid
+
+
+def test_burst_is_coalesced_into_one_frame(test_post):
+    async def scenario():
+        local = EngagementHub(interval=0.05)
+        watchers = [local.subscribe(test_post.pid) for _ in range(3)]
+
+        # Publishers run on worker threads, like sync routes do
+        publishers = [threading.Thread(target=local.publish, args=(test_post.pid, {"n": i})) for i in range(5)]
+        for t in publishers:
+            t.start()
+        for t in publishers:
+            t.join()
+        frames = [await asyncio.wait_for(q.get(), timeout=1) for q in watchers]
+        await asyncio.sleep(0.1)
+        assert all(q.empty() for q in watchers)
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert len(frames) == 3
+    assert frames[0] is frames[1] is frames[2]      # one snapshot shared by every watcher
+
+
+def test_frames_are_rate_limited_per_interval(test_post):
+    async def scenario():
+        local = EngagementHub(interval=0.2)
+        queue = local.subscribe(test_post.pid)
+        local.publish(test_post.pid, {"n": 1})
+        first = await asyncio.wait_for(queue.get(), timeout=1)
+        local.publish(test_post.pid, {"n": 2})
+        await asyncio.sleep(0.05)
+        assert queue.empty()                        # still inside the interval
+        second = await asyncio.wait_for(queue.get(), timeout=1)
+        return first, second
+
+    assert asyncio.run(scenario()) == ({"n": 1}, {"n": 2})
+
+
+def test_publish_without_watchers_is_a_noop(test_post):
+    local = EngagementHub()
+    local.publish(test_post.pid, {"n": 1})
+    assert local.subscriber_count(test_post.pid) == 0
+
+
+def test_event_stream_sends_initial_then_updates(test_post):
+    async def scenario():
+        local = EngagementHub(interval=0)
+        frames = []
+        async def disconnected():
+            return len(frames) >= 2
+
+        async for frame in engagement_events(test_post.pid, lambda: {"n": 0}, disconnected, source=local):
+            frames.append(frame)
+            local.publish(test_post.pid, {"n": len(frames)})
+        return frames, local.subscriber_count(test_post.pid)
+
+    frames, remaining = asyncio.run(scenario())
+    assert frames == ['event: engagement\ndata: {"n": 0}\n\n', 'event: engagement\ndata: {"n": 1}\n\n']
+    assert remaining == 0
+
+
+def test_event_stream_keeps_updates_published_while_loading(test_post):
+    async def scenario():
+        local = EngagementHub(interval=0)
+        frames = []
+        async def disconnected():
+            return len(frames) >= 2
+
+        def load_initial():
+            # A vote landing between the read and the subscription must not be lost
+            local.publish(test_post.pid, {"n": 1})
+            return {"n": 0}
+
+        async for frame in engagement_events(test_post.pid, load_initial, disconnected, source=local):
+            frames.append(frame)
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert frames[1] == 'event: engagement\ndata: {"n": 1}\n\n'
+
+
+def test_vote_publishes_snapshot(client, session: Session, test_post, auth_headers):
+    pid = _make_poll(session, test_post)
+
+    async def scenario():
+        queue = hub.subscribe(pid)
+        try:
+            response = await asyncio.to_thread(
+                client.post, f"/posts/{pid}/megaphone/poll/vote", json={"option_index": 1}, headers=auth_headers
+            )
+            assert response.status_code == 200
+            return await asyncio.wait_for(queue.get(), timeout=2)
+        finally:
+            hub.unsubscribe(pid, queue)
+
+    frame = asyncio.run(scenario())
+    assert frame["type"] == "POLL"
+    assert [o["votes"] for o in frame["poll"]["options"]] == [0, 1]
+    assert "my_vote" not in frame["poll"]
+
+
+def test_stream_rejects_missing_or_plain_megaphones(client, session: Session, test_post):
+    assert client.get(f"/posts/{test_post.pid}/megaphone/stream").status_code == 404
+
+    session.add(Megaphone(pid=test_post.pid, start_time=datetime.now(),
+                          end_time=datetime.now() + timedelta(hours=1), type=MegaphoneType.ANNOUNCEMENT))
+    session.commit()
+    assert client.get(f"/posts/{test_post.pid}/megaphone/stream").status_code == 400
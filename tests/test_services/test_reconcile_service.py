@@ -0,0 +1,122 @@
+from sqlmodel import Session, select, update, delete
+
+from api.models.cluster import ClusterStats, ClusterMember
+from api.models.comment import CommentStats
+from api.models.enums import ReactionType
+from api.models.post import PostStats
+from api.models.reconcile import CounterChange, ReconcileState
+from api.models.user import UserRole
+from api.services.post_service import PostService
+from api.services.reconcile_service import ReconcileService
+
+def test_writes_are_logged_for_reconciliation(session: Session, test_post, test_cluster, make_users):
+    pid = test_post.pid
+    fan, = make_users(1)
+    PostService.add_reaction_to_post(session, pid, fan, ReactionType.LIKE)
+    kinds = session.exec(select(CounterChange.kind, CounterChange.key)).all()
+    assert ("post", pid) in kinds
+    assert ("cluster", test_cluster.cid) in kinds       # the fixture's own member insert
+
+def test_run_repairs_drifted_post_likes(session: Session, test_post, make_users):
+    pid = test_post.pid
+    fans = make_users(2)
+    for fan in fans:
+        PostService.add_reaction_to_post(session, pid, fan, ReactionType.LIKE)
+    session.exec(update(PostStats).where(PostStats.pid == pid).values(likes=7, dislikes=3))
+    session.commit()
+
+    result = ReconcileService.run(session)
+    assert result["post"] == {"examined": 1, "repaired": 1, "high_water": result["post"]["high_water"]}
+    session.expire_all()
+    stats = session.get(PostStats, pid)
+    assert (stats.likes, stats.dislikes) == (2, 0)
+
+    # Nothing was logged since: the next pass looks at nothing
+    again = ReconcileService.run(session)
+    assert again["post"]["examined"] == 0
+    assert again["post"]["high_water"] == result["post"]["high_water"]
+    assert session.exec(select(CounterChange).where(CounterChange.kind == "post")).all() == []
+
+def test_run_repairs_member_count_and_recreates_missing_stats(session: Session, test_cluster, test_post, make_users):
+    cid, pid = test_cluster.cid, test_post.pid
+    fan, = make_users(1)
+    session.add(ClusterMember(cid=cid, uid=fan))
+    session.commit()
+    session.exec(update(ClusterStats).where(ClusterStats.cid == cid).values(member_count=40))
+    PostService.add_reaction_to_post(session, pid, fan, ReactionType.DISLIKE)
+    session.exec(delete(PostStats).where(PostStats.pid == pid))
+    session.commit()
+
+    result = ReconcileService.run(session)
+    assert result["cluster"]["repaired"] == 1
+    assert result["post"]["repaired"] == 1
+    session.expire_all()
+    assert session.get(ClusterStats, cid).member_count == 2
+    stats = session.get(PostStats, pid)
+    assert (stats.likes, stats.dislikes) == (0, 1)
+
+def test_chunks_advance_the_high_water_mark(session: Session, test_post, test_comment, make_users):
+    from api.services.comment_service import CommentService
+    mid = test_comment.mid
+    fans = make_users(3)
+    for fan in fans:
+        CommentService.add_reaction_to_comment(session, mid, fan, ReactionType.LIKE)
+    session.exec(update(CommentStats).where(CommentStats.mid == mid).values(likes=0))
+    session.commit()
+
+    first = ReconcileService.run_kind(session, "comment", chunk_size=1, max_chunks=1)
+    assert first["examined"] == 1
+    assert len(session.exec(select(CounterChange).where(CounterChange.kind == "comment")).all()) == 2
+
+    rest = ReconcileService.run_kind(session, "comment", chunk_size=1)
+    assert rest["high_water"] > first["high_water"]
+    assert first["repaired"] + rest["repaired"] == 1
+    session.expire_all()
+    assert session.get(CommentStats, mid).likes == 3
+    assert session.get(ReconcileState, "comment").total_repaired == 1
+
+def test_late_commit_below_the_mark_is_still_examined(session: Session, test_post, make_users):
+    pid = test_post.pid
+    fan, = make_users(1)
+    PostService.add_reaction_to_post(session, pid, fan, ReactionType.LIKE)
+    ReconcileService.run(session)
+    mark = session.get(ReconcileState, "post").high_water
+
+    # A writer that drew its seq before the pass but committed after it
+    session.exec(update(PostStats).where(PostStats.pid == pid).values(likes=9))
+    session.add(CounterChange(seq=mark - 1, kind="post", key=pid))
+    session.commit()
+
+    assert ReconcileService.run_kind(session, "post")["repaired"] == 1
+    session.expire_all()
+    assert session.get(PostStats, pid).likes == 1
+    assert session.exec(select(CounterChange).where(CounterChange.kind == "post")).all() == []
+
+
+def test_sweep_finds_drift_without_log_entries(session: Session, test_cluster):
+    cid = test_cluster.cid
+    ReconcileService.run(session)                   # drain the fixture's log entries
+    session.exec(update(ClusterStats).where(ClusterStats.cid == cid).values(member_count=9))
+    session.commit()
+
+    assert ReconcileService.run_kind(session, "cluster")["repaired"] == 0
+    assert ReconcileService.sweep(session, "cluster", chunk_size=1)["repaired"] == 1
+    session.expire_all()
+    assert session.get(ClusterStats, cid).member_count == 1
+
+def test_dashboard_reports_stored_results(client, session: Session, test_user, test_cluster, auth_headers):
+    cid = test_cluster.cid
+    test_user.role = UserRole.ADMIN               # starting a pass is admin-only
+    session.add(test_user)
+    session.exec(update(ClusterStats).where(ClusterStats.cid == cid).values(member_count=9))
+    session.commit()
+
+    before = client.get("/triggers/dashboard").json()["trg_member_count"]
+    assert before["reconciler"]["pending_changes"] == 1
+    assert before["reconciler"]["last_run_at"] is None
+
+    assert client.post("/triggers/reconcile", headers=auth_headers).json()["cluster"]["repaired"] == 1
+    after = client.get("/triggers/dashboard").json()["trg_member_count"]
+    assert after["reconciler"]["repaired"] == 1
+    assert after["reconciler"]["pending_changes"] == 0
+    assert not after["all_counts_accurate"]
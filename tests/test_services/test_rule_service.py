@@ -0,0 +1,53 @@
+import pytest
+from sqlmodel import Session, select
+
+from api.models.enums import ModerationStatus, RuleAction
+from api.models.moderation import ModerationItem
+from api.models.post import PostCore
+from api.rules import RuleViolation
+from api.schemas.cluster import ClusterRuleCreate, ClusterRuleUpdate
+from api.schemas.post import PostCreate
+from api.services.comment_service import CommentService
+from api.services.post_service import PostService
+from api.services.rule_service import RuleService
+
+def _rule(name, pattern, action):
+    return ClusterRuleCreate(name=name, pattern=pattern, action=action)
+
+def test_block_rule_stops_post(session: Session, test_user, test_cluster):
+    RuleService.create_rule(session, test_cluster.cid, _rule("no spam", r"buy\s+now", RuleAction.BLOCK))
+    with pytest.raises(RuleViolation) as caught:
+        PostService.create_post(session, PostCreate(uid=test_user.uid, cid=test_cluster.cid, content="BUY   now!"))
+    assert caught.value.rule.name == "no spam"
+    assert session.exec(PostCore.__table__.select()).all() == []
+
+def test_flag_rule_queues_and_allows(session: Session, test_user, test_cluster):
+    RuleService.create_rule(session, test_cluster.cid, _rule("links", "http", RuleAction.FLAG))
+    core, _, _ = PostService.create_post(session, PostCreate(uid=test_user.uid, cid=test_cluster.cid, content="see http://x"))
+    item = session.exec(select(ModerationItem)).one()
+    assert (item.target, item.kind, item.rules, item.status) == (core.pid, "post", "links", ModerationStatus.QUEUED)
+
+def test_comment_uses_the_post_cluster_rules(session: Session, test_user, test_post):
+    RuleService.create_rule(session, test_post.cid, _rule("rude", "idiot", RuleAction.BLOCK))
+
+    class CommentIn:
+        uid, pid, parent_mid, content = test_user.uid, test_post.pid, None, "you idiot"
+
+    with pytest.raises(RuleViolation):
+        CommentService.create_comment(session, CommentIn)
+
+def test_rule_changes_invalidate_the_compiled_set(session: Session, test_user, test_cluster):
+    cid = test_cluster.cid
+    assert len(RuleService.get_rule_set(session, cid)) == 0
+    rule = RuleService.create_rule(session, cid, _rule("w", "word", RuleAction.FLAG))
+    assert RuleService.get_rule_set(session, cid).evaluate("a word").flagged
+
+    RuleService.update_rule(session, rule.rid, ClusterRuleUpdate(action=RuleAction.BLOCK))
+    assert RuleService.get_rule_set(session, cid).evaluate("a word").blocked
+
+    RuleService.delete_rule(session, rule.rid)
+    assert RuleService.get_rule_set(session, cid).evaluate("a word") == (None, [])
+
+def test_unsupported_pattern_is_refused(session: Session, test_cluster):
+    with pytest.raises(ValueError):
+        RuleService.create_rule(session, test_cluster.cid, _rule("bad", r"(a)\1", RuleAction.BLOCK))
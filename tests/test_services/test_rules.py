@@ -0,0 +1,116 @@
+"""
+tests/test_services/test_rules.py
+
+Validates the rule matchers in api/rules.py: pattern guards, the Aho-Corasick
+automaton and the literal-prefix prefilter in front of the regex rules.
+"""
+
+import random
+import re
+import string
+import time
+
+import pytest
+
+from api import rules
+from api.models.enums import RuleAction
+from api.rules import AhoCorasick, RuleSet, SafePattern, literal_prefix, literal_text, validate_pattern
+
+
+@pytest.mark.parametrize("pattern", [r"(a)\1", "(?=a)b", "(?<!a)b", "(?>a)", "a++", "(?:a{100}){100}", "(unclosed", ""])
+def test_unsupported_or_invalid_patterns_are_rejected(pattern):
+    with pytest.raises(ValueError):
+        validate_pattern(pattern)
+
+
+@pytest.mark.parametrize("pattern", [r"free\s+money", "a{2,5}", "(ab){3}", r"(?:buy|sell)\s+now", "spam", r"\bcat\b$"])
+def test_safe_patterns_pass(pattern):
+    validate_pattern(pattern)
+
+
+# Nested or overlapping quantifiers (exponential on `re`) and adjacent .* (polynomial)
+@pytest.mark.parametrize("pattern", ["(a+)+$", r"^(\w+\s?)*$", "(a|a)*b", "(a|aa)+b", "(.*a)*b", "a.*a.*a.*b"])
+def test_backtracking_patterns_run_in_linear_time(pattern):
+    validate_pattern(pattern)
+    compiled = SafePattern(pattern)
+    run = "a" * rules.RULES_MAX_SCAN_CHARS
+    start = time.perf_counter()
+    assert not compiled.search(run + "!")
+    assert compiled.search(run + "b") == bool(re.search(pattern, "aaab", re.IGNORECASE))
+    assert time.perf_counter() - start < 2
+
+
+def test_safe_pattern_agrees_with_re():
+    patterns = [
+        r"free\s+money", r"(a|aa)+b", r"^hey", r"end$", r"\bcat\b", r"\Bat", r"[^a-c\s]x", r"x{2,3}y",
+        r"(?:ab)*?c", r"(?m)^b", r"(?m)a$", r"(?s)a.b", r"a.b", r"\d+\.\d", r"[A-Z]+q", r"(x|y|)z", r"a\Z", r"\Aa",
+    ]
+    rng = random.Random(3)
+    for pattern in patterns:
+        compiled = SafePattern(pattern)
+        for _ in range(300):
+            text = "".join(rng.choices("abcxyzqK\n .1hetAB_", k=rng.randint(0, 12)))
+            assert compiled.search(text) == bool(re.search(pattern, text, re.IGNORECASE)), (pattern, text)
+
+
+def test_literal_detection():
+    assert literal_text("spam") == "spam"
+    assert literal_text(r"a\.b") == "a.b"
+    assert literal_text(r"a.b") is None
+    assert literal_text(r"free\s+money") is None
+    assert literal_prefix(r"free\s+money") == "free"
+    assert literal_prefix(r"ab?c") == "a"
+    assert literal_prefix(r"(?:buy|sell)") == ""
+
+
+def test_aho_corasick_agrees_with_substring_search():
+    rng = random.Random(7)
+    words = list({"".join(rng.choices("abc", k=rng.randint(1, 4))) for _ in range(60)})
+    automaton = AhoCorasick()
+    for i, word in enumerate(words):
+        automaton.add(word, i)
+    automaton.build()
+    for _ in range(200):
+        text = "".join(rng.choices("abcd", k=rng.randint(0, 30)))
+        assert automaton.search(text) == {i for i, word in enumerate(words) if word in text}
+    assert automaton.search("ABC") == automaton.search("abc")
+
+
+def test_block_wins_and_flags_are_collected():
+    rule_set = RuleSet([
+        (1, "spam", "spam", RuleAction.BLOCK),
+        (2, "money", r"free\s+money", RuleAction.FLAG),
+        (3, "caps", "shouting", RuleAction.FLAG),
+        (4, "link", r"https?://\S+", RuleAction.BLOCK),
+    ])
+    assert rule_set.evaluate("Buy SPAM").blocked.name == "spam"
+    assert rule_set.evaluate("see http://x.example").blocked.name == "link"
+    verdict = rule_set.evaluate("FREE  money, no shouting")
+    assert verdict.blocked is None
+    assert [rule.name for rule in verdict.flagged] == ["money", "caps"]
+    assert rule_set.evaluate("all good") == (None, [])
+
+
+def test_prefiltered_regexes_agree_with_plain_search():
+    patterns = [r"free\s+money", r"(?P<x>foo)\d", r"(?P<x>bar)", r"ab?c", r"(?:buy|sell)\s+now", r"^hey", r"Zap.{0,3}z"]
+    rule_set = RuleSet([(i, f"r{i}", pattern, RuleAction.FLAG) for i, pattern in enumerate(patterns)])
+    rng = random.Random(11)
+    vocabulary = ["free", "money", "foo1", "bar", "ac", "abc", "buy", "now", "hey", "ZAPxxZ", "FREE", " ", "\t"]
+    for _ in range(200):
+        text = " ".join(rng.choices(vocabulary, k=rng.randint(0, 8)))
+        expected = [f"r{i}" for i, pattern in enumerate(patterns) if re.search(pattern, text, re.IGNORECASE)]
+        assert [rule.name for rule in rule_set.evaluate(text).flagged] == expected
+
+
+def test_stored_unsafe_rules_are_skipped():
+    rule_set = RuleSet([(1, "old", r"(a)\1", RuleAction.BLOCK), (2, "ok", "spam", RuleAction.BLOCK)])
+    assert len(rule_set) == 1
+    assert rule_set.evaluate("aa").blocked is None
+
+
+def test_regex_rules_scan_a_bounded_prefix(monkeypatch):
+    monkeypatch.setattr(rules, "RULES_MAX_SCAN_CHARS", 10)
+    rule_set = RuleSet([(1, "re", r"bad\w", RuleAction.BLOCK), (2, "lit", "worse", RuleAction.BLOCK)])
+    tail = string.ascii_lowercase[:20]
+    assert rule_set.evaluate(tail + " badx").blocked is None
+    assert rule_set.evaluate(tail + " worse").blocked.name == "lit"
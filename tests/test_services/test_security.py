@@ -0,0 +1,65 @@
+"""
+tests/test_services/test_security.py
+
+Validates the bounded bcrypt pool in api/security.py and rehash-on-login.
+"""
+
+import threading
+import pytest
+from sqlmodel import Session
+
+from api import security
+from api.models.user import UserAuth
+from api.security import HashingPool, HashingPoolSaturated, needs_rehash
+
+
+@pytest.fixture(name="busy_pool")
+def busy_pool_fixture():
+    """A one-worker pool with no queue whose only worker is held until teardown."""
+    pool = HashingPool(workers=1, max_pending=0)
+    release = threading.Event()
+    pool.submit(release.wait)
+    yield pool
+    release.set()
+
+def test_pool_rejects_beyond_capacity(busy_pool):
+    with pytest.raises(HashingPoolSaturated):
+        busy_pool.submit(lambda: None)
+    assert busy_pool.stats()["in_flight"] == 1
+    assert busy_pool.stats()["rejected"] == 1
+
+def test_pool_slot_freed_after_completion():
+    pool = HashingPool(workers=1, max_pending=0)
+    assert pool.run(lambda x: x * 2, 21) == 42
+    assert pool.run(lambda: "again") == "again"
+    assert pool.stats()["in_flight"] == 0
+
+def test_hash_uses_configured_rounds(monkeypatch):
+    monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+    hashed = security.get_password_hash("pw")
+    assert hashed.startswith("$2b$04$")
+    assert security.verify_password("pw", hashed)
+    assert not needs_rehash(hashed)
+    monkeypatch.setattr(security, "BCRYPT_ROUNDS", 5)
+    assert needs_rehash(hashed)
+
+def test_login_rehashes_when_cost_changes(client, session: Session, test_user, test_password, monkeypatch):
+    uid = test_user.uid
+    monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+
+    response = client.post("/users/login", data={"username": "test@example.com", "password": test_password})
+    assert response.status_code == 200
+    session.expire_all()
+    rehashed = session.get(UserAuth, uid).password_hash
+    assert rehashed.startswith("$2b$04$")
+
+    # The new hash still verifies and is left alone on the next login
+    assert client.post("/users/login", data={"username": "test@example.com", "password": test_password}).status_code == 200
+    session.expire_all()
+    assert session.get(UserAuth, uid).password_hash == rehashed
+
+def test_login_returns_503_when_saturated(client, test_user, test_password, busy_pool, monkeypatch):
+    monkeypatch.setattr(security, "hashing_pool", busy_pool)
+    response = client.post("/users/login", data={"username": "test@example.com", "password": test_password})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
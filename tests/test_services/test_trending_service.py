@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlmodel import Session, update
+from api.services.post_service import PostService
+from api.services.trending_service import TrendingService
+from api.models.cluster import ClusterCore, ClusterInfo, ClusterStats, ClusterMember
+from api.models.post import PostCore, PostTrending, PostType
+from api.models.enums import ReactionType
+from api.security import get_password_hash
+
+def _make_post(session: Session, uid, cid, text: str = "trend"):
+    class MockPostIn:
+        type = PostType.TEXT
+        tags = None
+    payload = MockPostIn()
+    payload.uid, payload.cid, payload.content = uid, cid, text
+    core, _content, _stats = PostService.create_post(session, payload)
+    return core
+
+def test_score_decays_with_age():
+    now = datetime(2025, 6, 1)
+    fresh = TrendingService.compute_score(10, 0, now)
+    day_old = TrendingService.compute_score(10, 0, now - timedelta(hours=24))
+    # One half-life older is worth exactly one doubling of net score
+    half_life_old = TrendingService.compute_score(10, 0, now - timedelta(hours=12))
+    assert fresh > half_life_old > day_old
+    assert fresh - half_life_old == pytest.approx(1.0)
+    assert TrendingService.compute_score(0, 5, now) < TrendingService.compute_score(0, 0, now)
+
+def test_reactions_update_trending_rank(session: Session, test_user, test_cluster, make_users):
+    quiet = _make_post(session, test_user.uid, test_cluster.cid, "quiet")
+    loud = _make_post(session, test_user.uid, test_cluster.cid, "loud")
+    # Make the liked post older so only its reactions can lift it above the quiet one
+    loud_core = session.get(PostCore, loud.pid)
+    loud_core.created_at = quiet.created_at - timedelta(hours=1)
+    session.add(loud_core)
+    session.commit()
+    TrendingService.refresh_post(session, loud.pid)
+    session.commit()
+
+    assert [row[0].pid for row in PostService.get_trending_posts_globally(session)] == [quiet.pid, loud.pid]
+
+    voters = make_users(3)
+    for uid in voters:
+        PostService.add_reaction_to_post(session, loud.pid, uid, ReactionType.LIKE)
+    assert [row[0].pid for row in PostService.get_trending_posts_globally(session)] == [loud.pid, quiet.pid]
+
+    session.expire_all()
+    before = session.get(PostTrending, loud.pid).score
+    PostService.remove_reaction_from_post(session, loud.pid, voters[0])
+    session.expire_all()
+    assert session.get(PostTrending, loud.pid).score < before
+
+def test_private_cluster_posts_are_not_trending(session: Session, test_user, test_cluster):
+    cid = uuid4()
+    session.add(ClusterCore(cid=cid, name="Hidden", is_private=True))
+    session.add(ClusterInfo(cid=cid, creator_uid=test_user.uid))
+    session.add(ClusterStats(cid=cid))
+    session.add(ClusterMember(cid=cid, uid=test_user.uid))
+    session.commit()
+
+    public = _make_post(session, test_user.uid, test_cluster.cid, "public")
+    _make_post(session, test_user.uid, cid, "private")
+
+    rows = PostService.get_trending_posts_globally(session)
+    assert [row[0].pid for row in rows] == [public.pid]
+
+def test_trending_follows_cluster_privacy_changes(session: Session, test_user, test_cluster):
+    post = _make_post(session, test_user.uid, test_cluster.cid)
+    pid, cid = post.pid, test_cluster.cid
+
+    test_cluster.is_private = True
+    session.add(test_cluster)
+    session.commit()
+    assert PostService.get_trending_posts_globally(session) == []
+
+    session.exec(update(ClusterCore).where(ClusterCore.cid == cid).values(is_private=False))
+    session.commit()
+    assert [row[0].pid for row in PostService.get_trending_posts_globally(session)] == [pid]
+
+def test_rebuild_scores_existing_posts(session: Session, test_post):
+    assert session.get(PostTrending, test_post.pid) is None
+
+    TrendingService.rebuild(session)
+    rows = PostService.get_trending_posts_globally(session)
+    assert [row[0].pid for row in rows] == [test_post.pid]
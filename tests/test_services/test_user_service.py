@@ -74,3 +74,23 @@ def test_delete_user_account(session: Session, test_user):
     # Check deletion (profile cascade isn't fully set up in the DB schema provided so we just check auth)
     assert session.get(UserAuth, test_user.uid) is None
     
+
+def test_rebuild_follow_stats(session: Session, test_user):
+    from sqlmodel import delete
+    from api.models.follow import UserFollow, UserFollowStats
+    from api.models.user import UserAuth, UserProfile
+
+    fan = uuid4()
+    session.add(UserAuth(uid=fan, email="fan@example.com", password_hash="x"))
+    session.add(UserProfile(uid=fan, name="Fan"))
+    session.add(UserFollow(follower_uid=fan, following_uid=test_user.uid))
+    session.commit()
+
+    # Simulate drift, e.g. edges written before the triggers existed
+    session.exec(delete(UserFollowStats))
+    session.commit()
+    assert UserService.get_follow_counts(session, test_user.uid) == (0, 0)
+
+    UserService.rebuild_follow_stats(session)
+    assert UserService.get_follow_counts(session, test_user.uid) == (1, 0)
+    assert UserService.get_follow_counts(session, fan) == (0, 1)
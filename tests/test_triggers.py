@@ -1,7 +1,7 @@
 """
 tests/test_triggers.py
 
-Validates all 5 SQLite triggers defined in api/triggers.py.
+Validates the SQLite triggers defined in api/triggers.py.
 """
 
 import pytest
@@ -12,7 +12,9 @@ from sqlmodel import Session, select
 from api.models.cluster import ClusterCore, ClusterInfo, ClusterStats, ClusterMember
 from api.models.post    import PostCore, PostContent, PostStats, PostType
 from api.models.comment import CommentCore, CommentContent, CommentStats
-from api.models.user    import UserAuth, UserProfile
+from api.models.user    import UserAuth, UserProfile, UserRole
+from api.auth           import user_cache
+from api.models.follow  import UserFollow, UserFollowStats
 from api.security       import get_password_hash
 
 
@@ -173,3 +175,118 @@ def test_trigger_update_last_active(session: Session, test_user, test_cluster):
     assert last_active_after != last_active_before, (
         "trg_update_last_active did not change last_active after a new post"
     )
+
+def _make_user(session: Session, name: str):
+    uid = uuid4()
+    session.add(UserAuth(uid=uid, email=f"{uid.hex}@example.com", password_hash="x"))
+    session.add(UserProfile(uid=uid, name=name))
+    session.commit()
+    return uid
+
+def test_trigger_follow_counts(session: Session, test_user):
+    """
+    Inserting/deleting UserFollow rows should create and maintain UserFollowStats
+    for both ends of the edge via trg_increment/decrement_follow_counts.
+    """
+    fans = [_make_user(session, f"Fan {i}") for i in range(3)]
+    for fan in fans:
+        session.add(UserFollow(follower_uid=fan, following_uid=test_user.uid))
+    session.commit()
+    session.expire_all()
+
+    stats = session.get(UserFollowStats, test_user.uid)
+    assert stats is not None, "trg_increment_follow_counts did not create a stats row"
+    assert (stats.follower_count, stats.following_count) == (3, 0)
+    assert session.get(UserFollowStats, fans[0]).following_count == 1
+
+    session.delete(session.get(UserFollow, {"follower_uid": fans[0], "following_uid": test_user.uid}))
+    session.commit()
+    session.expire_all()
+
+    assert session.get(UserFollowStats, test_user.uid).follower_count == 2
+    assert session.get(UserFollowStats, fans[0]).following_count == 0
+
+
+def test_trigger_reply_counts(client, session: Session, test_user, test_post):
+    """
+    Replies created through CommentService should bump reply_count on the parent and
+    total_descendants on every ancestor; deleting a subtree should take them back down.
+    """
+    from api.services.comment_service import CommentService
+
+    class CommentIn:
+        def __init__(self, parent_mid=None, pid=None):
+            self.uid, self.content, self.parent_mid, self.pid = test_user.uid, "c", parent_mid, pid
+
+    root, _, _ = CommentService.create_comment(session, CommentIn(pid=test_post.pid))
+    root_mid = root.mid
+    child, _, _ = CommentService.create_comment(session, CommentIn(parent_mid=root_mid))
+    child_mid = child.mid
+    for _ in range(2):
+        CommentService.create_comment(session, CommentIn(parent_mid=child_mid))
+    CommentService.create_comment(session, CommentIn(parent_mid=root_mid))
+    session.expire_all()
+
+    stats = session.get(CommentStats, root_mid)
+    assert (stats.reply_count, stats.total_descendants) == (2, 4)
+    stats = session.get(CommentStats, child_mid)
+    assert (stats.reply_count, stats.total_descendants) == (2, 2)
+    assert client.get(f"/triggers/verify/reply-counts/{root_mid}").json()["counts_match"]
+
+    CommentService.delete_comment(session, child_mid)
+    session.expire_all()
+    stats = session.get(CommentStats, root_mid)
+    assert (stats.reply_count, stats.total_descendants) == (1, 1)
+
+
+def test_trigger_post_rollups(client, session: Session, test_user, test_post):
+    """
+    Posts, likes and reactions should roll up into userpoststats/clusterpoststats, and
+    deleting a post should take its whole share back out.
+    """
+    from api.models.enums import ReactionType
+    from api.models.post import UserPostStats, ClusterPostStats
+    from api.services.post_service import PostService
+
+    uid, cid, pid = test_user.uid, test_post.cid, test_post.pid
+    fans = [_make_user(session, f"Fan {i}") for i in range(3)]
+    PostService.add_reaction_to_post(session, pid, fans[0], ReactionType.LIKE)
+    PostService.add_reaction_to_post(session, pid, fans[1], ReactionType.LIKE)
+    PostService.add_reaction_to_post(session, pid, fans[2], ReactionType.DISLIKE)
+    PostService.add_reaction_to_post(session, pid, fans[1], ReactionType.DISLIKE)    # switch: like -> dislike
+    session.expire_all()
+
+    stats = session.get(UserPostStats, uid)
+    assert (stats.post_count, stats.total_likes, stats.total_reactions) == (1, 1, 3)
+    stats = session.get(ClusterPostStats, cid)
+    assert (stats.post_count, stats.total_likes, stats.total_reactions) == (1, 1, 3)
+    assert client.get(f"/triggers/verify/post-rollups/{uid}").json()["counts_match"]
+
+    # A full rebuild agrees with the incremental state
+    PostService.rebuild_rollups(session)
+    session.expire_all()
+    stats = session.get(UserPostStats, uid)
+    assert (stats.post_count, stats.total_likes, stats.total_reactions) == (1, 1, 3)
+
+    PostService.delete_post(session, pid)
+    session.expire_all()
+    stats = session.get(UserPostStats, uid)
+    assert (stats.post_count, stats.total_likes, stats.total_reactions) == (0, 0, 0)
+    stats = session.get(ClusterPostStats, cid)
+    assert (stats.post_count, stats.total_likes, stats.total_reactions) == (0, 0, 0)
+
+
+def test_reconcile_endpoint_is_admin_only(client, session: Session, test_user, auth_headers):
+    """
+    A sweep rewrites every stats table, so only admins may start one.
+    """
+    assert client.post("/triggers/reconcile?sweep=true").status_code == 401
+    assert client.post("/triggers/reconcile?sweep=true", headers=auth_headers).status_code == 403
+
+    test_user.role = UserRole.ADMIN
+    session.add(test_user)
+    session.commit()
+    user_cache.clear()
+    response = client.post("/triggers/reconcile?sweep=true", headers=auth_headers)
+    assert response.status_code == 200
+    assert set(response.json()) == {"post", "comment", "cluster"}